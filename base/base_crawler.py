@@ -9,10 +9,13 @@
 # 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
 
 from abc import ABC, abstractmethod
-from typing import Dict, Optional
+from typing import TYPE_CHECKING, Dict, List, Optional
 
 from playwright.async_api import BrowserContext, BrowserType, Playwright
 
+if TYPE_CHECKING:
+    from distributed.task_queue import CrawlTask
+
 
 class AbstractCrawler(ABC):
 
@@ -54,6 +57,14 @@ class AbstractCrawler(ABC):
         # 默认实现：回退到标准模式
         return await self.launch_browser(playwright.chromium, playwright_proxy, user_agent, headless)
 
+    async def handle_task(self, task: "CrawlTask") -> List["CrawlTask"]:
+        """
+        分布式模式下处理一个从任务队列领取的任务（可选实现）
+        :param task: 任务
+        :return: 派生出的后续任务，例如搜索的下一页、帖子的评论
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support distributed worker mode")
+
 
 class AbstractLogin(ABC):
 
@@ -90,6 +101,20 @@ class AbstractStore(ABC):
     async def store_creator(self, creator: Dict):
         pass
 
+    async def store_contents_batch(self, content_items: List[Dict]):
+        """
+        batch store contents, stores with a native bulk write should override it
+        """
+        for content_item in content_items:
+            await self.store_content(content_item)
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        batch store comments, stores with a native bulk write should override it
+        """
+        for comment_item in comment_items:
+            await self.store_comment(comment_item)
+
 
 class AbstractStoreImage(ABC):
     # TODO: support all platform
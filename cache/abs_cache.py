@@ -16,7 +16,7 @@
 # @Desc    : 抽象类
 
 from abc import ABC, abstractmethod
-from typing import Any, List, Optional
+from typing import Any, Dict, List, Optional
 
 
 class AbstractCache(ABC):
@@ -51,3 +51,127 @@ class AbstractCache(ABC):
         :return:
         """
         raise NotImplementedError
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，返回结果与 keys 一一对应，不存在的键为 None
+        默认逐个调用 get，支持批量命令的子类可以覆盖该方法减少往返次数
+        :param keys: 键列表
+        :return:
+        """
+        return [self.get(key) for key in keys]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置键的值，所有键使用相同的过期时间
+        默认逐个调用 set，支持批量命令的子类可以覆盖该方法减少往返次数
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        for key, value in mapping.items():
+            self.set(key, value, expire_time)
+
+    def delete(self, key: str) -> None:
+        """
+        删除键，子类按需实现
+        :param key: 键
+        :return:
+        """
+        raise NotImplementedError
+
+
+class AbstractAsyncCache(ABC):
+    """
+    异步缓存抽象类，方法与 AbstractCache 一一对应，但都是协程，
+    如 AsyncRedisCache、TieredCache；同步缓存通过 AsyncCacheAdapter 转换为该接口
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key: 键
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中
+        :param key: 键
+        :param value: 值
+        :param expire_time: 过期时间
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key
+        :param pattern: 匹配模式
+        :return:
+        """
+        raise NotImplementedError
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取键的值，返回结果与 keys 一一对应，不存在的键为 None
+        默认逐个调用 get，支持批量命令的子类可以覆盖该方法减少往返次数
+        :param keys: 键列表
+        :return:
+        """
+        return [await self.get(key) for key in keys]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        批量设置键的值，所有键使用相同的过期时间
+        默认逐个调用 set，支持批量命令的子类可以覆盖该方法减少往返次数
+        :param mapping: 键值对
+        :param expire_time: 过期时间
+        :return:
+        """
+        for key, value in mapping.items():
+            await self.set(key, value, expire_time)
+
+    async def delete(self, key: str) -> None:
+        """
+        删除键，子类按需实现
+        :param key: 键
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        释放连接
+        :return:
+        """
+        pass
+
+
+class AsyncCacheAdapter(AbstractAsyncCache):
+    """把同步缓存（ExpiringLocalCache、RedisCache）包装为 AbstractAsyncCache 接口"""
+
+    def __init__(self, cache: AbstractCache):
+        self.cache = cache
+
+    async def get(self, key: str) -> Optional[Any]:
+        return self.cache.get(key)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        self.cache.set(key, value, expire_time)
+
+    async def keys(self, pattern: str) -> List[str]:
+        return self.cache.keys(pattern)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        return self.cache.mget(keys)
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        self.cache.mset(mapping, expire_time)
+
+    async def delete(self, key: str) -> None:
+        self.cache.delete(key)
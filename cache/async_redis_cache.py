@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 redis.asyncio 的非阻塞 RedisCache 实现，所有方法都是协程，
+#            序列化方式与 RedisCache 一致（pickle），两者可以读写同一份数据
+
+import asyncio
+import pickle
+from typing import Any, Dict, List, Optional
+
+from redis.asyncio import Redis
+
+from cache.abs_cache import AbstractAsyncCache
+from config import db_config
+
+
+class AsyncRedisCache(AbstractAsyncCache):
+
+    def __init__(self) -> None:
+        self._redis_client = Redis(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+        )
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值, 并且反序列化
+        :param key:
+        :return:
+        """
+        value = await self._redis_client.get(key)
+        if value is None:
+            return None
+        return pickle.loads(value)
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        将键的值设置到缓存中, 并且序列化
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        await self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
+
+    async def delete(self, key: str) -> None:
+        """
+        删除键
+        :param key:
+        :return:
+        """
+        await self._redis_client.delete(key)
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        使用 SCAN 分批获取所有符合pattern的key，不会像 KEYS 一样阻塞 redis
+        :param pattern:
+        :return:
+        """
+        return [
+            key.decode()
+            async for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)
+        ]
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        使用 MGET 一次往返批量获取键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        values = await self._redis_client.mget(keys)
+        return [pickle.loads(value) if value is not None else None for value in values]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        使用 pipeline 一次往返批量设置键的值
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        if not mapping:
+            return
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key, value in mapping.items():
+                pipe.set(key, pickle.dumps(value), ex=expire_time)
+            await pipe.execute()
+
+    async def close(self) -> None:
+        await self._redis_client.close()
+
+
+if __name__ == '__main__':
+    async def main():
+        redis_cache = AsyncRedisCache()
+        await redis_cache.mset({"name": "程序员阿江-Relakkes", "list": [1, 2, 3]}, 10)
+        print(await redis_cache.keys("*"))
+        print(await redis_cache.mget(["name", "list", "not_exists"]))  # ['程序员阿江-Relakkes', [1, 2, 3], None]
+        await redis_cache.close()
+
+    asyncio.run(main())
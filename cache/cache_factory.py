@@ -38,3 +38,22 @@ class CacheFactory:
             return RedisCache()
         else:
             raise ValueError(f'Unknown cache type: {cache_type}')
+
+    @staticmethod
+    def create_async_cache(cache_type: str, *args, **kwargs):
+        """
+        创建异步缓存对象（AbstractAsyncCache），同步缓存类型会被包装为异步接口
+        :param cache_type: 缓存类型
+        :param args: 参数
+        :param kwargs: 关键字参数
+        :return:
+        """
+        if cache_type == 'async_redis':
+            from .async_redis_cache import AsyncRedisCache
+            return AsyncRedisCache()
+        elif cache_type == 'tiered':
+            from .tiered_cache import create_tiered_cache
+            return create_tiered_cache()
+        else:
+            from .abs_cache import AsyncCacheAdapter
+            return AsyncCacheAdapter(CacheFactory.create_cache(cache_type, *args, **kwargs))
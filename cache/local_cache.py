@@ -16,7 +16,11 @@
 # @Desc    : 本地缓存
 
 import asyncio
+import bisect
+import fnmatch
+import heapq
 import time
+from collections import OrderedDict
 from typing import Any, Dict, List, Optional, Tuple
 
 from cache.abs_cache import AbstractCache
@@ -24,14 +28,24 @@ from cache.abs_cache import AbstractCache
 
 class ExpiringLocalCache(AbstractCache):
 
-    def __init__(self, cron_interval: int = 10):
+    def __init__(self, cron_interval: int = 10, max_size: int = 0):
         """
         初始化本地缓存
         :param cron_interval: 定时清楚cache的时间间隔
+        :param max_size: 最多缓存的键数量，超出后淘汰最久未访问的键，0 表示不限制
         :return:
         """
         self._cron_interval = cron_interval
-        self._cache_container: Dict[str, Tuple[Any, float]] = {}
+        self._max_size = max_size
+        # key -> (value, 过期时间戳)，按访问顺序排列，用于 LRU 淘汰
+        self._cache_container: "OrderedDict[str, Tuple[Any, float]]" = OrderedDict()
+        # (过期时间戳, key) 小顶堆，键被覆盖后旧的堆元素在弹出时跳过
+        self._expire_heap: List[Tuple[float, str]] = []
+        # 有序的 key 列表，keys() 按前缀匹配时二分查找
+        self._sorted_keys: List[str] = []
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
         self._cron_task: Optional[asyncio.Task] = None
         # 开启定时清理任务
         self._schedule_clear()
@@ -44,21 +58,29 @@ class ExpiringLocalCache(AbstractCache):
         if self._cron_task is not None:
             self._cron_task.cancel()
 
+    def __len__(self) -> int:
+        return len(self._cache_container)
+
     def get(self, key: str) -> Optional[Any]:
         """
         从缓存中获取键的值
         :param key:
         :return:
         """
-        value, expire_time = self._cache_container.get(key, (None, 0))
-        if value is None:
+        item = self._cache_container.get(key)
+        if item is None:
+            self.misses += 1
             return None
 
         # 如果键已过期，则删除键并返回None
+        value, expire_time = item
         if expire_time < time.time():
-            del self._cache_container[key]
+            self._delete(key)
+            self.misses += 1
             return None
 
+        self._cache_container.move_to_end(key)
+        self.hits += 1
         return value
 
     def set(self, key: str, value: Any, expire_time: int) -> None:
@@ -69,45 +91,105 @@ class ExpiringLocalCache(AbstractCache):
         :param expire_time:
         :return:
         """
-        self._cache_container[key] = (value, time.time() + expire_time)
+        self._clear()
+        expire_at = time.time() + expire_time
+        if key in self._cache_container:
+            self._cache_container.move_to_end(key)
+        else:
+            bisect.insort(self._sorted_keys, key)
+        self._cache_container[key] = (value, expire_at)
+        heapq.heappush(self._expire_heap, (expire_at, key))
+
+        if self._max_size > 0:
+            while len(self._cache_container) > self._max_size:
+                oldest_key = next(iter(self._cache_container))
+                self._delete(oldest_key)
+                self.evictions += 1
+
+        # 同一个键反复覆盖会在堆里留下过期的元素，数量过多时重建
+        if len(self._expire_heap) > 2 * len(self._cache_container) + 64:
+            self._expire_heap = [(expire_at, k) for k, (_, expire_at) in self._cache_container.items()]
+            heapq.heapify(self._expire_heap)
 
     def keys(self, pattern: str) -> List[str]:
         """
         获取所有符合pattern的key
-        :param pattern: 匹配模式
+        :param pattern: 匹配模式，支持 fnmatch 通配符，"prefix*" 形式走前缀索引
         :return:
         """
+        self._clear()
         if pattern == '*':
-            return list(self._cache_container.keys())
+            return list(self._sorted_keys)
+
+        if pattern.endswith('*') and not any(c in pattern[:-1] for c in '*?['):
+            prefix = pattern[:-1]
+            start = bisect.bisect_left(self._sorted_keys, prefix)
+            result = []
+            for key in self._sorted_keys[start:]:
+                if not key.startswith(prefix):
+                    break
+                result.append(key)
+            return result
 
-        # 本地缓存通配符暂时将*替换为空
-        if '*' in pattern:
-            pattern = pattern.replace('*', '')
+        return [key for key in self._sorted_keys if fnmatch.fnmatchcase(key, pattern)]
+
+    def delete(self, key: str) -> None:
+        """
+        删除键
+        :param key:
+        :return:
+        """
+        self._delete(key)
 
-        return [key for key in self._cache_container.keys() if pattern in key]
+    def stats(self) -> Dict[str, int]:
+        """
+        缓存命中统计
+        :return:
+        """
+        return {
+            "size": len(self._cache_container),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def _delete(self, key: str):
+        """
+        删除键，堆中对应的元素在弹出时跳过
+        :param key:
+        :return:
+        """
+        if self._cache_container.pop(key, None) is None:
+            return
+        index = bisect.bisect_left(self._sorted_keys, key)
+        if index < len(self._sorted_keys) and self._sorted_keys[index] == key:
+            del self._sorted_keys[index]
 
     def _schedule_clear(self):
         """
-        开启定时清理任务,
+        开启定时清理任务, 没有运行中的事件循环时只在读写时清理
         :return:
         """
 
         try:
-            loop = asyncio.get_event_loop()
+            loop = asyncio.get_running_loop()
         except RuntimeError:
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
+            return
 
         self._cron_task = loop.create_task(self._start_clear_cron())
 
     def _clear(self):
         """
-        根据过期时间清理缓存
+        根据过期时间清理缓存，只弹出堆顶已过期的元素
         :return:
         """
-        for key, (value, expire_time) in self._cache_container.items():
-            if expire_time < time.time():
-                del self._cache_container[key]
+        now = time.time()
+        while self._expire_heap and self._expire_heap[0][0] < now:
+            expire_at, key = heapq.heappop(self._expire_heap)
+            item = self._cache_container.get(key)
+            # 键被覆盖过，堆中的是旧的过期时间
+            if item is not None and item[1] == expire_at:
+                self._delete(key)
 
     async def _start_clear_cron(self):
         """
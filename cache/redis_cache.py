@@ -16,7 +16,7 @@
 # @Desc    : RedisCache实现
 import pickle
 import time
-from typing import Any, List
+from typing import Any, Dict, List, Optional
 
 from redis import Redis
 
@@ -64,11 +64,42 @@ class RedisCache(AbstractCache):
         """
         self._redis_client.set(key, pickle.dumps(value), ex=expire_time)
 
+    def delete(self, key: str) -> None:
+        """
+        删除键
+        :param key:
+        :return:
+        """
+        self._redis_client.delete(key)
+
     def keys(self, pattern: str) -> List[str]:
         """
         获取所有符合pattern的key
         """
-        return [key.decode() for key in self._redis_client.keys(pattern)]
+        # SCAN 分批遍历，避免 KEYS 在 key 较多时阻塞 redis
+        return [key.decode() for key in self._redis_client.scan_iter(match=pattern, count=db_config.REDIS_SCAN_COUNT)]
+
+    def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        使用 MGET 一次往返批量获取键的值
+        :param keys:
+        :return:
+        """
+        if not keys:
+            return []
+        return [pickle.loads(value) if value is not None else None for value in self._redis_client.mget(keys)]
+
+    def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        """
+        使用 pipeline 一次往返批量设置键的值
+        :param mapping:
+        :param expire_time:
+        :return:
+        """
+        pipe = self._redis_client.pipeline(transaction=False)
+        for key, value in mapping.items():
+            pipe.set(key, pickle.dumps(value), ex=expire_time)
+        pipe.execute()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,211 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+
+# -*- coding: utf-8 -*-
+# @Desc    : 二级缓存：进程内 LRU（ExpiringLocalCache）在前，远端缓存（Redis）在后，
+#            支持 read-through 加载、空结果缓存以及同一个键并发加载时只查询一次
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from cache.abs_cache import AbstractAsyncCache
+from cache.local_cache import ExpiringLocalCache
+from config import db_config
+from tools import utils
+
+# 空结果的占位值，区分"未缓存"和"查询结果为空"
+NEGATIVE_VALUE = "__tiered_cache_negative__"
+
+
+def _is_negative(value: Any) -> bool:
+    return isinstance(value, str) and value == NEGATIVE_VALUE
+
+
+class TieredCache(AbstractAsyncCache):
+
+    def __init__(
+        self,
+        remote: Optional[AbstractAsyncCache] = None,
+        local_max_size: int = db_config.TIERED_CACHE_LOCAL_MAX_SIZE,
+        local_ttl: int = db_config.TIERED_CACHE_LOCAL_TTL,
+        negative_ttl: int = db_config.TIERED_CACHE_NEGATIVE_TTL,
+    ):
+        """
+        :param remote: 远端缓存，同步缓存需要用 AsyncCacheAdapter 包装，为空时只使用进程内缓存
+        :param local_max_size: 进程内缓存最多保存的键数量
+        :param local_ttl: 进程内缓存的最长有效期，进程内的值最多比远端旧这么久
+        :param negative_ttl: 空结果的缓存时间
+        """
+        self._local = ExpiringLocalCache(max_size=local_max_size)
+        self._remote = remote
+        self.local_ttl = local_ttl
+        self.negative_ttl = negative_ttl
+        self._loading: Dict[str, asyncio.Future] = {}
+
+    def _set_local(self, key: str, value: Any, expire_time: int):
+        self._local.set(key, value, min(expire_time, self.local_ttl))
+
+    async def _get_raw(self, key: str) -> Optional[Any]:
+        """
+        依次查询进程内缓存和远端缓存，返回值可能是空结果占位值
+        :param key:
+        :return:
+        """
+        value = self._local.get(key)
+        if value is not None or self._remote is None:
+            return value
+        try:
+            value = await self._remote.get(key)
+        except Exception as e:
+            utils.logger.error(f"[TieredCache._get_raw] get {key} from remote cache error: {e}")
+            return None
+        if value is not None:
+            self._set_local(key, value, self.local_ttl)
+        return value
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        从缓存中获取键的值
+        :param key:
+        :return:
+        """
+        value = await self._get_raw(key)
+        return None if _is_negative(value) else value
+
+    async def set(self, key: str, value: Any, expire_time: int) -> None:
+        """
+        同时写入进程内缓存和远端缓存
+        :param key:
+        :param value:
+        :param expire_time:
+        :return:
+        """
+        self._set_local(key, value, expire_time)
+        if self._remote is None:
+            return
+        try:
+            await self._remote.set(key, value, expire_time)
+        except Exception as e:
+            utils.logger.error(f"[TieredCache.set] set {key} to remote cache error: {e}")
+
+    async def delete(self, key: str) -> None:
+        """
+        删除键，只能保证当前进程和远端一致，其他进程的进程内缓存在 local_ttl 后失效
+        :param key:
+        :return:
+        """
+        self._local.delete(key)
+        if self._remote is not None:
+            await self._remote.delete(key)
+
+    async def keys(self, pattern: str) -> List[str]:
+        """
+        获取所有符合pattern的key，有远端缓存时以远端为准
+        :param pattern:
+        :return:
+        """
+        if self._remote is None:
+            return self._local.keys(pattern)
+        return await self._remote.keys(pattern)
+
+    async def mget(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        批量获取，进程内未命中的键一次性从远端获取
+        :param keys:
+        :return:
+        """
+        values = self._local.mget(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing and self._remote is not None:
+            remote_values = dict(zip(missing, await self._remote.mget(missing)))
+            for index, key in enumerate(keys):
+                if values[index] is None and remote_values.get(key) is not None:
+                    values[index] = remote_values[key]
+                    self._set_local(key, values[index], self.local_ttl)
+        return [None if _is_negative(value) else value for value in values]
+
+    async def mset(self, mapping: Dict[str, Any], expire_time: int) -> None:
+        for key, value in mapping.items():
+            self._set_local(key, value, expire_time)
+        if self._remote is not None:
+            await self._remote.mset(mapping, expire_time)
+
+    async def get_or_load(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Optional[Any]]],
+        expire_time: int,
+    ) -> Optional[Any]:
+        """
+        read-through 读取：缓存未命中时调用 loader 加载并写入缓存，loader 返回 None 时按 negative_ttl 缓存空结果。
+        同一个键同时只会有一个 loader 在执行，其余调用等待其结果
+        :param key: 键
+        :param loader: 加载函数
+        :param expire_time: 过期时间
+        :return:
+        """
+        value = await self._get_raw(key)
+        if value is not None:
+            return None if _is_negative(value) else value
+
+        if key in self._loading:
+            return await asyncio.shield(self._loading[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self._loading[key] = future
+        try:
+            value = await loader()
+            if value is None:
+                await self.set(key, NEGATIVE_VALUE, self.negative_ttl)
+            else:
+                await self.set(key, value, expire_time)
+            future.set_result(value)
+            return value
+        except Exception as e:
+            future.set_exception(e)
+            # 没有其他调用方等待时避免 "exception was never retrieved"
+            future.exception()
+            raise
+        finally:
+            self._loading.pop(key, None)
+
+    def stats(self) -> Dict[str, int]:
+        """
+        进程内缓存的命中统计
+        :return:
+        """
+        return self._local.stats()
+
+
+def create_tiered_cache() -> TieredCache:
+    """
+    按配置创建二级缓存，远端缓存类型由 TIERED_CACHE_REMOTE_TYPE 配置
+    :return:
+    """
+    remote = None
+    if db_config.TIERED_CACHE_REMOTE_TYPE:
+        from cache.cache_factory import CacheFactory
+        remote = CacheFactory.create_async_cache(db_config.TIERED_CACHE_REMOTE_TYPE)
+    return TieredCache(remote=remote)
+
+
+_tiered_cache: Optional[TieredCache] = None
+
+
+def get_tiered_cache() -> TieredCache:
+    """
+    获取全局共享的二级缓存
+    :return:
+    """
+    global _tiered_cache
+    if _tiered_cache is None:
+        _tiered_cache = create_tiered_cache()
+    return _tiered_cache
@@ -61,6 +61,7 @@ class SaveDataOptionEnum(str, Enum):
     CSV = "csv"
     DB = "db"
     JSON = "json"
+    JSONL = "jsonl"
     SQLITE = "sqlite"
 
 
@@ -71,6 +72,14 @@ class InitDbOptionEnum(str, Enum):
     MYSQL = "mysql"
 
 
+class ProfileModeEnum(str, Enum):
+    """性能分析模式"""
+
+    CPU = "cpu"
+    ASYNC = "async"
+    MEMORY = "memory"
+
+
 def _to_bool(value: bool | str) -> bool:
     if isinstance(value, bool):
         return value
@@ -190,7 +199,7 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             SaveDataOptionEnum,
             typer.Option(
                 "--save_data_option",
-                help="数据保存方式 (csv=CSV文件 | db=MySQL数据库 | json=JSON文件 | sqlite=SQLite数据库)",
+                help="数据保存方式 (csv=CSV文件 | db=MySQL数据库 | json=JSON文件 | jsonl=JSON Lines文件 | sqlite=SQLite数据库)",
                 rich_help_panel="存储配置",
             ),
         ] = _coerce_enum(
@@ -212,12 +221,62 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
                 rich_help_panel="账号配置",
             ),
         ] = config.COOKIES,
+        worker: Annotated[
+            bool,
+            typer.Option(
+                "--worker",
+                help="以分布式 worker 模式运行，从 Redis 任务队列中领取任务",
+                rich_help_panel="分布式配置",
+            ),
+        ] = config.ENABLE_DISTRIBUTED_WORKER,
+        enqueue: Annotated[
+            bool,
+            typer.Option(
+                "--enqueue",
+                help="按当前平台和爬取类型把关键词 / 创作者写入 Redis 任务队列后退出",
+                rich_help_panel="分布式配置",
+            ),
+        ] = False,
+        record: Annotated[
+            bool,
+            typer.Option(
+                "--record",
+                help="录制模式：请求照常发出，同时把请求指纹和压缩后的响应写入本地录制文件",
+                rich_help_panel="录制回放配置",
+            ),
+        ] = config.HTTP_CASSETTE_MODE == "record",
+        replay: Annotated[
+            bool,
+            typer.Option(
+                "--replay",
+                help="回放模式：不访问网络、不启动浏览器，所有请求都从录制文件返回",
+                rich_help_panel="录制回放配置",
+            ),
+        ] = config.HTTP_CASSETTE_MODE == "replay",
+        metrics_port: Annotated[
+            int,
+            typer.Option(
+                "--metrics_port",
+                help="指标 HTTP 服务端口，访问 /metrics 获取 Prometheus 格式的指标，0 表示不启动",
+                rich_help_panel="监控配置",
+            ),
+        ] = config.METRICS_PORT,
+        profile: Annotated[
+            Optional[ProfileModeEnum],
+            typer.Option(
+                "--profile",
+                help="在性能分析器下运行爬虫，报告写入 data/profiles (cpu: cProfile | async: 按协程统计耗时 | memory: tracemalloc)",
+                rich_help_panel="监控配置",
+            ),
+        ] = ProfileModeEnum(config.PROFILE_MODE) if config.PROFILE_MODE else None,
     ) -> SimpleNamespace:
         """MediaCrawler 命令行入口"""
 
         enable_comment = _to_bool(get_comment)
         enable_sub_comment = _to_bool(get_sub_comment)
         init_db_value = init_db.value if init_db else None
+        if record and replay:
+            raise typer.BadParameter("--record 和 --replay 不能同时使用")
 
         # override global config
         config.PLATFORM = platform.value
@@ -229,6 +288,10 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
         config.ENABLE_GET_SUB_COMMENTS = enable_sub_comment
         config.SAVE_DATA_OPTION = save_data_option.value
         config.COOKIES = cookies
+        config.ENABLE_DISTRIBUTED_WORKER = worker
+        config.HTTP_CASSETTE_MODE = "record" if record else "replay" if replay else ""
+        config.METRICS_PORT = metrics_port
+        config.PROFILE_MODE = profile.value if profile else ""
 
         return SimpleNamespace(
             platform=config.PLATFORM,
@@ -241,6 +304,11 @@ async def parse_cmd(argv: Optional[Sequence[str]] = None):
             save_data_option=config.SAVE_DATA_OPTION,
             init_db=init_db_value,
             cookies=config.COOKIES,
+            worker=config.ENABLE_DISTRIBUTED_WORKER,
+            enqueue=enqueue,
+            http_cassette_mode=config.HTTP_CASSETTE_MODE,
+            metrics_port=config.METRICS_PORT,
+            profile=config.PROFILE_MODE,
         )
 
     command = typer.main.get_command(app)
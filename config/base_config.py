@@ -25,6 +25,21 @@ IP_PROXY_POOL_COUNT = 2
 # 代理IP提供商名称
 IP_PROXY_PROVIDER_NAME = "kuaidaili"  # kuaidaili | wandouhttp
 
+# 代理池中可用代理少于该数量时在后台补充
+IP_PROXY_LOW_WATER_MARK = 1
+
+# 代理在过期前多少秒就从代理池中淘汰，避免请求过程中代理过期
+IP_PROXY_EXPIRE_MARGIN = 30
+
+# 并发验证代理的数量
+IP_PROXY_VALIDATE_CONCURRENCY = 5
+
+# 代理健康分（成功率、延迟）的 EWMA 平滑系数，越大越看重最近的请求
+IP_PROXY_EWMA_ALPHA = 0.3
+
+# 代理成功率 EWMA 低于该值时从代理池中淘汰
+IP_PROXY_MIN_SUCCESS_SCORE = 0.3
+
 # 设置为True不会打开浏览器（无头浏览器）
 # 设置False会打开一个浏览器
 # 小红书如果一直扫码登录不通过，打开浏览器手动过一下滑动验证码
@@ -61,8 +76,9 @@ BROWSER_LAUNCH_TIMEOUT = 60
 # 设置为False可以保持浏览器运行，便于调试
 AUTO_CLOSE_BROWSER = True
 
-# 数据保存类型选项配置,支持四种类型：csv、db、json、sqlite, 最好保存到DB，有排重的功能。
-SAVE_DATA_OPTION = "json"  # csv or db or json or sqlite
+# 数据保存类型选项配置,支持五种类型：csv、db、json、jsonl、sqlite, 最好保存到DB，有排重的功能。
+# jsonl 为 JSON Lines 格式，每条数据追加写入一行；json 模式运行时同样以追加方式写入，程序退出时再合并为 JSON 数组
+SAVE_DATA_OPTION = "json"  # csv or db or json or jsonl or sqlite
 
 # 用户浏览器缓存的浏览器文件配置
 USER_DATA_DIR = "%s_user_data_dir"  # %s will be replaced by platform name
@@ -76,6 +92,20 @@ CRAWLER_MAX_NOTES_COUNT = 15
 # 并发爬虫数量控制
 MAX_CONCURRENCY_NUM = 1
 
+# 是否开启自适应并发：响应正常时逐步提高并发，遇到风控信号(HTTP 418/432、ok=0、非JSON响应、403)时成倍降低
+# 开启后 MAX_CONCURRENCY_NUM 作为初始并发数
+ENABLE_ADAPTIVE_CONCURRENCY = False
+
+# 自适应并发的上下限
+ADAPTIVE_CONCURRENCY_MIN = 1
+ADAPTIVE_CONCURRENCY_MAX = 8
+
+# 出现风控信号时并发数乘以该系数
+ADAPTIVE_CONCURRENCY_DECREASE_FACTOR = 0.5
+
+# 两次降低并发之间的最小间隔（秒），避免同一批失败的请求把并发连续降到最低
+ADAPTIVE_CONCURRENCY_COOLDOWN = 5
+
 # 是否开启爬媒体模式（包含图片或视频资源），默认不开启爬媒体
 ENABLE_GET_MEIDAS = False
 
@@ -108,6 +138,192 @@ FONT_PATH = "./docs/STZHONGS.TTF"
 # 爬取间隔时间
 CRAWLER_MAX_SLEEP_SEC = 2
 
+# ==================== HTTP 连接池配置 ====================
+# API client 复用长连接，避免每次请求都重新进行 TCP+TLS 握手
+# 连接池最大连接数
+HTTPX_MAX_CONNECTIONS = 20
+
+# 连接池最大保持的空闲长连接数
+HTTPX_MAX_KEEPALIVE_CONNECTIONS = 10
+
+# 空闲长连接的保活时间（秒）
+HTTPX_KEEPALIVE_EXPIRY = 30
+
+# 是否启用 HTTP/2，需要额外安装 h2 (pip install httpx[http2])，未安装时自动回退到 HTTP/1.1
+ENABLE_HTTP2 = False
+
+# ==================== 请求录制回放配置 ====================
+# record: API 请求照常发出，同时把请求指纹和压缩后的响应写入本地录制文件
+# replay: 不访问网络、不启动浏览器，所有请求都从录制文件返回，用于在本地按磁盘速度重跑解析/存储逻辑
+# 空字符串表示关闭，也可以通过命令行 --record / --replay 开启
+HTTP_CASSETTE_MODE = ""
+
+# ==================== 请求限流配置 ====================
+# 开启后所有 API 请求按 (域名, 账号, 代理) 维度经过令牌桶限流，翻页之间不再固定 sleep CRAWLER_MAX_SLEEP_SEC
+# 关闭时保持原来的固定间隔 sleep
+ENABLE_RATE_LIMITER = True
+
+# 每个 (域名, 账号, 代理) 每秒允许的请求数，默认与 CRAWLER_MAX_SLEEP_SEC 的间隔一致
+RATE_LIMITER_RATE = 1 / CRAWLER_MAX_SLEEP_SEC
+
+# 允许的突发请求数，空闲一段时间后最多可以连续发出的请求数
+RATE_LIMITER_BURST = 2
+
+# 每次请求额外增加 0~N 秒的随机延迟，避免请求间隔过于规律
+RATE_LIMITER_JITTER = 0.5
+
+# 按域名单独设置每秒请求数，例如 {"m.weibo.cn": 0.3}
+RATE_LIMITER_HOST_RATES = {}
+
+# ==================== 存储缓冲队列配置 ====================
+# 开启后内容和评论先写入内存队列，由后台任务批量落盘/入库，爬取不再等待存储写入
+ENABLE_STORE_PIPELINE = False
+
+# 存储队列最大长度，队列写满时爬取协程会等待（背压）
+STORE_PIPELINE_MAX_SIZE = 1000
+
+# 累积多少条数据触发一次批量写入
+STORE_PIPELINE_BATCH_SIZE = 100
+
+# 距离上次写入超过多少秒也会触发一次写入
+STORE_PIPELINE_FLUSH_INTERVAL = 2
+
+# 批量写入失败后的重试次数，每次重试前等待 STORE_PIPELINE_RETRY_INTERVAL * 重试次数 秒；
+# 重试仍失败时逐条写入，只丢弃单独写入也失败的数据
+STORE_PIPELINE_MAX_RETRIES = 3
+
+STORE_PIPELINE_RETRY_INTERVAL = 1
+
+# ==================== 搜索流水线配置 ====================
+# 开启后搜索模式按 搜索翻页 -> 评论 -> 媒体 拆成多个阶段并行执行，第 N+1 页的搜索和第 N 页的评论抓取可以同时进行
+ENABLE_SEARCH_PIPELINE = False
+
+# 各阶段的 worker 数，评论阶段实际并发同时受 MAX_CONCURRENCY_NUM / 自适应并发控制
+SEARCH_PIPELINE_WORKERS = {
+    "search": 1,
+    "comments": 2,
+    "media": 2,
+}
+
+# 各阶段之间的队列长度，队列满时上游阶段等待
+SEARCH_PIPELINE_QUEUE_SIZE = 100
+
+# ==================== 断点续爬配置 ====================
+# 开启后记录关键词分页、创作者分页、评论分页的爬取进度，程序中断后再次运行会从中断处继续
+# 一次完整的爬取结束后进度会被清空，下一次运行从头开始
+ENABLE_CRAWL_FRONTIER = False
+
+# 爬取进度的存储方式 sqlite | redis，sqlite 文件路径见 db_config.FRONTIER_SQLITE_PATH
+CRAWL_FRONTIER_TYPE = "sqlite"
+
+# ==================== 多账号会话配置 ====================
+# 除浏览器登录账号之外的其他账号 Cookie，每个账号会绑定一个独立的代理IP（开启 IP 代理时）和 User-Agent，
+# API 请求在所有账号之间轮换。开启 IP 代理时 IP_PROXY_POOL_COUNT 建议不少于账号数量
+CRAWL_SESSION_COOKIES = [
+    # "SUB=xxx; SUBP=xxx; ...",
+]
+
+# 保存其他账号 Cookie 的目录（位于 browser_data 下，%s 会被替换为平台名称），不存在时忽略
+# 目录下每个 .json 文件是浏览器导出的 cookies 列表 [{"name": ..., "value": ...}]，每个 .txt 文件是一行 Cookie 字符串
+CRAWL_SESSION_COOKIE_DIR = "%s_cookies"
+
+# ==================== 去重配置 ====================
+# 开启后用布隆过滤器跨多次运行记录已保存的帖子和评论，重复出现的内容不再写入存储；
+# 评论数、点赞数等计数没有变化的帖子也不再重新抓取图片、长文详情和评论。
+# 布隆过滤器有很小的误判率，极少量新内容会被当作已保存而跳过
+ENABLE_SEEN_SET = False
+
+# 存储方式 file | redis，file 的存放目录见 db_config.SEEN_SET_FILE_DIR，多台机器运行分布式 worker 时使用 redis 共享
+SEEN_SET_TYPE = "file"
+
+# 每个平台每类内容的预计条目数，file 方式写满后自动扩容，redis 方式超过后误判率会上升
+SEEN_SET_CAPACITY = 1000000
+
+# 误判率
+SEEN_SET_ERROR_RATE = 0.001
+
+# ==================== 媒体下载配置 ====================
+# 开启 ENABLE_GET_MEIDAS 后图片由独立的下载队列并发下载，流式写入磁盘，按内容的 sha256 分目录保存，相同内容只保存一份
+
+# 同时下载的文件数
+MEDIA_DOWNLOAD_CONCURRENCY = 4
+
+# 下载请求的限流（每秒请求数），和 API 请求的限流互不影响
+MEDIA_DOWNLOAD_RATE = 2
+
+# 下载请求允许的突发请求数
+MEDIA_DOWNLOAD_BURST = 4
+
+# 流式写入的块大小（字节）
+MEDIA_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# 单个文件的最大重试次数，重试时从已下载的位置续传
+MEDIA_DOWNLOAD_MAX_RETRIES = 3
+
+# ==================== 增量评论配置 ====================
+# 开启后按帖子记录上次爬取完成时的评论数和已保存的最新一条评论（高水位），存储方式同 CRAWL_FRONTIER_TYPE，不随断点续爬进度清空。
+# 评论数没有变化的帖子不再爬取评论；评论数变化的帖子只保存高水位之后的新评论：
+# 知乎评论按时间倒序翻页，遇到已保存的评论即停止；微博评论接口按热度排序，找到与评论数增量相同数量的新评论后停止
+ENABLE_INCREMENTAL_COMMENTS = False
+
+# ==================== 分布式爬取配置 ====================
+# python main.py --enqueue 按当前平台和爬取类型把关键词 / 创作者写入 Redis 任务队列（Redis 连接见 db_config.py），
+# python main.py --worker 启动的爬虫不再按 CRAWLER_TYPE 执行，而是从队列中领取任务，多台机器可以同时运行 worker。
+# 建议同时开启断点续爬并使用 redis 存储进度（CRAWL_FRONTIER_TYPE = "redis"），任务重试时可以从中断处继续
+# --enqueue 时如果队列中已没有待处理和处理中的任务（上一轮已结束），会清空断点续爬进度，新一轮从头爬取
+ENABLE_DISTRIBUTED_WORKER = False
+
+# 任务队列的 Redis 键前缀，每个平台一个队列
+DISTRIBUTED_QUEUE_NAMESPACE = "mediacrawler:tasks"
+
+# 任务租约时长（秒），worker 处理任务期间会定期续约，worker 异常退出后租约到期的任务会重新入队
+DISTRIBUTED_VISIBILITY_TIMEOUT = 300
+
+# 任务失败后的最大重试次数，超过后移入死信队列
+DISTRIBUTED_MAX_RETRIES = 3
+
+# 队列中没有待处理和处理中的任务持续多少秒后 worker 退出，0 表示一直等待新任务
+DISTRIBUTED_IDLE_TIMEOUT = 60
+
+# 队列为空时的轮询间隔（秒）
+DISTRIBUTED_POLL_INTERVAL = 1
+
+# ==================== 监控指标配置 ====================
+# 指标 HTTP 服务端口，启动后可以通过 http://METRICS_HOST:METRICS_PORT/metrics 获取 Prometheus 文本格式的指标，0 表示不启动
+METRICS_PORT = 0
+
+# 指标 HTTP 服务监听地址
+METRICS_HOST = "127.0.0.1"
+
+# 程序退出时把指标汇总写入日志
+ENABLE_METRICS_SUMMARY = True
+
+# ==================== 链路追踪配置 ====================
+# 开启后每个爬取单元（搜索页、帖子详情、评论页、图片、存储写入）记录一个 span，带上关键词/创作者/帖子ID和耗时
+ENABLE_TRACING = False
+
+# span 导出格式：jsonl（每行一个 span）| otlp（OTLP/JSON，可由 OpenTelemetry Collector 的 otlpjsonfile receiver 读取）
+TRACE_EXPORTER = "jsonl"
+
+# span 导出文件目录
+TRACE_FILE_DIR = "data/traces"
+
+# 慢请求阈值（秒），耗时超过阈值的 API 请求连同参数和所属的关键词/创作者/帖子写入日志，0 表示关闭
+SLOW_REQUEST_THRESHOLD_SEC = 10
+
+# ==================== 性能分析配置 ====================
+# 性能分析模式：""（关闭）| cpu（cProfile）| async（按协程统计耗时的采样器）| memory（tracemalloc 内存快照）
+PROFILE_MODE = ""
+
+# 性能分析报告目录
+PROFILE_OUTPUT_DIR = "data/profiles"
+
+# async 模式的采样间隔（秒）
+PROFILE_SAMPLE_INTERVAL = 0.005
+
+# 报告中输出的函数/协程/代码行数量
+PROFILE_TOP_N = 30
+
 from .bilibili_config import *
 from .xhs_config import *
 from .dy_config import *
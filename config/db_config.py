@@ -26,6 +26,12 @@ mysql_db_config = {
     "db_name": MYSQL_DB_NAME,
 }
 
+# mysql 连接池配置
+MYSQL_POOL_SIZE = int(os.getenv("MYSQL_POOL_SIZE", 10))  # 连接池常驻连接数
+MYSQL_MAX_OVERFLOW = int(os.getenv("MYSQL_MAX_OVERFLOW", 10))  # 连接池满时允许额外创建的连接数
+MYSQL_POOL_RECYCLE = int(os.getenv("MYSQL_POOL_RECYCLE", 3600))  # 连接回收时间（秒），需小于 MySQL 的 wait_timeout
+MYSQL_POOL_PRE_PING = True  # 取出连接前先 ping 一次，避免使用已被服务端断开的连接
+
 
 # redis config
 REDIS_DB_HOST = "127.0.0.1"  # your redis host
@@ -36,6 +42,20 @@ REDIS_DB_NUM = os.getenv("REDIS_DB_NUM", 0)  # your redis db num
 # cache type
 CACHE_TYPE_REDIS = "redis"
 CACHE_TYPE_MEMORY = "memory"
+CACHE_TYPE_ASYNC_REDIS = "async_redis"  # 基于 redis.asyncio 的非阻塞实现
+CACHE_TYPE_TIERED = "tiered"  # 进程内 LRU + 远端缓存的二级缓存
+
+# 二级缓存配置
+TIERED_CACHE_REMOTE_TYPE = ""  # 远端缓存类型，为空时只使用进程内缓存，多进程共享时设置为 CACHE_TYPE_ASYNC_REDIS
+TIERED_CACHE_LOCAL_MAX_SIZE = 10000  # 进程内缓存最多保存的键数量
+TIERED_CACHE_LOCAL_TTL = 300  # 进程内缓存的最长有效期（秒），限制与远端缓存不一致的时间
+TIERED_CACHE_NEGATIVE_TTL = 60  # 查询结果为空时的缓存时间（秒）
+
+# 代理 IP 缓存使用的缓存类型，多进程共享代理 IP 时可以改为 CACHE_TYPE_ASYNC_REDIS
+IP_CACHE_TYPE = CACHE_TYPE_MEMORY
+
+# SCAN 遍历 key 时每批返回的数量提示
+REDIS_SCAN_COUNT = 500
 
 # sqlite config
 SQLITE_DB_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "sqlite_tables.db")
@@ -44,6 +64,19 @@ sqlite_db_config = {
     "db_path": SQLITE_DB_PATH
 }
 
+# sqlite 写入调优：WAL 模式允许读写并发，synchronous=NORMAL 在 WAL 下兼顾性能和安全
+SQLITE_JOURNAL_MODE = "WAL"
+SQLITE_SYNCHRONOUS = "NORMAL"
+
+# 断点续爬进度文件路径
+FRONTIER_SQLITE_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "crawl_frontier.db")
+
+# 已见集合（布隆过滤器）文件目录，每个 平台 + 内容类型 一个文件
+SEEN_SET_FILE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "seen_set")
+
+# 请求录制文件目录，每个平台一个文件
+HTTP_CASSETTE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "database", "cassettes")
+
 # mongodb config
 MONGODB_HOST = os.getenv("MONGODB_HOST", "localhost")
 MONGODB_PORT = os.getenv("MONGODB_PORT", 27017)
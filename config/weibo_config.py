@@ -25,3 +25,6 @@ WEIBO_CREATOR_ID_LIST = [
     "5533390220",
     # ........................
 ]
+
+# 多会话并行爬取创作者时，单个创作者爬取失败后最多尝试的次数（会话登录态失效导致的失败不计入）
+WEIBO_CREATOR_MAX_ATTEMPTS = 3
@@ -23,3 +23,6 @@ ZHIHU_SPECIFIED_ID_LIST = [
     "https://zhuanlan.zhihu.com/p/673461588",  # 文章
     "https://www.zhihu.com/zvideo/1539542068422144000",  # 视频
 ]
+
+# 签名使用的常驻 Node 子进程数量，设置为 0 时每次签名都通过 execjs 启动新的 Node 进程
+ZHIHU_SIGN_WORKER_NUM = 2
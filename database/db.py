@@ -12,7 +12,7 @@ if str(project_root) not in sys.path:
     sys.path.append(str(project_root))
 
 from tools import utils
-from database.db_session import create_tables
+from database.db_session import create_tables, dispose_engines, migrate_tables
 
 async def init_table_schema(db_type: str):
     """
@@ -27,9 +27,13 @@ async def init_table_schema(db_type: str):
 
 async def init_db(db_type: str = None):
     await init_table_schema(db_type)
+    migrated = await migrate_tables(db_type)
+    utils.logger.info(f"[init_db] {migrated} tables migrated to the unique indexes required by batch upsert")
 
 async def close():
     """
-    Placeholder for closing database connections if needed in the future.
+    Dispose all database engines and release pooled connections.
     """
-    pass
+    await dispose_engines()
+    utils.logger.info("[close] database connections closed")
+
@@ -0,0 +1,107 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""
+表结构迁移：create_all 不会修改已经存在的表，批量 upsert 依赖的唯一索引需要在老的数据库上补建。
+迁移是幂等的，先按唯一字段去重（保留 id 最大即最后写入的记录），再创建唯一索引
+"""
+from typing import Dict, List, Tuple, Type
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection
+
+from database.models import WeiboNoteComment, ZhihuComment, ZhihuContent
+from tools import utils
+
+# 批量 upsert 新增的唯一字段，其他表的唯一字段在建表时就已存在
+UNIQUE_UPSERT_COLUMNS: List[Tuple[Type, str]] = [
+    (WeiboNoteComment, "comment_id"),
+    (ZhihuContent, "content_id"),
+    (ZhihuComment, "comment_id"),
+]
+
+# (数据库 URL, 表名, 字段) -> 是否有唯一索引，避免每个批次都检查表结构
+_unique_index_cache: Dict[Tuple[str, str, str], bool] = {}
+
+
+def has_unique_index(conn: Connection, table_name: str, column: str) -> bool:
+    """
+    表中是否已有只包含该字段的唯一索引或唯一约束，表不存在时返回 False
+    """
+    inspector = inspect(conn)
+    if not inspector.has_table(table_name):
+        return False
+    for index in inspector.get_indexes(table_name):
+        if index.get("unique") and index.get("column_names") == [column]:
+            return True
+    for constraint in inspector.get_unique_constraints(table_name):
+        if constraint.get("column_names") == [column]:
+            return True
+    return False
+
+
+def has_unique_index_cached(conn: Connection, table_name: str, column: str) -> bool:
+    """has_unique_index 的缓存版本，迁移后调用 clear_unique_index_cache 重新检查"""
+    key = (str(conn.engine.url), table_name, column)
+    if key not in _unique_index_cache:
+        _unique_index_cache[key] = has_unique_index(conn, table_name, column)
+    return _unique_index_cache[key]
+
+
+def clear_unique_index_cache():
+    _unique_index_cache.clear()
+
+
+def _model_index(model: Type, column: str):
+    return next(index for index in model.__table__.indexes if [c.name for c in index.columns] == [column])
+
+
+def migrate_unique_index(conn: Connection, model: Type, column: str) -> bool:
+    """
+    为已存在的表补建唯一索引，已经有唯一索引或表不存在时什么都不做
+    :param conn: 同步连接
+    :param model: ORM 模型
+    :param column: 唯一字段
+    :return: 是否执行了迁移
+    """
+    table_name = model.__tablename__
+    if not inspect(conn).has_table(table_name) or has_unique_index(conn, table_name, column):
+        return False
+
+    preparer = conn.dialect.identifier_preparer
+    table, col = preparer.quote(table_name), preparer.quote(column)
+    # MySQL 不允许在 DELETE 的子查询中直接读取同一张表，需要多包一层派生表
+    result = conn.execute(text(
+        f"DELETE FROM {table} WHERE {col} IS NOT NULL AND id NOT IN ("
+        f"SELECT keep_id FROM (SELECT MAX(id) AS keep_id FROM {table} WHERE {col} IS NOT NULL GROUP BY {col}) AS keep_rows)"
+    ))
+
+    index = _model_index(model, column)
+    for existing in inspect(conn).get_indexes(table_name):
+        if existing["name"] == index.name:
+            # 老版本建的同名普通索引，换成唯一索引
+            if conn.dialect.name == "mysql":
+                conn.execute(text(f"DROP INDEX {preparer.quote(index.name)} ON {table}"))
+            else:
+                conn.execute(text(f"DROP INDEX {preparer.quote(index.name)}"))
+    index.create(conn)
+    utils.logger.info(
+        f"[migrate_unique_index] {table_name}.{column}: {result.rowcount} duplicate rows removed, unique index {index.name} created"
+    )
+    return True
+
+
+def migrate_unique_indexes(conn: Connection) -> int:
+    """
+    为所有批量 upsert 依赖的唯一字段补建唯一索引
+    :param conn: 同步连接
+    :return: 执行了迁移的表数量
+    """
+    return sum(migrate_unique_index(conn, model, column) for model, column in UNIQUE_UPSERT_COLUMNS)
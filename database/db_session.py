@@ -1,13 +1,17 @@
-from sqlalchemy import text
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine
 from sqlalchemy.orm import sessionmaker
 from contextlib import asynccontextmanager
+from .db_migrations import clear_unique_index_cache, migrate_unique_indexes
 from .models import Base
 import config
+from config import db_config
 from config.db_config import mysql_db_config, sqlite_db_config
 
 # Keep a cache of engines
 _engines = {}
+# Keep a cache of session factories, one per engine
+_session_factories = {}
 
 
 async def create_database_if_not_exists(db_type: str):
@@ -32,16 +36,55 @@ def get_async_engine(db_type: str = None):
 
     if db_type == "sqlite":
         db_url = f"sqlite+aiosqlite:///{sqlite_db_config['db_path']}"
+        # SQLite 同一时间只允许一个写者，使用单连接避免 "database is locked"
+        engine = create_async_engine(db_url, echo=False, pool_size=1, max_overflow=0)
+        _setup_sqlite_pragmas(engine)
     elif db_type == "mysql" or db_type == "db":
         db_url = f"mysql+asyncmy://{mysql_db_config['user']}:{mysql_db_config['password']}@{mysql_db_config['host']}:{mysql_db_config['port']}/{mysql_db_config['db_name']}"
+        engine = create_async_engine(
+            db_url,
+            echo=False,
+            pool_size=db_config.MYSQL_POOL_SIZE,
+            max_overflow=db_config.MYSQL_MAX_OVERFLOW,
+            pool_recycle=db_config.MYSQL_POOL_RECYCLE,
+            pool_pre_ping=db_config.MYSQL_POOL_PRE_PING,
+        )
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
-    engine = create_async_engine(db_url, echo=False)
     _engines[db_type] = engine
     return engine
 
 
+def _setup_sqlite_pragmas(engine: AsyncEngine):
+    """每个新建的 SQLite 连接都开启 WAL 并调整同步级别"""
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def _on_connect(dbapi_connection, _connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={db_config.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={db_config.SQLITE_SYNCHRONOUS}")
+        cursor.close()
+
+
+def get_session_factory(engine: AsyncEngine) -> sessionmaker:
+    """按 engine 缓存 sessionmaker，避免每次获取 session 都重新构造"""
+    factory = _session_factories.get(engine)
+    if factory is None:
+        factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+        _session_factories[engine] = factory
+    return factory
+
+
+async def dispose_engines():
+    """释放所有 engine 的连接池，程序退出时调用"""
+    engines = list(_engines.values())
+    _engines.clear()
+    _session_factories.clear()
+    for engine in engines:
+        await engine.dispose()
+
+
 async def create_tables(db_type: str = None):
     if db_type is None:
         db_type = config.SAVE_DATA_OPTION
@@ -52,14 +95,28 @@ async def create_tables(db_type: str = None):
             await conn.run_sync(Base.metadata.create_all)
 
 
+async def migrate_tables(db_type: str = None) -> int:
+    """
+    为已存在的表补建批量 upsert 依赖的唯一索引（先去重），返回执行了迁移的表数量
+    """
+    if db_type is None:
+        db_type = config.SAVE_DATA_OPTION
+    engine = get_async_engine(db_type)
+    if not engine:
+        return 0
+    async with engine.begin() as conn:
+        migrated = await conn.run_sync(migrate_unique_indexes)
+    clear_unique_index_cache()
+    return migrated
+
+
 @asynccontextmanager
 async def get_session() -> AsyncSession:
     engine = get_async_engine(config.SAVE_DATA_OPTION)
     if not engine:
         yield None
         return
-    AsyncSessionFactory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
-    session = AsyncSessionFactory()
+    session = get_session_factory(engine)()
     try:
         yield session
         await session.commit()
@@ -67,4 +124,4 @@ async def get_session() -> AsyncSession:
         await session.rollback()
         raise e
     finally:
-        await session.close()
\ No newline at end of file
+        await session.close()
@@ -0,0 +1,158 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+"""批量 upsert：MySQL 使用 INSERT ... ON DUPLICATE KEY UPDATE，SQLite 使用 INSERT ... ON CONFLICT DO UPDATE"""
+from datetime import datetime
+from typing import Dict, List, Type
+
+from sqlalchemy import DateTime, select
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.dml import Insert
+
+from database.db_migrations import has_unique_index_cached
+from database.db_session import get_session
+from tools import utils
+
+# SQLite 老版本单条语句最多 999 个绑定参数，按列数切分批次
+SQLITE_MAX_VARIABLES = 999
+MYSQL_MAX_ROWS_PER_STMT = 500
+
+# upsert 命中已有记录时不覆盖的字段
+_IMMUTABLE_COLUMNS = {"id", "add_ts"}
+
+# 已经提示过缺少唯一索引的表，只提示一次
+_warned_tables = set()
+
+
+def _normalize_rows(model: Type, rows: List[Dict], conflict_column: str) -> List[Dict]:
+    """
+    过滤掉表中不存在的字段、补齐时间戳、转换日期字符串，并按冲突字段去重（保留最后一条）
+    """
+    table = model.__table__
+    columns = table.columns
+    now_ts = utils.get_current_timestamp()
+    deduped: Dict = {}
+    for row in rows:
+        if row.get(conflict_column) in (None, ""):
+            continue
+        clean_row = {key: value for key, value in row.items() if key in columns and key != "id"}
+        clean_row.setdefault("add_ts", now_ts)
+        clean_row.setdefault("last_modify_ts", now_ts)
+        for key, value in clean_row.items():
+            # 各平台的日期字段以 str(datetime) 的形式传入，SQLite 的 DateTime 类型只接受 datetime 对象
+            if isinstance(value, str) and value and isinstance(columns[key].type, DateTime):
+                try:
+                    clean_row[key] = datetime.fromisoformat(value)
+                except ValueError:
+                    pass
+        deduped[clean_row[conflict_column]] = clean_row
+    return list(deduped.values())
+
+
+def build_upsert_stmt(dialect_name: str, model: Type, rows: List[Dict], conflict_column: str) -> Insert:
+    """
+    构造方言原生的批量 upsert 语句，rows 需要包含相同的字段
+    Args:
+        dialect_name: 数据库方言名称 mysql | sqlite
+        model: ORM 模型
+        rows: 待写入的数据
+        conflict_column: 唯一约束字段，用于判断记录是否已存在
+
+    Returns:
+
+    """
+    table = model.__table__
+    update_columns = [key for key in rows[0].keys() if key not in _IMMUTABLE_COLUMNS and key != conflict_column]
+    if dialect_name == "mysql":
+        stmt = mysql_insert(table).values(rows)
+        if not update_columns:
+            return stmt.prefix_with("IGNORE")
+        return stmt.on_duplicate_key_update({key: stmt.inserted[key] for key in update_columns})
+    elif dialect_name == "sqlite":
+        stmt = sqlite_insert(table).values(rows)
+        if not update_columns:
+            return stmt.on_conflict_do_nothing(index_elements=[conflict_column])
+        return stmt.on_conflict_do_update(
+            index_elements=[conflict_column],
+            set_={key: stmt.excluded[key] for key in update_columns},
+        )
+    raise ValueError(f"Unsupported dialect for upsert: {dialect_name}")
+
+
+def _chunk_rows(dialect_name: str, rows: List[Dict]) -> List[List[Dict]]:
+    """按方言限制切分批次"""
+    if dialect_name == "sqlite":
+        chunk_size = max(1, SQLITE_MAX_VARIABLES // max(1, len(rows[0])))
+    else:
+        chunk_size = MYSQL_MAX_ROWS_PER_STMT
+    return [rows[i:i + chunk_size] for i in range(0, len(rows), chunk_size)]
+
+
+def _group_by_keys(rows: List[Dict]) -> List[List[Dict]]:
+    """多行 VALUES 要求每行字段一致，按字段集合分组"""
+    groups: Dict[tuple, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(tuple(sorted(row.keys())), []).append(row)
+    return list(groups.values())
+
+
+async def _upsert_rows_per_row(session: AsyncSession, model: Type, rows: List[Dict], conflict_column: str):
+    """
+    冲突字段上还没有唯一索引（老数据库未执行 --init_db 迁移）时，逐条查询后更新或插入
+    """
+    column = getattr(model, conflict_column)
+    for row in rows:
+        res = await session.execute(select(model).where(column == row[conflict_column]))
+        db_row = res.scalars().first()
+        if db_row is None:
+            session.add(model(**row))
+            continue
+        for key, value in row.items():
+            if key not in _IMMUTABLE_COLUMNS:
+                setattr(db_row, key, value)
+
+
+async def upsert_rows(model: Type, rows: List[Dict], conflict_column: str) -> int:
+    """
+    批量写入或更新记录，一个批次只需要一次数据库往返
+    Args:
+        model: ORM 模型
+        rows: 待写入的数据
+        conflict_column: 唯一约束字段
+
+    Returns:
+        写入的记录数
+    """
+    rows = _normalize_rows(model, rows, conflict_column)
+    if not rows:
+        return 0
+
+    async with get_session() as session:
+        if session is None:
+            return 0
+        dialect_name = session.bind.dialect.name
+        table_name = model.__tablename__
+        has_unique = await session.run_sync(
+            lambda sync_session: has_unique_index_cached(sync_session.connection(), table_name, conflict_column))
+        if not has_unique:
+            if table_name not in _warned_tables:
+                _warned_tables.add(table_name)
+                utils.logger.warning(
+                    f"[upsert_rows] {table_name}.{conflict_column} has no unique index, fall back to per-row upsert, "
+                    f"run --init_db to migrate the table"
+                )
+            await _upsert_rows_per_row(session, model, rows, conflict_column)
+            return len(rows)
+        for group in _group_by_keys(rows):
+            for chunk in _chunk_rows(dialect_name, group):
+                await session.execute(build_upsert_stmt(dialect_name, model, chunk, conflict_column))
+    return len(rows)
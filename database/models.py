@@ -54,7 +54,8 @@ class WeiboNote(Base):
 class WeiboNoteComment(Base):
     __tablename__ = 'weibo_note_comment'
 
-    id = Column(BigInteger, primary_key=True, comment="主键ID")
+    # SQLite 只有 INTEGER PRIMARY KEY 才会自增
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, comment="主键ID")
     user_id = Column(String(255), comment="评论用户ID")
     nickname = Column(String(512), comment="昵称")
     avatar = Column(Text, comment="头像URL")
@@ -64,7 +65,7 @@ class WeiboNoteComment(Base):
     ip_location = Column(String(256), default='', comment="IP定位信息")
     add_ts = Column(BigInteger, comment="记录添加时间戳")
     last_modify_ts = Column(BigInteger, comment="最后修改时间戳")
-    comment_id = Column(BigInteger, index=True, comment="评论ID")
+    comment_id = Column(BigInteger, unique=True, index=True, comment="评论ID")
     note_id = Column(BigInteger, index=True, comment="所属微博ID")
     content = Column(Text, comment="评论内容")
     create_time = Column(BigInteger, comment="评论创建时间戳")
@@ -77,7 +78,7 @@ class WeiboNoteComment(Base):
 class ZhihuContent(Base):
     __tablename__ = 'zhihu_content'
     id = Column(Integer, primary_key=True)
-    content_id = Column(String(64), index=True)
+    content_id = Column(String(64), unique=True, index=True)
     content_type = Column(Text)
     content_text = Column(Text)
     content_url = Column(Text)
@@ -101,7 +102,7 @@ class ZhihuContent(Base):
 class ZhihuComment(Base):
     __tablename__ = 'zhihu_comment'
     id = Column(Integer, primary_key=True)
-    comment_id = Column(String(64), index=True)
+    comment_id = Column(String(64), unique=True, index=True)
     parent_comment_id = Column(String(64))
     content = Column(Text)
     publish_time = Column(String(32), index=True)
@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 已见集合(seen set)抽象类，跨多次运行记录已保存过的内容，
+#            key 中包含评论数等计数时，内容变化后会被当作新内容重新保存
+
+from abc import ABC, abstractmethod
+from typing import Callable, List, TypeVar
+
+T = TypeVar("T")
+
+
+class AbstractSeenSet(ABC):
+
+    def __init__(self, namespace: str):
+        """
+        :param namespace: 命名空间，平台 + 内容类型，例如 wb:note
+        """
+        self.namespace = namespace
+
+    @abstractmethod
+    async def add(self, keys: List[str]) -> List[bool]:
+        """
+        加入集合
+        :param keys:
+        :return: 每个 key 加入前是否不在集合中（True 表示新内容）
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def contains(self, keys: List[str]) -> List[bool]:
+        """
+        判断是否在集合中
+        :param keys:
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        持久化并释放资源
+        :return:
+        """
+        pass
+
+    async def filter_new(self, items: List[T], key_func: Callable[[T], str]) -> List[T]:
+        """
+        过滤出不在集合中的新内容，不会加入集合：内容写入存储成功后再调用 add，
+        避免写入失败或未写入的内容在之后的运行中被当作已保存而跳过
+        :param items:
+        :param key_func: 生成 key 的函数
+        :return:
+        """
+        if not items:
+            return []
+        seen_list = await self.contains([key_func(item) for item in items])
+        return [item for item, seen in zip(items, seen_list) if not seen]
+
+
+class NoopSeenSet(AbstractSeenSet):
+    """未开启去重时使用，所有内容都当作新内容"""
+
+    async def add(self, keys: List[str]) -> List[bool]:
+        return [True] * len(keys)
+
+    async def contains(self, keys: List[str]) -> List[bool]:
+        return [False] * len(keys)
@@ -0,0 +1,191 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 布隆过滤器和可扩容布隆过滤器，以及保存在本地文件中的已见集合实现。
+#            100 万条、误判率 0.1% 约占 1.8MB，远小于保存原始 ID 的集合
+
+import hashlib
+import json
+import math
+import os
+from typing import Dict, List, Optional, Tuple
+
+from dedup.abs_seen_set import AbstractSeenSet
+from tools import utils
+
+FILE_MAGIC = b"MCBLOOM1\n"
+
+
+def bloom_params(capacity: int, error_rate: float) -> Tuple[int, int]:
+    """
+    计算布隆过滤器的位数和哈希函数个数
+    :param capacity: 预计条目数
+    :param error_rate: 误判率
+    :return: (位数, 哈希函数个数)
+    """
+    num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2)))
+    num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+    return num_bits, num_hashes
+
+
+def bloom_positions(key: str, num_bits: int, num_hashes: int) -> List[int]:
+    """
+    双重哈希生成 key 对应的位位置，文件实现和 Redis 实现共用
+    :param key:
+    :param num_bits:
+    :param num_hashes:
+    :return:
+    """
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "little")
+    h2 = int.from_bytes(digest[8:], "little") | 1
+    return [(h1 + i * h2) % num_bits for i in range(num_hashes)]
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float, bits: Optional[bytearray] = None, count: int = 0):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits, self.num_hashes = bloom_params(capacity, error_rate)
+        self.bits = bits if bits is not None else bytearray((self.num_bits + 7) // 8)
+        self.count = count
+
+    @property
+    def full(self) -> bool:
+        return self.count >= self.capacity
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in bloom_positions(key, self.num_bits, self.num_hashes))
+
+    def add(self, key: str) -> bool:
+        """
+        :param key:
+        :return: 加入前是否不在过滤器中
+        """
+        is_new = False
+        for pos in bloom_positions(key, self.num_bits, self.num_hashes):
+            mask = 1 << (pos & 7)
+            if not self.bits[pos >> 3] & mask:
+                self.bits[pos >> 3] |= mask
+                is_new = True
+        if is_new:
+            self.count += 1
+        return is_new
+
+
+class ScalableBloomFilter:
+    """
+    可扩容布隆过滤器：当前过滤器写满后追加一个容量翻倍、误判率减半的过滤器，
+    各过滤器的误判率之和不超过 error_rate，不需要预先知道总条目数
+    """
+
+    GROWTH = 2
+    TIGHTENING = 0.5
+
+    def __init__(self, initial_capacity: int, error_rate: float):
+        self.initial_capacity = initial_capacity
+        self.error_rate = error_rate
+        self.filters: List[BloomFilter] = []
+
+    def __contains__(self, key: str) -> bool:
+        return any(key in bloom for bloom in self.filters)
+
+    def __len__(self) -> int:
+        return sum(bloom.count for bloom in self.filters)
+
+    def add(self, key: str) -> bool:
+        if key in self:
+            return False
+        if not self.filters or self.filters[-1].full:
+            index = len(self.filters)
+            self.filters.append(BloomFilter(
+                self.initial_capacity * self.GROWTH ** index,
+                self.error_rate * (1 - self.TIGHTENING) * self.TIGHTENING ** index,
+            ))
+        return self.filters[-1].add(key)
+
+    def to_bytes(self) -> bytes:
+        header: Dict = {
+            "initial_capacity": self.initial_capacity,
+            "error_rate": self.error_rate,
+            "filters": [{"capacity": b.capacity, "error_rate": b.error_rate, "count": b.count} for b in self.filters],
+        }
+        return FILE_MAGIC + json.dumps(header).encode("utf-8") + b"\n" + b"".join(bytes(b.bits) for b in self.filters)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ScalableBloomFilter":
+        if not data.startswith(FILE_MAGIC):
+            raise ValueError("invalid bloom filter file")
+        header_end = data.index(b"\n", len(FILE_MAGIC))
+        header = json.loads(data[len(FILE_MAGIC):header_end])
+        scalable = cls(header["initial_capacity"], header["error_rate"])
+        offset = header_end + 1
+        for meta in header["filters"]:
+            bloom = BloomFilter(meta["capacity"], meta["error_rate"], count=meta["count"])
+            size = len(bloom.bits)
+            bloom.bits = bytearray(data[offset:offset + size])
+            if len(bloom.bits) != size:
+                raise ValueError("truncated bloom filter file")
+            offset += size
+            scalable.filters.append(bloom)
+        return scalable
+
+
+class FileBloomSeenSet(AbstractSeenSet):
+    """
+    保存在本地文件中的已见集合，运行期间在内存中读写，close 时写回文件
+    """
+
+    def __init__(self, namespace: str, file_path: str, capacity: int, error_rate: float):
+        """
+        :param namespace: 命名空间
+        :param file_path: 文件路径
+        :param capacity: 初始容量，写满后自动扩容
+        :param error_rate: 误判率
+        """
+        super().__init__(namespace)
+        self.file_path = file_path
+        self._bloom = self._load(capacity, error_rate)
+        self._dirty = False
+
+    def _load(self, capacity: int, error_rate: float) -> ScalableBloomFilter:
+        if os.path.exists(self.file_path):
+            try:
+                with open(self.file_path, "rb") as f:
+                    bloom = ScalableBloomFilter.from_bytes(f.read())
+                utils.logger.info(f"[FileBloomSeenSet._load] {len(bloom)} keys loaded from {self.file_path}")
+                return bloom
+            except (OSError, ValueError) as e:
+                utils.logger.error(f"[FileBloomSeenSet._load] load {self.file_path} error, start with an empty set: {e}")
+        return ScalableBloomFilter(capacity, error_rate)
+
+    async def add(self, keys: List[str]) -> List[bool]:
+        result = [self._bloom.add(key) for key in keys]
+        self._dirty = self._dirty or any(result)
+        return result
+
+    async def contains(self, keys: List[str]) -> List[bool]:
+        return [key in self._bloom for key in keys]
+
+    def flush(self) -> None:
+        """原子地写回文件：先写临时文件再替换"""
+        if not self._dirty:
+            return
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        tmp_path = f"{self.file_path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(self._bloom.to_bytes())
+        os.replace(tmp_path, self.file_path)
+        self._dirty = False
+
+    async def close(self) -> None:
+        self.flush()
@@ -0,0 +1,61 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 Redis 位图的布隆过滤器已见集合，多台机器的 worker 可以共享，
+#            位图大小按容量固定分配，条目数超过容量后误判率会上升
+
+from typing import List, Optional
+
+from redis.asyncio import Redis
+
+from config import db_config
+from dedup.abs_seen_set import AbstractSeenSet
+from dedup.bloom_filter import bloom_params, bloom_positions
+
+
+class RedisBloomSeenSet(AbstractSeenSet):
+
+    def __init__(self, namespace: str, capacity: int, error_rate: float, redis_client: Optional[Redis] = None):
+        super().__init__(namespace)
+        self._redis_client = redis_client or Redis(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+        )
+        self._key = f"seen_set:{namespace}"
+        self.num_bits, self.num_hashes = bloom_params(capacity, error_rate)
+
+    async def add(self, keys: List[str]) -> List[bool]:
+        if not keys:
+            return []
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                for pos in bloom_positions(key, self.num_bits, self.num_hashes):
+                    pipe.setbit(self._key, pos, 1)
+            old_bits = await pipe.execute()
+        # SETBIT 返回原来的位，任一位原来为 0 即为新内容
+        k = self.num_hashes
+        return [not all(old_bits[i * k:(i + 1) * k]) for i in range(len(keys))]
+
+    async def contains(self, keys: List[str]) -> List[bool]:
+        if not keys:
+            return []
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                for pos in bloom_positions(key, self.num_bits, self.num_hashes):
+                    pipe.getbit(self._key, pos)
+            bits = await pipe.execute()
+        k = self.num_hashes
+        return [all(bits[i * k:(i + 1) * k]) for i in range(len(keys))]
+
+    async def close(self) -> None:
+        await self._redis_client.close()
@@ -0,0 +1,75 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 已见集合工厂，每个 平台 + 内容类型 一个集合，进程内共享
+
+import os
+from typing import Dict
+
+import config
+from config import db_config
+from dedup.abs_seen_set import AbstractSeenSet, NoopSeenSet
+
+# 内容类型
+SEEN_NOTE = "note"  # 帖子 / 回答，key 包含评论数等计数，计数变化后重新保存
+SEEN_COMMENT = "comment"  # 评论，key 包含点赞数、回复数，计数变化后重新保存
+SEEN_NOTE_COMMENTS = "note_comments"  # 帖子的评论已完整爬取，key 包含评论数，评论数变化后重新爬取
+
+_seen_sets: Dict[str, AbstractSeenSet] = {}
+
+
+class SeenSetFactory:
+    """
+    已见集合工厂类
+    """
+
+    @staticmethod
+    def create_seen_set(seen_set_type: str, namespace: str) -> AbstractSeenSet:
+        """
+        创建已见集合
+        :param seen_set_type: file | redis
+        :param namespace: 命名空间，平台 + 内容类型
+        :return:
+        """
+        if seen_set_type == "file":
+            from .bloom_filter import FileBloomSeenSet
+            file_path = os.path.join(db_config.SEEN_SET_FILE_DIR, f"{namespace.replace(':', '_')}.bloom")
+            return FileBloomSeenSet(namespace, file_path, config.SEEN_SET_CAPACITY, config.SEEN_SET_ERROR_RATE)
+        elif seen_set_type == "redis":
+            from .redis_seen_set import RedisBloomSeenSet
+            return RedisBloomSeenSet(namespace, config.SEEN_SET_CAPACITY, config.SEEN_SET_ERROR_RATE)
+        else:
+            raise ValueError(f"Unknown seen set type: {seen_set_type}")
+
+
+def get_seen_set(entity: str) -> AbstractSeenSet:
+    """
+    获取当前平台某类内容的已见集合，未开启去重时返回空实现
+    :param entity: 内容类型 note | comment | note_comments
+    :return:
+    """
+    namespace = f"{config.PLATFORM}:{entity}"
+    if namespace not in _seen_sets:
+        if config.ENABLE_SEEN_SET:
+            _seen_sets[namespace] = SeenSetFactory.create_seen_set(config.SEEN_SET_TYPE, namespace)
+        else:
+            _seen_sets[namespace] = NoopSeenSet(namespace)
+    return _seen_sets[namespace]
+
+
+async def close_seen_sets() -> None:
+    """
+    持久化并关闭所有已见集合，爬虫结束时调用
+    :return:
+    """
+    while _seen_sets:
+        _, seen_set = _seen_sets.popitem()
+        await seen_set.close()
@@ -0,0 +1,235 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 Redis 的分布式爬取任务队列，支持租约、可见性超时、失败重试和死信队列，
+#            多个进程 / 多台机器上的 worker 从同一个队列领取任务，任务至少被执行一次
+#
+# Redis 键（{ns} 为队列命名空间）：
+#   {ns}:pending     list  待领取的任务ID，LPUSH 入队，RPOPLPUSH 领取（先进先出）
+#   {ns}:processing  list  已领取、未确认的任务ID
+#   {ns}:leases      zset  任务ID -> 租约到期时间戳
+#   {ns}:tasks       hash  任务ID -> 任务内容，同一个任务ID未完成时重复入队会被忽略
+#   {ns}:dead        hash  超过最大重试次数的任务ID -> 任务内容
+
+import time
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+from redis.asyncio import Redis
+
+from config import db_config
+from tools import utils
+
+TASK_SEARCH_PAGE = "search_page"
+TASK_CREATOR = "creator"
+TASK_NOTE_COMMENTS = "note_comments"
+
+# 任务内容写入 {ns}:tasks 和任务ID写入 {ns}:pending 必须是原子的：
+# 分两次请求时进程在中间退出，任务内容留在 hash 中却不在待领取队列里，之后相同任务ID的入队都会被去重忽略
+# KEYS: [{ns}:tasks, {ns}:pending]，ARGV: [任务ID1, 任务内容1, 任务ID2, 任务内容2, ...]
+_ENQUEUE_SCRIPT = """
+local added = 0
+for i = 1, #ARGV, 2 do
+    if redis.call('HSETNX', KEYS[1], ARGV[i], ARGV[i + 1]) == 1 then
+        redis.call('LPUSH', KEYS[2], ARGV[i])
+        added = added + 1
+    end
+end
+return added
+"""
+
+
+class CrawlTask(BaseModel):
+    task_id: str = Field(title="任务ID，同一个爬取单元的任务ID相同")
+    platform: str = Field(title="平台")
+    task_type: str = Field(title="任务类型 search_page | creator | note_comments")
+    payload: Dict = Field(default_factory=dict, title="任务参数")
+    attempts: int = Field(default=0, title="已失败的次数")
+    last_error: str = Field(default="", title="最近一次失败的原因")
+
+
+def new_task(platform: str, task_type: str, unit_key: str, payload: Dict) -> CrawlTask:
+    """
+    创建任务，任务ID由平台和爬取单元组成，unit_key 的约定与断点续爬一致（见 frontier/abs_frontier.py）
+    :param platform: 平台
+    :param task_type: 任务类型
+    :param unit_key: 爬取单元，例如 search:{keyword}:{page}、creator:{creator_id}、comments:{note_id}
+    :param payload: 任务参数
+    :return:
+    """
+    return CrawlTask(task_id=f"{platform}:{unit_key}", platform=platform, task_type=task_type, payload=payload)
+
+
+class RedisTaskQueue:
+
+    def __init__(
+        self,
+        namespace: str,
+        redis_client: Optional[Redis] = None,
+        visibility_timeout: int = 300,
+        max_retries: int = 3,
+    ):
+        """
+        :param namespace: 队列命名空间（Redis 键前缀）
+        :param redis_client: Redis 客户端，为空时按 db_config 创建，需要 decode_responses=True
+        :param visibility_timeout: 租约时长（秒），租约到期未确认的任务会被重新入队
+        :param max_retries: 最大重试次数
+        """
+        self.namespace = namespace
+        self.visibility_timeout = visibility_timeout
+        self.max_retries = max_retries
+        self._redis_client = redis_client or Redis(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+            decode_responses=True,
+        )
+        self._pending_key = f"{namespace}:pending"
+        self._processing_key = f"{namespace}:processing"
+        self._leases_key = f"{namespace}:leases"
+        self._tasks_key = f"{namespace}:tasks"
+        self._dead_key = f"{namespace}:dead"
+        self._enqueue_script = self._redis_client.register_script(_ENQUEUE_SCRIPT)
+
+    async def enqueue(self, tasks: List[CrawlTask]) -> int:
+        """
+        任务入队，队列中已有相同任务ID（待领取或处理中）时忽略
+        :param tasks:
+        :return: 实际入队的任务数
+        """
+        if not tasks:
+            return 0
+        args = []
+        for task in tasks:
+            args += [task.task_id, task.model_dump_json()]
+        return int(await self._enqueue_script(keys=[self._tasks_key, self._pending_key], args=args))
+
+    async def lease(self) -> Optional[CrawlTask]:
+        """
+        领取一个任务并设置租约，队列为空时返回 None
+        :return:
+        """
+        while True:
+            task_id = await self._redis_client.rpoplpush(self._pending_key, self._processing_key)
+            if task_id is None:
+                return None
+            await self._redis_client.zadd(self._leases_key, {task_id: time.time() + self.visibility_timeout})
+            value = await self._redis_client.hget(self._tasks_key, task_id)
+            if value is not None:
+                return CrawlTask.model_validate_json(value)
+            # 租约到期重新入队后又被原 worker 确认完成的任务，直接丢弃
+            await self._remove_processing(task_id)
+
+    async def extend_lease(self, task: CrawlTask) -> bool:
+        """
+        续约，任务处理时间可能超过租约时长时由 worker 定期调用
+        :param task:
+        :return: 租约是否仍然有效（已被重新入队时返回 False）
+        """
+        updated = await self._redis_client.zadd(
+            self._leases_key, {task.task_id: time.time() + self.visibility_timeout}, xx=True, ch=True
+        )
+        return bool(updated)
+
+    async def ack(self, task: CrawlTask) -> None:
+        """
+        确认任务完成
+        :param task:
+        :return:
+        """
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing_key, 1, task.task_id)
+            pipe.zrem(self._leases_key, task.task_id)
+            pipe.hdel(self._tasks_key, task.task_id)
+            await pipe.execute()
+
+    async def nack(self, task: CrawlTask, error: str) -> None:
+        """
+        任务失败，未超过最大重试次数时重新入队到队尾，否则移入死信队列
+        :param task:
+        :param error: 失败原因
+        :return:
+        """
+        task.attempts += 1
+        task.last_error = error[:500]
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing_key, 1, task.task_id)
+            pipe.zrem(self._leases_key, task.task_id)
+            if task.attempts > self.max_retries:
+                pipe.hdel(self._tasks_key, task.task_id)
+                pipe.hset(self._dead_key, task.task_id, task.model_dump_json())
+            else:
+                pipe.hset(self._tasks_key, task.task_id, task.model_dump_json())
+                pipe.lpush(self._pending_key, task.task_id)
+            await pipe.execute()
+        if task.attempts > self.max_retries:
+            utils.logger.error(f"[RedisTaskQueue.nack] task {task.task_id} failed {task.attempts} times, move to dead letter, err: {error}")
+        else:
+            utils.logger.warning(f"[RedisTaskQueue.nack] task {task.task_id} failed {task.attempts} times, retry later, err: {error}")
+
+    async def requeue_expired(self) -> int:
+        """
+        把租约到期的任务按失败处理（重新入队或移入死信队列），每个 worker 领取任务前调用
+        :return: 处理的过期任务数
+        """
+        now = time.time()
+        # 领取任务时 RPOPLPUSH 和设置租约之间进程退出，处理中的任务没有租约，补一个租约以便到期后回收
+        processing_ids = await self._redis_client.lrange(self._processing_key, 0, -1)
+        if processing_ids:
+            async with self._redis_client.pipeline(transaction=False) as pipe:
+                for task_id in processing_ids:
+                    pipe.zadd(self._leases_key, {task_id: now + self.visibility_timeout}, nx=True)
+                await pipe.execute()
+
+        expired_ids = await self._redis_client.zrangebyscore(self._leases_key, "-inf", now)
+        requeued = 0
+        for task_id in expired_ids:
+            # 多个 worker 同时回收时只有成功删除租约的 worker 负责重新入队
+            if not await self._redis_client.zrem(self._leases_key, task_id):
+                continue
+            value = await self._redis_client.hget(self._tasks_key, task_id)
+            if value is None:
+                await self._remove_processing(task_id)
+                continue
+            await self.nack(CrawlTask.model_validate_json(value), "lease expired")
+            requeued += 1
+        return requeued
+
+    async def _remove_processing(self, task_id: str) -> None:
+        async with self._redis_client.pipeline(transaction=True) as pipe:
+            pipe.lrem(self._processing_key, 1, task_id)
+            pipe.zrem(self._leases_key, task_id)
+            await pipe.execute()
+
+    async def stats(self) -> Dict[str, int]:
+        """
+        队列状态
+        :return: {"pending": 待领取, "processing": 处理中, "dead": 死信}
+        """
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            pipe.llen(self._pending_key)
+            pipe.llen(self._processing_key)
+            pipe.hlen(self._dead_key)
+            pending, processing, dead = await pipe.execute()
+        return {"pending": pending, "processing": processing, "dead": dead}
+
+    async def list_dead(self) -> List[CrawlTask]:
+        values = await self._redis_client.hvals(self._dead_key)
+        return [CrawlTask.model_validate_json(value) for value in values]
+
+    async def clear(self) -> None:
+        await self._redis_client.delete(
+            self._pending_key, self._processing_key, self._leases_key, self._tasks_key, self._dead_key
+        )
+
+    async def close(self) -> None:
+        await self._redis_client.close()
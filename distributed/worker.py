@@ -0,0 +1,187 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 分布式爬取：--enqueue 按配置生成种子任务写入队列，--worker 循环领取任务交给爬虫处理，
+#            任务处理中派生出的后续任务（下一页、评论）写回队列，由任意 worker 继续处理
+
+import asyncio
+from typing import TYPE_CHECKING, List, Optional
+
+import config
+from distributed.task_queue import TASK_CREATOR, TASK_SEARCH_PAGE, CrawlTask, RedisTaskQueue, new_task
+from frontier.abs_frontier import AbstractFrontier
+from frontier.frontier_factory import FrontierFactory
+from tools import utils
+
+if TYPE_CHECKING:
+    from base.base_crawler import AbstractCrawler
+
+
+def create_task_queue(platform: str) -> RedisTaskQueue:
+    """
+    按配置创建平台的任务队列
+    :param platform: 平台
+    :return:
+    """
+    return RedisTaskQueue(
+        namespace=f"{config.DISTRIBUTED_QUEUE_NAMESPACE}:{platform}",
+        visibility_timeout=config.DISTRIBUTED_VISIBILITY_TIMEOUT,
+        max_retries=config.DISTRIBUTED_MAX_RETRIES,
+    )
+
+
+def build_seed_tasks(platform: str, crawler_type: str) -> List[CrawlTask]:
+    """
+    按配置生成种子任务：search 为每个关键词的起始页，creator 为配置中的创作者
+    :param platform: 平台
+    :param crawler_type: 爬取类型
+    :return:
+    """
+    if crawler_type == "search":
+        return [
+            new_task(platform, TASK_SEARCH_PAGE, f"search:{keyword}:{config.START_PAGE}",
+                     {"keyword": keyword, "page": config.START_PAGE, "start_page": config.START_PAGE})
+            for keyword in config.KEYWORDS.split(",") if keyword
+        ]
+    if crawler_type == "creator":
+        if platform == "wb":
+            creator_ids = config.WEIBO_CREATOR_ID_LIST
+        elif platform == "zhihu":
+            creator_ids = [user_link.split("/")[-1] for user_link in config.ZHIHU_CREATOR_URL_LIST]
+        else:
+            creator_ids = []
+        return [new_task(platform, TASK_CREATOR, f"creator:{creator_id}", {"creator_id": creator_id}) for creator_id in creator_ids]
+    utils.logger.warning(f"[build_seed_tasks] crawler type {crawler_type} is not supported in distributed mode")
+    return []
+
+
+async def enqueue_seed_tasks(queue: Optional[RedisTaskQueue] = None, frontier: Optional[AbstractFrontier] = None) -> int:
+    """
+    把当前平台和爬取类型的种子任务写入队列。
+    worker 模式下没有"完整爬取结束"的时刻，爬取进度由每次播种重置：队列中没有待处理和处理中的任务时，
+    上一轮已经结束，清空断点续爬进度，否则上一轮标记完成的创作者和评论单元会让本轮的任务被直接跳过
+    :param queue: 任务队列，为空时按配置创建
+    :param frontier: 爬取进度，为空时按配置创建
+    :return: 实际入队的任务数
+    """
+    own_queue, own_frontier = queue is None, frontier is None
+    queue = queue or create_task_queue(config.PLATFORM)
+    frontier = frontier or FrontierFactory.create_crawler_frontier()
+    try:
+        stats = await queue.stats()
+        if stats["pending"] or stats["processing"]:
+            utils.logger.warning(
+                f"[enqueue_seed_tasks] previous run is still in progress ({stats}), keep its crawl progress, "
+                f"units finished in that run will be skipped"
+            )
+        else:
+            await frontier.clear()
+        tasks = build_seed_tasks(config.PLATFORM, config.CRAWLER_TYPE)
+        added = await queue.enqueue(tasks)
+        utils.logger.info(f"[enqueue_seed_tasks] {added}/{len(tasks)} tasks enqueued, queue stats: {await queue.stats()}")
+        return added
+    finally:
+        if own_queue:
+            await queue.close()
+        if own_frontier:
+            await frontier.close()
+
+
+class CrawlWorker:
+
+    def __init__(
+        self,
+        crawler: "AbstractCrawler",
+        queue: RedisTaskQueue,
+        idle_timeout: float = 60,
+        poll_interval: float = 1,
+    ):
+        """
+        :param crawler: 已登录的爬虫，通过 crawler.handle_task 处理任务
+        :param queue: 任务队列
+        :param idle_timeout: 队列中没有待处理和处理中的任务持续多少秒后退出，<= 0 表示一直运行
+        :param poll_interval: 队列为空时的轮询间隔（秒）
+        """
+        self.crawler = crawler
+        self.queue = queue
+        self.idle_timeout = idle_timeout
+        self.poll_interval = poll_interval
+        self.processed = 0
+        self.failed = 0
+
+    async def run(self) -> None:
+        loop = asyncio.get_running_loop()
+        idle_since: Optional[float] = None
+        while True:
+            await self.queue.requeue_expired()
+            task = await self.queue.lease()
+            if task is None:
+                # 其他 worker 还有处理中的任务时可能会派生新任务，不算空闲
+                stats = await self.queue.stats()
+                if stats["processing"]:
+                    idle_since = None
+                elif idle_since is None:
+                    idle_since = loop.time()
+                elif 0 < self.idle_timeout <= loop.time() - idle_since:
+                    utils.logger.info(f"[CrawlWorker.run] queue idle for {self.idle_timeout}s, worker exit")
+                    break
+                await asyncio.sleep(self.poll_interval)
+                continue
+            idle_since = None
+            await self.process(task)
+        utils.logger.info(f"[CrawlWorker.run] worker finished, processed: {self.processed}, failed: {self.failed}")
+
+    async def process(self, task: CrawlTask) -> None:
+        """
+        处理一个任务：成功后先写入派生任务再确认，失败时交给队列重试
+        :param task:
+        :return:
+        """
+        utils.logger.info(f"[CrawlWorker.process] begin task {task.task_id}, attempts: {task.attempts}")
+        heartbeat = asyncio.create_task(self._heartbeat(task))
+        try:
+            follow_up_tasks = await self.crawler.handle_task(task)
+        except Exception as e:
+            self.failed += 1
+            await self.queue.nack(task, f"{type(e).__name__}: {e}")
+            return
+        finally:
+            heartbeat.cancel()
+        if follow_up_tasks:
+            await self.queue.enqueue(follow_up_tasks)
+        await self.queue.ack(task)
+        self.processed += 1
+
+    async def _heartbeat(self, task: CrawlTask) -> None:
+        interval = max(1.0, self.queue.visibility_timeout / 3)
+        while True:
+            await asyncio.sleep(interval)
+            if not await self.queue.extend_lease(task):
+                utils.logger.warning(f"[CrawlWorker._heartbeat] lease of task {task.task_id} lost, it may run twice")
+                return
+
+
+async def run_crawl_worker(crawler: "AbstractCrawler") -> None:
+    """
+    按配置为已登录的爬虫运行 worker，直到队列空闲超时
+    :param crawler:
+    :return:
+    """
+    queue = create_task_queue(config.PLATFORM)
+    try:
+        await CrawlWorker(
+            crawler,
+            queue,
+            idle_timeout=config.DISTRIBUTED_IDLE_TIMEOUT,
+            poll_interval=config.DISTRIBUTED_POLL_INTERVAL,
+        ).run()
+    finally:
+        await queue.close()
@@ -0,0 +1,142 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取边界(frontier)抽象类，记录每个爬取单元的进度，用于中断后断点续爬
+#
+# 爬取单元(unit)的 key 约定：
+#   search:{keyword}        cursor: {"page": 下一个待爬的页码}
+#   creator:{creator_id}    cursor: {"since_id"/"offset": 下一页的分页参数}
+#   comments:{note_id}      cursor: {"max_id"/"offset": 下一页的分页参数, "count": 已爬取的评论数}
+
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+from tools import utils
+
+STATUS_PENDING = "pending"
+STATUS_IN_FLIGHT = "in_flight"
+STATUS_DONE = "done"
+
+
+class FrontierUnit(BaseModel):
+    unit_key: str = Field(title="爬取单元key")
+    status: str = Field(default=STATUS_PENDING, title="状态 pending | in_flight | done")
+    cursor: Dict = Field(default_factory=dict, title="分页游标")
+    update_ts: int = Field(default=0, title="最后更新时间戳")
+
+
+class AbstractFrontier(ABC):
+
+    def __init__(self, namespace: str):
+        """
+        :param namespace: 命名空间，不同平台/爬取类型的进度互不影响，例如 wb:search
+        """
+        self.namespace = namespace
+
+    @abstractmethod
+    async def get(self, unit_key: str) -> Optional[FrontierUnit]:
+        """
+        获取爬取单元的进度
+        :param unit_key: 爬取单元key
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def save(self, unit: FrontierUnit) -> None:
+        """
+        写入或覆盖爬取单元的进度
+        :param unit: 爬取单元
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def add_pending(self, unit_keys: List[str]) -> None:
+        """
+        登记待爬取的单元，已存在的单元保持原状态
+        :param unit_keys: 爬取单元key列表
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def list_units(self, status: Optional[str] = None) -> List[FrontierUnit]:
+        """
+        列出当前命名空间下的爬取单元
+        :param status: 按状态过滤，None 表示全部
+        :return:
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """
+        清空当前命名空间下的全部进度，一次完整的爬取结束后调用，下一次运行从头开始
+        :return:
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+        释放连接
+        :return:
+        """
+        pass
+
+    async def is_done(self, unit_key: str) -> bool:
+        unit = await self.get(unit_key)
+        return unit is not None and unit.status == STATUS_DONE
+
+    async def get_cursor(self, unit_key: str) -> Dict:
+        """
+        获取爬取单元上次保存的游标，没有进度时返回空字典
+        :param unit_key: 爬取单元key
+        :return:
+        """
+        unit = await self.get(unit_key)
+        if unit is None or unit.status == STATUS_DONE:
+            return {}
+        return unit.cursor
+
+    async def checkpoint(self, unit_key: str, cursor: Dict) -> None:
+        """
+        保存爬取单元的游标，并标记为进行中
+        :param unit_key: 爬取单元key
+        :param cursor: 下一页的分页参数
+        :return:
+        """
+        await self.save(FrontierUnit(unit_key=unit_key, status=STATUS_IN_FLIGHT, cursor=cursor,
+                                     update_ts=utils.get_current_timestamp()))
+
+    async def mark_done(self, unit_key: str) -> None:
+        await self.save(FrontierUnit(unit_key=unit_key, status=STATUS_DONE, update_ts=utils.get_current_timestamp()))
+
+
+class NoopFrontier(AbstractFrontier):
+    """未开启断点续爬时使用，所有操作均为空实现"""
+
+    async def get(self, unit_key: str) -> Optional[FrontierUnit]:
+        return None
+
+    async def save(self, unit: FrontierUnit) -> None:
+        pass
+
+    async def add_pending(self, unit_keys: List[str]) -> None:
+        pass
+
+    async def list_units(self, status: Optional[str] = None) -> List[FrontierUnit]:
+        return []
+
+    async def clear(self) -> None:
+        pass
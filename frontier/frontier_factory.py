@@ -0,0 +1,50 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取边界工厂
+
+import config
+from config import db_config
+from frontier.abs_frontier import AbstractFrontier, NoopFrontier
+
+
+class FrontierFactory:
+    """
+    爬取边界工厂类
+    """
+
+    @staticmethod
+    def create_frontier(frontier_type: str, namespace: str) -> AbstractFrontier:
+        """
+        创建爬取边界对象
+        :param frontier_type: sqlite | redis
+        :param namespace: 命名空间
+        :return:
+        """
+        if frontier_type == "sqlite":
+            from .sqlite_frontier import SqliteFrontier
+            return SqliteFrontier(namespace, db_path=db_config.FRONTIER_SQLITE_PATH)
+        elif frontier_type == "redis":
+            from .redis_frontier import RedisFrontier
+            return RedisFrontier(namespace)
+        else:
+            raise ValueError(f"Unknown frontier type: {frontier_type}")
+
+    @staticmethod
+    def create_crawler_frontier() -> AbstractFrontier:
+        """
+        按当前配置为爬虫创建爬取边界，未开启断点续爬时返回空实现
+        :return:
+        """
+        if not config.ENABLE_CRAWL_FRONTIER:
+            return NoopFrontier(namespace="")
+        namespace = f"{config.PLATFORM}:{config.CRAWLER_TYPE}"
+        return FrontierFactory.create_frontier(config.CRAWL_FRONTIER_TYPE, namespace)
@@ -0,0 +1,65 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 Redis 的爬取边界实现，每个命名空间对应一个 hash，多台机器可以共享进度
+
+from typing import List, Optional
+
+from redis.asyncio import Redis
+
+from config import db_config
+from frontier.abs_frontier import STATUS_PENDING, AbstractFrontier, FrontierUnit
+from tools import utils
+
+
+class RedisFrontier(AbstractFrontier):
+
+    def __init__(self, namespace: str):
+        super().__init__(namespace)
+        self._redis_client = Redis(
+            host=db_config.REDIS_DB_HOST,
+            port=db_config.REDIS_DB_PORT,
+            db=db_config.REDIS_DB_NUM,
+            password=db_config.REDIS_DB_PWD,
+        )
+        self._hash_key = f"crawl_frontier:{namespace}"
+
+    async def get(self, unit_key: str) -> Optional[FrontierUnit]:
+        value = await self._redis_client.hget(self._hash_key, unit_key)
+        if value is None:
+            return None
+        return FrontierUnit.model_validate_json(value)
+
+    async def save(self, unit: FrontierUnit) -> None:
+        await self._redis_client.hset(self._hash_key, unit.unit_key, unit.model_dump_json())
+
+    async def add_pending(self, unit_keys: List[str]) -> None:
+        if not unit_keys:
+            return
+        now_ts = utils.get_current_timestamp()
+        async with self._redis_client.pipeline(transaction=False) as pipe:
+            for unit_key in unit_keys:
+                unit = FrontierUnit(unit_key=unit_key, status=STATUS_PENDING, update_ts=now_ts)
+                pipe.hsetnx(self._hash_key, unit_key, unit.model_dump_json())
+            await pipe.execute()
+
+    async def list_units(self, status: Optional[str] = None) -> List[FrontierUnit]:
+        values = await self._redis_client.hvals(self._hash_key)
+        units = [FrontierUnit.model_validate_json(value) for value in values]
+        if status:
+            units = [unit for unit in units if unit.status == status]
+        return sorted(units, key=lambda unit: unit.update_ts)
+
+    async def clear(self) -> None:
+        await self._redis_client.delete(self._hash_key)
+
+    async def close(self) -> None:
+        await self._redis_client.close()
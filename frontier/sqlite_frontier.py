@@ -0,0 +1,113 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 SQLite 的爬取边界实现，默认使用
+
+import asyncio
+import json
+import os
+from typing import List, Optional
+
+import aiosqlite
+
+from frontier.abs_frontier import STATUS_PENDING, AbstractFrontier, FrontierUnit
+from tools import utils
+
+_CREATE_TABLE_SQL = """
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    namespace TEXT NOT NULL,
+    unit_key TEXT NOT NULL,
+    status TEXT NOT NULL,
+    cursor TEXT NOT NULL DEFAULT '{}',
+    update_ts INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (namespace, unit_key)
+)
+"""
+
+
+class SqliteFrontier(AbstractFrontier):
+
+    def __init__(self, namespace: str, db_path: str):
+        super().__init__(namespace)
+        self.db_path = db_path
+        self._conn: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_conn(self) -> aiosqlite.Connection:
+        if self._conn is None:
+            db_dir = os.path.dirname(self.db_path)
+            if db_dir:
+                os.makedirs(db_dir, exist_ok=True)
+            self._conn = await aiosqlite.connect(self.db_path)
+            await self._conn.execute("PRAGMA journal_mode=WAL")
+            await self._conn.execute(_CREATE_TABLE_SQL)
+            await self._conn.commit()
+        return self._conn
+
+    @staticmethod
+    def _row_to_unit(row) -> FrontierUnit:
+        return FrontierUnit(unit_key=row[0], status=row[1], cursor=json.loads(row[2]), update_ts=row[3])
+
+    async def get(self, unit_key: str) -> Optional[FrontierUnit]:
+        async with self._lock:
+            conn = await self._get_conn()
+            async with conn.execute(
+                "SELECT unit_key, status, cursor, update_ts FROM crawl_frontier WHERE namespace = ? AND unit_key = ?",
+                (self.namespace, unit_key),
+            ) as cursor:
+                row = await cursor.fetchone()
+        return self._row_to_unit(row) if row else None
+
+    async def save(self, unit: FrontierUnit) -> None:
+        async with self._lock:
+            conn = await self._get_conn()
+            await conn.execute(
+                "INSERT INTO crawl_frontier (namespace, unit_key, status, cursor, update_ts) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (namespace, unit_key) DO UPDATE SET "
+                "status = excluded.status, cursor = excluded.cursor, update_ts = excluded.update_ts",
+                (self.namespace, unit.unit_key, unit.status, json.dumps(unit.cursor, ensure_ascii=False), unit.update_ts),
+            )
+            await conn.commit()
+
+    async def add_pending(self, unit_keys: List[str]) -> None:
+        if not unit_keys:
+            return
+        now_ts = utils.get_current_timestamp()
+        async with self._lock:
+            conn = await self._get_conn()
+            await conn.executemany(
+                "INSERT OR IGNORE INTO crawl_frontier (namespace, unit_key, status, cursor, update_ts) VALUES (?, ?, ?, '{}', ?)",
+                [(self.namespace, unit_key, STATUS_PENDING, now_ts) for unit_key in unit_keys],
+            )
+            await conn.commit()
+
+    async def list_units(self, status: Optional[str] = None) -> List[FrontierUnit]:
+        sql = "SELECT unit_key, status, cursor, update_ts FROM crawl_frontier WHERE namespace = ?"
+        params = [self.namespace]
+        if status:
+            sql += " AND status = ?"
+            params.append(status)
+        async with self._lock:
+            conn = await self._get_conn()
+            async with conn.execute(sql + " ORDER BY update_ts", params) as cursor:
+                rows = await cursor.fetchall()
+        return [self._row_to_unit(row) for row in rows]
+
+    async def clear(self) -> None:
+        async with self._lock:
+            conn = await self._get_conn()
+            await conn.execute("DELETE FROM crawl_frontier WHERE namespace = ?", (self.namespace,))
+            await conn.commit()
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._conn.close()
+            self._conn = None
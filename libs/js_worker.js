@@ -0,0 +1,44 @@
+// 常驻 Node 进程：加载指定的 JS 文件，按行读取 JSON 请求并调用其中的函数，避免每次签名都启动一个新的 Node 进程
+// 请求：{"id": 1, "fn": "get_sign", "args": ["url", "cookies"]}
+// 响应：{"id": 1, "result": ...} 或 {"id": 1, "error": "..."}
+
+const fs = require('fs');
+const vm = require('vm');
+const readline = require('readline');
+
+const scriptPath = process.argv[2];
+if (!scriptPath) {
+    process.stderr.write('usage: node js_worker.js <script_path>\n');
+    process.exit(1);
+}
+
+// 与 execjs.compile 行为一致：脚本顶层定义的函数可以按名字调用
+const sandbox = {require, console, Buffer, setTimeout, clearTimeout};
+vm.createContext(sandbox);
+vm.runInContext(fs.readFileSync(scriptPath, 'utf-8').replace(/^﻿/, ''), sandbox, {filename: scriptPath});
+
+const rl = readline.createInterface({input: process.stdin, terminal: false});
+rl.on('line', (line) => {
+    if (!line.trim()) {
+        return;
+    }
+    let request;
+    try {
+        request = JSON.parse(line);
+    } catch (e) {
+        process.stdout.write(JSON.stringify({id: null, error: `invalid request: ${e.message}`}) + '\n');
+        return;
+    }
+    let response;
+    try {
+        const fn = sandbox[request.fn];
+        if (typeof fn !== 'function') {
+            throw new Error(`function ${request.fn} not found`);
+        }
+        response = {id: request.id, result: fn(...(request.args || []))};
+    } catch (e) {
+        response = {id: request.id, error: String(e && e.stack || e)};
+    }
+    process.stdout.write(JSON.stringify(response) + '\n');
+});
+rl.on('close', () => process.exit(0));
@@ -1,15 +1,22 @@
 import asyncio
-import sys
 import signal
 from typing import Optional
 
 import cmd_arg
 import config
 from database import db
+from dedup.seen_set_factory import close_seen_sets
 from base.base_crawler import AbstractCrawler
+from distributed.worker import enqueue_seed_tasks
+from metrics.crawler_metrics import log_metrics_summary
+from metrics.profiler import profiling
+from metrics.server import start_metrics_server, stop_metrics_server
+from metrics.tracing import close_tracing
+from store.comment_watermark import close_comment_watermark_store
 from media_platform.weibo import WeiboCrawler
 from media_platform.zhihu import ZhihuCrawler
-from tools.async_file_writer import AsyncFileWriter
+from store.store_pipeline import store_pipeline
+from tools.async_file_writer import AsyncFileWriter, finalize_json_files
 from var import crawler_type_var
 
 
@@ -33,9 +40,6 @@ crawler: Optional[AbstractCrawler] = None
 
 
 async def main():
-    # Init crawler
-    global crawler
-
     # parse cmd
     args = await cmd_arg.parse_cmd()
 
@@ -45,12 +49,33 @@ async def main():
         print(f"Database {args.init_db} initialized successfully.")
         return  # Exit the main function cleanly
 
+    # seed distributed task queue
+    if args.enqueue:
+        added = await enqueue_seed_tasks()
+        print(f"{added} tasks enqueued for platform {config.PLATFORM}.")
+        return
+
+    if config.METRICS_PORT:
+        await start_metrics_server(config.METRICS_HOST, config.METRICS_PORT)
+
+    # --profile：在选定的性能分析器下运行爬虫，结束或中断时写入报告
+    async with profiling(config.PROFILE_MODE):
+        await run_crawler()
+
+
+async def run_crawler():
+    # Init crawler
+    global crawler
+
     crawler = CrawlerFactory.create_crawler(platform=config.PLATFORM)
     await crawler.start()
 
+    # 等待存储队列中的数据全部写入，词云需要读取完整的数据文件
+    await store_pipeline.drain()
+
     # Generate wordcloud after crawling is complete
-    # Only for JSON save mode
-    if config.SAVE_DATA_OPTION == "json" and config.ENABLE_GET_WORDCLOUD:
+    # Only for JSON / JSON Lines save mode
+    if config.SAVE_DATA_OPTION in ["json", "jsonl"] and config.ENABLE_GET_WORDCLOUD:
         try:
             file_writer = AsyncFileWriter(
                 platform=config.PLATFORM,
@@ -87,38 +112,92 @@ async def async_cleanup():
                 if "closed" not in error_msg and "disconnected" not in error_msg:
                     print(f"[Main] 关闭浏览器上下文时出错: {e}")
 
+        # 关闭API client的HTTP长连接池（正常流程已在crawler.start中关闭，这里兜底异常退出的情况）
+        for client_attr in ("wb_client", "zhihu_client"):
+            api_client = getattr(crawler, client_attr, None)
+            if api_client and hasattr(api_client, "close"):
+                try:
+                    await api_client.close()
+                except Exception as e:
+                    print(f"[Main] 关闭API client连接池时出错: {e}")
+
+    # 写入存储队列中剩余的数据
+    try:
+        await store_pipeline.drain()
+    except Exception as e:
+        print(f"[Main] 写入存储队列剩余数据时出错: {e}")
+
+    # 持久化去重用的已见集合（正常流程已在crawler.start中关闭，这里兜底异常退出的情况）
+    try:
+        await close_seen_sets()
+    except Exception as e:
+        print(f"[Main] 保存已见集合时出错: {e}")
+
+    try:
+        await close_comment_watermark_store()
+    except Exception as e:
+        print(f"[Main] 关闭评论高水位存储时出错: {e}")
+
+    # json 模式：把运行时追加写入的 JSON Lines 暂存文件合并为 JSON 数组
+    if config.SAVE_DATA_OPTION == "json":
+        try:
+            await finalize_json_files()
+        except Exception as e:
+            print(f"[Main] 合并JSON数据文件时出错: {e}")
+
     # 关闭数据库连接
     if config.SAVE_DATA_OPTION in ["db", "sqlite"]:
         await db.close()
 
+    close_tracing()
+    if config.ENABLE_METRICS_SUMMARY:
+        log_metrics_summary()
+    try:
+        await stop_metrics_server()
+    except Exception as e:
+        print(f"[Main] 关闭指标服务时出错: {e}")
+
 
-def cleanup():
-    """同步清理函数"""
+def cleanup(loop: Optional[asyncio.AbstractEventLoop] = None):
+    """同步清理函数，在爬虫所在的事件循环中执行异步清理，保证存储队列等绑定在该循环上的资源能正常收尾"""
     try:
-        # 创建新的事件循环来执行异步清理
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
+        if loop is None or loop.is_closed():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
         loop.run_until_complete(async_cleanup())
         loop.close()
     except Exception as e:
         print(f"[Main] 清理时出错: {e}")
 
 
-def signal_handler(signum, _frame):
-    """信号处理器，处理Ctrl+C等中断信号"""
+def signal_handler(signum, main_task: asyncio.Task):
+    """信号处理器，处理Ctrl+C等中断信号：取消主任务，由 finally 中的 cleanup 统一清理资源"""
     print(f"\n[Main] 收到中断信号 {signum}，正在清理资源...")
-    cleanup()
-    sys.exit(0)
+    main_task.cancel()
+
+
+def register_signal_handlers(loop: asyncio.AbstractEventLoop, main_task: asyncio.Task):
+    for signum in (signal.SIGINT, signal.SIGTERM):  # Ctrl+C / 终止信号
+        try:
+            loop.add_signal_handler(signum, signal_handler, signum, main_task)
+        except NotImplementedError:
+            # Windows 的事件循环不支持 add_signal_handler
+            signal.signal(signum, lambda sig, _frame: loop.call_soon_threadsafe(signal_handler, sig, main_task))
 
 
 if __name__ == "__main__":
+    event_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(event_loop)
+    main_task = event_loop.create_task(main())
     # 注册信号处理器
-    signal.signal(signal.SIGINT, signal_handler)   # Ctrl+C
-    signal.signal(signal.SIGTERM, signal_handler)  # 终止信号
+    register_signal_handlers(event_loop, main_task)
 
     try:
-        asyncio.get_event_loop().run_until_complete(main())
+        event_loop.run_until_complete(main_task)
     except KeyboardInterrupt:
         print("\n[Main] 收到键盘中断，正在清理资源...")
+    except asyncio.CancelledError:
+        # 主任务已被信号处理器取消
+        pass
     finally:
-        cleanup()
+        cleanup(event_loop)
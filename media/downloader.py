@@ -0,0 +1,210 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 媒体下载队列：固定数量的下载协程从队列中领取任务，使用独立的限流，
+#            响应体按块流式写入磁盘，失败重试时通过 Range 请求从已下载的位置续传
+
+import asyncio
+import hashlib
+import os
+from typing import Dict, List, Optional
+
+import aiofiles
+import httpx
+from pydantic import BaseModel, Field
+
+import config
+from metrics.crawler_metrics import QUEUE_DEPTH
+from metrics.tracing import traced
+from tools import utils
+from tools.http_cassette import is_cassette_replay
+from tools.http_pool import HttpClientPool
+from tools.rate_limiter import RateLimiter
+
+from .media_store import ContentAddressedMediaStore
+
+
+class MediaTask(BaseModel):
+    media_key: str = Field(..., title="媒体标识，同一标识只下载一次")
+    url: str = Field(..., title="下载地址")
+    extension: str = Field(default="", title="文件扩展名")
+    proxy: Optional[str] = Field(default=None, title="httpx 代理URL")
+    headers: Dict[str, str] = Field(default_factory=dict, title="请求头")
+
+
+class MediaDownloader:
+
+    def __init__(
+        self,
+        store: ContentAddressedMediaStore,
+        http_pool: HttpClientPool,
+        concurrency: int = 4,
+        rate_limiter: Optional[RateLimiter] = None,
+        chunk_size: int = 64 * 1024,
+        max_retries: int = 3,
+        timeout: Optional[float] = None,
+    ):
+        """
+        :param store: 媒体文件存储
+        :param http_pool: 复用连接的 httpx 连接池
+        :param concurrency: 同时下载的文件数
+        :param rate_limiter: 下载请求的限流，和 API 请求的限流互不影响
+        :param chunk_size: 流式写入的块大小（字节）
+        :param max_retries: 单个文件的最大重试次数，每次重试从已下载的位置续传
+        :param timeout: 请求超时（秒）
+        """
+        self.store = store
+        self.http_pool = http_pool
+        self.concurrency = max(1, concurrency)
+        self.rate_limiter = rate_limiter
+        self.chunk_size = chunk_size
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    def _ensure_workers(self):
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def submit(self, task: MediaTask) -> asyncio.Future:
+        """
+        提交下载任务，立即返回，不等待下载完成
+        :param task:
+        :return: 下载完成后结果为文件路径，失败时为 None
+        """
+        future = asyncio.get_running_loop().create_future()
+        path = await self.store.lookup(task.media_key)
+        if path:
+            self.store.link_key(task.media_key, path, task.extension)
+            future.set_result(path)
+            return future
+        if task.media_key in self._pending:
+            return self._pending[task.media_key]
+        self._pending[task.media_key] = future
+        self._ensure_workers()
+        self._queue.put_nowait(task)
+        QUEUE_DEPTH.inc(queue="media_download")
+        return future
+
+    async def download(self, task: MediaTask) -> Optional[str]:
+        """
+        提交下载任务并等待下载完成
+        :param task:
+        :return: 文件路径，失败时返回 None
+        """
+        return await (await self.submit(task))
+
+    async def _worker(self):
+        while True:
+            task: MediaTask = await self._queue.get()
+            QUEUE_DEPTH.dec(queue="media_download")
+            future = self._pending.get(task.media_key)
+            path = None
+            try:
+                path = await self._download_with_retry(task)
+            except Exception as e:
+                utils.logger.error(f"[MediaDownloader._worker] download {task.url} error: {e}")
+            finally:
+                self._pending.pop(task.media_key, None)
+                if future is not None and not future.done():
+                    future.set_result(path)
+                self._queue.task_done()
+
+    @traced("image", "task.media_key", "task.url")
+    async def _download_with_retry(self, task: MediaTask) -> Optional[str]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return await self._download(task)
+            except httpx.HTTPError as e:
+                utils.logger.warning(
+                    f"[MediaDownloader._download_with_retry] {e.__class__.__name__} for {task.url} "
+                    f"(attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+        utils.logger.error(f"[MediaDownloader._download_with_retry] give up downloading {task.url}")
+        return None
+
+    async def _download(self, task: MediaTask) -> str:
+        partial_path = self.store.partial_path(task.media_key)
+        os.makedirs(os.path.dirname(partial_path), exist_ok=True)
+        downloaded = os.path.getsize(partial_path) if os.path.exists(partial_path) else 0
+        headers = dict(task.headers)
+        if downloaded:
+            headers["Range"] = f"bytes={downloaded}-"
+
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(task.url, proxy=task.proxy)
+        client = self.http_pool.get_client(task.proxy)
+        async with client.stream("GET", task.url, headers=headers, timeout=self.timeout) as response:
+            if response.status_code == 416 and downloaded:
+                # 临时文件已经是完整的内容
+                pass
+            else:
+                response.raise_for_status()
+                # 服务端不支持 Range 时返回完整内容，从头写入
+                resume = downloaded and response.status_code == 206
+                async with aiofiles.open(partial_path, "ab" if resume else "wb") as f:
+                    async for chunk in response.aiter_bytes(self.chunk_size):
+                        await f.write(chunk)
+
+        digest = await self._file_digest(partial_path)
+        return await self.store.commit(task.media_key, partial_path, digest, task.extension)
+
+    async def _file_digest(self, path: str) -> str:
+        hasher = hashlib.sha256()
+        async with aiofiles.open(path, "rb") as f:
+            while True:
+                chunk = await f.read(self.chunk_size)
+                if not chunk:
+                    break
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    async def join(self):
+        """
+        等待队列中的下载任务全部完成
+        :return:
+        """
+        if self._workers:
+            await self._queue.join()
+
+    async def close(self):
+        """
+        等待已提交的下载完成后停止下载协程
+        :return:
+        """
+        await self.join()
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+
+def create_media_downloader(store_dir: str, http_pool: HttpClientPool, timeout: Optional[float] = None) -> MediaDownloader:
+    """
+    按配置创建媒体下载队列
+    :param store_dir: 媒体文件根目录
+    :param http_pool: 复用连接的 httpx 连接池
+    :param timeout: 请求超时（秒）
+    :return:
+    """
+    rate_limiter = None
+    if not is_cassette_replay():
+        rate_limiter = RateLimiter(rate=config.MEDIA_DOWNLOAD_RATE, burst=config.MEDIA_DOWNLOAD_BURST)
+    return MediaDownloader(
+        store=ContentAddressedMediaStore(store_dir),
+        http_pool=http_pool,
+        concurrency=config.MEDIA_DOWNLOAD_CONCURRENCY,
+        rate_limiter=rate_limiter,
+        chunk_size=config.MEDIA_DOWNLOAD_CHUNK_SIZE,
+        max_retries=config.MEDIA_DOWNLOAD_MAX_RETRIES,
+        timeout=timeout,
+    )
@@ -0,0 +1,142 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 按内容哈希寻址的媒体文件存储：文件名为内容的 sha256，按哈希前缀分两级子目录存放，
+#            相同内容只保存一份；下载中的文件写在 .partial 目录下，中断后可以续传
+
+import asyncio
+import hashlib
+import json
+import os
+import shutil
+from typing import Dict, Optional
+
+import aiofiles
+
+from tools import utils
+
+PARTIAL_DIR_NAME = ".partial"
+INDEX_FILE_NAME = "index.jsonl"
+
+
+class ContentAddressedMediaStore:
+
+    def __init__(self, root_dir: str):
+        """
+        :param root_dir: 媒体文件根目录
+        """
+        self.root_dir = root_dir
+        self._index: Optional[Dict[str, str]] = None
+        self._lock = asyncio.Lock()
+
+    def path_for(self, digest: str, extension: str) -> str:
+        """
+        内容哈希对应的文件路径，如 root/ab/cd/abcd....jpg
+        :param digest: 内容的 sha256
+        :param extension: 文件扩展名
+        :return:
+        """
+        file_name = f"{digest}.{extension}" if extension else digest
+        return os.path.join(self.root_dir, digest[:2], digest[2:4], file_name)
+
+    def key_path(self, media_key: str, extension: str) -> str:
+        """
+        按媒体标识命名的文件路径，如 root/{pid}.jpg，提交下载任务时就可以确定；
+        下载完成后是内容文件的硬链接，不额外占用空间
+        :param media_key: 媒体标识
+        :param extension: 文件扩展名
+        :return:
+        """
+        file_name = f"{media_key}.{extension}" if extension else media_key
+        return os.path.join(self.root_dir, file_name)
+
+    def link_key(self, media_key: str, path: str, extension: str) -> str:
+        """
+        为已下载的内容文件创建按媒体标识命名的硬链接，文件系统不支持硬链接时复制一份
+        :param media_key: 媒体标识
+        :param path: 内容文件路径
+        :param extension: 文件扩展名
+        :return: 按媒体标识命名的文件路径
+        """
+        key_path = self.key_path(media_key, extension)
+        if os.path.exists(key_path):
+            return key_path
+        try:
+            os.link(path, key_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copyfile(path, key_path)
+        return key_path
+
+    def partial_path(self, media_key: str) -> str:
+        """
+        下载中的临时文件路径，同一个媒体每次下载都写到同一个文件，用于断点续传
+        :param media_key: 媒体标识，如微博图片的 pid
+        :return:
+        """
+        key_hash = hashlib.sha1(media_key.encode("utf-8")).hexdigest()
+        return os.path.join(self.root_dir, PARTIAL_DIR_NAME, f"{key_hash}.part")
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root_dir, INDEX_FILE_NAME)
+
+    async def _load_index(self) -> Dict[str, str]:
+        if self._index is not None:
+            return self._index
+        self._index = {}
+        if os.path.exists(self.index_path):
+            async with aiofiles.open(self.index_path, "r", encoding="utf-8") as f:
+                async for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:  # 进程被杀时可能留下写了一半的最后一行
+                        continue
+                    self._index[record["key"]] = record["path"]
+        return self._index
+
+    async def lookup(self, media_key: str) -> Optional[str]:
+        """
+        查询媒体是否已经下载，文件被手动删除时视为未下载
+        :param media_key:
+        :return: 文件路径，未下载时返回 None
+        """
+        async with self._lock:
+            index = await self._load_index()
+        path = index.get(media_key)
+        if path and os.path.exists(path):
+            return path
+        return None
+
+    async def commit(self, media_key: str, partial_path: str, digest: str, extension: str) -> str:
+        """
+        下载完成后把临时文件移动到内容哈希对应的位置，相同内容的文件已存在时丢弃临时文件
+        :param media_key: 媒体标识
+        :param partial_path: 已下载完成的临时文件
+        :param digest: 内容的 sha256
+        :param extension: 文件扩展名
+        :return: 最终的文件路径
+        """
+        path = self.path_for(digest, extension)
+        async with self._lock:
+            index = await self._load_index()
+            if os.path.exists(path):
+                os.remove(partial_path)
+                utils.logger.info(f"[ContentAddressedMediaStore.commit] {media_key} has same content as {path}, dedup")
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(partial_path, path)
+            self.link_key(media_key, path, extension)
+            index[media_key] = path
+            async with aiofiles.open(self.index_path, "a", encoding="utf-8") as f:
+                await f.write(json.dumps({"key": media_key, "path": path}, ensure_ascii=False) + "\n")
+        return path
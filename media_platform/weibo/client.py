@@ -19,7 +19,8 @@ import json
 import random
 import re
 import time
-from typing import Callable, Dict, List, Optional, Union
+from contextlib import nullcontext
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from urllib.parse import parse_qs, unquote, urlencode
 
 import httpx
@@ -28,13 +29,29 @@ from playwright.async_api import BrowserContext, Page
 from tenacity import retry, stop_after_attempt, wait_exponential, wait_fixed
 
 import config
+from cache.tiered_cache import get_tiered_cache
+from dedup.seen_set_factory import SEEN_NOTE, get_seen_set
+from media.downloader import MediaTask, create_media_downloader
+from metrics.crawler_metrics import record_error, record_retry
+from metrics.tracing import traced
 from notification.qy_weixin import notify_final_error
+from store.comment_watermark import CommentWatermark
 from tools import utils
+from tools.adaptive_concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from tools.crawl_session import CrawlSessionPool
+from tools.http_pool import HttpClientPool
+from tools.rate_limiter import RateLimiter, get_rate_limiter, throttle_sleep
 
 from .exception import DataFetchError
 from .field import SearchType
 from store import weibo as weibo_store
 
+# 微博风控时返回的 HTTP 状态码
+BAN_STATUS_CODES = (418, 432)
+
+# 用户容器ID的缓存时间（秒）
+CREATOR_CONTAINER_CACHE_TTL = 7 * 24 * 60 * 60
+
 
 class WeiboClient:
 
@@ -44,8 +61,12 @@ class WeiboClient:
         proxy=None,
         *,
         headers: Dict[str, str],
-        playwright_page: Page,
+        playwright_page: Optional[Page],
         cookie_dict: Dict[str, str],
+        account: str = "",
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_controller: Optional[AdaptiveConcurrencyController] = None,
+        session_pool: Optional[CrawlSessionPool] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
@@ -54,14 +75,56 @@ class WeiboClient:
         self.playwright_page = playwright_page
         self.cookie_dict = cookie_dict
         self._image_agent_host = "https://i1.wp.com/"
+        self._http_pool = HttpClientPool(timeout=timeout)
+        self._media_downloader = create_media_downloader(weibo_store.WeiboStoreImage.image_store_path, self._http_pool, timeout)
+        self.account = account
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.concurrency_controller = concurrency_controller or get_concurrency_controller()
+        # 设置会话池后每次请求轮换使用会话池中的 (账号 Cookie, 代理, User-Agent)，否则使用上面的固定配置
+        self.session_pool = session_pool
+
+    def _use_session(self):
+        return self.session_pool.use() if self.session_pool else nullcontext()
+
+    async def _throttle(self, url: str, account: Optional[str] = None, proxy: Optional[str] = None):
+        """请求发出前按 (域名, 账号, 代理) 限流"""
+        if self.rate_limiter:
+            await self.rate_limiter.acquire(
+                url,
+                account=self.account if account is None else account,
+                proxy=self.proxy if proxy is None else proxy,
+            )
+
+    async def _report_health(self, healthy: bool, reason: str = ""):
+        """把请求结果反馈给自适应并发控制器"""
+        if not self.concurrency_controller:
+            return
+        if healthy:
+            await self.concurrency_controller.record_success()
+        else:
+            await self.concurrency_controller.record_failure(reason)
 
     @retry(stop=stop_after_attempt(5),
            wait=wait_exponential(multiplier=2, min=5, max=300),
+           before_sleep=record_retry,
            retry_error_callback=notify_final_error)
     async def request(self, method, url, **kwargs) -> Union[Response, Dict]:
         enable_return_response = kwargs.pop("return_response", False)
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        async with self._use_session() as session:
+            proxy, account = self.proxy, self.account
+            if session:
+                proxy, account = session.httpx_proxy, session.account
+                kwargs["headers"] = session.apply_headers(kwargs.get("headers") or self.headers)
+            await self._throttle(url, account=account, proxy=proxy)
+            start = time.monotonic()
+            try:
+                response = await self._http_pool.request(method, url, proxy=proxy, timeout=self.timeout, **kwargs)
+            except httpx.TransportError:
+                if session:
+                    await self.session_pool.report(session, False)
+                raise
+            if session:
+                await self.session_pool.report(session, response.status_code not in BAN_STATUS_CODES, time.monotonic() - start)
 
         if enable_return_response:
             return response
@@ -69,24 +132,38 @@ class WeiboClient:
         try:
             data: Dict = response.json()
         except json.decoder.JSONDecodeError:
+            record_error("json_decode")
+            await self._report_health(False, f"response is not json, http status {response.status_code}")
             # issue: #771 搜索接口会报错432， 多次重试 + 更新 h5 cookies
             utils.logger.error(
                 f"[WeiboClient.request] request {method}:{url} err code: {response.status_code} res:{response.text}")
-            await self.playwright_page.goto(self._host)
-            await asyncio.sleep(2)
-            await self.update_cookies(browser_context=self.playwright_page.context)
+            if self.playwright_page is not None:
+                await self.playwright_page.goto(self._host)
+                await asyncio.sleep(2)
+                await self.update_cookies(browser_context=self.playwright_page.context)
             raise DataFetchError(f"get response code error: {response.status_code}")
 
+        if response.status_code in BAN_STATUS_CODES:
+            await self._report_health(False, f"http status {response.status_code}")
         ok_code = data.get("ok")
         if ok_code == 0:  # response error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+            record_error("ok_0")
+            await self._report_health(False, "ok == 0")
             # raise DataFetchError(data.get("msg", "response error"))
         elif ok_code != 1:  # unknown error
             utils.logger.error(f"[WeiboClient.request] request {method}:{url} err, res:{data}")
+            record_error("ok_unknown")
             raise DataFetchError(data.get("msg", "unknown error"))
         else:  # response right
+            await self._report_health(True)
             return data.get("data", {})
 
+    async def close(self):
+        """等待已提交的图片下载完成，然后关闭 client 持有的长连接"""
+        await self._media_downloader.close()
+        await self._http_pool.aclose()
+
     async def get(self, uri: str, params=None, headers=None, **kwargs) -> Union[Response, Dict]:
         final_uri = uri
         if isinstance(params, dict):
@@ -134,9 +211,13 @@ class WeiboClient:
         cookie_str, cookie_dict = utils.convert_cookies(cookies)
         self.headers["Cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 浏览器登录得到的会话和浏览器共用 Cookie
+        if self.session_pool and self.session_pool.primary:
+            self.session_pool.primary.update_cookies(cookie_str, cookie_dict)
         utils.logger.info(
             f"[WeiboClient.update_cookies] Cookie updated successfully, total: {len(cookie_dict)} cookies")
 
+    @traced("search_page", "keyword", "page")
     async def get_note_by_keyword(
         self,
         keyword: str,
@@ -159,6 +240,7 @@ class WeiboClient:
         }
         return await self.get(uri, params)
 
+    @traced("comment_page", "mid_id", "max_id")
     async def get_note_comments(self, mid_id: str, max_id: int, max_id_type: int = 0) -> Dict:
         """get notes comments
         :param mid_id: 微博ID
@@ -186,6 +268,10 @@ class WeiboClient:
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
         max_count: int = 10,
+        cursor: Optional[Dict] = None,
+        checkpoint: Optional[Callable] = None,
+        watermark: Optional[CommentWatermark] = None,
+        new_comments_count: Optional[int] = None,
     ):
         """
         get note all comments include sub comments
@@ -193,28 +279,56 @@ class WeiboClient:
         :param crawl_interval:
         :param callback:
         :param max_count:
+        :param cursor: 断点续爬时上次保存的分页游标 {"max_id", "max_id_type", "count"}
+        :param checkpoint: 每爬完一页后回调，参数为下一页的分页游标
+        :param watermark: 评论高水位，只有高水位之后的新评论会传给 callback
+        :param new_comments_count: 评论数的增量，找到这么多条新评论后停止翻页（接口按热度排序，不能在遇到旧评论时停止）
         :return:
         """
+        cursor = cursor or {}
         result = []
         is_end = False
-        max_id = -1
-        max_id_type = 0
-        while not is_end and len(result) < max_count:
+        max_id = cursor.get("max_id", -1)
+        max_id_type = cursor.get("max_id_type", 0)
+        fetched_count = cursor.get("count", 0)
+        found_new_count = 0
+        if watermark is not None:
+            store_callback = callback
+
+            async def callback(callback_note_id: str, comments: List[Dict]):
+                nonlocal found_new_count
+                new_comments = [c for c in comments if watermark.is_newer(*self.comment_order_key(c))]
+                found_new_count += len(new_comments)
+                if store_callback and new_comments:
+                    await store_callback(callback_note_id, new_comments)
+
+        while not is_end and fetched_count < max_count:
             comments_res = await self.get_note_comments(note_id, max_id, max_id_type)
             max_id: int = comments_res.get("max_id")
             max_id_type: int = comments_res.get("max_id_type")
             comment_list: List[Dict] = comments_res.get("data", [])
             is_end = max_id == 0
-            if len(result) + len(comment_list) > max_count:
-                comment_list = comment_list[:max_count - len(result)]
+            if fetched_count + len(comment_list) > max_count:
+                comment_list = comment_list[:max_count - fetched_count]
             if callback:  # 如果有回调函数，就执行回调函数
                 await callback(note_id, comment_list)
-            await asyncio.sleep(crawl_interval)
+            await throttle_sleep(crawl_interval)
             result.extend(comment_list)
+            fetched_count += len(comment_list)
             sub_comment_result = await self.get_comments_all_sub_comments(note_id, comment_list, callback)
             result.extend(sub_comment_result)
+            if checkpoint:
+                await checkpoint({"max_id": max_id, "max_id_type": max_id_type, "count": fetched_count})
+            if new_comments_count is not None and found_new_count >= new_comments_count:
+                utils.logger.info(f"[WeiboClient.get_note_all_comments] note_id: {note_id} found {found_new_count} new comments, stop")
+                break
         return result
 
+    @staticmethod
+    def comment_order_key(comment: Dict) -> Tuple[int, str]:
+        """评论的 (发布时间戳, 评论ID)，用于和高水位比较"""
+        return utils.rfc2822_to_timestamp(comment.get("created_at")), str(comment.get("id", ""))
+
     @staticmethod
     async def get_comments_all_sub_comments(
         note_id: str,
@@ -243,6 +357,7 @@ class WeiboClient:
                 res_sub_comments.extend(sub_comments)
         return res_sub_comments
 
+    @traced("note_detail", "note_id")
     async def get_note_info_by_id(self, note_id: str) -> Dict:
         """
         根据帖子ID获取详情
@@ -250,22 +365,29 @@ class WeiboClient:
         :return:
         """
         url = f"{self._host}/detail/{note_id}"
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request("GET", url, timeout=self.timeout, headers=self.headers)
-            if response.status_code != 200:
-                raise DataFetchError(f"get weibo detail err: {response.text}")
-            match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
-            if match:
-                render_data_json = match.group(1)
-                render_data_dict = json.loads(render_data_json)
-                note_detail = render_data_dict[0].get("status")
-                note_item = {"mblog": note_detail}
-                return note_item
-            else:
-                utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
-                return dict()
+        async with self._use_session() as session:
+            proxy, headers = (session.httpx_proxy, session.apply_headers(self.headers)) if session else (self.proxy, self.headers)
+            await self._throttle(url, account=session.account if session else None, proxy=proxy)
+            response = await self._http_pool.request("GET", url, proxy=proxy, timeout=self.timeout, headers=headers)
+        if response.status_code != 200:
+            raise DataFetchError(f"get weibo detail err: {response.text}")
+        match = re.search(r'var \$render_data = (\[.*?\])\[0\]', response.text, re.DOTALL)
+        if match:
+            render_data_json = match.group(1)
+            render_data_dict = json.loads(render_data_json)
+            note_detail = render_data_dict[0].get("status")
+            note_item = {"mblog": note_detail}
+            return note_item
+        else:
+            utils.logger.info(f"[WeiboClient.get_note_info_by_id] 未找到$render_data的值")
+            return dict()
 
-    async def get_note_image(self, image_url: str) -> bytes:
+    def get_note_image_url(self, image_url: str) -> str:
+        """
+        微博图片的高清大图地址
+        :param image_url: 帖子中的图片地址
+        :return:
+        """
         image_url = image_url[8:]  # 去掉 https://
         sub_url = image_url.split("/")
         image_url = ""
@@ -278,22 +400,40 @@ class WeiboClient:
                 image_url += sub_url[i] + "/"
         # 微博图床对外存在防盗链，所以需要代理访问
         # 由于微博图片是通过 i1.wp.com 来访问的，所以需要拼接一下
-        final_uri = (f"{self._image_agent_host}"
-                     f"{image_url}")
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            try:
-                response = await client.request("GET", final_uri, timeout=self.timeout)
-                response.raise_for_status()
-                if not response.reason_phrase == "OK":
-                    utils.logger.error(f"[WeiboClient.get_note_image] request {final_uri} err, res:{response.text}")
-                    return None
-                else:
-                    return response.content
-            except httpx.HTTPError as exc:  # some wrong when call httpx.request method, such as connection error, client error, server error or response status code is not 2xx
-                # 保留原始异常类型名称，以便开发者调试
-                utils.logger.error(
-                    f"[DouYinClient.get_aweme_media] {exc.__class__.__name__} for {exc.request.url} - {exc}")
-                return None
+        return f"{self._image_agent_host}{image_url}"
+
+    async def download_note_pics(self, note_pics: List[Dict]) -> List[Optional[str]]:
+        """
+        通过媒体下载队列并发下载帖子的图片，已下载过的图片直接返回文件路径
+        :param note_pics: 帖子的 pics 字段
+        :return: 和 note_pics 一一对应的文件路径，没有地址或下载失败时为 None
+        """
+        futures = await self.submit_note_pics(note_pics)
+        return [await future if future is not None else None for future in futures]
+
+    async def submit_note_pics(self, note_pics: List[Dict]) -> List[Optional[asyncio.Future]]:
+        """
+        把帖子的图片提交到媒体下载队列，不等待下载完成
+        :param note_pics: 帖子的 pics 字段
+        :return: 和 note_pics 一一对应的下载结果 future，没有地址时为 None；已下载过的图片 future 已完成
+        """
+        proxy = self.proxy
+        if self.session_pool:
+            async with self._use_session() as session:
+                proxy = session.httpx_proxy
+        futures = []
+        for note_pic in note_pics:
+            url = note_pic.get("url")
+            if not url:
+                futures.append(None)
+                continue
+            futures.append(await self._media_downloader.submit(MediaTask(
+                media_key=note_pic["pid"],
+                url=self.get_note_image_url(url),
+                extension=url.split(".")[-1],
+                proxy=proxy,
+            )))
+        return futures
 
     async def get_creator_container_info(self, creator_id: str) -> Dict:
         """
@@ -306,13 +446,21 @@ class WeiboClient:
         Returns: {
 
         """
-        response = await self.get(f"/u/{creator_id}", return_response=True)
-        m_weibocn_params = response.cookies.get("M_WEIBOCN_PARAMS")
-        if not m_weibocn_params:
-            raise DataFetchError("get containerid failed")
-        m_weibocn_params_dict = parse_qs(unquote(m_weibocn_params))
-        return {"fid_container_id": m_weibocn_params_dict.get("fid", [""])[0], "lfid_container_id": m_weibocn_params_dict.get("lfid", [""])[0]}
 
+        async def load_container_info() -> Dict:
+            response = await self.get(f"/u/{creator_id}", return_response=True)
+            m_weibocn_params = response.cookies.get("M_WEIBOCN_PARAMS")
+            if not m_weibocn_params:
+                raise DataFetchError("get containerid failed")
+            m_weibocn_params_dict = parse_qs(unquote(m_weibocn_params))
+            return {"fid_container_id": m_weibocn_params_dict.get("fid", [""])[0], "lfid_container_id": m_weibocn_params_dict.get("lfid", [""])[0]}
+
+        # 容器ID基本不会变化，缓存后同一个用户不需要重复请求
+        return await get_tiered_cache().get_or_load(
+            f"weibo:creator_container:{creator_id}", load_container_info, CREATOR_CONTAINER_CACHE_TTL
+        )
+
+    @traced("creator_info", "creator_id")
     async def get_creator_info_by_id(self, creator_id: str) -> Dict:
         """
         根据用户ID获取用户详情
@@ -333,6 +481,7 @@ class WeiboClient:
         user_res = await self.get(uri, params)
         return user_res
 
+    @traced("creator_page", "creator", "since_id")
     async def get_notes_by_creator(
         self,
         creator: str,
@@ -368,10 +517,7 @@ class WeiboClient:
         Returns:
 
         """
-        creator_info = await weibo_store.WeibostoreFactory.create_store().get_creator(creator_id)
-        user_last_ts = 0
-        if creator_info:
-            user_last_ts = (creator_info.last_modify_ts or 0) // 1000
+        user_last_ts = await weibo_store.get_creator_last_modify_ts(creator_id) // 1000
         user_last_ts = user_last_ts or utils.get_unix_timestamp() - 60 * 60 * 1
         return user_last_ts
 
@@ -380,6 +526,8 @@ class WeiboClient:
         creator_id: str,
         container_id: str,
         crawl_interval: float = 1.0,
+        cursor: Optional[Dict] = None,
+        checkpoint: Optional[Callable] = None,
     ) -> List[Dict]:
         """
         获取指定用户下的所有发过的帖子，该方法会一直查找一个用户下的所有帖子信息
@@ -387,16 +535,18 @@ class WeiboClient:
             creator_id:
             container_id:
             crawl_interval:
-            callback:
+            cursor: 断点续爬时上次保存的分页游标 {"since_id", "count"}
+            checkpoint: 每爬完一页后回调，参数为下一页的分页游标
 
         Returns:
 
         """
+        cursor = cursor or {}
         result = []
         notes_has_more = True
-        since_id = ""
+        since_id = cursor.get("since_id", "")
         last_modify_ts = await self.get_user_last_ts(creator_id)
-        crawler_total_count = 0
+        crawler_total_count = cursor.get("count", 0)
         while notes_has_more:
             utils.logger.info(
                 f"[WeiboClient.get_all_notes_by_creator] Fetching notes for user_id:{creator_id} with since_id:{since_id} ...")
@@ -421,9 +571,11 @@ class WeiboClient:
                     f"[WeiboClient.get_all_notes_by_creator] Stopping fetch for user_id:{creator_id}. is_continue:{is_continue}, since_id:{since_id}, notes_len:{len(notes)}")
                 break
 
-            await asyncio.sleep(utils.human_sleep(crawl_interval))
+            await throttle_sleep(utils.human_sleep(crawl_interval))
             result.extend(notes)
             crawler_total_count += 10
+            if checkpoint:
+                await checkpoint({"since_id": since_id, "count": crawler_total_count})
             notes_has_more = notes_res.get("cardlistInfo", {}).get("total", 0) > crawler_total_count
         return result
 
@@ -442,8 +594,12 @@ class WeiboClient:
             if not is_top and not is_new:  # 如果不是置顶且不是新发布的，就停止爬取
                 is_continue = False
                 break
-            if is_new:
+            # 已保存且计数没有变化的帖子不再重复保存，也不再请求长文详情和图片
+            seen_key = weibo_store.note_seen_key(note_item.get("mblog"))
+            if is_new and not (await get_seen_set(SEEN_NOTE).contains([seen_key]))[0]:
                 await self.parse_note(note_item)
+                # 写入存储成功后才加入已见集合
+                await get_seen_set(SEEN_NOTE).add([seen_key])
         return is_continue
 
     async def parse_check(self, note_item: Dict, last_modify_ts: int):
@@ -519,24 +675,19 @@ class WeiboClient:
         """
         pics = []
 
-        note_pics = mblog.get("pics")
+        note_pics = [note_pic for note_pic in mblog.get("pics") or [] if note_pic.get("url")]
         if not note_pics:
             return pics
+        # 只提交下载任务，不等待下载完成，避免图片下载的限流拖慢帖子的保存；
+        # 文件路径按 pid 确定（data/weibo/images/{pid}.{扩展名}），下载完成后即可访问
+        if config.ENABLE_GET_MEIDAS:
+            await self.submit_note_pics(note_pics)
         for note_pic in note_pics:
-            url = note_pic.get("url")
-            if not url:
-                continue
-            _pic = {
+            url = note_pic["url"]
+            pics.append({
                 "pic_id": note_pic["pid"],
                 "pic_url": url,
-                "pic_path": "",
-            }
-            if config.ENABLE_GET_MEIDAS:
-                content = await self.get_note_image(url)
-                await asyncio.sleep(config.CRAWL_INTERVAL)
-                # utils.logger.info(f"[WeiboCrawler._note_pics] Sleeping for {config.CRAWL_INTERVAL} seconds after fetching image")
-                if content != None:
-                    extension_file_name = url.split(".")[-1]
-                    _pic["pic_path"] = await weibo_store.update_weibo_note_image(note_pic["pid"], content, extension_file_name)
-            pics.append(_pic)
+                "pic_path": self._media_downloader.store.key_path(note_pic["pid"], url.split(".")[-1])
+                if config.ENABLE_GET_MEIDAS else "",
+            })
         return pics
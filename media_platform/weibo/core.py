@@ -17,6 +17,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
+from functools import partial
 import random
 from typing import Dict, List, Optional, Tuple
 
@@ -30,16 +31,29 @@ from playwright.async_api import (
 
 import config
 from base.base_crawler import AbstractCrawler
+from dedup.seen_set_factory import SEEN_NOTE, SEEN_NOTE_COMMENTS, close_seen_sets, get_seen_set
+from distributed.task_queue import TASK_CREATOR, TASK_NOTE_COMMENTS, TASK_SEARCH_PAGE, CrawlTask, new_task
+from distributed.worker import run_crawl_worker
+from frontier.abs_frontier import AbstractFrontier
+from frontier.frontier_factory import FrontierFactory
+from metrics.tracing import traced
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import weibo as weibo_store
+from store.comment_watermark import close_comment_watermark_store, get_comment_watermark_store
+from store.store_pipeline import store_pipeline
 from tools import utils
+from tools.adaptive_concurrency import create_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_pipeline import Countdown, CrawlPipeline, OrderedPageCheckpoint, Stage
+from tools.crawl_session import CrawlSession, create_session_pool, get_extra_session_cookies
+from tools.http_cassette import is_cassette_replay
+from tools.rate_limiter import throttle_sleep
 from var import crawler_type_var, source_keyword_var
 
 from .client import WeiboClient
 from .exception import DataFetchError
 from .field import SearchType
-from .help import filter_search_result_card
+from .help import filter_search_result_card, note_comments_seen_key
 from .login import WeiboLogin
 
 
@@ -48,6 +62,7 @@ class WeiboCrawler(AbstractCrawler):
     wb_client: WeiboClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    frontier: AbstractFrontier
 
     def __init__(self):
         self.index_url = "https://www.weibo.com"
@@ -55,9 +70,21 @@ class WeiboCrawler(AbstractCrawler):
         self.user_agent = utils.get_user_agent()
         self.mobile_user_agent = utils.get_mobile_user_agent()
         self.cdp_manager = None
+        self.frontier = FrontierFactory.create_crawler_frontier()
+        # 待爬取评论的帖子ID -> 搜索结果中的评论数，用于跳过评论数没有变化的帖子
+        self._note_comments_counts: Dict[str, int] = {}
 
     async def start(self):
+        if is_cassette_replay():
+            # 回放模式下所有请求都从录制文件返回，不需要启动浏览器和检查登录态
+            utils.logger.info("[WeiboCrawler.start] replay recorded responses, skip browser and login")
+            self.wb_client = await self.create_weibo_client(None)
+            await self.crawl()
+            utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
+            return
+
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(config.IP_PROXY_POOL_COUNT, enable_validate_ip=True)
             ip_proxy_info: IpInfoModel = await ip_proxy_pool.get_proxy()
@@ -77,7 +104,7 @@ class WeiboCrawler(AbstractCrawler):
                 utils.logger.info("[WeiboCrawler] 使用标准模式启动浏览器")
                 # Launch a browser context.
                 chromium = playwright.chromium
-                self.browser_context = await self.launch_browser(chromium, None, self.mobile_user_agent, headless=config.HEADLESS)
+                self.browser_context = await self.launch_browser(chromium, playwright_proxy_format, self.mobile_user_agent, headless=config.HEADLESS)
 
                 # stealth.min.js is a js script to prevent the website from detecting the crawler.
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
@@ -94,7 +121,7 @@ class WeiboCrawler(AbstractCrawler):
                     login_phone="",  # your phone number
                     browser_context=self.browser_context,
                     context_page=self.context_page,
-                    cookie_str=config.COOKIES,  # TODO: 代理和coocki绑定
+                    cookie_str=config.COOKIES,
                 )
                 await login_obj.begin()
 
@@ -108,20 +135,54 @@ class WeiboCrawler(AbstractCrawler):
                     urls=[self.mobile_index_url]
                 )
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for video and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
+            # 浏览器登录的账号和浏览器使用的代理IP绑定为主会话，配置中的其他账号各自绑定一个代理IP
+            self.wb_client.session_pool = await create_session_pool(
+                primary_cookie_str=self.wb_client.headers["Cookie"],
+                user_agent_factory=utils.get_mobile_user_agent,
+                primary_user_agent=self.wb_client.headers["User-Agent"],
+                extra_cookies=get_extra_session_cookies(config.PLATFORM),
+                ip_pool=ip_proxy_pool,
+                primary_proxy=ip_proxy_info,
+            )
+            await self.crawl(ip_proxy_pool)
             utils.logger.info("[WeiboCrawler.start] Weibo Crawler finished ...")
 
+    async def crawl(self, ip_proxy_pool=None):
+        """
+        按爬取类型执行爬取任务，结束后释放 client 和各类存储
+        :param ip_proxy_pool: 代理IP池，结束时关闭
+        :return:
+        """
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        try:
+            if config.ENABLE_DISTRIBUTED_WORKER:
+                # 从分布式任务队列中领取任务，爬取进度由所有 worker 共享，不在这里清空
+                await run_crawl_worker(self)
+            else:
+                if config.CRAWLER_TYPE == "search":
+                    # Search for video and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+                # 完整爬取结束，清空断点续爬进度，下次运行从头开始
+                await self.frontier.clear()
+        finally:
+            # 释放 API client 的长连接
+            await self.wb_client.close()
+            await self.frontier.close()
+            # 先写完存储队列，已见集合在数据写入成功后才会更新，之后再持久化
+            await store_pipeline.drain()
+            await close_seen_sets()
+            await close_comment_watermark_store()
+            if ip_proxy_pool:
+                await ip_proxy_pool.close()
+
     async def search(self):
         """
         search weibo note with keywords
@@ -133,54 +194,169 @@ class WeiboCrawler(AbstractCrawler):
             config.CRAWLER_MAX_NOTES_COUNT = weibo_limit_count
         start_page = config.START_PAGE
 
-        # Set the search type based on the configuration for weibo
-        if config.WEIBO_SEARCH_TYPE == "default":
-            search_type = SearchType.DEFAULT
-        elif config.WEIBO_SEARCH_TYPE == "real_time":
-            search_type = SearchType.REAL_TIME
-        elif config.WEIBO_SEARCH_TYPE == "popular":
-            search_type = SearchType.POPULAR
-        elif config.WEIBO_SEARCH_TYPE == "video":
-            search_type = SearchType.VIDEO
-        else:
+        search_type = self.get_search_type()
+        if search_type is None:
             utils.logger.error(f"[WeiboCrawler.search] Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
             return
 
+        if config.ENABLE_SEARCH_PIPELINE:
+            await self.search_by_pipeline(search_type, start_page, weibo_limit_count)
+            return
+
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(f"[WeiboCrawler.search] Current search keyword: {keyword}")
+            unit_key = f"search:{keyword}"
+            if await self.frontier.is_done(unit_key):
+                utils.logger.info(f"[WeiboCrawler.search] Keyword {keyword} already crawled, skip")
+                continue
+            # 断点续爬：从上次中断的页码继续
+            resume_page = (await self.frontier.get_cursor(unit_key)).get("page", start_page)
             page = 1
             while (page - start_page + 1) * weibo_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
+                if page < max(start_page, resume_page):
                     utils.logger.info(f"[WeiboCrawler.search] Skip page: {page}")
                     page += 1
                     continue
                 utils.logger.info(f"[WeiboCrawler.search] search weibo keyword: {keyword}, page: {page}")
                 search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
-                note_id_list: List[str] = []
                 note_list = filter_search_result_card(search_res.get("cards"))
-                for note_item in note_list:
-                    if note_item:
-                        mblog: Dict = note_item.get("mblog")
-                        if mblog:
-                            note_id_list.append(mblog.get("id"))
-                            await weibo_store.update_weibo_note(note_item)
-                            await self.get_note_images(mblog)
+                new_note_list, note_id_list = await self.filter_seen_notes(note_list)
+                for note_item in new_note_list:
+                    await weibo_store.update_weibo_note(note_item)
+                    await self.get_note_images(note_item.get("mblog"))
 
                 page += 1
                 
                 # Sleep after page navigation
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 
                 await self.batch_get_notes_comments(note_id_list)
+                await self.frontier.checkpoint(unit_key, {"page": page})
+            await self.frontier.mark_done(unit_key)
+
+    @staticmethod
+    def get_search_type() -> Optional[SearchType]:
+        """
+        Set the search type based on the configuration for weibo
+        :return: 配置无效时返回 None
+        """
+        if config.WEIBO_SEARCH_TYPE == "default":
+            return SearchType.DEFAULT
+        elif config.WEIBO_SEARCH_TYPE == "real_time":
+            return SearchType.REAL_TIME
+        elif config.WEIBO_SEARCH_TYPE == "popular":
+            return SearchType.POPULAR
+        elif config.WEIBO_SEARCH_TYPE == "video":
+            return SearchType.VIDEO
+        return None
+
+    async def search_by_pipeline(self, search_type: SearchType, start_page: int, page_size: int):
+        """
+        流水线模式搜索：搜索翻页、评论、图片三个阶段各自用独立的 worker 并行执行
+        :param search_type: 搜索类型
+        :param start_page: 起始页
+        :param page_size: 每页数量
+        :return:
+        """
+        semaphore = create_concurrency_limiter()
+        pipeline = CrawlPipeline(
+            stages=[
+                Stage("search", partial(self._search_page_stage, search_type=search_type, start_page=start_page, page_size=page_size),
+                      workers=config.SEARCH_PIPELINE_WORKERS.get("search", 1)),
+                Stage("comments", partial(self._note_comments_stage, semaphore=semaphore),
+                      workers=config.SEARCH_PIPELINE_WORKERS.get("comments", 1)),
+                Stage("media", self._note_media_stage, workers=config.SEARCH_PIPELINE_WORKERS.get("media", 1)),
+            ],
+            max_queue_size=config.SEARCH_PIPELINE_QUEUE_SIZE,
+        )
+
+        checkpoints: List[OrderedPageCheckpoint] = []
+        seeds: List[Tuple[str, int, OrderedPageCheckpoint]] = []
+        for keyword in config.KEYWORDS.split(","):
+            unit_key = f"search:{keyword}"
+            if await self.frontier.is_done(unit_key):
+                utils.logger.info(f"[WeiboCrawler.search_by_pipeline] Keyword {keyword} already crawled, skip")
+                continue
+            first_page = max(start_page, (await self.frontier.get_cursor(unit_key)).get("page", start_page))
+            checkpoint = OrderedPageCheckpoint(self.frontier, unit_key, first_page)
+            checkpoints.append(checkpoint)
+            if (first_page - start_page + 1) * page_size <= config.CRAWLER_MAX_NOTES_COUNT:
+                seeds.append((keyword, first_page, checkpoint))
+
+        await pipeline.run("search", seeds)
+        for checkpoint in checkpoints:
+            await checkpoint.finish()
+
+    async def _search_page_stage(self, task: Tuple[str, int, OrderedPageCheckpoint], pipeline: CrawlPipeline,
+                                 search_type: SearchType, start_page: int, page_size: int):
+        """搜索阶段：抓取一页搜索结果并保存，把评论、图片任务投递给下游阶段，同时投递下一页"""
+        keyword, page, checkpoint = task
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[WeiboCrawler._search_page_stage] search weibo keyword: {keyword}, page: {page}")
+        try:
+            search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
+        except Exception:
+            checkpoint.failed = True
+            raise
+        if (page - start_page + 2) * page_size <= config.CRAWLER_MAX_NOTES_COUNT:
+            await pipeline.emit("search", (keyword, page + 1, checkpoint))
+
+        new_note_list, note_id_list = await self.filter_seen_notes(filter_search_result_card(search_res.get("cards")))
+        for note_item in new_note_list:
+            await weibo_store.update_weibo_note(note_item)
+            if config.ENABLE_GET_MEIDAS:
+                await pipeline.emit("media", note_item.get("mblog"))
+
+        if not config.ENABLE_GET_COMMENTS:
+            note_id_list = []
+        await self.frontier.add_pending([f"comments:{note_id}" for note_id in note_id_list])
+        # 本页所有评论任务完成后才推进断点
+        countdown = Countdown(len(note_id_list), partial(checkpoint.page_done, page))
+        for note_id in note_id_list:
+            await pipeline.emit("comments", (note_id, countdown))
+        await countdown.start()
+        await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
+
+    async def _note_comments_stage(self, task: Tuple[str, Countdown], pipeline: CrawlPipeline, semaphore: asyncio.Semaphore):
+        """评论阶段"""
+        note_id, countdown = task
+        try:
+            await self.get_note_comments(note_id, semaphore)
+        finally:
+            await countdown.done()
+
+    async def _note_media_stage(self, mblog: Dict, pipeline: CrawlPipeline):
+        """图片阶段"""
+        await self.get_note_images(mblog)
+
+    async def filter_seen_notes(self, note_list: List[Dict]) -> Tuple[List[Dict], List[str]]:
+        """
+        按已见集合过滤搜索结果，未开启去重时全部保留
+        :param note_list: 搜索结果中的帖子
+        :return: (新出现或计数有变化、需要保存的帖子, 需要爬取评论的帖子ID)
+        """
+        note_list = [note_item for note_item in note_list if note_item and note_item.get("mblog")]
+        # 只过滤不加入已见集合，帖子写入存储成功后才会加入
+        new_note_list = await get_seen_set(SEEN_NOTE).filter_new(note_list, lambda item: weibo_store.note_seen_key(item["mblog"]))
+        comments_counts = {item["mblog"].get("id"): int(item["mblog"].get("comments_count") or 0) for item in note_list}
+        crawled_list = await get_seen_set(SEEN_NOTE_COMMENTS).contains(
+            [note_comments_seen_key(note_id, count) for note_id, count in comments_counts.items()])
+        note_id_list = [note_id for note_id, crawled in zip(comments_counts, crawled_list) if not crawled]
+        if config.ENABLE_GET_COMMENTS:
+            self._note_comments_counts.update({note_id: comments_counts[note_id] for note_id in note_id_list})
+        if len(new_note_list) < len(note_list):
+            utils.logger.info(
+                f"[WeiboCrawler.filter_seen_notes] skip {len(note_list) - len(new_note_list)} unchanged notes, "
+                f"{len(note_list) - len(note_id_list)} notes comments already crawled")
+        return new_note_list, note_id_list
 
     async def get_specified_notes(self):
         """
         get specified notes info
         :return:
         """
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        semaphore = create_concurrency_limiter()
         task_list = [self.get_note_info_task(note_id=note_id, semaphore=semaphore) for note_id in config.WEIBO_SPECIFIED_ID_LIST]
         video_details = await asyncio.gather(*task_list)
         for note_item in video_details:
@@ -200,8 +376,7 @@ class WeiboCrawler(AbstractCrawler):
                 result = await self.wb_client.get_note_info_by_id(note_id)
                 
                 # Sleep after fetching note details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_info_task] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching note details {note_id}")
+                await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 
                 return result
             except DataFetchError as ex:
@@ -222,7 +397,8 @@ class WeiboCrawler(AbstractCrawler):
             return
 
         utils.logger.info(f"[WeiboCrawler.batch_get_notes_comments] note ids:{note_id_list}")
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        await self.frontier.add_pending([f"comments:{note_id}" for note_id in note_id_list])
+        semaphore = create_concurrency_limiter()
         task_list: List[Task] = []
         for note_id in note_id_list:
             task = asyncio.create_task(self.get_note_comments(note_id, semaphore), name=note_id)
@@ -236,25 +412,63 @@ class WeiboCrawler(AbstractCrawler):
         :param semaphore:
         :return:
         """
+        unit_key = f"comments:{note_id}"
+        if await self.frontier.is_done(unit_key):
+            utils.logger.info(f"[WeiboCrawler.get_note_comments] note_id: {note_id} comments already crawled, skip")
+            return
         async with semaphore:
             try:
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] begin get note_id: {note_id} comments ...")
-                
-                # Sleep before fetching comments
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[WeiboCrawler.get_note_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for note {note_id}")
-                
-                await self.wb_client.get_note_all_comments(
-                    note_id=note_id,
-                    crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,  # Use fixed interval instead of random
-                    callback=weibo_store.batch_update_weibo_note_comments,
-                    max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
-                )
+                await self.crawl_note_comments(note_id)
             except DataFetchError as ex:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] get note_id: {note_id} comment error: {ex}")
             except Exception as e:
                 utils.logger.error(f"[WeiboCrawler.get_note_comments] may be been blocked, err:{e}")
 
+    @traced("note_comments", "note_id")
+    async def crawl_note_comments(self, note_id: str, comments_count: Optional[int] = None):
+        """
+        crawl all comments of the note, errors are raised to the caller
+        :param note_id:
+        :param comments_count: 帖子当前的评论数，为空时使用搜索结果中记录的评论数，未知时不跳过
+        :return:
+        """
+        unit_key = f"comments:{note_id}"
+        if comments_count is None:
+            comments_count = self._note_comments_counts.pop(note_id, None)
+        watermark_store = get_comment_watermark_store()
+        watermark = await watermark_store.get(note_id) if watermark_store else None
+        if watermark and comments_count is not None and watermark.comments_count == comments_count:
+            utils.logger.info(f"[WeiboCrawler.crawl_note_comments] note_id: {note_id} comments count unchanged, skip")
+            await self.frontier.mark_done(unit_key)
+            return
+        new_comments_count = None
+        if watermark and comments_count is not None and watermark.comments_count >= 0:
+            new_comments_count = max(0, comments_count - watermark.comments_count)
+        utils.logger.info(f"[WeiboCrawler.crawl_note_comments] begin get note_id: {note_id} comments ...")
+
+        # Sleep before fetching comments
+        await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
+
+        comments = await self.wb_client.get_note_all_comments(
+            note_id=note_id,
+            crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,  # Use fixed interval instead of random
+            callback=weibo_store.batch_update_weibo_note_comments,
+            max_count=config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES,
+            cursor=await self.frontier.get_cursor(unit_key),
+            checkpoint=partial(self.frontier.checkpoint, unit_key),
+            watermark=watermark,
+            new_comments_count=new_comments_count,
+        )
+        await self.frontier.mark_done(unit_key)
+        if watermark is not None:
+            watermark.advance(comments, self.wb_client.comment_order_key)
+            if comments_count is not None:
+                watermark.comments_count = comments_count
+            await watermark_store.save(note_id, watermark)
+        if comments_count is not None:
+            # 评论全部写入存储成功后才标记为已完整爬取
+            await store_pipeline.mark_seen(SEEN_NOTE_COMMENTS, [note_comments_seen_key(note_id, comments_count)])
+
     async def get_note_images(self, mblog: Dict):
         """
         get note images
@@ -265,55 +479,198 @@ class WeiboCrawler(AbstractCrawler):
             utils.logger.info(f"[WeiboCrawler.get_note_images] Crawling image mode is not enabled")
             return
 
-        pics: Dict = mblog.get("pics")
+        pics: List[Dict] = mblog.get("pics")
         if not pics:
             return
-        for pic in pics:
-            url = pic.get("url")
-            if not url:
-                continue
-            content = await self.wb_client.get_note_image(url)
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[WeiboCrawler.get_note_images] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching image")
-            if content != None:
-                extension_file_name = url.split(".")[-1]
-                await weibo_store.update_weibo_note_image(pic["pid"], content, extension_file_name)
+        await self.wb_client.download_note_pics(pics)
 
     async def get_creators_and_notes(self) -> None:
         """
         Get creator's information and their notes and comments
+        有多个登录会话时每个会话一个 worker，从共享队列中领取创作者并行爬取
         Returns:
 
         """
         utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] {len(config.WEIBO_CREATOR_ID_LIST)} Begin get weibo creators")
-        for user_id in random.sample(config.WEIBO_CREATOR_ID_LIST, len(config.WEIBO_CREATOR_ID_LIST)):
-            createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
-            if createor_info_res:
-                createor_info: Dict = createor_info_res.get("userInfo", {})
-                # utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {createor_info}")
-                if not createor_info:
-                    raise DataFetchError("Get creator info error")
-
-                last_modify_ts = utils.get_current_timestamp()
-                # Get all note information of the creator
-                all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
-                    creator_id=user_id,
-                    container_id=f"107603{user_id}",
-                    crawl_interval=config.CRAWL_INTERVAL,
-                )
-                await weibo_store.save_creator(user_id, user_info=createor_info, last_modify_ts=last_modify_ts)
+        creator_ids = random.sample(config.WEIBO_CREATOR_ID_LIST, len(config.WEIBO_CREATOR_ID_LIST))
+        session_pool = self.wb_client.session_pool
+        if not session_pool or len(session_pool.active_sessions) <= 1:
+            for user_id in creator_ids:
+                await self.get_creator_and_notes(user_id)
+            return
+
+        # 队列元素为 (创作者ID, 已失败次数)
+        creator_queue: asyncio.Queue = asyncio.Queue()
+        for user_id in creator_ids:
+            creator_queue.put_nowait((user_id, 0))
+        await asyncio.gather(*[
+            self.creator_session_worker(session, creator_queue) for session in session_pool.active_sessions
+        ])
+        remaining_ids = []
+        while not creator_queue.empty():
+            remaining_ids.append(creator_queue.get_nowait()[0])
+        if remaining_ids:
+            utils.logger.error(
+                f"[WeiboCrawler.get_creators_and_notes] all sessions are parked, {len(remaining_ids)} creators not crawled: {remaining_ids}")
+
+    async def creator_session_worker(self, session: CrawlSession, creator_queue: asyncio.Queue):
+        """
+        绑定一个会话，依次领取并爬取创作者；爬取失败的创作者放回队列重试，最多尝试 WEIBO_CREATOR_MAX_ATTEMPTS 次；
+        会话登录态失效且无法恢复时暂停该会话，剩余的创作者由其他会话继续爬取
+        Args:
+            session: 该 worker 使用的会话
+            creator_queue: 待爬取的 (创作者ID, 已失败次数)
+
+        Returns:
+
+        """
+        async with self.wb_client.session_pool.bind(session):
+            if not await self.ensure_session_alive(session):
+                return
+            while not creator_queue.empty():
+                user_id, failures = creator_queue.get_nowait()
+                try:
+                    await self.get_creator_and_notes(user_id)
+                except Exception as e:
+                    utils.logger.error(f"[WeiboCrawler.creator_session_worker] {session} crawl creator {user_id} error: {e}")
+                    if not await self.ensure_session_alive(session):
+                        # 会话失效导致的失败不计入重试次数
+                        creator_queue.put_nowait((user_id, failures))
+                        return
+                    if failures + 1 < config.WEIBO_CREATOR_MAX_ATTEMPTS:
+                        creator_queue.put_nowait((user_id, failures + 1))
+                    else:
+                        utils.logger.error(
+                            f"[WeiboCrawler.creator_session_worker] give up creator {user_id} after {failures + 1} attempts")
+
+    async def ensure_session_alive(self, session: CrawlSession) -> bool:
+        """
+        检查当前会话的登录态，浏览器登录的主会话尝试从浏览器刷新 Cookie，仍然失效时暂停该会话
+        Args:
+            session: 已绑定到当前上下文的会话
+
+        Returns: 会话是否可用
 
-                # 评论
-                # note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if note_item.get("mblog", {}).get("id")]
-                # await self.batch_get_notes_comments(note_ids)
-                await asyncio.sleep(utils.human_sleep(config.CRAWL_INTERVAL))
+        """
+        if await self.wb_client.pong():
+            return True
+        if session.primary:
+            utils.logger.info(f"[WeiboCrawler.ensure_session_alive] refresh cookies of {session} from browser")
+            await self.context_page.goto(self.mobile_index_url)
+            await asyncio.sleep(3)
+            await self.wb_client.update_cookies(browser_context=self.browser_context, urls=[self.mobile_index_url])
+            if await self.wb_client.pong():
+                return True
+        self.wb_client.session_pool.park(session, "pong failed")
+        return False
+
+    @traced("creator", "user_id")
+    async def get_creator_and_notes(self, user_id: str) -> None:
+        """
+        Get one creator's information and notes
+        Args:
+            user_id:
+
+        Returns:
+
+        """
+        unit_key = f"creator:{user_id}"
+        if await self.frontier.is_done(unit_key):
+            utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator {user_id} already crawled, skip")
+            return
+        createor_info_res: Dict = await self.wb_client.get_creator_info_by_id(creator_id=user_id)
+        if createor_info_res:
+            createor_info: Dict = createor_info_res.get("userInfo", {})
+            # utils.logger.info(f"[WeiboCrawler.get_creators_and_notes] creator info: {createor_info}")
+            if not createor_info:
+                raise DataFetchError("Get creator info error")
+
+            last_modify_ts = utils.get_current_timestamp()
+            # Get all note information of the creator
+            all_notes_list = await self.wb_client.get_all_notes_by_creator_id(
+                creator_id=user_id,
+                container_id=f"107603{user_id}",
+                crawl_interval=config.CRAWL_INTERVAL,
+                cursor=await self.frontier.get_cursor(unit_key),
+                checkpoint=partial(self.frontier.checkpoint, unit_key),
+            )
+            await weibo_store.save_creator(user_id, user_info=createor_info, last_modify_ts=last_modify_ts)
+            await self.frontier.mark_done(unit_key)
+
+            # 评论
+            # note_ids = [note_item.get("mblog", {}).get("id") for note_item in all_notes_list if note_item.get("mblog", {}).get("id")]
+            # await self.batch_get_notes_comments(note_ids)
+            await throttle_sleep(utils.human_sleep(config.CRAWL_INTERVAL))
+        else:
+            utils.logger.error(f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_id:{user_id}")
+
+    async def handle_task(self, task: CrawlTask) -> List[CrawlTask]:
+        """
+        分布式模式下处理一个任务
+        :param task:
+        :return: 派生出的后续任务
+        """
+        payload = task.payload
+        if payload.get("keyword"):
+            source_keyword_var.set(payload["keyword"])
+        if task.task_type == TASK_SEARCH_PAGE:
+            return await self.handle_search_page_task(payload["keyword"], payload["page"], payload.get("start_page", config.START_PAGE))
+        elif task.task_type == TASK_CREATOR:
+            await self.get_creator_and_notes(payload["creator_id"])
+        elif task.task_type == TASK_NOTE_COMMENTS:
+            if await self.frontier.is_done(f"comments:{payload['note_id']}"):
+                utils.logger.info(f"[WeiboCrawler.handle_task] note {payload['note_id']} comments already crawled, skip")
             else:
-                utils.logger.error(f"[WeiboCrawler.get_creators_and_notes] get creator info error, creator_id:{user_id}")
+                await self.crawl_note_comments(payload["note_id"], payload.get("comments_count"))
+        else:
+            raise ValueError(f"Unknown task type: {task.task_type}")
+        return []
+
+    async def handle_search_page_task(self, keyword: str, page: int, start_page: int) -> List[CrawlTask]:
+        """
+        抓取一页搜索结果并保存，评论和下一页作为后续任务写回队列
+        :param keyword: 关键词
+        :param page: 页码
+        :param start_page: 起始页，用于计算最大爬取数量
+        :return:
+        """
+        weibo_limit_count = 10  # weibo limit page fixed value
+        search_type = self.get_search_type()
+        if search_type is None:
+            raise ValueError(f"Invalid WEIBO_SEARCH_TYPE: {config.WEIBO_SEARCH_TYPE}")
+        utils.logger.info(f"[WeiboCrawler.handle_search_page_task] search weibo keyword: {keyword}, page: {page}")
+        search_res = await self.wb_client.get_note_by_keyword(keyword=keyword, page=page, search_type=search_type)
+        follow_up_tasks: List[CrawlTask] = []
+        note_list = filter_search_result_card(search_res.get("cards"))
+        new_note_list, note_id_list = await self.filter_seen_notes(note_list)
+        for note_item in new_note_list:
+            await weibo_store.update_weibo_note(note_item)
+            await self.get_note_images(note_item.get("mblog"))
+        if config.ENABLE_GET_COMMENTS:
+            # 评论任务可能由其他 worker 执行，评论数随任务传递
+            follow_up_tasks.extend(
+                new_task(config.PLATFORM, TASK_NOTE_COMMENTS, f"comments:{note_id}",
+                         {"note_id": note_id, "keyword": keyword, "comments_count": self._note_comments_counts.pop(note_id, None)})
+                for note_id in note_id_list
+            )
+
+        max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, weibo_limit_count)
+        if note_list and (page - start_page + 2) * weibo_limit_count <= max_notes_count:
+            follow_up_tasks.append(new_task(config.PLATFORM, TASK_SEARCH_PAGE, f"search:{keyword}:{page + 1}",
+                                            {"keyword": keyword, "page": page + 1, "start_page": start_page}))
+        await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
+        return follow_up_tasks
 
     async def create_weibo_client(self, httpx_proxy: Optional[str]) -> WeiboClient:
         """Create weibo client"""
         utils.logger.info("[WeiboCrawler.create_weibo_client] Begin create weibo API client ...")
-        cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies(urls=[self.mobile_index_url]))
+        if is_cassette_replay():
+            # 回放模式下没有浏览器，Cookie 不参与请求指纹，使用配置中的 Cookie 即可
+            cookie_str, cookie_dict = config.COOKIES, utils.convert_str_cookie_to_dict(config.COOKIES)
+            playwright_page = None
+        else:
+            cookie_str, cookie_dict = utils.convert_cookies(await self.browser_context.cookies(urls=[self.mobile_index_url]))
+            playwright_page = self.context_page
         weibo_client_obj = WeiboClient(
             proxy=httpx_proxy,
             headers={
@@ -323,7 +680,7 @@ class WeiboCrawler(AbstractCrawler):
                 "Referer": "https://m.weibo.cn",
                 "Content-Type": "application/json;charset=UTF-8",
             },
-            playwright_page=self.context_page,
+            playwright_page=playwright_page,
             cookie_dict=cookie_dict,
         )
         return weibo_client_obj
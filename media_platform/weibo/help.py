@@ -34,3 +34,13 @@ def filter_search_result_card(card_list: List[Dict]) -> List[Dict]:
                     note_list.append(card_group_item)
 
     return note_list
+
+
+def note_comments_seen_key(note_id: str, comments_count: int) -> str:
+    """
+    帖子评论已完整爬取的 key，评论数变化后需要重新爬取
+    :param note_id:
+    :param comments_count:
+    :return:
+    """
+    return f"{note_id}:{comments_count}"
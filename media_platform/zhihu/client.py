@@ -11,6 +11,8 @@
 # -*- coding: utf-8 -*-
 import asyncio
 import json
+import time
+from contextlib import nullcontext
 from typing import Any, Callable, Dict, List, Optional, Union
 from urllib.parse import urlencode
 
@@ -22,12 +24,20 @@ from tenacity import retry, stop_after_attempt, wait_fixed
 import config
 from base.base_crawler import AbstractApiClient
 from constant import zhihu as zhihu_constant
+from metrics.crawler_metrics import record_error, record_retry
+from metrics.tracing import traced
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
+from store.comment_watermark import CommentWatermark
 from tools import utils
+from tools.adaptive_concurrency import AdaptiveConcurrencyController, get_concurrency_controller
+from tools.crawl_session import CrawlSession, CrawlSessionPool
+from tools.http_cassette import is_cassette_replay
+from tools.http_pool import HttpClientPool
+from tools.rate_limiter import RateLimiter, get_rate_limiter, throttle_sleep
 
 from .exception import DataFetchError, ForbiddenError
 from .field import SearchSort, SearchTime, SearchType
-from .help import ZhihuExtractor, sign
+from .help import ZhihuExtractor, async_sign, close_sign_workers
 
 
 class ZhiHuClient(AbstractApiClient):
@@ -38,33 +48,51 @@ class ZhiHuClient(AbstractApiClient):
         proxy=None,
         *,
         headers: Dict[str, str],
-        playwright_page: Page,
+        playwright_page: Optional[Page],
         cookie_dict: Dict[str, str],
+        account: str = "",
+        rate_limiter: Optional[RateLimiter] = None,
+        concurrency_controller: Optional[AdaptiveConcurrencyController] = None,
+        session_pool: Optional[CrawlSessionPool] = None,
     ):
         self.proxy = proxy
         self.timeout = timeout
         self.default_headers = headers
         self.cookie_dict = cookie_dict
         self._extractor = ZhihuExtractor()
+        self._http_pool = HttpClientPool(timeout=timeout)
+        self.account = account
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.concurrency_controller = concurrency_controller or get_concurrency_controller()
+        # 设置会话池后每次请求轮换使用会话池中的 (账号 Cookie, 代理, User-Agent)，否则使用上面的固定配置
+        self.session_pool = session_pool
 
-    async def _pre_headers(self, url: str) -> Dict:
+    def _use_session(self):
+        return self.session_pool.use() if self.session_pool else nullcontext()
+
+    async def _pre_headers(self, url: str, session: Optional[CrawlSession] = None) -> Dict:
         """
         请求头参数签名
         Args:
             url:  请求的URL需要包含请求的参数
+            session: 当前请求使用的会话，签名需要使用该会话的 Cookie
         Returns:
 
         """
-        d_c0 = self.cookie_dict.get("d_c0")
+        headers = session.apply_headers(self.default_headers) if session else self.default_headers.copy()
+        if is_cassette_replay():
+            # 回放模式下请求不会发到平台，签名不参与请求指纹，跳过签名
+            return headers
+        cookie_dict = session.cookie_dict if session else self.cookie_dict
+        d_c0 = cookie_dict.get("d_c0")
         if not d_c0:
             raise Exception("d_c0 not found in cookies")
-        sign_res = sign(url, self.default_headers["cookie"])
-        headers = self.default_headers.copy()
+        sign_res = await async_sign(url, headers["cookie"])
         headers['x-zst-81'] = sign_res["x-zst-81"]
         headers['x-zse-96'] = sign_res["x-zse-96"]
         return headers
 
-    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
+    @retry(stop=stop_after_attempt(3), wait=wait_fixed(1), before_sleep=record_retry)
     async def request(self, method, url, **kwargs) -> Union[str, Any]:
         """
         封装httpx的公共请求方法，对请求响应做一些处理
@@ -78,37 +106,68 @@ class ZhiHuClient(AbstractApiClient):
         """
         # return response.text
         return_response = kwargs.pop('return_response', False)
-
-        async with httpx.AsyncClient(proxy=self.proxy) as client:
-            response = await client.request(method, url, timeout=self.timeout, **kwargs)
+        route = kwargs.pop('route', None)
+
+        async with self._use_session() as session:
+            proxy, account = self.proxy, self.account
+            if session:
+                proxy, account = session.httpx_proxy, session.account
+                kwargs["headers"] = session.apply_headers(kwargs.get("headers") or self.default_headers)
+            if self.rate_limiter:
+                await self.rate_limiter.acquire(url, account=account, proxy=proxy)
+            start = time.monotonic()
+            try:
+                response = await self._http_pool.request(method, url, proxy=proxy, route=route, timeout=self.timeout, **kwargs)
+            except httpx.TransportError:
+                if session:
+                    await self.session_pool.report(session, False)
+                raise
+            if session:
+                await self.session_pool.report(session, response.status_code != 403, time.monotonic() - start)
 
         if response.status_code != 200:
             utils.logger.error(f"[ZhiHuClient.request] Requset Url: {url}, Request error: {response.text}")
             if response.status_code == 403:
+                if self.concurrency_controller:
+                    await self.concurrency_controller.record_failure("http status 403")
                 raise ForbiddenError(response.text)
             elif response.status_code == 404:  # 如果一个content没有评论也是404
                 return {}
 
             raise DataFetchError(response.text)
 
+        if self.concurrency_controller:
+            await self.concurrency_controller.record_success()
         if return_response:
             return response.text
         try:
             data: Dict = response.json()
             if data.get("error"):
                 utils.logger.error(f"[ZhiHuClient.request] Request error: {data}")
+                record_error("api_error")
                 raise DataFetchError(data.get("error", {}).get("message"))
             return data
         except json.JSONDecodeError:
             utils.logger.error(f"[ZhiHuClient.request] Request error: {response.text}")
+            record_error("json_decode")
             raise DataFetchError(response.text)
 
+    async def close(self):
+        """
+        关闭 client 持有的长连接和签名子进程
+        Returns:
+
+        """
+        await self._http_pool.aclose()
+        await close_sign_workers()
+
     async def get(self, uri: str, params=None, **kwargs) -> Union[Response, Dict, str]:
         """
         GET请求，对请求头签名
         Args:
             uri: 请求路由
             params: 请求参数
+            **kwargs: 透传给 request，路径中有非数字参数时通过 route 传入路由模板，用作指标的接口名
 
         Returns:
 
@@ -116,9 +175,11 @@ class ZhiHuClient(AbstractApiClient):
         final_uri = uri
         if isinstance(params, dict):
             final_uri += '?' + urlencode(params)
-        headers = await self._pre_headers(final_uri)
         base_url = (zhihu_constant.ZHIHU_URL if "/p/" not in uri else zhihu_constant.ZHIHU_ZHUANLAN_URL)
-        return await self.request(method="GET", url=base_url + final_uri, headers=headers, **kwargs)
+        # 签名和请求必须使用同一个会话的 Cookie
+        async with self._use_session() as session:
+            headers = await self._pre_headers(final_uri, session)
+            return await self.request(method="GET", url=base_url + final_uri, headers=headers, **kwargs)
 
     async def pong(self) -> bool:
         """
@@ -152,6 +213,9 @@ class ZhiHuClient(AbstractApiClient):
         cookie_str, cookie_dict = utils.convert_cookies(await browser_context.cookies())
         self.default_headers["cookie"] = cookie_str
         self.cookie_dict = cookie_dict
+        # 浏览器登录得到的会话和浏览器共用 Cookie
+        if self.session_pool and self.session_pool.primary:
+            self.session_pool.primary.update_cookies(cookie_str, cookie_dict)
 
     async def get_current_user_info(self) -> Dict:
         """
@@ -162,6 +226,7 @@ class ZhiHuClient(AbstractApiClient):
         params = {"include": "email,is_active,is_bind_phone"}
         return await self.get("/api/v4/me", params)
 
+    @traced("search_page", "keyword", "page")
     async def get_note_by_keyword(
         self,
         keyword: str,
@@ -204,6 +269,7 @@ class ZhiHuClient(AbstractApiClient):
         utils.logger.info(f"[ZhiHuClient.get_note_by_keyword] Search result: {search_res}")
         return self._extractor.extract_contents_from_search(search_res)
 
+    @traced("comment_page", "content_id", "offset")
     async def get_root_comments(
         self,
         content_id: str,
@@ -235,6 +301,7 @@ class ZhiHuClient(AbstractApiClient):
         # }
         # return await self.get(uri, params)
 
+    @traced("comment_page", "root_comment_id", "offset")
     async def get_child_comments(
         self,
         root_comment_id: str,
@@ -266,6 +333,10 @@ class ZhiHuClient(AbstractApiClient):
         content: ZhihuContent,
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        cursor: Optional[Dict] = None,
+        checkpoint: Optional[Callable] = None,
+        watermark: Optional[CommentWatermark] = None,
+        new_comments_count: Optional[int] = None,
     ) -> List[ZhihuComment]:
         """
         获取指定帖子下的所有一级评论，该方法会一直查找一个帖子下的所有评论信息
@@ -273,32 +344,60 @@ class ZhiHuClient(AbstractApiClient):
             content: 内容详情对象(问题｜文章｜视频)
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
+            cursor: 断点续爬时上次保存的分页游标 {"offset"}
+            checkpoint: 每爬完一页后回调，参数为下一页的分页游标
+            watermark: 评论高水位，按时间倒序爬取，只有高水位之后的新评论会传给 callback；
+                       旧的一级评论在子评论数增加时重新爬取子评论
+            new_comments_count: 评论数的增量（包含子评论），遇到旧评论后继续翻页直到找到这么多条新评论，为空时遇到旧评论即停止
 
         Returns:
 
         """
         result: List[ZhihuComment] = []
         is_end: bool = False
-        offset: str = ""
+        offset: str = (cursor or {}).get("offset", "")
         limit: int = 10
+        order_by: str = "score" if watermark is None else "ts"
+        found_new_count = 0
         while not is_end:
-            root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit)
+            root_comment_res = await self.get_root_comments(content.content_id, content.content_type, offset, limit, order_by)
             if not root_comment_res:
                 break
             paging_info = root_comment_res.get("paging", {})
             is_end = paging_info.get("is_end")
             offset = self._extractor.extract_offset(paging_info)
             comments = self._extractor.extract_comments(content, root_comment_res.get("data"))
-
             if not comments:
                 break
 
-            if callback:
+            sub_comment_parents = comments
+            reached_old = False
+            if watermark is not None:
+                new_comments = [c for c in comments if watermark.is_newer(c.publish_time, c.comment_id)]
+                reached_old = len(new_comments) < len(comments)
+                # 新回复会让旧的一级评论的子评论数增加，这些评论的子评论需要重新爬取
+                new_comment_ids = {c.comment_id for c in new_comments}
+                sub_comment_parents = new_comments + [
+                    c for c in comments if c.comment_id not in new_comment_ids
+                    and (c.sub_comment_count or 0) > watermark.sub_comment_counts.get(c.comment_id, 0)
+                ]
+                comments = new_comments
+
+            if callback and comments:
                 await callback(comments)
 
             result.extend(comments)
-            await self.get_comments_all_sub_comments(content, comments, crawl_interval=crawl_interval, callback=callback)
-            await asyncio.sleep(crawl_interval)
+            sub_comments = await self.get_comments_all_sub_comments(
+                content, sub_comment_parents, crawl_interval=crawl_interval, callback=callback, watermark=watermark)
+            found_new_count += len(comments) + len(sub_comments)
+            if checkpoint:
+                await checkpoint({"offset": offset})
+            if reached_old and (new_comments_count is None or found_new_count >= new_comments_count
+                                or not config.ENABLE_GET_SUB_COMMENTS):
+                utils.logger.info(
+                    f"[ZhihuClient.get_note_all_comments] content_id: {content.content_id} found {found_new_count} new comments, stop")
+                break
+            await throttle_sleep(crawl_interval)
         return result
 
     async def get_comments_all_sub_comments(
@@ -307,6 +406,7 @@ class ZhiHuClient(AbstractApiClient):
         comments: List[ZhihuComment],
         crawl_interval: float = 1.0,
         callback: Optional[Callable] = None,
+        watermark: Optional[CommentWatermark] = None,
     ) -> List[ZhihuComment]:
         """
         获取指定评论下的所有子评论
@@ -315,6 +415,7 @@ class ZhiHuClient(AbstractApiClient):
             comments: 评论列表
             crawl_interval: 爬取一次笔记的延迟单位（秒）
             callback: 一次笔记爬取结束后
+            watermark: 评论高水位，只返回高水位之后的新子评论，并记录每条评论已爬取的子评论数
 
         Returns:
 
@@ -342,13 +443,18 @@ class ZhiHuClient(AbstractApiClient):
                 if not sub_comments:
                     break
 
-                if callback:
+                if watermark is not None:
+                    sub_comments = [c for c in sub_comments if watermark.is_newer(c.publish_time, c.comment_id)]
+                if callback and sub_comments:
                     await callback(sub_comments)
 
                 all_sub_comments.extend(sub_comments)
-                await asyncio.sleep(crawl_interval)
+                await throttle_sleep(crawl_interval)
+            if watermark is not None:
+                watermark.sub_comment_counts[parment_comment.comment_id] = parment_comment.sub_comment_count
         return all_sub_comments
 
+    @traced("creator_info", "url_token")
     async def get_creator_info(self, url_token: str) -> Optional[ZhihuCreator]:
         """
         获取创作者信息
@@ -358,10 +464,11 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        uri = f"/people/{url_token}"
-        html_content: str = await self.get(uri, return_response=True)
+        route = "/people/{url_token}"
+        html_content: str = await self.get(route.format(url_token=url_token), return_response=True, route=route)
         return self._extractor.extract_creator(url_token, html_content)
 
+    @traced("creator_page", "url_token", "offset")
     async def get_creator_answers(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
         获取创作者的回答
@@ -374,7 +481,8 @@ class ZhiHuClient(AbstractApiClient):
 
 
         """
-        uri = f"/api/v4/members/{url_token}/answers"
+        route = "/api/v4/members/{url_token}/answers"
+        uri = route.format(url_token=url_token)
         params = {
             "include":
             "data[*].is_normal,admin_closed_comment,reward_info,is_collapsed,annotation_action,annotation_detail,collapse_reason,collapsed_by,suggest_edit,comment_count,can_comment,content,editable_content,attachment,voteup_count,reshipment_settings,comment_permission,created_time,updated_time,review_info,excerpt,paid_info,reaction_instruction,is_labeled,label_info,relationship.is_authorized,voting,is_author,is_thanked,is_nothelp;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;data[*].question.has_publishing_draft,relationship",
@@ -382,8 +490,9 @@ class ZhiHuClient(AbstractApiClient):
             "limit": limit,
             "order_by": "created"
         }
-        return await self.get(uri, params)
+        return await self.get(uri, params, route=route)
 
+    @traced("creator_page", "url_token", "offset")
     async def get_creator_articles(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
         获取创作者的文章
@@ -395,7 +504,8 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        uri = f"/api/v4/members/{url_token}/articles"
+        route = "/api/v4/members/{url_token}/articles"
+        uri = route.format(url_token=url_token)
         params = {
             "include":
             "data[*].comment_count,suggest_edit,is_normal,thumbnail_extra_info,thumbnail,can_comment,comment_permission,admin_closed_comment,content,voteup_count,created,updated,upvoted_followees,voting,review_info,reaction_instruction,is_labeled,label_info;data[*].vessay_info;data[*].author.badge[?(type=best_answerer)].topics;data[*].author.vip_info;",
@@ -403,8 +513,9 @@ class ZhiHuClient(AbstractApiClient):
             "limit": limit,
             "order_by": "created"
         }
-        return await self.get(uri, params)
+        return await self.get(uri, params, route=route)
 
+    @traced("creator_page", "url_token", "offset")
     async def get_creator_videos(self, url_token: str, offset: int = 0, limit: int = 20) -> Dict:
         """
         获取创作者的视频
@@ -416,14 +527,15 @@ class ZhiHuClient(AbstractApiClient):
         Returns:
 
         """
-        uri = f"/api/v4/members/{url_token}/zvideos"
+        route = "/api/v4/members/{url_token}/zvideos"
+        uri = route.format(url_token=url_token)
         params = {
             "include": "similar_zvideo,creation_relationship,reaction_instruction",
             "offset": offset,
             "limit": limit,
             "similar_aggregation": "true",
         }
-        return await self.get(uri, params)
+        return await self.get(uri, params, route=route)
 
     async def get_all_anwser_by_creator(self, creator: ZhihuCreator, crawl_interval: float = 1.0, callback: Optional[Callable] = None) -> List[ZhihuContent]:
         """
@@ -452,7 +564,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await throttle_sleep(crawl_interval)
         return all_contents
 
     async def get_all_articles_by_creator(
@@ -486,7 +598,7 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await throttle_sleep(crawl_interval)
         return all_contents
 
     async def get_all_videos_by_creator(
@@ -520,9 +632,10 @@ class ZhiHuClient(AbstractApiClient):
                 await callback(contents)
             all_contents.extend(contents)
             offset += limit
-            await asyncio.sleep(crawl_interval)
+            await throttle_sleep(crawl_interval)
         return all_contents
 
+    @traced("note_detail", "answer_id")
     async def get_answer_info(
         self,
         question_id: str,
@@ -541,6 +654,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_answer_content_from_html(response_html)
 
+    @traced("note_detail", "article_id")
     async def get_article_info(self, article_id: str) -> Optional[ZhihuContent]:
         """
         获取文章信息
@@ -554,6 +668,7 @@ class ZhiHuClient(AbstractApiClient):
         response_html = await self.get(uri, return_response=True)
         return self._extractor.extract_article_content_from_html(response_html)
 
+    @traced("note_detail", "video_id")
     async def get_video_info(self, video_id: str) -> Optional[ZhihuContent]:
         """
         获取视频信息
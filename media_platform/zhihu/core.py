@@ -14,6 +14,7 @@ import asyncio
 import os
 # import random  # Removed as we now use fixed config.CRAWLER_MAX_SLEEP_SEC intervals
 from asyncio import Task
+from functools import partial
 from typing import Dict, List, Optional, Tuple, cast
 
 from playwright.async_api import (
@@ -27,11 +28,24 @@ from playwright.async_api import (
 import config
 from constant import zhihu as constant
 from base.base_crawler import AbstractCrawler
+from dedup.seen_set_factory import SEEN_NOTE_COMMENTS, close_seen_sets, get_seen_set
+from distributed.task_queue import TASK_CREATOR, TASK_NOTE_COMMENTS, TASK_SEARCH_PAGE, CrawlTask, new_task
+from distributed.worker import run_crawl_worker
+from frontier.abs_frontier import AbstractFrontier
+from frontier.frontier_factory import FrontierFactory
+from metrics.tracing import trace_span, traced
 from model.m_zhihu import ZhihuContent, ZhihuCreator
 from proxy.proxy_ip_pool import IpInfoModel, create_ip_pool
 from store import zhihu as zhihu_store
+from store.comment_watermark import close_comment_watermark_store, get_comment_watermark_store
+from store.store_pipeline import store_pipeline
 from tools import utils
+from tools.adaptive_concurrency import create_concurrency_limiter
 from tools.cdp_browser import CDPBrowserManager
+from tools.crawl_pipeline import Countdown, CrawlPipeline, OrderedPageCheckpoint, Stage
+from tools.crawl_session import create_session_pool, get_extra_session_cookies
+from tools.http_cassette import is_cassette_replay
+from tools.rate_limiter import throttle_sleep
 from var import crawler_type_var, source_keyword_var
 
 from .client import ZhiHuClient
@@ -45,6 +59,7 @@ class ZhihuCrawler(AbstractCrawler):
     zhihu_client: ZhiHuClient
     browser_context: BrowserContext
     cdp_manager: Optional[CDPBrowserManager]
+    frontier: AbstractFrontier
 
     def __init__(self) -> None:
         self.index_url = "https://www.zhihu.com"
@@ -52,6 +67,7 @@ class ZhihuCrawler(AbstractCrawler):
         self.user_agent = "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/128.0.0.0 Safari/537.36"
         self._extractor = ZhihuExtractor()
         self.cdp_manager = None
+        self.frontier = FrontierFactory.create_crawler_frontier()
 
     async def start(self) -> None:
         """
@@ -59,7 +75,16 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
+        if is_cassette_replay():
+            # 回放模式下所有请求都从录制文件返回，不需要启动浏览器和检查登录态
+            utils.logger.info("[ZhihuCrawler.start] replay recorded responses, skip browser and login")
+            self.zhihu_client = await self.create_zhihu_client(None)
+            await self.crawl()
+            utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
+            return
+
         playwright_proxy_format, httpx_proxy_format = None, None
+        ip_proxy_pool, ip_proxy_info = None, None
         if config.ENABLE_IP_PROXY:
             ip_proxy_pool = await create_ip_pool(
                 config.IP_PROXY_POOL_COUNT, enable_validate_ip=True
@@ -84,7 +109,7 @@ class ZhihuCrawler(AbstractCrawler):
                 # Launch a browser context.
                 chromium = playwright.chromium
                 self.browser_context = await self.launch_browser(
-                    chromium, None, self.user_agent, headless=config.HEADLESS
+                    chromium, playwright_proxy_format, self.user_agent, headless=config.HEADLESS
                 )
                 # stealth.min.js is a js script to prevent the website from detecting the crawler.
                 await self.browser_context.add_init_script(path="libs/stealth.min.js")
@@ -117,21 +142,57 @@ class ZhihuCrawler(AbstractCrawler):
             await asyncio.sleep(5)
             await self.zhihu_client.update_cookies(browser_context=self.browser_context)
 
-            crawler_type_var.set(config.CRAWLER_TYPE)
-            if config.CRAWLER_TYPE == "search":
-                # Search for notes and retrieve their comment information.
-                await self.search()
-            elif config.CRAWLER_TYPE == "detail":
-                # Get the information and comments of the specified post
-                await self.get_specified_notes()
-            elif config.CRAWLER_TYPE == "creator":
-                # Get creator's information and their notes and comments
-                await self.get_creators_and_notes()
-            else:
-                pass
-
+            # 浏览器登录的账号和浏览器使用的代理IP绑定为主会话，配置中的其他账号各自绑定一个代理IP
+            self.zhihu_client.session_pool = await create_session_pool(
+                primary_cookie_str=self.zhihu_client.default_headers["cookie"],
+                user_agent_factory=utils.get_user_agent,
+                primary_user_agent=self.zhihu_client.default_headers["user-agent"],
+                extra_cookies=get_extra_session_cookies(config.PLATFORM),
+                ip_pool=ip_proxy_pool,
+                primary_proxy=ip_proxy_info,
+            )
+            await self.crawl(ip_proxy_pool)
             utils.logger.info("[ZhihuCrawler.start] Zhihu Crawler finished ...")
 
+    async def crawl(self, ip_proxy_pool=None) -> None:
+        """
+        按爬取类型执行爬取任务，结束后释放 client 和各类存储
+        Args:
+            ip_proxy_pool: 代理IP池，结束时关闭
+
+        Returns:
+
+        """
+        crawler_type_var.set(config.CRAWLER_TYPE)
+        try:
+            if config.ENABLE_DISTRIBUTED_WORKER:
+                # 从分布式任务队列中领取任务，爬取进度由所有 worker 共享，不在这里清空
+                await run_crawl_worker(self)
+            else:
+                if config.CRAWLER_TYPE == "search":
+                    # Search for notes and retrieve their comment information.
+                    await self.search()
+                elif config.CRAWLER_TYPE == "detail":
+                    # Get the information and comments of the specified post
+                    await self.get_specified_notes()
+                elif config.CRAWLER_TYPE == "creator":
+                    # Get creator's information and their notes and comments
+                    await self.get_creators_and_notes()
+                else:
+                    pass
+                # 完整爬取结束，清空断点续爬进度，下次运行从头开始
+                await self.frontier.clear()
+        finally:
+            # 释放 API client 的长连接
+            await self.zhihu_client.close()
+            await self.frontier.close()
+            # 先写完存储队列，已见集合在数据写入成功后才会更新，之后再持久化
+            await store_pipeline.drain()
+            await close_seen_sets()
+            await close_comment_watermark_store()
+            if ip_proxy_pool:
+                await ip_proxy_pool.close()
+
     async def search(self) -> None:
         """Search for notes and retrieve their comment information."""
         utils.logger.info("[ZhihuCrawler.search] Begin search zhihu keywords")
@@ -139,16 +200,26 @@ class ZhihuCrawler(AbstractCrawler):
         if config.CRAWLER_MAX_NOTES_COUNT < zhihu_limit_count:
             config.CRAWLER_MAX_NOTES_COUNT = zhihu_limit_count
         start_page = config.START_PAGE
+        if config.ENABLE_SEARCH_PIPELINE:
+            await self.search_by_pipeline(start_page, zhihu_limit_count)
+            return
+
         for keyword in config.KEYWORDS.split(","):
             source_keyword_var.set(keyword)
             utils.logger.info(
                 f"[ZhihuCrawler.search] Current search keyword: {keyword}"
             )
+            unit_key = f"search:{keyword}"
+            if await self.frontier.is_done(unit_key):
+                utils.logger.info(f"[ZhihuCrawler.search] Keyword {keyword} already crawled, skip")
+                continue
+            # 断点续爬：从上次中断的页码继续
+            resume_page = (await self.frontier.get_cursor(unit_key)).get("page", start_page)
             page = 1
             while (
                 page - start_page + 1
             ) * zhihu_limit_count <= config.CRAWLER_MAX_NOTES_COUNT:
-                if page < start_page:
+                if page < max(start_page, resume_page):
                     utils.logger.info(f"[ZhihuCrawler.search] Skip page {page}")
                     page += 1
                     continue
@@ -171,17 +242,95 @@ class ZhihuCrawler(AbstractCrawler):
                         break
 
                     # Sleep after page navigation
-                    await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                    utils.logger.info(f"[ZhihuCrawler.search] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after page {page-1}")
+                    await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                     
                     page += 1
                     for content in content_list:
                         await zhihu_store.update_zhihu_content(content)
 
                     await self.batch_get_content_comments(content_list)
+                    await self.frontier.checkpoint(unit_key, {"page": page})
                 except DataFetchError:
                     utils.logger.error("[ZhihuCrawler.search] Search content error")
                     return
+            await self.frontier.mark_done(unit_key)
+
+    async def search_by_pipeline(self, start_page: int, page_size: int) -> None:
+        """
+        流水线模式搜索：搜索翻页和评论两个阶段各自用独立的 worker 并行执行
+        Args:
+            start_page: 起始页
+            page_size: 每页数量
+
+        Returns:
+
+        """
+        semaphore = create_concurrency_limiter()
+        pipeline = CrawlPipeline(
+            stages=[
+                Stage("search", partial(self._search_page_stage, start_page=start_page, page_size=page_size),
+                      workers=config.SEARCH_PIPELINE_WORKERS.get("search", 1)),
+                Stage("comments", partial(self._content_comments_stage, semaphore=semaphore),
+                      workers=config.SEARCH_PIPELINE_WORKERS.get("comments", 1)),
+            ],
+            max_queue_size=config.SEARCH_PIPELINE_QUEUE_SIZE,
+        )
+
+        checkpoints: List[OrderedPageCheckpoint] = []
+        seeds: List[Tuple[str, int, OrderedPageCheckpoint]] = []
+        for keyword in config.KEYWORDS.split(","):
+            unit_key = f"search:{keyword}"
+            if await self.frontier.is_done(unit_key):
+                utils.logger.info(f"[ZhihuCrawler.search_by_pipeline] Keyword {keyword} already crawled, skip")
+                continue
+            first_page = max(start_page, (await self.frontier.get_cursor(unit_key)).get("page", start_page))
+            checkpoint = OrderedPageCheckpoint(self.frontier, unit_key, first_page)
+            checkpoints.append(checkpoint)
+            if (first_page - start_page + 1) * page_size <= config.CRAWLER_MAX_NOTES_COUNT:
+                seeds.append((keyword, first_page, checkpoint))
+
+        await pipeline.run("search", seeds)
+        for checkpoint in checkpoints:
+            await checkpoint.finish()
+
+    async def _search_page_stage(self, task: Tuple[str, int, OrderedPageCheckpoint], pipeline: CrawlPipeline,
+                                 start_page: int, page_size: int) -> None:
+        """搜索阶段：抓取一页搜索结果并保存，把评论任务投递给下游阶段，同时投递下一页"""
+        keyword, page, checkpoint = task
+        source_keyword_var.set(keyword)
+        utils.logger.info(f"[ZhihuCrawler._search_page_stage] search zhihu keyword: {keyword}, page: {page}")
+        try:
+            content_list: List[ZhihuContent] = await self.zhihu_client.get_note_by_keyword(keyword=keyword, page=page)
+        except Exception:
+            checkpoint.failed = True
+            raise
+        if not content_list:
+            utils.logger.info(f"[ZhihuCrawler._search_page_stage] No more content for keyword: {keyword}")
+            await checkpoint.page_done(page)
+            return
+        if (page - start_page + 2) * page_size <= config.CRAWLER_MAX_NOTES_COUNT:
+            await pipeline.emit("search", (keyword, page + 1, checkpoint))
+
+        for content in content_list:
+            await zhihu_store.update_zhihu_content(content)
+
+        comment_contents = content_list if config.ENABLE_GET_COMMENTS else []
+        await self.frontier.add_pending([f"comments:{content.content_id}" for content in comment_contents])
+        # 本页所有评论任务完成后才推进断点
+        countdown = Countdown(len(comment_contents), partial(checkpoint.page_done, page))
+        for content in comment_contents:
+            await pipeline.emit("comments", (content, countdown))
+        await countdown.start()
+        await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
+
+    async def _content_comments_stage(self, task: Tuple[ZhihuContent, Countdown], pipeline: CrawlPipeline,
+                                      semaphore: asyncio.Semaphore) -> None:
+        """评论阶段"""
+        content, countdown = task
+        try:
+            await self.get_comments(content, semaphore)
+        finally:
+            await countdown.done()
 
     async def batch_get_content_comments(self, content_list: List[ZhihuContent]):
         """
@@ -198,7 +347,8 @@ class ZhihuCrawler(AbstractCrawler):
             )
             return
 
-        semaphore = asyncio.Semaphore(config.MAX_CONCURRENCY_NUM)
+        await self.frontier.add_pending([f"comments:{content_item.content_id}" for content_item in content_list])
+        semaphore = create_concurrency_limiter()
         task_list: List[Task] = []
         for content_item in content_list:
             task = asyncio.create_task(
@@ -207,6 +357,7 @@ class ZhihuCrawler(AbstractCrawler):
             task_list.append(task)
         await asyncio.gather(*task_list)
 
+    @traced("note_comments", "content_item.content_id")
     async def get_comments(
         self, content_item: ZhihuContent, semaphore: asyncio.Semaphore
     ):
@@ -219,20 +370,48 @@ class ZhihuCrawler(AbstractCrawler):
         Returns:
 
         """
+        unit_key = f"comments:{content_item.content_id}"
+        if await self.frontier.is_done(unit_key):
+            utils.logger.info(f"[ZhihuCrawler.get_comments] Content {content_item.content_id} comments already crawled, skip")
+            return
+        # 之前的运行已完整爬取过评论且评论数没有变化
+        seen_key = f"{content_item.content_id}:{content_item.comment_count}"
+        if (await get_seen_set(SEEN_NOTE_COMMENTS).contains([seen_key]))[0]:
+            utils.logger.info(f"[ZhihuCrawler.get_comments] Content {content_item.content_id} comments unchanged, skip")
+            return
+        watermark_store = get_comment_watermark_store()
+        watermark = await watermark_store.get(content_item.content_id) if watermark_store else None
+        if watermark and watermark.comments_count == content_item.comment_count:
+            utils.logger.info(f"[ZhihuCrawler.get_comments] Content {content_item.content_id} comments count unchanged, skip")
+            await self.frontier.mark_done(unit_key)
+            return
+        new_comments_count = None
+        if watermark and watermark.comments_count >= 0:
+            new_comments_count = max(0, content_item.comment_count - watermark.comments_count)
         async with semaphore:
             utils.logger.info(
                 f"[ZhihuCrawler.get_comments] Begin get note id comments {content_item.content_id}"
             )
             
             # Sleep before fetching comments
-            await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-            utils.logger.info(f"[ZhihuCrawler.get_comments] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds before fetching comments for content {content_item.content_id}")
+            await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
             
-            await self.zhihu_client.get_note_all_comments(
+            comments = await self.zhihu_client.get_note_all_comments(
                 content=content_item,
                 crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
                 callback=zhihu_store.batch_update_zhihu_note_comments,
+                cursor=await self.frontier.get_cursor(unit_key),
+                checkpoint=partial(self.frontier.checkpoint, unit_key),
+                watermark=watermark,
+                new_comments_count=new_comments_count,
             )
+            await self.frontier.mark_done(unit_key)
+            if watermark is not None:
+                watermark.advance(comments, lambda comment: (comment.publish_time, comment.comment_id))
+                watermark.comments_count = content_item.comment_count
+                await watermark_store.save(content_item.content_id, watermark)
+            # 评论全部写入存储成功后才标记为已完整爬取
+            await store_pipeline.mark_seen(SEEN_NOTE_COMMENTS, [seen_key])
 
     async def get_creators_and_notes(self) -> None:
         """
@@ -248,46 +427,113 @@ class ZhihuCrawler(AbstractCrawler):
                 f"[ZhihuCrawler.get_creators_and_notes] Begin get creator {user_link}"
             )
             user_url_token = user_link.split("/")[-1]
-            # get creator detail info from web html content
-            createor_info: ZhihuCreator = await self.zhihu_client.get_creator_info(
-                url_token=user_url_token
-            )
-            if not createor_info:
-                utils.logger.info(
-                    f"[ZhihuCrawler.get_creators_and_notes] Creator {user_url_token} not found"
-                )
-                continue
+            with trace_span("creator", url_token=user_url_token):
+                all_content_list = await self.get_creator_contents(user_url_token)
+                if all_content_list is None:
+                    continue
+
+                # Get all comments of the creator's contents
+                # 断点续爬时回答列表会重新拉取，已完成的评论单元会被跳过
+                await self.batch_get_content_comments(all_content_list)
+                await self.frontier.mark_done(f"creator:{user_url_token}")
+
+    async def get_creator_contents(self, user_url_token: str) -> Optional[List[ZhihuContent]]:
+        """
+        Get creator's information and contents
+        Args:
+            user_url_token: 创作者的 url_token
+
+        Returns: 创作者的内容列表，已爬取或创作者不存在时返回 None
 
+        """
+        if await self.frontier.is_done(f"creator:{user_url_token}"):
+            utils.logger.info(f"[ZhihuCrawler.get_creator_contents] Creator {user_url_token} already crawled, skip")
+            return None
+        # get creator detail info from web html content
+        createor_info: ZhihuCreator = await self.zhihu_client.get_creator_info(
+            url_token=user_url_token
+        )
+        if not createor_info:
             utils.logger.info(
-                f"[ZhihuCrawler.get_creators_and_notes] Creator info: {createor_info}"
+                f"[ZhihuCrawler.get_creator_contents] Creator {user_url_token} not found"
             )
-            await zhihu_store.save_creator(creator=createor_info)
+            return None
 
-            # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
+        utils.logger.info(
+            f"[ZhihuCrawler.get_creator_contents] Creator info: {createor_info}"
+        )
+        await zhihu_store.save_creator(creator=createor_info)
 
-            # Get all anwser information of the creator
-            all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
-                creator=createor_info,
-                crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-                callback=zhihu_store.batch_update_zhihu_contents,
-            )
+        # 默认只提取回答信息，如果需要文章和视频，把下面的注释打开即可
 
-            # Get all articles of the creator's contents
-            # all_content_list = await self.zhihu_client.get_all_articles_by_creator(
-            #     creator=createor_info,
-            #     crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-            #     callback=zhihu_store.batch_update_zhihu_contents
-            # )
+        # Get all anwser information of the creator
+        all_content_list = await self.zhihu_client.get_all_anwser_by_creator(
+            creator=createor_info,
+            crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+            callback=zhihu_store.batch_update_zhihu_contents,
+        )
 
-            # Get all videos of the creator's contents
-            # all_content_list = await self.zhihu_client.get_all_videos_by_creator(
-            #     creator=createor_info,
-            #     crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
-            #     callback=zhihu_store.batch_update_zhihu_contents
-            # )
+        # Get all articles of the creator's contents
+        # all_content_list = await self.zhihu_client.get_all_articles_by_creator(
+        #     creator=createor_info,
+        #     crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+        #     callback=zhihu_store.batch_update_zhihu_contents
+        # )
+
+        # Get all videos of the creator's contents
+        # all_content_list = await self.zhihu_client.get_all_videos_by_creator(
+        #     creator=createor_info,
+        #     crawl_interval=config.CRAWLER_MAX_SLEEP_SEC,
+        #     callback=zhihu_store.batch_update_zhihu_contents
+        # )
+        return all_content_list
+
+    async def handle_task(self, task: CrawlTask) -> List[CrawlTask]:
+        """
+        分布式模式下处理一个任务
+        Args:
+            task:
+
+        Returns: 派生出的后续任务
 
-            # Get all comments of the creator's contents
-            await self.batch_get_content_comments(all_content_list)
+        """
+        payload = task.payload
+        if payload.get("keyword"):
+            source_keyword_var.set(payload["keyword"])
+        if task.task_type == TASK_SEARCH_PAGE:
+            content_list = await self.zhihu_client.get_note_by_keyword(keyword=payload["keyword"], page=payload["page"])
+            for content in content_list:
+                await zhihu_store.update_zhihu_content(content)
+            follow_up_tasks = self.build_comment_tasks(content_list, payload["keyword"])
+            zhihu_limit_count = 20  # zhihu limit page fixed value
+            page, start_page = payload["page"], payload.get("start_page", config.START_PAGE)
+            max_notes_count = max(config.CRAWLER_MAX_NOTES_COUNT, zhihu_limit_count)
+            if content_list and (page - start_page + 2) * zhihu_limit_count <= max_notes_count:
+                follow_up_tasks.append(new_task(config.PLATFORM, TASK_SEARCH_PAGE, f"search:{payload['keyword']}:{page + 1}",
+                                                {"keyword": payload["keyword"], "page": page + 1, "start_page": start_page}))
+            await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
+            return follow_up_tasks
+        elif task.task_type == TASK_CREATOR:
+            all_content_list = await self.get_creator_contents(payload["creator_id"])
+            if all_content_list is None:
+                return []
+            # 创作者已完成，评论作为单独的任务由其他 worker 并行爬取
+            await self.frontier.mark_done(f"creator:{payload['creator_id']}")
+            return self.build_comment_tasks(all_content_list)
+        elif task.task_type == TASK_NOTE_COMMENTS:
+            await self.get_comments(ZhihuContent(**payload["content"]), create_concurrency_limiter())
+            return []
+        raise ValueError(f"Unknown task type: {task.task_type}")
+
+    @staticmethod
+    def build_comment_tasks(content_list: List[ZhihuContent], keyword: str = "") -> List[CrawlTask]:
+        if not config.ENABLE_GET_COMMENTS:
+            return []
+        return [
+            new_task(config.PLATFORM, TASK_NOTE_COMMENTS, f"comments:{content.content_id}",
+                     {"content": content.model_dump(), "keyword": keyword})
+            for content in content_list
+        ]
 
     async def get_note_detail(
         self, full_note_url: str, semaphore: asyncio.Semaphore
@@ -316,8 +562,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_answer_info(question_id, answer_id)
                 
                 # Sleep after fetching answer details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching answer details {answer_id}")
+                await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 
                 return result
 
@@ -329,8 +574,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_article_info(article_id)
                 
                 # Sleep after fetching article details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching article details {article_id}")
+                await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 
                 return result
 
@@ -342,8 +586,7 @@ class ZhihuCrawler(AbstractCrawler):
                 result = await self.zhihu_client.get_video_info(video_id)
                 
                 # Sleep after fetching video details
-                await asyncio.sleep(config.CRAWLER_MAX_SLEEP_SEC)
-                utils.logger.info(f"[ZhihuCrawler.get_note_detail] Sleeping for {config.CRAWLER_MAX_SLEEP_SEC} seconds after fetching video details {video_id}")
+                await throttle_sleep(config.CRAWLER_MAX_SLEEP_SEC)
                 
                 return result
 
@@ -359,7 +602,7 @@ class ZhihuCrawler(AbstractCrawler):
             full_note_url = full_note_url.split("?")[0]
             crawler_task = self.get_note_detail(
                 full_note_url=full_note_url,
-                semaphore=asyncio.Semaphore(config.MAX_CONCURRENCY_NUM),
+                semaphore=create_concurrency_limiter(),
             )
             get_note_detail_task_list.append(crawler_task)
 
@@ -383,9 +626,15 @@ class ZhihuCrawler(AbstractCrawler):
         utils.logger.info(
             "[ZhihuCrawler.create_zhihu_client] Begin create zhihu API client ..."
         )
-        cookie_str, cookie_dict = utils.convert_cookies(
-            await self.browser_context.cookies()
-        )
+        if is_cassette_replay():
+            # 回放模式下没有浏览器，Cookie 不参与请求指纹，使用配置中的 Cookie 即可
+            cookie_str, cookie_dict = config.COOKIES, utils.convert_str_cookie_to_dict(config.COOKIES)
+            playwright_page = None
+        else:
+            cookie_str, cookie_dict = utils.convert_cookies(
+                await self.browser_context.cookies()
+            )
+            playwright_page = self.context_page
         zhihu_client_obj = ZhiHuClient(
             proxy=httpx_proxy,
             headers={
@@ -400,7 +649,7 @@ class ZhihuCrawler(AbstractCrawler):
                 "x-requested-with": "fetch",
                 "x-zse-93": "101_3_3.0",
             },
-            playwright_page=self.context_page,
+            playwright_page=playwright_page,
             cookie_dict=cookie_dict,
         )
         return zhihu_client_obj
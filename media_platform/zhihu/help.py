@@ -10,6 +10,7 @@
 
 
 # -*- coding: utf-8 -*-
+import asyncio
 import json
 from typing import Dict, List, Optional
 from urllib.parse import parse_qs, urlparse
@@ -17,10 +18,12 @@ from urllib.parse import parse_qs, urlparse
 import execjs
 from parsel import Selector
 
+import config
 from constant import zhihu as zhihu_constant
 from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from tools import utils
 from tools.crawler_util import extract_text_from_html
+from tools.js_worker_pool import JsWorkerError, JsWorkerPool, node_available
 
 ZHIHU_SGIN_JS = None
 
@@ -43,6 +46,43 @@ def sign(url: str, cookies: str) -> Dict:
     return ZHIHU_SGIN_JS.call("get_sign", url, cookies)
 
 
+ZHIHU_SIGN_WORKER_POOL: Optional[JsWorkerPool] = None
+
+
+async def async_sign(url: str, cookies: str) -> Dict:
+    """
+    zhihu sign algorithm, 使用常驻的 Node 子进程签名，不会阻塞事件循环；
+    没有 Node 运行时或者 ZHIHU_SIGN_WORKER_NUM 为 0 时退回到 execjs（在线程池中执行）
+    Args:
+        url: request url with query string
+        cookies: request cookies with d_c0 key
+
+    Returns:
+
+    """
+    global ZHIHU_SIGN_WORKER_POOL
+    if config.ZHIHU_SIGN_WORKER_NUM > 0 and node_available():
+        if ZHIHU_SIGN_WORKER_POOL is None:
+            ZHIHU_SIGN_WORKER_POOL = JsWorkerPool("libs/zhihu.js", size=config.ZHIHU_SIGN_WORKER_NUM)
+        try:
+            return await ZHIHU_SIGN_WORKER_POOL.call("get_sign", url, cookies)
+        except JsWorkerError as e:
+            utils.logger.error(f"[async_sign] sign by node worker error: {e}, fallback to execjs")
+    return await asyncio.to_thread(sign, url, cookies)
+
+
+async def close_sign_workers():
+    """
+    关闭签名子进程
+    Returns:
+
+    """
+    global ZHIHU_SIGN_WORKER_POOL
+    if ZHIHU_SIGN_WORKER_POOL is not None:
+        await ZHIHU_SIGN_WORKER_POOL.close()
+        ZHIHU_SIGN_WORKER_POOL = None
+
+
 class ZhihuExtractor:
     def __init__(self):
         pass
@@ -0,0 +1,96 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬虫内部状态的指标定义，以及各模块埋点使用的辅助函数
+
+import re
+from typing import Optional
+from urllib.parse import urlsplit
+
+import config
+from tools import utils
+
+from .registry import get_metrics_registry
+
+_registry = get_metrics_registry()
+
+REQUESTS_TOTAL = _registry.counter(
+    "crawler_requests_total", "API 请求数", ("platform", "endpoint", "status"))
+REQUEST_LATENCY_SECONDS = _registry.histogram(
+    "crawler_request_latency_seconds", "API 请求耗时", ("platform", "endpoint"))
+REQUEST_ERRORS_TOTAL = _registry.counter(
+    "crawler_request_errors_total", "API 请求错误数，按错误类型区分", ("platform", "kind"))
+RETRIES_TOTAL = _registry.counter(
+    "crawler_retries_total", "tenacity 重试次数", ("function",))
+ITEMS_STORED_TOTAL = _registry.counter(
+    "crawler_items_stored_total", "写入存储的数据条数", ("store", "item_type"))
+STORE_LATENCY_SECONDS = _registry.histogram(
+    "crawler_store_latency_seconds", "存储批量写入耗时", ("store", "item_type"))
+QUEUE_DEPTH = _registry.gauge(
+    "crawler_queue_depth", "队列中等待处理的任务数", ("queue",))
+SEMAPHORE_WAIT_SECONDS = _registry.histogram(
+    "crawler_semaphore_wait_seconds", "等待并发信号量的耗时")
+SLEEP_SECONDS_TOTAL = _registry.counter(
+    "crawler_sleep_seconds_total", "主动等待的总时间（翻页间隔、限流）", ("kind",))
+CONCURRENCY_LIMIT = _registry.gauge(
+    "crawler_concurrency_limit", "自适应并发控制器当前的并发上限")
+CONCURRENCY_IN_FLIGHT = _registry.gauge(
+    "crawler_concurrency_in_flight", "自适应并发控制器当前正在执行的任务数")
+
+_ID_SEGMENT = re.compile(r"/\d+(?=/|$)")
+
+
+def endpoint_label(url: str, route: Optional[str] = None) -> str:
+    """
+    把请求地址归一化为接口名：去掉查询参数，路径中的数字ID替换为 {id}，避免标签数量随帖子数增长；
+    路径中有非数字参数（如知乎创作者的 url_token）时由调用方传入路由模板
+    :param url: 请求地址
+    :param route: 路由模板，如 /api/v4/members/{url_token}/answers
+    :return:
+    """
+    parts = urlsplit(url)
+    return f"{parts.netloc}{route or _ID_SEGMENT.sub('/{id}', parts.path)}"
+
+
+def record_request(url: str, status: str, latency: float, route: Optional[str] = None):
+    """
+    记录一次 API 请求
+    :param url: 请求地址
+    :param status: HTTP 状态码，请求异常时为异常类名
+    :param latency: 耗时（秒）
+    :param route: 路由模板，为空时按 url 归一化
+    :return:
+    """
+    endpoint = endpoint_label(url, route)
+    REQUESTS_TOTAL.inc(platform=config.PLATFORM, endpoint=endpoint, status=status)
+    REQUEST_LATENCY_SECONDS.observe(latency, platform=config.PLATFORM, endpoint=endpoint)
+
+
+def record_error(kind: str):
+    """
+    记录一次请求错误
+    :param kind: 错误类型，例如 json_decode、ok_0、http_432、ConnectError
+    :return:
+    """
+    REQUEST_ERRORS_TOTAL.inc(platform=config.PLATFORM, kind=kind)
+
+
+def record_retry(retry_state):
+    """tenacity 的 before_sleep 回调，每次重试前调用"""
+    RETRIES_TOTAL.inc(function=retry_state.fn.__qualname__ if retry_state.fn else "")
+
+
+def log_metrics_summary():
+    """把有数据的指标汇总写入日志"""
+    lines = get_metrics_registry().summary()
+    if not lines:
+        return
+    utils.logger.info("[log_metrics_summary] crawler metrics summary:\n" + "\n".join(lines))
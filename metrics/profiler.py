@@ -0,0 +1,259 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 内置的性能分析：cpu（cProfile）、async（按协程统计耗时的采样器）、memory（tracemalloc），
+#            报告写入 data/profiles 目录
+
+import asyncio
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from abc import ABC, abstractmethod
+from collections import Counter
+from contextlib import asynccontextmanager
+from types import FrameType
+from typing import AsyncIterator, List, Optional
+
+import config
+from tools import utils
+
+PROFILE_CPU = "cpu"
+PROFILE_ASYNC = "async"
+PROFILE_MEMORY = "memory"
+
+# 事件循环在等待 IO、没有任务在执行
+IDLE = "<idle>"
+
+
+class AbstractProfiler(ABC):
+
+    def __init__(self, output_dir: str, top_n: int = 30):
+        """
+        :param output_dir: 报告目录
+        :param top_n: 报告中输出的条目数
+        """
+        self.output_dir = output_dir
+        self.top_n = top_n
+        self.file_prefix = ""
+
+    def _path(self, suffix: str) -> str:
+        return os.path.join(self.output_dir, f"{self.file_prefix}{suffix}")
+
+    def _write(self, suffix: str, content: str) -> str:
+        path = self._path(suffix)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def start(self):
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.file_prefix = f"{config.PLATFORM}_{time.strftime('%Y%m%d_%H%M%S')}_"
+        self._start()
+
+    @abstractmethod
+    def _start(self):
+        raise NotImplementedError
+
+    @abstractmethod
+    def stop(self) -> List[str]:
+        """
+        停止分析并写入报告
+        :return: 生成的报告文件路径
+        """
+        raise NotImplementedError
+
+
+class CpuProfiler(AbstractProfiler):
+    """cProfile：记录事件循环线程中所有函数的调用次数和耗时"""
+
+    def _start(self):
+        self._profile = cProfile.Profile()
+        self._profile.enable()
+
+    def stop(self) -> List[str]:
+        self._profile.disable()
+        prof_path = self._path("cpu.prof")
+        self._profile.dump_stats(prof_path)
+        report = io.StringIO()
+        stats = pstats.Stats(self._profile, stream=report).strip_dirs()
+        report.write("==================== sorted by cumulative time ====================\n")
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top_n)
+        report.write("==================== sorted by total time ====================\n")
+        stats.sort_stats(pstats.SortKey.TIME).print_stats(self.top_n)
+        return [prof_path, self._write("cpu.txt", report.getvalue())]
+
+
+class AsyncSampler(AbstractProfiler):
+    """
+    后台线程定时采样事件循环线程的调用栈，按当前正在执行的 asyncio 任务（协程）汇总耗时；
+    没有任务在执行时计为 <idle>，即事件循环在等待网络/磁盘 IO。
+    调用栈同时输出为 folded 格式，可以直接用 flamegraph.pl / speedscope 生成火焰图
+    """
+
+    def __init__(self, output_dir: str, top_n: int = 30, interval: float = 0.005):
+        """
+        :param output_dir: 报告目录
+        :param top_n: 报告中输出的条目数
+        :param interval: 采样间隔（秒）
+        """
+        super().__init__(output_dir, top_n)
+        self.interval = interval
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread_id = 0
+        self._stop_event = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self.samples = 0
+        self.coroutines: Counter = Counter()
+        self.functions: Counter = Counter()
+        self.stacks: Counter = Counter()
+
+    def _start(self):
+        self._loop = asyncio.get_running_loop()
+        self._thread_id = threading.get_ident()
+        self._stop_event.clear()
+        self._sampler = threading.Thread(target=self._run, name="async-sampler", daemon=True)
+        self._sampler.start()
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            frame = sys._current_frames().get(self._thread_id)
+            if frame is not None:
+                self.sample(frame, asyncio.tasks._current_tasks.get(self._loop))
+
+    @staticmethod
+    def _frame_name(frame: FrameType) -> str:
+        code = frame.f_code
+        return f"{code.co_qualname}({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+    @staticmethod
+    def task_name(task: Optional[asyncio.Task]) -> str:
+        if task is None:
+            return IDLE
+        coro = task.get_coro()
+        return getattr(coro, "__qualname__", None) or task.get_name()
+
+    def sample(self, frame: FrameType, task: Optional[asyncio.Task]):
+        """
+        记录一次采样
+        :param frame: 事件循环线程当前的栈顶
+        :param task: 当前正在执行的任务
+        :return:
+        """
+        stack = []
+        while frame is not None:
+            stack.append(self._frame_name(frame))
+            frame = frame.f_back
+        stack.reverse()
+        task_name = self.task_name(task)
+        self.samples += 1
+        self.coroutines[task_name] += 1
+        self.functions[stack[-1] if task is not None else IDLE] += 1
+        self.stacks[";".join([task_name] + stack)] += 1
+
+    def stop(self) -> List[str]:
+        self._stop_event.set()
+        if self._sampler is not None:
+            self._sampler.join()
+        total = max(1, self.samples)
+        lines = [f"samples: {self.samples}, interval: {self.interval * 1000:.1f}ms, "
+                 f"sampled time: {self.samples * self.interval:.2f}s", "",
+                 "==================== time by coroutine ===================="]
+        lines += [f"{count / total:7.2%} {count * self.interval:9.2f}s  {name}"
+                  for name, count in self.coroutines.most_common(self.top_n)]
+        lines += ["", "==================== time by function (self) ===================="]
+        lines += [f"{count / total:7.2%} {count * self.interval:9.2f}s  {name}"
+                  for name, count in self.functions.most_common(self.top_n)]
+        folded = "".join(f"{stack} {count}\n" for stack, count in self.stacks.items())
+        return [self._write("async.txt", "\n".join(lines) + "\n"), self._write("async.folded", folded)]
+
+
+class MemoryProfiler(AbstractProfiler):
+    """tracemalloc：对比开始和结束时的内存快照，输出新增内存最多的代码位置"""
+
+    def __init__(self, output_dir: str, top_n: int = 30, frames: int = 10):
+        """
+        :param output_dir: 报告目录
+        :param top_n: 报告中输出的条目数
+        :param frames: 每次分配记录的调用栈深度
+        """
+        super().__init__(output_dir, top_n)
+        self.frames = frames
+        self._start_snapshot: Optional[tracemalloc.Snapshot] = None
+
+    def _start(self):
+        tracemalloc.start(self.frames)
+        self._start_snapshot = tracemalloc.take_snapshot()
+
+    def stop(self) -> List[str]:
+        snapshot = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        snapshot_path = self._path("memory.tracemalloc")
+        snapshot.dump(snapshot_path)
+
+        filters = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ]
+        snapshot = snapshot.filter_traces(filters)
+        lines = [f"current: {current / 1024 / 1024:.1f} MiB, peak: {peak / 1024 / 1024:.1f} MiB", "",
+                 "==================== top allocators (by line) ===================="]
+        lines += [str(stat) for stat in snapshot.statistics("lineno")[:self.top_n]]
+        lines += ["", "==================== growth since start (by line) ===================="]
+        lines += [str(stat) for stat in
+                  snapshot.compare_to(self._start_snapshot.filter_traces(filters), "lineno")[:self.top_n]]
+        lines += ["", "==================== top allocators (by traceback) ===================="]
+        for stat in snapshot.statistics("traceback")[:min(self.top_n, 10)]:
+            lines.append(f"{stat.count} blocks, {stat.size / 1024:.1f} KiB")
+            lines += [f"    {line}" for line in stat.traceback.format()]
+        return [snapshot_path, self._write("memory.txt", "\n".join(lines) + "\n")]
+
+
+class ProfilerFactory:
+    PROFILERS = {
+        PROFILE_CPU: CpuProfiler,
+        PROFILE_ASYNC: AsyncSampler,
+        PROFILE_MEMORY: MemoryProfiler,
+    }
+
+    @staticmethod
+    def create_profiler(mode: str) -> AbstractProfiler:
+        profiler_class = ProfilerFactory.PROFILERS.get(mode)
+        if not profiler_class:
+            raise ValueError(f"[ProfilerFactory.create_profiler] Invalid profile mode: {mode}, only supported cpu or async or memory")
+        if profiler_class is AsyncSampler:
+            return AsyncSampler(config.PROFILE_OUTPUT_DIR, config.PROFILE_TOP_N, config.PROFILE_SAMPLE_INTERVAL)
+        return profiler_class(config.PROFILE_OUTPUT_DIR, config.PROFILE_TOP_N)
+
+
+@asynccontextmanager
+async def profiling(mode: str) -> AsyncIterator[Optional[AbstractProfiler]]:
+    """
+    在选定的分析器下运行代码块，退出（包括异常和取消）时写入报告，mode 为空时不做任何事
+    :param mode: cpu | async | memory
+    :return:
+    """
+    if not mode:
+        yield None
+        return
+    profiler = ProfilerFactory.create_profiler(mode)
+    profiler.start()
+    utils.logger.info(f"[profiling] {mode} profiler started")
+    try:
+        yield profiler
+    finally:
+        paths = profiler.stop()
+        utils.logger.info(f"[profiling] {mode} profile reports: {', '.join(paths)}")
@@ -0,0 +1,263 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 进程内的指标注册表，支持 Counter / Gauge / Histogram 三种指标，
+#            输出 Prometheus 文本格式，不依赖 prometheus_client
+
+import bisect
+import math
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, cast
+
+LabelValues = Tuple[str, ...]
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str]) -> str:
+    if not labelnames:
+        return ""
+    pairs = ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in zip(labelnames, values))
+    return "{" + pairs + "}"
+
+
+class Metric:
+    metric_type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"[{self.__class__.__name__}] {self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        """
+        当前的所有样本
+        :return: [(样本名, 标签值, 数值)]
+        """
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        for sample_name, label_values, value in self.samples():
+            labelnames = self.labelnames + (("le",) if len(label_values) > len(self.labelnames) else ())
+            lines.append(f"{sample_name}{_format_labels(labelnames, label_values)} {_format_value(value)}")
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError(f"[Counter] {self.name} can only increase")
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._label_values(labels), 0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        return [(self.name, key, value) for key, value in sorted(self._values.items())]
+
+
+class Gauge(Metric):
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._functions: Dict[LabelValues, Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        self._values[self._label_values(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._label_values(labels)
+        self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, func: Callable[[], float], **labels):
+        """
+        采集时调用 func 获取当前值，适合队列长度这类随时变化、不方便在每次变化时更新的值
+        :param func: 返回当前值的函数
+        :param labels: 标签
+        :return:
+        """
+        self._functions[self._label_values(labels)] = func
+
+    def get(self, **labels) -> float:
+        key = self._label_values(labels)
+        if key in self._functions:
+            return self._functions[key]()
+        return self._values.get(key, 0)
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        values = dict(self._values)
+        for key, func in self._functions.items():
+            values[key] = func()
+        return [(self.name, key, value) for key, value in sorted(values.items())]
+
+
+class Histogram(Metric):
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # 标签值 -> (每个桶的计数（不累加）, 总和, 总数)
+        self._values: Dict[LabelValues, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._label_values(labels)
+        counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """记录 with 代码块的耗时（秒）"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def quantile(self, q: float, **labels) -> float:
+        """
+        按桶估算分位数，返回目标样本所在桶的上界
+        :param q: 0~1
+        :param labels: 标签
+        :return: 没有样本时返回 0
+        """
+        values = self._values.get(self._label_values(labels))
+        if not values or not values[2]:
+            return 0.0
+        counts, _, count = values
+        rank = max(1, math.ceil(q * count))
+        cumulative = 0
+        for upper, bucket_count in zip(self.buckets + (math.inf,), counts):
+            cumulative += bucket_count
+            if cumulative >= rank:
+                return upper
+        return math.inf
+
+    def stats(self) -> Dict[LabelValues, Tuple[int, float]]:
+        """
+        :return: 标签值 -> (样本数, 总和)
+        """
+        return {key: (count, total) for key, (_, total, count) in sorted(self._values.items())}
+
+    def samples(self) -> List[Tuple[str, LabelValues, float]]:
+        samples: List[Tuple[str, LabelValues, float]] = []
+        for key, (counts, total, count) in sorted(self._values.items()):
+            cumulative = 0
+            for upper, bucket_count in zip(self.buckets + (math.inf,), counts):
+                cumulative += bucket_count
+                samples.append((f"{self.name}_bucket", key + (_format_value(upper),), cumulative))
+            samples.append((f"{self.name}_sum", key, total))
+            samples.append((f"{self.name}_count", key, count))
+        return samples
+
+
+class MetricsRegistry:
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+
+    def _register(self, metric: Metric) -> Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            if type(existing) is not type(metric) or existing.labelnames != metric.labelnames:
+                raise ValueError(f"[MetricsRegistry] metric {metric.name} already registered with a different type or labels")
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return cast(Counter, self._register(Counter(name, documentation, labelnames)))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return cast(Gauge, self._register(Gauge(name, documentation, labelnames)))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return cast(Histogram, self._register(Histogram(name, documentation, labelnames, buckets)))
+
+    def get(self, name: str) -> Optional[Metric]:
+        return self._metrics.get(name)
+
+    def metrics(self) -> List[Metric]:
+        return list(self._metrics.values())
+
+    def render(self) -> str:
+        """
+        Prometheus 文本格式（text/plain; version=0.0.4）
+        :return:
+        """
+        return "\n".join(metric.render() for metric in self._metrics.values()) + "\n"
+
+    def summary(self) -> List[str]:
+        """
+        可读的指标汇总，每行一个样本，只输出有数据的指标，用于退出时写入日志
+        :return:
+        """
+        lines = []
+        for metric in self._metrics.values():
+            if isinstance(metric, Histogram):
+                for key, (count, total) in metric.stats().items():
+                    labels = dict(zip(metric.labelnames, key))
+                    lines.append(
+                        f"{metric.name}{_format_labels(metric.labelnames, key)} count={count} "
+                        f"avg={total / count * 1000:.1f}ms p50<={_format_value(metric.quantile(0.5, **labels))}s "
+                        f"p99<={_format_value(metric.quantile(0.99, **labels))}s")
+            else:
+                for sample_name, key, value in metric.samples():
+                    if value:
+                        lines.append(f"{sample_name}{_format_labels(metric.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """
+    获取全局共享的指标注册表
+    :return:
+    """
+    global _registry
+    if _registry is None:
+        _registry = MetricsRegistry()
+    return _registry
@@ -0,0 +1,106 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 指标 HTTP 服务，和爬虫运行在同一个事件循环中，GET /metrics 返回 Prometheus 文本格式
+
+import asyncio
+import contextlib
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+
+from tools import utils
+
+from .registry import MetricsRegistry, get_metrics_registry
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def create_metrics_app(registry: Optional[MetricsRegistry] = None) -> FastAPI:
+    registry = registry or get_metrics_registry()
+    app = FastAPI()
+
+    @app.get("/metrics")
+    async def metrics():
+        return PlainTextResponse(registry.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
+    return app
+
+
+class _UvicornServer(uvicorn.Server):
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        # Ctrl+C 等信号由 main 统一处理，不让 uvicorn 接管
+        yield
+
+
+class MetricsServer:
+
+    def __init__(self, host: str, port: int, registry: Optional[MetricsRegistry] = None):
+        """
+        :param host: 监听地址
+        :param port: 监听端口
+        :param registry: 指标注册表，默认使用全局注册表
+        """
+        self.host = host
+        self.port = port
+        self._server = _UvicornServer(uvicorn.Config(
+            create_metrics_app(registry), host=host, port=port, log_level="warning", access_log=False))
+        self._task: Optional[asyncio.Task] = None
+
+    async def _serve(self):
+        try:
+            await self._server.serve()
+        except SystemExit:
+            # 端口被占用时 uvicorn 会调用 sys.exit，这里拦截下来，不影响爬虫运行
+            utils.logger.error(f"[MetricsServer._serve] metrics server failed to start on {self.host}:{self.port}")
+
+    async def start(self):
+        self._task = asyncio.create_task(self._serve())
+        while not self._server.started:
+            if self._task.done():
+                return
+            await asyncio.sleep(0.05)
+        utils.logger.info(f"[MetricsServer.start] metrics exposed on http://{self.host}:{self.port}/metrics")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._server.should_exit = True
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+
+_metrics_server: Optional[MetricsServer] = None
+
+
+async def start_metrics_server(host: str, port: int) -> MetricsServer:
+    """
+    启动全局的指标 HTTP 服务
+    :param host: 监听地址
+    :param port: 监听端口
+    :return:
+    """
+    global _metrics_server
+    if _metrics_server is None:
+        _metrics_server = MetricsServer(host, port)
+        await _metrics_server.start()
+    return _metrics_server
+
+
+async def stop_metrics_server():
+    global _metrics_server
+    if _metrics_server is not None:
+        await _metrics_server.stop()
+        _metrics_server = None
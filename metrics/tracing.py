@@ -0,0 +1,279 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 轻量的链路追踪：每个爬取单元（搜索页、帖子详情、评论页、图片、存储写入）记录一个 span，
+#            span 通过 contextvars 传递父子关系，导出为 JSONL 或 OTLP/JSON 文件；
+#            同时提供慢请求日志，记录超过阈值的请求和它所属的关键词/创作者/帖子
+
+import functools
+import inspect
+import json
+import os
+import random
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import config
+from tools import utils
+from var import source_keyword_var
+
+TRACE_EXPORTER_JSONL = "jsonl"
+TRACE_EXPORTER_OTLP = "otlp"
+
+
+class Span:
+    __slots__ = ("name", "trace_id", "span_id", "parent", "attributes", "start_ns", "end_ns", "error")
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, attributes: Optional[Dict[str, Any]] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else f"{random.getrandbits(128):032x}"
+        self.span_id = f"{random.getrandbits(64):016x}"
+        self.attributes: Dict[str, Any] = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.error = ""
+
+    @property
+    def duration(self) -> float:
+        """耗时（秒）"""
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e9
+
+    def set_attribute(self, key: str, value: Any):
+        self.attributes[key] = value
+
+    def context_attributes(self) -> Dict[str, Any]:
+        """当前 span 和所有父 span 的属性，子 span 的同名属性优先"""
+        attributes: Dict[str, Any] = {}
+        span = self
+        while span is not None:
+            for key, value in span.attributes.items():
+                attributes.setdefault(key, value)
+            span = span.parent
+        return attributes
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_span_id": self.parent.span_id if self.parent else "",
+            "start_ts": self.start_ns / 1e9,
+            "duration": round(self.duration, 6),
+            "attributes": self.attributes,
+            "error": self.error,
+        }
+
+
+def _otlp_value(value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def span_to_otlp(span: Span) -> Dict:
+    """转换为 OTLP/JSON 格式的 span"""
+    otlp_span = {
+        "traceId": span.trace_id,
+        "spanId": span.span_id,
+        "name": span.name,
+        "kind": 1,  # SPAN_KIND_INTERNAL
+        "startTimeUnixNano": str(span.start_ns),
+        "endTimeUnixNano": str(span.end_ns),
+        "attributes": [{"key": key, "value": _otlp_value(value)} for key, value in span.attributes.items()],
+        # STATUS_CODE_OK = 1, STATUS_CODE_ERROR = 2
+        "status": {"code": 2, "message": span.error} if span.error else {"code": 1},
+    }
+    if span.parent:
+        otlp_span["parentSpanId"] = span.parent.span_id
+    return otlp_span
+
+
+class AbstractSpanExporter(ABC):
+
+    def __init__(self, file_path: str, batch_size: int = 100):
+        """
+        :param file_path: 导出文件路径
+        :param batch_size: 缓存多少个 span 后写入一次文件
+        """
+        self.file_path = file_path
+        self.batch_size = batch_size
+        self._buffer: List[Span] = []
+
+    def export(self, span: Span):
+        self._buffer.append(span)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        spans, self._buffer = self._buffer, []
+        os.makedirs(os.path.dirname(self.file_path) or ".", exist_ok=True)
+        with open(self.file_path, "a", encoding="utf-8") as f:
+            f.write(self.format_batch(spans))
+
+    @abstractmethod
+    def format_batch(self, spans: List[Span]) -> str:
+        """把一批 span 格式化为写入文件的文本"""
+        raise NotImplementedError
+
+
+class JsonlSpanExporter(AbstractSpanExporter):
+    """每行一个 span"""
+
+    def format_batch(self, spans: List[Span]) -> str:
+        return "".join(json.dumps(span.to_dict(), ensure_ascii=False) + "\n" for span in spans)
+
+
+class OtlpJsonFileExporter(AbstractSpanExporter):
+    """
+    每行一个 OTLP/JSON 格式的 ExportTraceServiceRequest，
+    可以直接被 OpenTelemetry Collector 的 otlpjsonfile receiver 读取后转发到 Jaeger/Tempo 等后端
+    """
+
+    def format_batch(self, spans: List[Span]) -> str:
+        request = {
+            "resourceSpans": [{
+                "resource": {"attributes": [
+                    {"key": "service.name", "value": {"stringValue": "MediaCrawler"}},
+                    {"key": "crawler.platform", "value": {"stringValue": config.PLATFORM}},
+                ]},
+                "scopeSpans": [{"scope": {"name": "mediacrawler"}, "spans": [span_to_otlp(span) for span in spans]}],
+            }]
+        }
+        return json.dumps(request, ensure_ascii=False) + "\n"
+
+
+class SpanExporterFactory:
+    EXPORTERS = {
+        TRACE_EXPORTER_JSONL: JsonlSpanExporter,
+        TRACE_EXPORTER_OTLP: OtlpJsonFileExporter,
+    }
+
+    @staticmethod
+    def create_exporter(exporter_type: str, trace_dir: str) -> AbstractSpanExporter:
+        exporter_class = SpanExporterFactory.EXPORTERS.get(exporter_type)
+        if not exporter_class:
+            raise ValueError(f"[SpanExporterFactory.create_exporter] Invalid trace exporter: {exporter_type}, only supported jsonl or otlp")
+        file_name = f"{config.PLATFORM}_{utils.get_current_date()}_{exporter_type}.jsonl"
+        return exporter_class(os.path.join(trace_dir, file_name))
+
+
+_current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+_exporter: Optional[AbstractSpanExporter] = None
+
+
+def _get_exporter() -> AbstractSpanExporter:
+    global _exporter
+    if _exporter is None:
+        _exporter = SpanExporterFactory.create_exporter(config.TRACE_EXPORTER, config.TRACE_FILE_DIR)
+    return _exporter
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def trace_span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    记录一个 span，嵌套调用时自动成为外层 span 的子 span，未开启追踪时不做任何事
+    :param name: span 名称，例如 search_page、comment_page
+    :param attributes: 关键词、创作者ID、帖子ID等属性
+    :return:
+    """
+    if not config.ENABLE_TRACING:
+        yield None
+        return
+    span = Span(name, parent=_current_span.get(), attributes=attributes)
+    token = _current_span.set(span)
+    try:
+        yield span
+    except BaseException as e:
+        span.error = f"{e.__class__.__name__}: {e}"
+        raise
+    finally:
+        span.end_ns = time.time_ns()
+        _current_span.reset(token)
+        _get_exporter().export(span)
+
+
+def traced(name: str, *arg_names: str) -> Callable:
+    """
+    协程函数的 span 装饰器
+    :param name: span 名称
+    :param arg_names: 作为 span 属性记录的参数名，支持 "content.content_id" 的形式读取参数的属性，属性名为最后一段
+    :return:
+    """
+
+    def decorator(func: Callable) -> Callable:
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not config.ENABLE_TRACING:
+                return await func(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            attributes = {}
+            for arg_name in arg_names:
+                arg, *fields = arg_name.split(".")
+                value = bound.arguments.get(arg)
+                for field in fields:
+                    value = getattr(value, field, None)
+                if value is not None:
+                    attributes[fields[-1] if fields else arg] = value
+            with trace_span(name, **attributes):
+                return await func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def log_slow_request(method: str, url: str, status: str, latency: float, params: Optional[Dict] = None):
+    """
+    请求耗时超过 SLOW_REQUEST_THRESHOLD_SEC 时写入日志，带上请求参数和所属的爬取单元
+    :param method: 请求方法
+    :param url: 请求地址
+    :param status: HTTP 状态码或异常类名
+    :param latency: 耗时（秒）
+    :param params: 没有拼接到 url 中的请求参数
+    :return:
+    """
+    if not config.SLOW_REQUEST_THRESHOLD_SEC or latency < config.SLOW_REQUEST_THRESHOLD_SEC:
+        return
+    context: Dict[str, Any] = {}
+    span = _current_span.get()
+    if span is not None:
+        context = span.context_attributes()
+        context["span"] = span.name
+    if source_keyword_var.get():
+        context.setdefault("keyword", source_keyword_var.get())
+    if params:
+        context["params"] = params
+    utils.logger.warning(
+        f"[log_slow_request] slow request {latency:.2f}s status: {status} {method} {url} context: {context}")
+
+
+def close_tracing():
+    """把缓存的 span 写入文件"""
+    global _exporter
+    if _exporter is not None:
+        _exporter.flush()
+        _exporter = None
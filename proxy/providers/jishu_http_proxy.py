@@ -51,7 +51,7 @@ class JiSuHttpProxy(ProxyProvider):
         """
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -80,7 +80,7 @@ class JiSuHttpProxy(ProxyProvider):
                     ip_key = f"JISUHTTP_{ip_info_model.ip}_{ip_info_model.port}_{ip_info_model.user}_{ip_info_model.password}"
                     ip_value = ip_info_model.json()
                     ip_infos.append(ip_info_model)
-                    self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
+                    await self.ip_cache.set_ip(ip_key, ip_value, ex=ip_info_model.expired_time_ts - current_ts)
             else:
                 raise IpGetError(res_dict.get("msg", "unkown err"))
         return ip_cache_list + ip_infos
@@ -92,7 +92,7 @@ class KuaiDaiLiProxy(ProxyProvider):
         uri = "/api/getdps/"
 
         # 优先从缓存中拿 IP
-        ip_cache_list = self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
+        ip_cache_list = await self.ip_cache.load_all_ip(proxy_brand_name=self.proxy_brand_name)
         if len(ip_cache_list) >= num:
             return ip_cache_list[:num]
 
@@ -125,7 +125,7 @@ class KuaiDaiLiProxy(ProxyProvider):
 
                 )
                 ip_key = f"{self.proxy_brand_name}_{ip_info_model.ip}_{ip_info_model.port}"
-                self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=ip_info_model.expired_time_ts)
+                await self.ip_cache.set_ip(ip_key, ip_info_model.model_dump_json(), ex=ip_info_model.expired_time_ts)
                 ip_infos.append(ip_info_model)
 
         return ip_cache_list + ip_infos
@@ -12,8 +12,9 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 13:45
 # @Desc    : ip代理池实现
-import random
-from typing import Dict, List
+import asyncio
+import time
+from typing import Dict, List, Optional, Set
 
 import httpx
 from tenacity import retry, stop_after_attempt, wait_fixed
@@ -29,6 +30,32 @@ from .base_proxy import ProxyProvider
 from .types import IpInfoModel, ProviderNameEnum
 
 
+def proxy_key(proxy: IpInfoModel) -> str:
+    return f"{proxy.ip}:{proxy.port}"
+
+
+class ProxyHealth:
+    """
+    代理健康分：成功率和延迟的指数加权移动平均（EWMA）
+    """
+
+    def __init__(self, alpha: float, latency: float = 1.0):
+        self.alpha = alpha
+        self.success_score = 1.0
+        self.latency = latency
+        self.in_use = 0
+
+    def update(self, success: bool, latency: Optional[float] = None):
+        self.success_score = self.alpha * (1.0 if success else 0.0) + (1 - self.alpha) * self.success_score
+        if latency is not None:
+            self.latency = self.alpha * latency + (1 - self.alpha) * self.latency
+
+    @property
+    def score(self) -> float:
+        """成功率越高、延迟越低分数越高，正在使用的代理略微降权以分散请求"""
+        return self.success_score / (1.0 + self.latency) / (1 + 0.1 * self.in_use)
+
+
 class ProxyIpPool:
 
     def __init__(
@@ -46,14 +73,41 @@ class ProxyIpPool:
         self.enable_validate_ip = enable_validate_ip
         self.proxy_list: List[IpInfoModel] = []
         self.ip_provider: ProxyProvider = ip_provider
+        self.health: Dict[str, ProxyHealth] = {}
+        self._refill_task: Optional[asyncio.Task] = None
+        self._refill_lock = asyncio.Lock()
 
     async def load_proxies(self) -> None:
         """
-        加载IP代理
+        加载IP代理，并发验证后加入代理池
         Returns:
 
         """
-        self.proxy_list = await self.ip_provider.get_proxy(self.ip_pool_count)
+        need_count = self.ip_pool_count - len(self.proxy_list)
+        if need_count <= 0:
+            return
+        candidates = await self.ip_provider.get_proxy(need_count)
+        known_keys = {proxy_key(proxy) for proxy in self.proxy_list}
+        candidates = [proxy for proxy in candidates if proxy_key(proxy) not in known_keys and not self._is_expiring(proxy)]
+        if self.enable_validate_ip:
+            semaphore = asyncio.Semaphore(config.IP_PROXY_VALIDATE_CONCURRENCY)
+
+            async def validate(proxy: IpInfoModel) -> Optional[float]:
+                async with semaphore:
+                    return await self._validate_latency(proxy)
+
+            latencies = await asyncio.gather(*[validate(proxy) for proxy in candidates])
+        else:
+            latencies = [1.0] * len(candidates)
+
+        for proxy, latency in zip(candidates, latencies):
+            if latency is None:
+                continue
+            self.proxy_list.append(proxy)
+            self.health[proxy_key(proxy)] = ProxyHealth(config.IP_PROXY_EWMA_ALPHA, latency=latency)
+        utils.logger.info(
+            f"[ProxyIpPool.load_proxies] {len(self.proxy_list)} proxies available, {len(candidates)} candidates loaded"
+        )
 
     async def _is_valid_proxy(self, proxy: IpInfoModel) -> bool:
         """
@@ -83,31 +137,124 @@ class ProxyIpPool:
             )
             raise e
 
+    async def _validate_latency(self, proxy: IpInfoModel) -> Optional[float]:
+        """
+        验证代理并返回耗时（秒），无效时返回 None
+        :param proxy:
+        :return:
+        """
+        start = time.monotonic()
+        try:
+            if not await self._is_valid_proxy(proxy):
+                return None
+        except Exception:
+            return None
+        return time.monotonic() - start
+
+    @staticmethod
+    def _is_expiring(proxy: IpInfoModel) -> bool:
+        """代理即将过期（预留 IP_PROXY_EXPIRE_MARGIN 秒）"""
+        if not proxy.expired_time_ts:
+            return False
+        return proxy.expired_time_ts - utils.get_unix_timestamp() <= config.IP_PROXY_EXPIRE_MARGIN
+
+    def _evict(self, proxy: IpInfoModel, reason: str):
+        if proxy in self.proxy_list:
+            self.proxy_list.remove(proxy)
+            utils.logger.info(f"[ProxyIpPool._evict] evict proxy {proxy_key(proxy)}, reason: {reason}")
+        self.health.pop(proxy_key(proxy), None)
+
+    def _evict_expiring(self):
+        for proxy in list(self.proxy_list):
+            if self._is_expiring(proxy):
+                self._evict(proxy, "expiring")
+
+    async def _refill(self):
+        async with self._refill_lock:
+            await self.load_proxies()
+
+    def _schedule_refill(self):
+        """可用代理低于水位线时在后台补充，不阻塞当前请求"""
+        if len(self.proxy_list) >= config.IP_PROXY_LOW_WATER_MARK:
+            return
+        if self._refill_task is not None and not self._refill_task.done():
+            return
+        self._refill_task = asyncio.create_task(self._refill())
+        self._refill_task.add_done_callback(self._on_refill_done)
+
+    @staticmethod
+    def _on_refill_done(task: asyncio.Task):
+        if not task.cancelled() and task.exception() is not None:
+            utils.logger.error(f"[ProxyIpPool._refill] refill proxies error: {task.exception()}")
+
     @retry(stop=stop_after_attempt(3), wait=wait_fixed(1))
-    async def get_proxy(self) -> IpInfoModel:
+    async def get_proxy(self, exclude: Optional[Set[str]] = None) -> IpInfoModel:
         """
-        从代理池中随机提取一个代理IP
+        从代理池中提取健康分最高的代理IP，代理会留在池中供其他请求继续使用
+        :param exclude: 尽量不使用的代理（ip:port），例如已经绑定到其他会话的代理，没有其他可用代理时忽略
         :return:
         """
+        self._evict_expiring()
         if len(self.proxy_list) == 0:
             await self._reload_proxies()
+        if len(self.proxy_list) == 0:
+            raise Exception("[ProxyIpPool.get_proxy] no valid proxy and again get it")
 
-        proxy = random.choice(self.proxy_list)
-        self.proxy_list.remove(proxy)  # 取出来一个IP就应该移出掉
-        if self.enable_validate_ip:
-            if not await self._is_valid_proxy(proxy):
-                raise Exception(
-                    "[ProxyIpPool.get_proxy] current ip invalid and again get it"
-                )
+        candidates = [p for p in self.proxy_list if proxy_key(p) not in (exclude or set())] or self.proxy_list
+        proxy = max(candidates, key=lambda p: self.health[proxy_key(p)].score)
+        self.health[proxy_key(proxy)].in_use += 1
+        self._schedule_refill()
         return proxy
 
+    def is_proxy_usable(self, proxy: IpInfoModel) -> bool:
+        """
+        代理是否仍在池中且没有即将过期，已被淘汰的代理需要换掉
+        :param proxy:
+        :return:
+        """
+        return proxy_key(proxy) in self.health and not self._is_expiring(proxy)
+
+    def release_proxy(self, proxy: IpInfoModel):
+        """
+        使用完代理后归还，降低正在使用的计数，会话换代理时调用
+        :param proxy:
+        :return:
+        """
+        health = self.health.get(proxy_key(proxy))
+        if health is not None and health.in_use > 0:
+            health.in_use -= 1
+
+    def report_proxy_result(self, proxy: IpInfoModel, success: bool, latency: Optional[float] = None):
+        """
+        上报代理的请求结果，更新健康分，成功率过低时淘汰并在后台补充
+        :param proxy: 代理
+        :param success: 请求是否成功
+        :param latency: 请求耗时（秒）
+        :return:
+        """
+        health = self.health.get(proxy_key(proxy))
+        if health is None:
+            return
+        health.update(success, latency)
+        if health.success_score < config.IP_PROXY_MIN_SUCCESS_SCORE:
+            self._evict(proxy, f"success score {health.success_score:.2f}")
+            self._schedule_refill()
+
     async def _reload_proxies(self):
         """
         # 重新加载代理池
         :return:
         """
-        self.proxy_list = []
-        await self.load_proxies()
+        await self._refill()
+
+    async def close(self):
+        """
+        取消后台补充任务
+        :return:
+        """
+        if self._refill_task is not None and not self._refill_task.done():
+            self._refill_task.cancel()
+            await asyncio.gather(self._refill_task, return_exceptions=True)
 
 
 IpProxyProvider: Dict[str, ProxyProvider] = {
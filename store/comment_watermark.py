@@ -0,0 +1,116 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 评论高水位：按帖子记录上次爬取时的评论数和已保存的最新一条评论，
+#            评论数没有变化的帖子跳过，评论数变化的帖子只爬取高水位之后的新评论。
+#            高水位复用爬取边界的 sqlite / redis 存储，使用独立的命名空间，不会随断点续爬进度一起清空
+
+from typing import Callable, Dict, Iterable, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+
+import config
+from frontier.abs_frontier import STATUS_DONE, AbstractFrontier, FrontierUnit
+from frontier.frontier_factory import FrontierFactory
+from tools import utils
+
+T = TypeVar("T")
+
+
+def _comment_id_order(comment_id: str) -> int:
+    return int(comment_id) if comment_id and str(comment_id).isdigit() else 0
+
+
+class CommentWatermark(BaseModel):
+    comments_count: int = Field(default=-1, title="上次爬取完成时帖子的评论数，-1 表示未知")
+    newest_ts: int = Field(default=0, title="已保存的最新评论的发布时间戳")
+    newest_id: str = Field(default="", title="已保存的最新评论ID，发布时间相同时比较ID")
+    sub_comment_counts: Dict[str, int] = Field(
+        default_factory=dict, title="一级评论上次爬取子评论时的子评论数，子评论数增加后重新爬取该评论的子评论")
+
+    def is_newer(self, ts: int, comment_id: str) -> bool:
+        """
+        评论是否在高水位之后
+        :param ts: 评论发布时间戳
+        :param comment_id: 评论ID
+        :return:
+        """
+        return (ts or 0, _comment_id_order(comment_id)) > (self.newest_ts, _comment_id_order(self.newest_id))
+
+    def advance(self, comments: Iterable[T], order_key: Callable[[T], Tuple[int, str]]) -> None:
+        """
+        把高水位推进到已爬取评论中最新的一条
+        :param comments: 本次爬取到的评论
+        :param order_key: 返回 (发布时间戳, 评论ID)
+        :return:
+        """
+        for comment in comments:
+            ts, comment_id = order_key(comment)
+            if self.is_newer(ts, comment_id):
+                self.newest_ts, self.newest_id = ts or 0, str(comment_id)
+
+
+class CommentWatermarkStore:
+
+    def __init__(self, frontier: AbstractFrontier):
+        """
+        :param frontier: 保存高水位的存储，每个帖子一个单元，cursor 为高水位
+        """
+        self._frontier = frontier
+
+    async def get(self, note_id: str) -> CommentWatermark:
+        """
+        获取帖子的评论高水位，没有记录时返回空的高水位（全部评论都是新评论）
+        :param note_id:
+        :return:
+        """
+        unit = await self._frontier.get(note_id)
+        if unit is None:
+            return CommentWatermark()
+        return CommentWatermark(**unit.cursor)
+
+    async def save(self, note_id: str, watermark: CommentWatermark) -> None:
+        """
+        帖子的评论爬取完成后保存高水位
+        :param note_id:
+        :param watermark:
+        :return:
+        """
+        await self._frontier.save(FrontierUnit(unit_key=note_id, status=STATUS_DONE, cursor=watermark.model_dump(),
+                                               update_ts=utils.get_current_timestamp()))
+
+    async def close(self) -> None:
+        await self._frontier.close()
+
+
+_watermark_store: Optional[CommentWatermarkStore] = None
+
+
+def get_comment_watermark_store() -> Optional[CommentWatermarkStore]:
+    """
+    获取当前平台的评论高水位存储，未开启增量评论爬取时返回 None
+    :return:
+    """
+    global _watermark_store
+    if not config.ENABLE_INCREMENTAL_COMMENTS:
+        return None
+    if _watermark_store is None:
+        _watermark_store = CommentWatermarkStore(
+            FrontierFactory.create_frontier(config.CRAWL_FRONTIER_TYPE, f"{config.PLATFORM}:comment_watermark")
+        )
+    return _watermark_store
+
+
+async def close_comment_watermark_store() -> None:
+    global _watermark_store
+    if _watermark_store is not None:
+        store, _watermark_store = _watermark_store, None
+        await store.close()
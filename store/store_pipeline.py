@@ -0,0 +1,241 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 存储缓冲队列，爬取协程只负责入队，由后台任务按批量/间隔调用存储实现的批量接口
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Tuple
+
+import config
+from base.base_crawler import AbstractStore
+from dedup.seen_set_factory import get_seen_set
+from metrics.crawler_metrics import ITEMS_STORED_TOTAL, QUEUE_DEPTH, STORE_LATENCY_SECONDS
+from metrics.tracing import trace_span
+from tools import utils
+
+ITEM_TYPE_CONTENTS = "contents"
+ITEM_TYPE_COMMENTS = "comments"
+# 已见集合标记，在它之前提交的数据全部写入成功后才加入已见集合
+_SEEN_MARK = "seen_mark"
+
+# (已见集合内容类型, key)，数据写入成功后加入已见集合
+SeenKey = Tuple[str, str]
+
+# 通知后台任务退出的哨兵
+_STOP = object()
+
+
+class StorePipeline:
+    """
+    有界内存队列 + 后台 flush 任务。
+    队列满时 submit 会等待，从而对爬取协程形成背压；程序退出时调用 drain 保证队列中的数据全部写入。
+    """
+
+    def __init__(self, max_size: int = 1000, batch_size: int = 100, flush_interval: float = 2,
+                 max_retries: int = 3, retry_interval: float = 1):
+        """
+        :param max_size: 队列最大长度
+        :param batch_size: 累积多少条数据触发一次批量写入
+        :param flush_interval: 距离上次写入超过多少秒触发一次写入
+        :param max_retries: 批量写入失败后的重试次数，仍失败时逐条写入
+        :param retry_interval: 重试间隔（秒），按重试次数线性增加
+        """
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_interval = retry_interval
+        self._queue: Optional[asyncio.Queue] = None
+        self._flusher: Optional[asyncio.Task] = None
+        # 重试和逐条写入后仍然写入失败、被丢弃的数据条数
+        self.dropped_items = 0
+
+    @property
+    def pending(self) -> int:
+        return self._queue.qsize() if self._queue else 0
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue(maxsize=self.max_size)
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._run())
+
+    async def submit(self, store: AbstractStore, item_type: str, items: List[Dict],
+                     seen_entity: str = "", seen_keys: Optional[List[str]] = None):
+        """
+        提交待存储的数据，未开启缓冲队列时直接调用存储实现的批量接口
+        Args:
+            store: 存储实现
+            item_type: contents | comments
+            items: 待存储的数据
+            seen_entity: 已见集合的内容类型，为空时不记录
+            seen_keys: 与 items 一一对应的已见集合 key，所在批次写入成功后才加入已见集合
+
+        Returns:
+
+        """
+        if not items:
+            return
+        item_seen_keys: List[Optional[SeenKey]] = (
+            [(seen_entity, key) for key in seen_keys] if seen_entity and seen_keys else [None] * len(items))
+        if not config.ENABLE_STORE_PIPELINE:
+            await self._write(store, item_type, items, item_seen_keys)
+            return
+        self._ensure_started()
+        for item, seen_key in zip(items, item_seen_keys):
+            await self._queue.put((store, item_type, item, seen_key))
+
+    async def mark_seen(self, seen_entity: str, keys: List[str]):
+        """
+        在此之前提交的数据全部写入成功后把 keys 加入已见集合，
+        用于"帖子评论已完整爬取"这类依赖多批数据都写入成功的标记
+        Args:
+            seen_entity: 已见集合的内容类型
+            keys:
+
+        Returns:
+
+        """
+        if not keys:
+            return
+        if not config.ENABLE_STORE_PIPELINE:
+            # 未开启缓冲队列时数据已同步写入，写入失败会直接抛给调用方
+            await get_seen_set(seen_entity).add(keys)
+            return
+        self._ensure_started()
+        await self._queue.put((None, _SEEN_MARK, (seen_entity, keys), None))
+
+    async def _run(self):
+        buffer: List[Tuple[AbstractStore, str, Dict, Optional[SeenKey]]] = []
+        last_flush = time.monotonic()
+        stopping = False
+        while not stopping:
+            timeout = max(0.0, self.flush_interval - (time.monotonic() - last_flush))
+            try:
+                entry = await asyncio.wait_for(self._queue.get(), timeout=timeout)
+                self._queue.task_done()
+                if entry is _STOP:
+                    stopping = True
+                else:
+                    buffer.append(entry)
+            except asyncio.TimeoutError:
+                pass
+            if stopping or len(buffer) >= self.batch_size or time.monotonic() - last_flush >= self.flush_interval:
+                if buffer:
+                    await self._flush(buffer)
+                    buffer = []
+                last_flush = time.monotonic()
+
+    async def _flush(self, buffer: List[Tuple[AbstractStore, str, Dict, Optional[SeenKey]]]):
+        """按 存储实现类 + 数据类型 分组后批量写入，再处理本批次中的已见集合标记"""
+        groups: Dict[Tuple[type, str], Tuple[AbstractStore, List[Dict], List[Optional[SeenKey]]]] = {}
+        seen_marks: List[Tuple[str, List[str]]] = []
+        for store, item_type, item, seen_key in buffer:
+            if item_type == _SEEN_MARK:
+                seen_marks.append(item)
+                continue
+            group = groups.setdefault((type(store), item_type), (store, [], []))
+            group[1].append(item)
+            group[2].append(seen_key)
+        dropped = 0
+        for (_, item_type), (store, items, seen_keys) in groups.items():
+            dropped += await self._write_with_retry(store, item_type, items, seen_keys)
+        for seen_entity, keys in seen_marks:
+            # 本次写入有数据被丢弃时，标记依赖的数据可能不完整，下次运行需要重新爬取
+            if dropped:
+                utils.logger.warning(
+                    f"[StorePipeline._flush] {dropped} items failed to store, skip marking {len(keys)} {seen_entity} keys as seen")
+                continue
+            await get_seen_set(seen_entity).add(keys)
+
+    async def _write_with_retry(self, store: AbstractStore, item_type: str, items: List[Dict],
+                                seen_keys: List[Optional[SeenKey]]) -> int:
+        """
+        批量写入，失败时按间隔重试，重试仍失败时逐条写入，避免一条坏数据或一次数据库抖动丢掉整批数据
+        :return: 最终写入失败被丢弃的条数
+        """
+        for attempt in range(self.max_retries + 1):
+            try:
+                await self._write(store, item_type, items, seen_keys)
+                return 0
+            except Exception as e:
+                utils.logger.warning(
+                    f"[StorePipeline._write_with_retry] store {len(items)} {item_type} failed "
+                    f"(attempt {attempt + 1}/{self.max_retries + 1}): {e}")
+            if attempt < self.max_retries:
+                await asyncio.sleep(self.retry_interval * (attempt + 1))
+
+        dropped = 0
+        for item, seen_key in zip(items, seen_keys):
+            try:
+                await self._write(store, item_type, [item], [seen_key])
+            except Exception as e:
+                dropped += 1
+                utils.logger.error(f"[StorePipeline._write_with_retry] store {item_type} item failed, drop it: {e}, item: {str(item)[:200]}")
+        self.dropped_items += dropped
+        return dropped
+
+    @staticmethod
+    async def _write(store: AbstractStore, item_type: str, items: List[Dict],
+                     seen_keys: Optional[List[Optional[SeenKey]]] = None):
+        store_name = store.__class__.__name__
+        with trace_span("store_write", store=store_name, item_type=item_type, count=len(items)), \
+                STORE_LATENCY_SECONDS.time(store=store_name, item_type=item_type):
+            if item_type == ITEM_TYPE_CONTENTS:
+                await store.store_contents_batch(items)
+            elif item_type == ITEM_TYPE_COMMENTS:
+                await store.store_comments_batch(items)
+            else:
+                raise ValueError(f"[StorePipeline._write] Invalid item type: {item_type}")
+        ITEMS_STORED_TOTAL.inc(len(items), store=store_name, item_type=item_type)
+        # 写入成功后才加入已见集合
+        entity_keys: Dict[str, List[str]] = {}
+        for seen_key in seen_keys or []:
+            if seen_key:
+                entity_keys.setdefault(seen_key[0], []).append(seen_key[1])
+        for seen_entity, keys in entity_keys.items():
+            await get_seen_set(seen_entity).add(keys)
+
+    async def drain(self):
+        """
+        通知后台任务写完队列中剩余的数据后退出
+        Returns:
+
+        """
+        if self._queue is None:
+            return
+        if self._flusher is not None and not self._flusher.done():
+            utils.logger.info(f"[StorePipeline.drain] waiting for {self.pending} pending items to be stored")
+            await self._queue.put(_STOP)
+            await self._flusher
+        else:
+            # 后台任务已经退出（例如事件循环被中断），直接在当前协程中写入
+            buffer = []
+            while not self._queue.empty():
+                entry = self._queue.get_nowait()
+                if entry is not _STOP:
+                    buffer.append(entry)
+            if buffer:
+                await self._flush(buffer)
+        self._flusher = None
+        # 队列绑定在当前事件循环上，清理后允许在新的事件循环中重新创建
+        self._queue = None
+
+
+store_pipeline = StorePipeline(
+    max_size=config.STORE_PIPELINE_MAX_SIZE,
+    batch_size=config.STORE_PIPELINE_BATCH_SIZE,
+    flush_interval=config.STORE_PIPELINE_FLUSH_INTERVAL,
+    max_retries=config.STORE_PIPELINE_MAX_RETRIES,
+    retry_interval=config.STORE_PIPELINE_RETRY_INTERVAL,
+)
+QUEUE_DEPTH.set_function(lambda: store_pipeline.pending, queue="store_pipeline")
@@ -16,17 +16,24 @@
 import re
 from typing import List
 
+from cache.tiered_cache import get_tiered_cache
+from dedup.seen_set_factory import SEEN_COMMENT, SEEN_NOTE, get_seen_set
+from store.store_pipeline import ITEM_TYPE_COMMENTS, ITEM_TYPE_CONTENTS, store_pipeline
 from var import source_keyword_var
 
 from .weibo_store_media import *
 from ._store_impl import *
 
+# creator 的 last_modify_ts 缓存时间（秒），save_creator 时同步写入缓存
+CREATOR_LAST_TS_CACHE_TTL = 24 * 60 * 60
+
 
 class WeibostoreFactory:
     STORES = {
         "csv": WeiboCsvStoreImplement,
         "db": WeiboDbStoreImplement,
         "json": WeiboJsonStoreImplement,
+        "jsonl": WeiboJsonlStoreImplement,
         "sqlite": WeiboSqliteStoreImplement,
         "mongodb": WeiboMongoStoreImplement,
     }
@@ -36,7 +43,7 @@ class WeibostoreFactory:
         store_class = WeibostoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
             raise ValueError(
-                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb ...")
+                "[WeibotoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb ...")
         return store_class()
 
 
@@ -51,8 +58,10 @@ async def batch_update_weibo_notes(note_list: List[Dict]):
     """
     if not note_list:
         return
-    for note_item in note_list:
-        await update_weibo_note(note_item)
+    note_list = [note_item for note_item in note_list if note_item]
+    save_content_items = [_build_weibo_note_item(note_item) for note_item in note_list]
+    await store_pipeline.submit(WeibostoreFactory.create_store(), ITEM_TYPE_CONTENTS, save_content_items,
+                                SEEN_NOTE, [note_seen_key(note_item.get("mblog")) for note_item in note_list])
 
 
 async def update_weibo_note(note_item: Dict):
@@ -66,6 +75,44 @@ async def update_weibo_note(note_item: Dict):
     """
     if not note_item:
         return
+    save_content_item = _build_weibo_note_item(note_item)
+    await store_pipeline.submit(WeibostoreFactory.create_store(), ITEM_TYPE_CONTENTS, [save_content_item],
+                                SEEN_NOTE, [note_seen_key(note_item.get("mblog"))])
+
+
+def note_seen_key(mblog: Dict) -> str:
+    """
+    帖子在已见集合中的 key，评论数、点赞数、转发数变化后视为新内容
+    Args:
+        mblog:
+
+    Returns:
+
+    """
+    return f"{mblog.get('id')}:{mblog.get('comments_count', 0)}:{mblog.get('attitudes_count', 0)}:{mblog.get('reposts_count', 0)}"
+
+
+def comment_seen_key(comment_item: Dict) -> str:
+    """
+    评论在已见集合中的 key，点赞数、回复数变化后视为新内容
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    return f"{comment_item.get('id')}:{comment_item.get('like_count', 0)}:{comment_item.get('total_number', 0)}"
+
+
+def _build_weibo_note_item(note_item: Dict) -> Dict:
+    """
+    Convert weibo note api item to store item
+    Args:
+        note_item:
+
+    Returns:
+
+    """
     mblog: Dict = note_item.get("mblog")
     is_long = True if mblog.get("pic_num") > 9 else mblog.get("isLongText")
     user_info: Dict = mblog.get("user")
@@ -100,7 +147,7 @@ async def update_weibo_note(note_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note] weibo note id:{note_id}, title:{save_content_item.get('content')[:24]} ...")
-    await WeibostoreFactory.create_store().store_content(content_item=save_content_item)
+    return save_content_item
 
 
 async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
@@ -113,10 +160,13 @@ async def batch_update_weibo_note_comments(note_id: str, comments: List[Dict]):
     Returns:
 
     """
-    if not comments:
+    if not comments or not note_id:
         return
-    for comment_item in comments:
-        await update_weibo_note_comment(note_id, comment_item)
+    # 多次运行之间重复出现且点赞数、回复数没有变化的评论不再写入存储
+    comments = await get_seen_set(SEEN_COMMENT).filter_new([c for c in comments if c], comment_seen_key)
+    save_comment_items = [_build_weibo_comment_item(note_id, comment_item) for comment_item in comments]
+    await store_pipeline.submit(WeibostoreFactory.create_store(), ITEM_TYPE_COMMENTS, save_comment_items,
+                                SEEN_COMMENT, [comment_seen_key(comment_item) for comment_item in comments])
 
 
 async def update_weibo_note_comment(note_id: str, comment_item: Dict):
@@ -131,6 +181,20 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     """
     if not comment_item or not note_id:
         return
+    save_comment_item = _build_weibo_comment_item(note_id, comment_item)
+    await store_pipeline.submit(WeibostoreFactory.create_store(), ITEM_TYPE_COMMENTS, [save_comment_item])
+
+
+def _build_weibo_comment_item(note_id: str, comment_item: Dict) -> Dict:
+    """
+    Convert weibo comment api item to store item
+    Args:
+        note_id: weibo note id
+        comment_item: weibo comment item
+
+    Returns:
+
+    """
     comment_id = str(comment_item.get("id"))
     user_info: Dict = comment_item.get("user")
     content_text = comment_item.get("text")
@@ -156,21 +220,7 @@ async def update_weibo_note_comment(note_id: str, comment_item: Dict):
     }
     utils.logger.info(
         f"[store.weibo.update_weibo_note_comment] Weibo note comment: {comment_id}, content: {save_comment_item.get('content', '')[:24]} ...")
-    await WeibostoreFactory.create_store().store_comment(comment_item=save_comment_item)
-
-
-async def update_weibo_note_image(picid: str, pic_content, extension_file_name):
-    """
-    Save weibo note image to local
-    Args:
-        picid:
-        pic_content:
-        extension_file_name:
-
-    Returns:
-
-    """
-    return await WeiboStoreImage().store_image({"pic_id": picid, "pic_content": pic_content, "extension_file_name": extension_file_name})
+    return save_comment_item
 
 
 async def save_creator(user_id: str, user_info: Dict, last_modify_ts=0):
@@ -197,6 +247,7 @@ async def save_creator(user_id: str, user_info: Dict, last_modify_ts=0):
     }
     # utils.logger.info(f"[store.weibo.save_creator] creator:{local_db_item}")
     await WeibostoreFactory.create_store().store_creator(local_db_item)
+    await get_tiered_cache().set(_creator_last_ts_cache_key(user_id), last_modify_ts or 0, CREATOR_LAST_TS_CACHE_TTL)
 
 
 async def get_creator(user_id: str):
@@ -210,3 +261,27 @@ async def get_creator(user_id: str):
     """
 
     return await WeibostoreFactory.create_store().get_creator(user_id)
+
+
+def _creator_last_ts_cache_key(user_id: str) -> str:
+    return f"weibo:creator_last_ts:{user_id}"
+
+
+async def get_creator_last_modify_ts(user_id: str) -> int:
+    """
+    Get creator last_modify_ts (ms) through the tiered cache, 0 if the creator was never saved
+    Args:
+        user_id:
+
+    Returns:
+
+    """
+
+    async def load_last_modify_ts():
+        creator_info = await get_creator(user_id)
+        return (creator_info.last_modify_ts or 0) if creator_info else None
+
+    last_modify_ts = await get_tiered_cache().get_or_load(
+        _creator_last_ts_cache_key(user_id), load_last_modify_ts, CREATOR_LAST_TS_CACHE_TTL
+    )
+    return last_modify_ts or 0
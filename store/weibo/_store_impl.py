@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -30,6 +30,7 @@ from database.models import WeiboCreator, WeiboNote, WeiboNoteComment
 from tools import utils, words
 from tools.async_file_writer import AsyncFileWriter
 from database.db_session import get_session
+from database.db_upsert import upsert_rows
 from var import crawler_type_var
 from database.mongodb_store_base import MongoDBStoreBase
 
@@ -99,22 +100,18 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        note_id = content_item.get("note_id")
-        async with get_session() as session:
-            stmt = select(WeiboNote).where(WeiboNote.note_id == note_id)
-            res = await session.execute(stmt)
-            db_note = res.scalar_one_or_none()
-            if db_note:
-                db_note.last_modify_ts = utils.get_current_timestamp()
-                for key, value in content_item.items():
-                    if hasattr(db_note, key):
-                        setattr(db_note, key, value)
-            else:
-                content_item["add_ts"] = utils.get_current_timestamp()
-                content_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_note = WeiboNote(**content_item)
-                session.add(db_note)
-            await session.commit()
+        await self.store_contents_batch([content_item])
+
+    async def store_contents_batch(self, content_items: List[Dict]):
+        """
+        Weibo contents DB batch upsert implementation
+        Args:
+            content_items: content item dict list
+
+        Returns:
+
+        """
+        await upsert_rows(WeiboNote, content_items, conflict_column="note_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -125,22 +122,18 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        comment_id = comment_item.get("comment_id")
-        async with get_session() as session:
-            stmt = select(WeiboNoteComment).where(WeiboNoteComment.comment_id == comment_id)
-            res = await session.execute(stmt)
-            db_comment = res.scalar_one_or_none()
-            if db_comment:
-                db_comment.last_modify_ts = utils.get_current_timestamp()
-                for key, value in comment_item.items():
-                    if hasattr(db_comment, key):
-                        setattr(db_comment, key, value)
-            else:
-                comment_item["add_ts"] = utils.get_current_timestamp()
-                comment_item["last_modify_ts"] = utils.get_current_timestamp()
-                db_comment = WeiboNoteComment(**comment_item)
-                session.add(db_comment)
-            await session.commit()
+        await self.store_comments_batch([comment_item])
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Weibo comments DB batch upsert implementation
+        Args:
+            comment_items: comment item dict list
+
+        Returns:
+
+        """
+        await upsert_rows(WeiboNoteComment, comment_items, conflict_column="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -151,22 +144,7 @@ class WeiboDbStoreImplement(AbstractStore):
         Returns:
 
         """
-        user_id = creator.get("user_id")
-        async with get_session() as session:
-            stmt = select(WeiboCreator).where(WeiboCreator.user_id == user_id)
-            res = await session.execute(stmt)
-            db_creator = res.scalar_one_or_none()
-            if db_creator:
-                db_creator.last_modify_ts = utils.get_current_timestamp()
-                for key, value in creator.items():
-                    if hasattr(db_creator, key):
-                        setattr(db_creator, key, value)
-            else:
-                creator["add_ts"] = utils.get_current_timestamp()
-                creator["last_modify_ts"] = utils.get_current_timestamp()
-                db_creator = WeiboCreator(**creator)
-                session.add(db_creator)
-            await session.commit()
+        await upsert_rows(WeiboCreator, [creator], conflict_column="user_id")
     
     async def get_creator(self, user_id: str) -> Dict:
         """
@@ -224,6 +202,45 @@ class WeiboJsonStoreImplement(AbstractStore):
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
 
+class WeiboJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter(platform="weibo", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSON Lines storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSON Lines storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSON Lines storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="creators", item=creator)
+
+
 class WeiboSqliteStoreImplement(WeiboDbStoreImplement):
     """
     Weibo content SQLite storage implementation
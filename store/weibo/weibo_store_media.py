@@ -12,59 +12,10 @@
 # @Author  : Erm
 # @Time    : 2024/4/9 17:35
 # @Desc    : 微博媒体保存
-import pathlib
-from typing import Dict
-
-import aiofiles
-
-from base.base_crawler import AbstractStoreImage, AbstractStoreVideo
-from tools import utils
+from base.base_crawler import AbstractStoreImage
 
 
 class WeiboStoreImage(AbstractStoreImage):
+    # 图片由媒体下载队列（media/downloader.py）下载到该目录，按内容哈希存放，
+    # 并以 {pid}.{扩展名} 的硬链接保留原来的文件路径
     image_store_path: str = "data/weibo/images"
-
-    async def store_image(self, image_content_item: Dict):
-        """
-        store content
-        
-        Args:
-            image_content_item:
-
-        Returns:
-
-        """
-        return await self.save_image(image_content_item.get("pic_id"), image_content_item.get("pic_content"), image_content_item.get("extension_file_name"))
-
-    def make_save_file_name(self, picid: str, extension_file_name: str) -> str:
-        """
-        make save file name by store type
-        
-        Args:
-            picid: image id
-            extension_file_name: video filename with extension
-
-        Returns:
-
-        """
-        return f"{self.image_store_path}/{picid}.{extension_file_name}"
-
-    async def save_image(self, picid: str, pic_content: str, extension_file_name="jpg"):
-        """
-        save image to local
-        
-        Args:
-            picid: image id
-            pic_content: image content
-            extension_file_name: image filename with extension
-
-        Returns:
-
-        """
-        pathlib.Path(self.image_store_path).mkdir(parents=True, exist_ok=True)
-        save_file_name = self.make_save_file_name(picid, extension_file_name)
-        if not pathlib.Path(save_file_name).exists():
-            async with aiofiles.open(save_file_name, 'wb') as f:
-                await f.write(pic_content)
-                # utils.logger.info(f"[WeiboImageStoreImplement.save_image] save image {save_file_name} success ...")
-        return save_file_name
@@ -10,7 +10,7 @@
 
 
 # -*- coding: utf-8 -*-
-from typing import List
+from typing import Dict, List
 
 import config
 from base.base_crawler import AbstractStore
@@ -18,8 +18,11 @@ from model.m_zhihu import ZhihuComment, ZhihuContent, ZhihuCreator
 from ._store_impl import (ZhihuCsvStoreImplement,
                                           ZhihuDbStoreImplement,
                                           ZhihuJsonStoreImplement,
+                                          ZhihuJsonlStoreImplement,
                                           ZhihuSqliteStoreImplement,
                                           ZhihuMongoStoreImplement)
+from dedup.seen_set_factory import SEEN_COMMENT, SEEN_NOTE, get_seen_set
+from store.store_pipeline import ITEM_TYPE_COMMENTS, ITEM_TYPE_CONTENTS, store_pipeline
 from tools import utils
 from var import source_keyword_var
 
@@ -29,6 +32,7 @@ class ZhihuStoreFactory:
         "csv": ZhihuCsvStoreImplement,
         "db": ZhihuDbStoreImplement,
         "json": ZhihuJsonStoreImplement,
+        "jsonl": ZhihuJsonlStoreImplement,
         "sqlite": ZhihuSqliteStoreImplement,
         "mongodb": ZhihuMongoStoreImplement,
     }
@@ -37,7 +41,7 @@ class ZhihuStoreFactory:
     def create_store() -> AbstractStore:
         store_class = ZhihuStoreFactory.STORES.get(config.SAVE_DATA_OPTION)
         if not store_class:
-            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or sqlite or mongodb ...")
+            raise ValueError("[ZhihuStoreFactory.create_store] Invalid save option only supported csv or db or json or jsonl or sqlite or mongodb ...")
         return store_class()
 
 async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
@@ -52,8 +56,10 @@ async def batch_update_zhihu_contents(contents: List[ZhihuContent]):
     if not contents:
         return
 
-    for content_item in contents:
-        await update_zhihu_content(content_item)
+    contents = await get_seen_set(SEEN_NOTE).filter_new(contents, _content_seen_key)
+    local_db_items = [_build_zhihu_content_item(content_item) for content_item in contents]
+    await store_pipeline.submit(ZhihuStoreFactory.create_store(), ITEM_TYPE_CONTENTS, local_db_items,
+                                SEEN_NOTE, [_content_seen_key(content_item) for content_item in contents])
 
 async def update_zhihu_content(content_item: ZhihuContent):
     """
@@ -63,12 +69,40 @@ async def update_zhihu_content(content_item: ZhihuContent):
 
     Returns:
 
+    """
+    seen_key = _content_seen_key(content_item)
+    if (await get_seen_set(SEEN_NOTE).contains([seen_key]))[0]:
+        return
+    local_db_item = _build_zhihu_content_item(content_item)
+    await store_pipeline.submit(ZhihuStoreFactory.create_store(), ITEM_TYPE_CONTENTS, [local_db_item], SEEN_NOTE, [seen_key])
+
+
+def _content_seen_key(content_item: ZhihuContent) -> str:
+    """
+    内容在已见集合中的 key，内容更新或赞同数、评论数变化后视为新内容
+    Args:
+        content_item:
+
+    Returns:
+
+    """
+    return f"{content_item.content_id}:{content_item.updated_time}:{content_item.voteup_count}:{content_item.comment_count}"
+
+
+def _build_zhihu_content_item(content_item: ZhihuContent) -> Dict:
+    """
+    知乎内容转换为存储的字典
+    Args:
+        content_item:
+
+    Returns:
+
     """
     content_item.source_keyword = source_keyword_var.get()
     local_db_item = content_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_content] zhihu content: {local_db_item}")
-    await ZhihuStoreFactory.create_store().store_content(local_db_item)
+    return local_db_item
 
 
 
@@ -83,9 +117,24 @@ async def batch_update_zhihu_note_comments(comments: List[ZhihuComment]):
     """
     if not comments:
         return
-    
-    for comment_item in comments:
-        await update_zhihu_content_comment(comment_item)
+
+    # 多次运行之间重复出现且点赞数、回复数没有变化的评论不再写入存储
+    comments = await get_seen_set(SEEN_COMMENT).filter_new(comments, _comment_seen_key)
+    local_db_items = [_build_zhihu_comment_item(comment_item) for comment_item in comments]
+    await store_pipeline.submit(ZhihuStoreFactory.create_store(), ITEM_TYPE_COMMENTS, local_db_items,
+                                SEEN_COMMENT, [_comment_seen_key(comment_item) for comment_item in comments])
+
+
+def _comment_seen_key(comment_item: ZhihuComment) -> str:
+    """
+    评论在已见集合中的 key，点赞数、回复数变化后视为新内容
+    Args:
+        comment_item:
+
+    Returns:
+
+    """
+    return f"{comment_item.comment_id}:{comment_item.like_count}:{comment_item.sub_comment_count}"
 
 
 async def update_zhihu_content_comment(comment_item: ZhihuComment):
@@ -96,11 +145,24 @@ async def update_zhihu_content_comment(comment_item: ZhihuComment):
 
     Returns:
 
+    """
+    local_db_item = _build_zhihu_comment_item(comment_item)
+    await store_pipeline.submit(ZhihuStoreFactory.create_store(), ITEM_TYPE_COMMENTS, [local_db_item])
+
+
+def _build_zhihu_comment_item(comment_item: ZhihuComment) -> Dict:
+    """
+    知乎评论转换为存储的字典
+    Args:
+        comment_item:
+
+    Returns:
+
     """
     local_db_item = comment_item.model_dump()
     local_db_item.update({"last_modify_ts": utils.get_current_timestamp()})
     utils.logger.info(f"[store.zhihu.update_zhihu_note_comment] zhihu content comment:{local_db_item}")
-    await ZhihuStoreFactory.create_store().store_comment(local_db_item)
+    return local_db_item
 
 
 async def save_creator(creator: ZhihuCreator):
@@ -18,7 +18,7 @@ import csv
 import json
 import os
 import pathlib
-from typing import Dict
+from typing import Dict, List
 
 import aiofiles
 from sqlalchemy import select
@@ -27,6 +27,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 import config
 from base.base_crawler import AbstractStore
 from database.db_session import get_session
+from database.db_upsert import upsert_rows
 from database.models import ZhihuContent, ZhihuComment, ZhihuCreator
 from tools import utils, words
 from var import crawler_type_var
@@ -94,18 +95,15 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             content_item: content item dict
         """
-        content_id = content_item.get("content_id")
-        async with get_session() as session:
-            stmt = select(ZhihuContent).where(ZhihuContent.content_id == content_id)
-            result = await session.execute(stmt)
-            existing_content = result.scalars().first()
-            if existing_content:
-                for key, value in content_item.items():
-                    setattr(existing_content, key, value)
-            else:
-                new_content = ZhihuContent(**content_item)
-                session.add(new_content)
-            await session.commit()
+        await self.store_contents_batch([content_item])
+
+    async def store_contents_batch(self, content_items: List[Dict]):
+        """
+        Zhihu contents DB batch upsert implementation
+        Args:
+            content_items: content item dict list
+        """
+        await upsert_rows(ZhihuContent, content_items, conflict_column="content_id")
 
     async def store_comment(self, comment_item: Dict):
         """
@@ -113,18 +111,15 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             comment_item: comment item dict
         """
-        comment_id = comment_item.get("comment_id")
-        async with get_session() as session:
-            stmt = select(ZhihuComment).where(ZhihuComment.comment_id == comment_id)
-            result = await session.execute(stmt)
-            existing_comment = result.scalars().first()
-            if existing_comment:
-                for key, value in comment_item.items():
-                    setattr(existing_comment, key, value)
-            else:
-                new_comment = ZhihuComment(**comment_item)
-                session.add(new_comment)
-            await session.commit()
+        await self.store_comments_batch([comment_item])
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        """
+        Zhihu comments DB batch upsert implementation
+        Args:
+            comment_items: comment item dict list
+        """
+        await upsert_rows(ZhihuComment, comment_items, conflict_column="comment_id")
 
     async def store_creator(self, creator: Dict):
         """
@@ -132,18 +127,7 @@ class ZhihuDbStoreImplement(AbstractStore):
         Args:
             creator: creator dict
         """
-        user_id = creator.get("user_id")
-        async with get_session() as session:
-            stmt = select(ZhihuCreator).where(ZhihuCreator.user_id == user_id)
-            result = await session.execute(stmt)
-            existing_creator = result.scalars().first()
-            if existing_creator:
-                for key, value in creator.items():
-                    setattr(existing_creator, key, value)
-            else:
-                new_creator = ZhihuCreator(**creator)
-                session.add(new_creator)
-            await session.commit()
+        await upsert_rows(ZhihuCreator, [creator], conflict_column="user_id")
 
 
 class ZhihuJsonStoreImplement(AbstractStore):
@@ -185,6 +169,45 @@ class ZhihuJsonStoreImplement(AbstractStore):
         await self.writer.write_single_item_to_json(item_type="creators", item=creator)
 
 
+class ZhihuJsonlStoreImplement(AbstractStore):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = AsyncFileWriter(platform="zhihu", crawler_type=crawler_type_var.get())
+
+    async def store_content(self, content_item: Dict):
+        """
+        content JSON Lines storage implementation
+        Args:
+            content_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="contents", item=content_item)
+
+    async def store_comment(self, comment_item: Dict):
+        """
+        comment JSON Lines storage implementation
+        Args:
+            comment_item:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="comments", item=comment_item)
+
+    async def store_creator(self, creator: Dict):
+        """
+        creator JSON Lines storage implementation
+        Args:
+            creator:
+
+        Returns:
+
+        """
+        await self.writer.write_single_item_to_jsonl(item_type="creators", item=creator)
+
+
 class ZhihuSqliteStoreImplement(ZhihuDbStoreImplement):
     """
     Zhihu content SQLite storage implementation
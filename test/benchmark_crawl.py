@@ -0,0 +1,342 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取吞吐量基准测试：在本地启动回放服务（test/replay_server.py），用 WeiboCrawler / ZhihuCrawler
+#            的爬取流程对它爬取，按存储方式分别统计 请求数/秒、保存条数/秒、请求延迟 p50/p99 和进程峰值内存。
+#            每种存储方式在独立的子进程和临时目录中运行，峰值内存和输出文件互不影响
+# 用法：python -m test.benchmark_crawl --platform wb --stores json,jsonl,csv,sqlite --latency-ms 20
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import resource
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+import httpx
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULT_PREFIX = "BENCHMARK_RESULT "
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="离线回放爬取基准测试")
+    parser.add_argument("--platform", choices=["wb", "zhihu"], default="wb")
+    parser.add_argument("--crawler-type", choices=["search", "creator"], default="search")
+    parser.add_argument("--stores", default="json,jsonl,csv,sqlite", help="逗号分隔的存储方式，对应 SAVE_DATA_OPTION")
+    parser.add_argument("--keywords", default="python,编程")
+    parser.add_argument("--creators", default="1000000001,1000000002", help="微博用户ID或知乎 url_token，逗号分隔")
+    parser.add_argument("--search-pages", type=int, default=5)
+    parser.add_argument("--comment-pages", type=int, default=2)
+    parser.add_argument("--creator-pages", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=0)
+    parser.add_argument("--latency-jitter-ms", type=float, default=0)
+    parser.add_argument("--error-rate", type=float, default=0)
+    parser.add_argument("--ban-rate", type=float, default=0)
+    parser.add_argument("--concurrency", type=int, default=4, help="MAX_CONCURRENCY_NUM")
+    parser.add_argument("--pipeline", action="store_true", help="开启搜索流水线 ENABLE_SEARCH_PIPELINE")
+    parser.add_argument("--store-pipeline", action="store_true", help="开启存储缓冲队列 ENABLE_STORE_PIPELINE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--store", help=argparse.SUPPRESS)
+    return parser
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法计算百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+# ==================== 子进程：运行一次爬取 ====================
+
+def _replay_http_pool_class():
+    from tools.http_pool import HttpClientPool
+
+    class ReplayHttpClientPool(HttpClientPool):
+        """把所有请求改写到回放服务，并记录每个请求的耗时"""
+
+        def __init__(self, base_url: str, timeout: Optional[float] = None):
+            super().__init__(timeout=timeout)
+            self.base_url = urlsplit(base_url)
+            self.latencies: List[float] = []
+            self.failed = 0
+
+        async def request(self, method: str, url: str, proxy: Optional[str] = None, **kwargs) -> httpx.Response:
+            parts = urlsplit(url)
+            replay_url = urlunsplit((self.base_url.scheme, self.base_url.netloc, parts.path, parts.query, ""))
+            start = time.perf_counter()
+            try:
+                response = await super().request(method, replay_url, proxy=None, **kwargs)
+            except httpx.HTTPError:
+                self.failed += 1
+                raise
+            self.latencies.append(time.perf_counter() - start)
+            return response
+
+    return ReplayHttpClientPool
+
+
+class _ReplayBrowserContext:
+    async def cookies(self, urls=None) -> List[Dict]:
+        return []
+
+
+class _ReplayPage:
+    """回放时没有浏览器，微博 client 遇到风控后刷新页面和 Cookie 的操作在这里直接返回"""
+
+    def __init__(self):
+        self.context = _ReplayBrowserContext()
+
+    async def goto(self, url: str, **kwargs):
+        return None
+
+
+def _count_store_writes(store_class, counter: Dict[str, int]):
+    """统计存储实现实际写入的条数"""
+
+    def wrap(method_name: str, counter_key: str, batch: bool):
+        original = getattr(store_class, method_name)
+
+        async def counted(self, items):
+            counter[counter_key] += len(items) if batch else 1
+            return await original(self, items)
+
+        setattr(store_class, method_name, counted)
+
+    wrap("store_contents_batch", "contents", True)
+    wrap("store_comments_batch", "comments", True)
+    wrap("store_creator", "creators", False)
+
+
+def _configure(args, work_dir: str):
+    import config
+    from config import db_config
+
+    config.PLATFORM = args.platform
+    config.CRAWLER_TYPE = args.crawler_type
+    config.KEYWORDS = args.keywords
+    config.SAVE_DATA_OPTION = args.store
+    config.START_PAGE = 1
+    config.CRAWLER_MAX_NOTES_COUNT = args.search_pages * (10 if args.platform == "wb" else 20)
+    config.CRAWLER_MAX_COMMENTS_COUNT_SINGLENOTES = 10 ** 6
+    config.ENABLE_GET_COMMENTS = True
+    config.ENABLE_GET_SUB_COMMENTS = True
+    config.ENABLE_GET_MEIDAS = False
+    config.MAX_CONCURRENCY_NUM = args.concurrency
+    config.ENABLE_SEARCH_PIPELINE = args.pipeline
+    config.ENABLE_STORE_PIPELINE = args.store_pipeline
+    # 开启限流后翻页之间不再 sleep，令牌桶的速率设得足够大，测出来的是爬虫自身的开销
+    config.ENABLE_RATE_LIMITER = True
+    config.RATE_LIMITER_RATE = 10 ** 6
+    config.RATE_LIMITER_BURST = 10 ** 6
+    config.RATE_LIMITER_JITTER = 0
+    config.RATE_LIMITER_HOST_RATES = {}
+    config.CRAWLER_MAX_SLEEP_SEC = 0
+    config.CRAWL_INTERVAL = 0
+    config.ENABLE_CRAWL_FRONTIER = False
+    config.ENABLE_SEEN_SET = False
+    config.ENABLE_INCREMENTAL_COMMENTS = False
+    config.ENABLE_DISTRIBUTED_WORKER = False
+    config.WEIBO_CREATOR_ID_LIST = args.creators.split(",")
+    config.ZHIHU_CREATOR_URL_LIST = [f"https://www.zhihu.com/people/{token}" for token in args.creators.split(",")]
+    db_config.sqlite_db_config["db_path"] = os.path.join(work_dir, "sqlite_tables.db")
+    db_config.FRONTIER_SQLITE_PATH = os.path.join(work_dir, "crawl_frontier.db")
+    db_config.SEEN_SET_FILE_DIR = os.path.join(work_dir, "seen_set")
+
+
+def _create_crawler(args, base_url: str):
+    import config
+    from tools import utils
+
+    pool_class = _replay_http_pool_class()
+    if args.platform == "wb":
+        from media_platform.weibo import WeiboCrawler
+        from media_platform.weibo.client import WeiboClient
+        from store.weibo import WeibostoreFactory
+
+        crawler = WeiboCrawler()
+        client = WeiboClient(
+            headers={"User-Agent": utils.get_mobile_user_agent(), "Cookie": "SUB=replay", "Origin": "https://m.weibo.cn",
+                     "Referer": "https://m.weibo.cn", "Content-Type": "application/json;charset=UTF-8"},
+            playwright_page=_ReplayPage(),
+            cookie_dict={"SUB": "replay"},
+        )
+        crawler.wb_client = client
+        store_class = WeibostoreFactory.STORES[config.SAVE_DATA_OPTION]
+    else:
+        from media_platform.zhihu import ZhihuCrawler
+        from media_platform.zhihu.client import ZhiHuClient
+        from store.zhihu import ZhihuStoreFactory
+
+        crawler = ZhihuCrawler()
+        d_c0 = "AHBTQ9J0Gx-PTt0v6rYtr9cXs1Jh0g-8Yws=|1711938443"
+        client = ZhiHuClient(
+            headers={"accept": "*/*", "cookie": f"d_c0={d_c0}", "user-agent": crawler.user_agent,
+                     "x-api-version": "3.0.91", "x-requested-with": "fetch", "x-zse-93": "101_3_3.0"},
+            playwright_page=_ReplayPage(),
+            cookie_dict={"d_c0": d_c0},
+        )
+        crawler.zhihu_client = client
+        store_class = ZhihuStoreFactory.STORES[config.SAVE_DATA_OPTION]
+    client._http_pool = pool_class(base_url, timeout=client.timeout)
+    return crawler, client, store_class
+
+
+async def _run_crawl(args, base_url: str) -> Dict:
+    import config
+    from database import db
+    from store.store_pipeline import store_pipeline
+    from var import crawler_type_var
+
+    if config.SAVE_DATA_OPTION in ("sqlite", "db"):
+        await db.init_db(config.SAVE_DATA_OPTION if config.SAVE_DATA_OPTION == "sqlite" else "mysql")
+    crawler, client, store_class = _create_crawler(args, base_url)
+    counter = {"contents": 0, "comments": 0, "creators": 0}
+    _count_store_writes(store_class, counter)
+    crawler_type_var.set(config.CRAWLER_TYPE)
+
+    error = ""
+    start = time.perf_counter()
+    try:
+        if config.CRAWLER_TYPE == "search":
+            await crawler.search()
+        else:
+            await crawler.get_creators_and_notes()
+        await store_pipeline.drain()
+    except Exception as e:
+        error = f"{e.__class__.__name__}: {e}"
+    elapsed = time.perf_counter() - start
+    latencies = client._http_pool.latencies
+    await client.close()
+    await crawler.frontier.close()
+    if config.SAVE_DATA_OPTION in ("sqlite", "db"):
+        await db.close()
+
+    items = sum(counter.values())
+    return {
+        "store": config.SAVE_DATA_OPTION,
+        "elapsed": elapsed,
+        "requests": len(latencies),
+        "failed_requests": client._http_pool.failed,
+        "requests_per_sec": len(latencies) / elapsed if elapsed else 0,
+        "items": items,
+        "items_per_sec": items / elapsed if elapsed else 0,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "error": error,
+        **counter,
+    }
+
+
+async def run_child(args) -> Dict:
+    """
+    在当前进程启动回放服务并完成一次爬取
+    :param args:
+    :return: 统计结果
+    """
+    import uvicorn
+    from test.replay_server import ReplayConfig, create_replay_app
+
+    _configure(args, os.getcwd())
+    replay_config = ReplayConfig(
+        latency_ms=args.latency_ms,
+        latency_jitter_ms=args.latency_jitter_ms,
+        error_rate=args.error_rate,
+        ban_rate=args.ban_rate,
+        search_pages=args.search_pages,
+        comment_pages=args.comment_pages,
+        creator_pages=args.creator_pages,
+        seed=args.seed,
+    )
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(create_replay_app(replay_config), host="127.0.0.1", port=port,
+                                           log_level="warning", access_log=False))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.05)
+    try:
+        return await _run_crawl(args, f"http://127.0.0.1:{port}")
+    finally:
+        server.should_exit = True
+        await server_task
+
+
+# ==================== 父进程：按存储方式依次运行并汇总 ====================
+
+def run_store(argv: List[str], store: str) -> Dict:
+    """
+    在独立的子进程和临时目录中运行一种存储方式
+    :param argv: 透传给子进程的命令行参数
+    :param store: 存储方式
+    :return:
+    """
+    with tempfile.TemporaryDirectory(prefix=f"benchmark_{store}_") as work_dir:
+        # 知乎签名使用相对路径 libs/zhihu.js
+        os.symlink(os.path.join(PROJECT_ROOT, "libs"), os.path.join(work_dir, "libs"))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [PROJECT_ROOT, os.environ.get("PYTHONPATH")])))
+        proc = subprocess.run(
+            [sys.executable, "-m", "test.benchmark_crawl", *argv, "--child", "--store", store],
+            cwd=work_dir, env=env, capture_output=True, text=True,
+        )
+    for line in proc.stdout.splitlines():
+        if line.startswith(RESULT_PREFIX):
+            return json.loads(line[len(RESULT_PREFIX):])
+    return {"store": store, "error": (proc.stderr.strip().splitlines() or ["no result"])[-1]}
+
+
+def print_report(results: List[Dict]):
+    header = f"{'store':<8}{'requests':>10}{'req/s':>10}{'items':>10}{'items/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'peak MB':>10}"
+    print(header)
+    print("-" * len(header))
+    for res in results:
+        if "requests" not in res:
+            print(f"{res['store']:<8}  failed: {res['error']}")
+            continue
+        print(f"{res['store']:<8}{res['requests']:>10}{res['requests_per_sec']:>10.1f}{res['items']:>10}"
+              f"{res['items_per_sec']:>10.1f}{res['p50_ms']:>10.2f}{res['p99_ms']:>10.2f}{res['peak_rss_mb']:>10.1f}")
+        if res.get("error"):
+            print(f"{'':<8}  error: {res['error']}")
+
+
+def main():
+    parser = build_arg_parser()
+    args = parser.parse_args()
+    if args.child:
+        result = asyncio.run(run_child(args))
+        print(RESULT_PREFIX + json.dumps(result, ensure_ascii=False))
+        return
+
+    results = [run_store(sys.argv[1:], store) for store in args.stores.split(",") if store]
+    print(f"platform: {args.platform}, crawler type: {args.crawler_type}, latency: {args.latency_ms}ms, "
+          f"error rate: {args.error_rate}, ban rate: {args.ban_rate}")
+    print_report(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 知乎签名性能对比：execjs 每次调用启动 Node 进程 vs 常驻 Node 子进程池
+# 用法：python -m test.benchmark_zhihu_sign [调用次数]
+
+import asyncio
+import sys
+import time
+
+from media_platform.zhihu.help import sign
+from tools.js_worker_pool import JsWorkerPool
+
+URL = "/api/v4/search_v3?gk_version=gz-gaokao&t=general&q=python&correction=1&offset=0&limit=20"
+COOKIES = "d_c0=AHBTQ9J0Gx-PTt0v6rYtr9cXs1Jh0g-8Yws=|1711938443"
+
+
+def bench_execjs(times: int) -> float:
+    sign(URL, COOKIES)  # 预热，编译脚本
+    start = time.perf_counter()
+    for _ in range(times):
+        sign(URL, COOKIES)
+    return time.perf_counter() - start
+
+
+async def bench_worker_pool(times: int, size: int) -> float:
+    pool = JsWorkerPool("libs/zhihu.js", size=size)
+    try:
+        await pool.start()
+        await pool.call("get_sign", URL, COOKIES)  # 预热
+        start = time.perf_counter()
+        await asyncio.gather(*[pool.call("get_sign", URL, COOKIES) for _ in range(times)])
+        return time.perf_counter() - start
+    finally:
+        await pool.close()
+
+
+def main():
+    times = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    cost = bench_execjs(times)
+    print(f"execjs       : {times} calls, {cost:.3f}s, {cost / times * 1000:.2f} ms/call")
+    for size in (1, 2, 4):
+        cost = asyncio.run(bench_worker_pool(times, size))
+        print(f"worker pool {size}: {times} calls, {cost:.3f}s, {cost / times * 1000:.2f} ms/call")
+
+
+if __name__ == "__main__":
+    main()
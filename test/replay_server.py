@@ -0,0 +1,321 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 离线回放服务：用 test/fixtures/replay 下录制的响应模拟 m.weibo.cn 和知乎的接口，
+#            按请求的分页参数把录制的条目复制成任意多页（替换ID），可以注入延迟、服务端错误和风控状态码，
+#            用于在不访问真实网站的情况下测量爬虫的性能
+# 用法：python -m test.replay_server [端口]
+
+import asyncio
+import copy
+import json
+import os
+import random
+import sys
+import zlib
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs, quote
+
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, JSONResponse
+from pydantic import BaseModel, Field
+
+FIXTURE_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "replay")
+
+# 微博风控时返回的状态码，知乎风控时返回 403
+WEIBO_BAN_STATUS = 432
+ZHIHU_BAN_STATUS = 403
+
+_WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+_MONTHS = ("Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec")
+_CHINA_TZ = timezone(timedelta(hours=8))
+
+
+class ReplayConfig(BaseModel):
+    latency_ms: float = Field(default=0, title="每个请求的固定延迟（毫秒）")
+    latency_jitter_ms: float = Field(default=0, title="在固定延迟上额外增加 0~jitter 毫秒的随机延迟")
+    error_rate: float = Field(default=0, title="返回 500 的请求比例")
+    ban_rate: float = Field(default=0, title="返回风控状态码（微博 432，知乎 403）的请求比例")
+    search_pages: int = Field(default=5, title="每个关键词的搜索结果页数")
+    comment_pages: int = Field(default=2, title="每个帖子的一级评论页数")
+    creator_pages: int = Field(default=3, title="每个创作者的内容页数")
+    seed: Optional[int] = Field(default=None, title="故障注入的随机种子")
+
+
+def load_fixture(name: str, fixture_dir: str = FIXTURE_DIR):
+    """
+    读取录制的响应，.json 返回解析后的对象，其他返回文本
+    :param name: 文件名
+    :param fixture_dir: 录制文件目录
+    :return:
+    """
+    with open(os.path.join(fixture_dir, name), "r", encoding="utf-8") as f:
+        return json.load(f) if name.endswith(".json") else f.read()
+
+
+def weibo_time(dt: datetime) -> str:
+    """微博接口的时间格式，如 Sat Oct 18 10:20:31 +0800 2025，不依赖 locale"""
+    dt = dt.astimezone(_CHINA_TZ)
+    return f"{_WEEKDAYS[dt.weekday()]} {_MONTHS[dt.month - 1]} {dt:%d %H:%M:%S} +0800 {dt.year}"
+
+
+def _stable_number(text: str, modulo: int = 1000) -> int:
+    return zlib.crc32(text.encode("utf-8")) % modulo
+
+
+def _weibo_mblogs(search_fixture: Dict) -> List[Dict]:
+    mblogs = []
+    for card in search_fixture["data"]["cards"]:
+        for item in [card] + card.get("card_group", []):
+            if item.get("card_type") == 9:
+                mblogs.append(item["mblog"])
+    return mblogs
+
+
+class ReplayData:
+    """
+    根据录制的响应生成任意页数的数据，同样的请求参数总是生成同样的ID
+    """
+
+    def __init__(self, replay_config: ReplayConfig, fixture_dir: str = FIXTURE_DIR):
+        self.config = replay_config
+        self.weibo_mblogs = _weibo_mblogs(load_fixture("weibo_search.json", fixture_dir))
+        self.weibo_comments = load_fixture("weibo_comments.json", fixture_dir)["data"]["data"]
+        self.weibo_detail_html = load_fixture("weibo_detail.html", fixture_dir)
+        self.weibo_creator_info = load_fixture("weibo_creator_info.json", fixture_dir)
+        self.zhihu_search = load_fixture("zhihu_search.json", fixture_dir)["data"]
+        self.zhihu_root_comments = load_fixture("zhihu_root_comment.json", fixture_dir)["data"]
+        self.zhihu_child_comments = load_fixture("zhihu_child_comment.json", fixture_dir)["data"]
+        self.zhihu_people_html = load_fixture("zhihu_people.html", fixture_dir)
+        self.zhihu_creator_answers = load_fixture("zhihu_creator_answers.json", fixture_dir)["data"]
+
+    @property
+    def weibo_note_comments_count(self) -> int:
+        return self.config.comment_pages * len(self.weibo_comments)
+
+    @property
+    def zhihu_content_comments_count(self) -> int:
+        return self.config.comment_pages * len(self.zhihu_root_comments)
+
+    # ==================== 微博 ====================
+
+    def weibo_mblog(self, note_id: str, index: int, created_at: datetime) -> Dict:
+        mblog = copy.deepcopy(self.weibo_mblogs[index % len(self.weibo_mblogs)])
+        mblog.update(id=note_id, mid=note_id, created_at=weibo_time(created_at),
+                     comments_count=self.weibo_note_comments_count)
+        return mblog
+
+    def weibo_search_page(self, keyword: str, page: int, page_size: int = 10) -> Dict:
+        cards = []
+        if page <= self.config.search_pages:
+            base = 4900000000000000 + _stable_number(keyword) * 10 ** 8
+            now = datetime.now(_CHINA_TZ)
+            for i in range(page_size):
+                index = (page - 1) * page_size + i
+                cards.append({"card_type": 9, "mblog": self.weibo_mblog(str(base + index), index, now - timedelta(minutes=index))})
+        return {"ok": 1, "data": {"cardlistInfo": {"page": page + 1, "page_size": page_size}, "cards": cards}}
+
+    def weibo_creator_notes_page(self, creator_id: str, since_id: str, page_size: int = 10) -> Dict:
+        page = int(since_id) if since_id and since_id.isdigit() and int(since_id) > 0 else 1
+        base = 4800000000000000 + _stable_number(creator_id) * 10 ** 8
+        now = datetime.now(_CHINA_TZ)
+        cards = []
+        for i in range(page_size):
+            index = (page - 1) * page_size + i
+            cards.append({"card_type": 9, "mblog": self.weibo_mblog(str(base + index), index, now - timedelta(minutes=index))})
+        next_since_id = str(page + 1) if page < self.config.creator_pages else "0"
+        return {"ok": 1, "data": {
+            "cardlistInfo": {"since_id": next_since_id, "total": self.config.creator_pages * page_size},
+            "cards": cards,
+        }}
+
+    def weibo_creator_info_page(self, creator_id: str) -> Dict:
+        data = copy.deepcopy(self.weibo_creator_info)
+        data["data"]["userInfo"]["id"] = int(creator_id) if creator_id.isdigit() else creator_id
+        return data
+
+    def weibo_comments_page(self, note_id: str, max_id: int) -> Dict:
+        page = max_id if max_id > 0 else 1
+        comments = []
+        now = datetime.now(_CHINA_TZ)
+        for i, template in enumerate(self.weibo_comments):
+            comment = copy.deepcopy(template)
+            comment_id = f"{note_id[-8:]}{page:04d}{i:02d}0"
+            comment.update(id=comment_id, rootid=comment_id,
+                           created_at=weibo_time(now - timedelta(minutes=page * 10 + i)))
+            for j, sub_comment in enumerate(comment.get("comments") or []):
+                sub_comment.update(id=f"{comment_id[:-1]}{j + 1}", rootid=comment_id)
+            comments.append(comment)
+        next_max_id = page + 1 if page < self.config.comment_pages else 0
+        return {"ok": 1, "data": {"data": comments, "total_number": self.weibo_note_comments_count,
+                                  "max_id": next_max_id, "max_id_type": 0}}
+
+    def weibo_detail_page(self, note_id: str) -> str:
+        template_id = self.weibo_mblogs[-1]["id"]
+        return self.weibo_detail_html.replace(template_id, note_id)
+
+    # ==================== 知乎 ====================
+
+    def _zhihu_contents(self, templates: List[Dict], key: str, offset: int, limit: int, pages: int) -> List[Dict]:
+        page = offset // limit + 1
+        if page > pages:
+            return []
+        base = 3000000000 + _stable_number(key) * 10 ** 6
+        contents = []
+        for i in range(limit):
+            index = offset + i
+            content = copy.deepcopy(templates[index % len(templates)])
+            content.update(id=str(base + index), comment_count=self.zhihu_content_comments_count)
+            contents.append(content)
+        return contents
+
+    def zhihu_search_page(self, keyword: str, offset: int, limit: int) -> Dict:
+        contents = self._zhihu_contents([item["object"] for item in self.zhihu_search], keyword, offset, limit,
+                                        self.config.search_pages)
+        is_end = offset // limit + 1 >= self.config.search_pages
+        return {"paging": {"is_end": is_end}, "data": [{"type": "search_result", "object": c} for c in contents]}
+
+    def zhihu_creator_answers_page(self, url_token: str, offset: int, limit: int) -> Dict:
+        contents = self._zhihu_contents(self.zhihu_creator_answers, url_token, offset, limit, self.config.creator_pages)
+        is_end = offset // limit + 1 >= self.config.creator_pages
+        return {"paging": {"is_end": is_end, "totals": self.config.creator_pages * limit}, "data": contents}
+
+    def zhihu_root_comments_page(self, content_type: str, content_id: str, offset: str) -> Dict:
+        page = int(offset) if offset.isdigit() and int(offset) > 0 else 1
+        base_ts = 1729222800
+        comments = []
+        for i, template in enumerate(self.zhihu_root_comments):
+            comment = copy.deepcopy(template)
+            comment.update(id=f"{content_id[-6:]}{page:04d}{i:02d}",
+                           created_time=base_ts - (page * len(self.zhihu_root_comments) + i))
+            comments.append(comment)
+        is_end = page >= self.config.comment_pages
+        next_url = ("" if is_end else
+                    f"https://www.zhihu.com/api/v4/comment_v5/{content_type}s/{content_id}/root_comment?limit=10&offset={page + 1}")
+        return {"paging": {"is_end": is_end, "next": next_url}, "data": comments}
+
+    def zhihu_child_comments_page(self, root_comment_id: str) -> Dict:
+        comments = []
+        for i, template in enumerate(self.zhihu_child_comments):
+            comment = copy.deepcopy(template)
+            comment.update(id=f"{root_comment_id}{i + 1:02d}", reply_comment_id=root_comment_id)
+            comments.append(comment)
+        return {"paging": {"is_end": True, "next": ""}, "data": comments}
+
+    def zhihu_people_page(self, url_token: str) -> str:
+        return self.zhihu_people_html.replace("coder-wang", url_token)
+
+
+def create_replay_app(replay_config: Optional[ReplayConfig] = None, fixture_dir: str = FIXTURE_DIR) -> FastAPI:
+    """
+    创建回放服务
+    :param replay_config: 分页数量和故障注入配置
+    :param fixture_dir: 录制文件目录
+    :return: app.state.request_stats 记录每个路由的请求数和注入的故障数
+    """
+    replay_config = replay_config or ReplayConfig()
+    data = ReplayData(replay_config, fixture_dir)
+    rand = random.Random(replay_config.seed)
+    app = FastAPI(title="MediaCrawler replay server")
+    app.state.request_stats = Counter()
+
+    @app.middleware("http")
+    async def inject_faults(request: Request, call_next):
+        path = request.url.path
+        if path == "/stats":
+            return await call_next(request)
+        is_zhihu = path.startswith("/api/v4") or path.startswith("/people")
+        app.state.request_stats["requests"] += 1
+        delay_ms = replay_config.latency_ms + rand.uniform(0, replay_config.latency_jitter_ms)
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        dice = rand.random()
+        if dice < replay_config.ban_rate:
+            app.state.request_stats["banned"] += 1
+            if is_zhihu:
+                return JSONResponse({"error": {"code": 40352, "message": "系统监测到您的网络环境存在异常"}},
+                                    status_code=ZHIHU_BAN_STATUS)
+            return HTMLResponse("<html><body>请求过于频繁</body></html>", status_code=WEIBO_BAN_STATUS)
+        if dice < replay_config.ban_rate + replay_config.error_rate:
+            app.state.request_stats["errors"] += 1
+            return HTMLResponse("<html><body>Internal Server Error</body></html>", status_code=500)
+        return await call_next(request)
+
+    # ==================== 微博 m.weibo.cn ====================
+
+    @app.get("/api/config")
+    async def weibo_config():
+        return {"ok": 1, "data": {"login": True, "uid": "1000000001"}}
+
+    @app.get("/api/container/getIndex")
+    async def weibo_get_index(containerid: str, page: int = 1, since_id: str = "", value: str = ""):
+        if containerid.startswith("100103"):
+            keyword = parse_qs(containerid).get("q", [""])[0]
+            return data.weibo_search_page(keyword, page)
+        if containerid.startswith("100505"):
+            return data.weibo_creator_info_page(value or containerid[len("100505"):])
+        if containerid.startswith("107603"):
+            return data.weibo_creator_notes_page(value or containerid[len("107603"):], since_id)
+        return {"ok": 0, "msg": f"unknown containerid {containerid}"}
+
+    @app.get("/comments/hotflow")
+    async def weibo_comments(id: str, max_id: int = 0):
+        return data.weibo_comments_page(id, max_id)
+
+    @app.get("/detail/{note_id}")
+    async def weibo_detail(note_id: str):
+        return HTMLResponse(data.weibo_detail_page(note_id))
+
+    @app.get("/u/{creator_id}")
+    async def weibo_creator_home(creator_id: str):
+        response = HTMLResponse("<html><body></body></html>")
+        response.set_cookie("M_WEIBOCN_PARAMS", quote(f"fid=107603{creator_id}&lfid=100505{creator_id}"))
+        return response
+
+    # ==================== 知乎 ====================
+
+    @app.get("/api/v4/me")
+    async def zhihu_me():
+        return {"uid": "a0000000000000000000000000000001", "name": "回放账号"}
+
+    @app.get("/api/v4/search_v3")
+    async def zhihu_search(q: str, offset: int = 0, limit: int = 20):
+        return data.zhihu_search_page(q, offset, limit)
+
+    @app.get("/api/v4/comment_v5/{content_type}s/{content_id}/root_comment")
+    async def zhihu_root_comments(content_type: str, content_id: str, offset: str = ""):
+        return data.zhihu_root_comments_page(content_type, content_id, offset)
+
+    @app.get("/api/v4/comment_v5/comment/{root_comment_id}/child_comment")
+    async def zhihu_child_comments(root_comment_id: str):
+        return data.zhihu_child_comments_page(root_comment_id)
+
+    @app.get("/people/{url_token}")
+    async def zhihu_people(url_token: str):
+        return HTMLResponse(data.zhihu_people_page(url_token))
+
+    @app.get("/api/v4/members/{url_token}/answers")
+    async def zhihu_creator_answers(url_token: str, offset: int = 0, limit: int = 20):
+        return data.zhihu_creator_answers_page(url_token, offset, limit)
+
+    @app.get("/stats")
+    async def stats():
+        return dict(app.state.request_stats)
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(create_replay_app(), host="127.0.0.1", port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
@@ -0,0 +1,52 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from tools.adaptive_concurrency import AdaptiveConcurrencyController
+
+
+class TestAdaptiveConcurrency(IsolatedAsyncioTestCase):
+
+    async def test_additive_increase(self):
+        controller = AdaptiveConcurrencyController(initial_limit=2, max_limit=3)
+        for _ in range(2):
+            await controller.record_success()
+        self.assertEqual(3, controller.limit)
+        for _ in range(10):
+            await controller.record_success()
+        self.assertEqual(3, controller.limit, msg="不能超过最大并发")
+
+    async def test_multiplicative_decrease_with_cooldown(self):
+        controller = AdaptiveConcurrencyController(initial_limit=8, min_limit=1, cooldown=60)
+        await controller.record_failure("http status 432")
+        self.assertEqual(4, controller.limit)
+        await controller.record_failure("http status 432")
+        self.assertEqual(4, controller.limit, msg="冷却时间内只降低一次")
+
+        controller.cooldown = 0
+        for _ in range(5):
+            await controller.record_failure("ok == 0")
+        self.assertEqual(1, controller.limit, msg="不能低于最小并发")
+
+    async def test_limits_in_flight_tasks(self):
+        controller = AdaptiveConcurrencyController(initial_limit=2, max_limit=4)
+        peak = 0
+
+        async def task():
+            nonlocal peak
+            async with controller:
+                peak = max(peak, controller.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[task() for _ in range(6)])
+        self.assertEqual(2, peak)
+        self.assertEqual(0, controller.snapshot()["in_flight"])
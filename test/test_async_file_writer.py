@@ -0,0 +1,79 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import json
+import os
+import tempfile
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+
+from tools.async_file_writer import finalize_json_files
+
+
+class TestFinalizeJsonFiles(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.data_root = self.tmp_dir.name
+        self.json_dir = os.path.join(self.data_root, "weibo", "json")
+        os.makedirs(self.json_dir)
+        self.json_path = os.path.join(self.json_dir, "search_contents_2024-01-01.json")
+        self.staging_path = f"{self.json_path}l"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write_json(self, items: List[Dict]):
+        with open(self.json_path, "w", encoding="utf-8") as f:
+            json.dump(items, f, ensure_ascii=False, indent=4)
+
+    def _write_staging(self, content: str):
+        with open(self.staging_path, "w", encoding="utf-8") as f:
+            f.write(content)
+
+    def _read_json(self) -> List[Dict]:
+        with open(self.json_path, "r", encoding="utf-8") as f:
+            return json.load(f)
+
+    async def test_merge_into_existing_json_array(self):
+        self._write_json([{"note_id": "1"}, {"note_id": "2"}])
+        self._write_staging('{"note_id": "3"}\n{"note_id": "4", "content": "你好"}\n')
+
+        await finalize_json_files(self.data_root)
+
+        self.assertEqual(
+            self._read_json(),
+            [{"note_id": "1"}, {"note_id": "2"}, {"note_id": "3"}, {"note_id": "4", "content": "你好"}],
+        )
+        self.assertFalse(os.path.exists(self.staging_path))
+        self.assertFalse(os.path.exists(f"{self.json_path}.tmp"))
+
+    async def test_recover_staging_file_left_by_killed_run(self):
+        # 被强杀的进程只留下暂存文件，最后一行只写了一半
+        self._write_staging('{"note_id": "1"}\n\n{"note_id": "2"}\n{"note_id": "3", "cont')
+
+        await finalize_json_files(self.data_root)
+
+        self.assertEqual(self._read_json(), [{"note_id": "1"}, {"note_id": "2"}])
+        self.assertFalse(os.path.exists(self.staging_path))
+
+    async def test_repeated_call_is_noop(self):
+        self._write_json([{"note_id": "1"}])
+        self._write_staging('{"note_id": "2"}\n')
+
+        await finalize_json_files(self.data_root)
+        with open(self.json_path, "rb") as f:
+            merged = f.read()
+
+        await finalize_json_files(self.data_root)
+        with open(self.json_path, "rb") as f:
+            self.assertEqual(f.read(), merged)
+        self.assertEqual(self._read_json(), [{"note_id": "1"}, {"note_id": "2"}])
+        self.assertEqual(os.listdir(self.json_dir), [os.path.basename(self.json_path)])
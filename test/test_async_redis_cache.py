@@ -0,0 +1,54 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from cache.abs_cache import AsyncCacheAdapter
+from cache.async_redis_cache import AsyncRedisCache
+from cache.local_cache import ExpiringLocalCache
+from proxy.base_proxy import IpCache
+from proxy.types import IpInfoModel
+
+
+class TestAsyncRedisCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis_cache = AsyncRedisCache()
+
+    async def asyncTearDown(self):
+        await self.redis_cache.close()
+
+    async def test_set_and_get(self):
+        await self.redis_cache.set('async_key', 'value', 10)
+        self.assertEqual(await self.redis_cache.get('async_key'), 'value')
+
+    async def test_expired_key(self):
+        await self.redis_cache.set('async_key', 'value', 1)
+        await asyncio.sleep(2)  # wait for the key to expire
+        self.assertIsNone(await self.redis_cache.get('async_key'))
+
+    async def test_mset_mget_and_keys(self):
+        await self.redis_cache.mset({'async_key1': 'value1', 'async_key2': [1, 2]}, 10)
+        self.assertEqual(['value1', [1, 2], None], await self.redis_cache.mget(['async_key1', 'async_key2', 'async_key3']))
+        keys = await self.redis_cache.keys('async_key*')
+        self.assertIn('async_key1', keys)
+        self.assertIn('async_key2', keys)
+
+
+class TestIpCache(IsolatedAsyncioTestCase):
+
+    async def test_load_all_ip_from_local_cache(self):
+        ip_cache = IpCache()
+        ip_cache.cache_client = AsyncCacheAdapter(ExpiringLocalCache())
+        ip_info = IpInfoModel(ip="127.0.0.1", port=8080, user="", password="", expired_time_ts=0)
+        await ip_cache.set_ip("kuaidaili_127.0.0.1_8080", ip_info.model_dump_json(), ex=10)
+        await ip_cache.set_ip("wandouhttp_127.0.0.2_8080", ip_info.model_dump_json(), ex=10)
+        self.assertEqual([ip_info], await ip_cache.load_all_ip(proxy_brand_name="kuaidaili"))
@@ -0,0 +1,101 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+import unittest
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from frontier.sqlite_frontier import SqliteFrontier
+from media_platform.zhihu.client import ZhiHuClient
+from model.m_zhihu import ZhihuContent
+from store.comment_watermark import CommentWatermark, CommentWatermarkStore
+
+
+class TestCommentWatermark(unittest.TestCase):
+
+    def test_is_newer(self):
+        watermark = CommentWatermark(newest_ts=100, newest_id="20")
+        self.assertTrue(watermark.is_newer(101, "1"))
+        self.assertTrue(watermark.is_newer(100, "21"), msg="发布时间相同时比较评论ID")
+        self.assertFalse(watermark.is_newer(100, "20"))
+        self.assertFalse(watermark.is_newer(99, "99"))
+        self.assertTrue(CommentWatermark().is_newer(1, "1"), msg="空的高水位下所有评论都是新评论")
+
+    def test_advance(self):
+        watermark = CommentWatermark(newest_ts=100, newest_id="20")
+        comments = [{"ts": 90, "id": "5"}, {"ts": 120, "id": "30"}, {"ts": 110, "id": "40"}]
+        watermark.advance(comments, lambda c: (c["ts"], c["id"]))
+        self.assertEqual((120, "30"), (watermark.newest_ts, watermark.newest_id))
+
+
+class TestCommentWatermarkStore(IsolatedAsyncioTestCase):
+
+    async def test_save_and_get(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = CommentWatermarkStore(SqliteFrontier("wb:comment_watermark", os.path.join(tmp_dir, "frontier.db")))
+            self.assertEqual(-1, (await store.get("note_1")).comments_count)
+            await store.save("note_1", CommentWatermark(comments_count=12, newest_ts=100, newest_id="20"))
+            await store.close()
+
+            store = CommentWatermarkStore(SqliteFrontier("wb:comment_watermark", os.path.join(tmp_dir, "frontier.db")))
+            watermark = await store.get("note_1")
+            self.assertEqual((12, 100, "20"), (watermark.comments_count, watermark.newest_ts, watermark.newest_id))
+            await store.close()
+
+
+def _zhihu_comment(comment_id: int, ts: int, child_count: int = 0) -> Dict:
+    return {"type": "comment", "id": comment_id, "created_time": ts, "child_comment_count": child_count,
+            "content": f"comment {comment_id}", "author": {}}
+
+
+class FakeZhiHuClient(ZhiHuClient):
+    """一级评论按时间倒序每页 2 条"""
+
+    def __init__(self, root_comments: List[Dict], child_comments: Dict[str, List[Dict]]):
+        super().__init__(headers={}, playwright_page=None, cookie_dict={})
+        self.root_comments = root_comments
+        self.child_comments = child_comments
+        self.root_pages = 0
+
+    async def get_root_comments(self, content_id, content_type, offset="", limit=10, order_by="sort"):
+        self.root_pages += 1
+        start = int(offset or 0)
+        page = self.root_comments[start:start + 2]
+        return {"data": page, "paging": {"is_end": start + 2 >= len(self.root_comments),
+                                        "next": f"https://www.zhihu.com/api/v4/root_comment?offset={start + 2}"}}
+
+    async def get_child_comments(self, root_comment_id, offset="", limit=10, order_by="sort"):
+        return {"data": self.child_comments.get(root_comment_id, []), "paging": {"is_end": True}}
+
+
+@patch("config.ENABLE_GET_SUB_COMMENTS", True)
+class TestZhihuIncrementalComments(IsolatedAsyncioTestCase):
+
+    async def test_new_reply_under_old_root_comment(self):
+        # 上次爬取后：一级评论 1-4，评论 1 有 1 条回复；之后评论 1 下新增一条回复
+        watermark = CommentWatermark(comments_count=5, newest_ts=400, newest_id="4", sub_comment_counts={"1": 1})
+        client = FakeZhiHuClient(
+            root_comments=[_zhihu_comment(4, 400), _zhihu_comment(3, 300), _zhihu_comment(2, 200),
+                           _zhihu_comment(1, 100, child_count=2)],
+            child_comments={"1": [_zhihu_comment(11, 150), _zhihu_comment(12, 500)]},
+        )
+        stored = []
+
+        async def callback(comments):
+            stored.extend(comment.comment_id for comment in comments)
+
+        await client.get_note_all_comments(ZhihuContent(content_id="a1", content_type="answer"), crawl_interval=0,
+                                           callback=callback, watermark=watermark, new_comments_count=1)
+        self.assertEqual(["12"], stored)
+        self.assertEqual(2, client.root_pages, msg="找到评论数增量对应的新回复前继续翻页")
+        self.assertEqual(2, watermark.sub_comment_counts["1"])
@@ -0,0 +1,59 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+
+from frontier.abs_frontier import STATUS_DONE, STATUS_IN_FLIGHT, STATUS_PENDING
+from frontier.sqlite_frontier import SqliteFrontier
+
+
+class TestSqliteFrontier(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "frontier.db")
+        self.frontier = SqliteFrontier("wb:search", db_path=self.db_path)
+
+    async def asyncTearDown(self):
+        await self.frontier.close()
+        self.tmp_dir.cleanup()
+
+    async def test_checkpoint_survives_restart(self):
+        await self.frontier.checkpoint("search:python", {"page": 3})
+        await self.frontier.close()
+
+        # 模拟进程重启后重新打开
+        frontier = SqliteFrontier("wb:search", db_path=self.db_path)
+        self.assertEqual({"page": 3}, await frontier.get_cursor("search:python"))
+        self.assertEqual(STATUS_IN_FLIGHT, (await frontier.get("search:python")).status)
+        await frontier.close()
+
+    async def test_pending_does_not_override_progress(self):
+        await self.frontier.checkpoint("comments:1", {"max_id": 100, "max_id_type": 0, "count": 20})
+        await self.frontier.add_pending(["comments:1", "comments:2"])
+        self.assertEqual({"max_id": 100, "max_id_type": 0, "count": 20}, await self.frontier.get_cursor("comments:1"))
+        pending = await self.frontier.list_units(STATUS_PENDING)
+        self.assertEqual(["comments:2"], [unit.unit_key for unit in pending])
+
+    async def test_done_and_clear(self):
+        await self.frontier.checkpoint("creator:1", {"since_id": "abc"})
+        await self.frontier.mark_done("creator:1")
+        self.assertTrue(await self.frontier.is_done("creator:1"))
+        self.assertEqual({}, await self.frontier.get_cursor("creator:1"))
+        self.assertEqual(STATUS_DONE, (await self.frontier.list_units())[0].status)
+
+        other = SqliteFrontier("zhihu:search", db_path=self.db_path)
+        await other.checkpoint("search:python", {"page": 2})
+        await self.frontier.clear()
+        self.assertEqual([], await self.frontier.list_units())
+        self.assertEqual({"page": 2}, await other.get_cursor("search:python"), msg="清空进度不应影响其他命名空间")
+        await other.close()
@@ -0,0 +1,96 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from typing import Dict, List, Optional
+from unittest import IsolatedAsyncioTestCase
+
+from frontier.abs_frontier import AbstractFrontier, FrontierUnit
+from tools.crawl_pipeline import Countdown, CrawlPipeline, OrderedPageCheckpoint, Stage
+
+
+class MemoryFrontier(AbstractFrontier):
+
+    def __init__(self):
+        super().__init__("test")
+        self.units: Dict[str, FrontierUnit] = {}
+
+    async def get(self, unit_key: str) -> Optional[FrontierUnit]:
+        return self.units.get(unit_key)
+
+    async def save(self, unit: FrontierUnit) -> None:
+        self.units[unit.unit_key] = unit
+
+    async def add_pending(self, unit_keys: List[str]) -> None:
+        pass
+
+    async def list_units(self, status: Optional[str] = None) -> List[FrontierUnit]:
+        return list(self.units.values())
+
+    async def clear(self) -> None:
+        self.units.clear()
+
+
+class TestCrawlPipeline(IsolatedAsyncioTestCase):
+
+    async def test_search_overlaps_comments(self):
+        events = []
+
+        async def search_stage(page, pipeline):
+            events.append(f"search-{page}")
+            if page < 3:
+                await pipeline.emit("search", page + 1)
+            await pipeline.emit("comments", page)
+
+        async def comments_stage(page, pipeline):
+            await asyncio.sleep(0.02)
+            events.append(f"comments-{page}")
+
+        pipeline = CrawlPipeline([Stage("search", search_stage), Stage("comments", comments_stage, workers=2)])
+        await pipeline.run("search", [1])
+        self.assertEqual(6, len(events))
+        self.assertLess(events.index("search-3"), events.index("comments-1"), msg="后续页面的搜索不需要等待前一页的评论")
+
+    async def test_stage_error_does_not_stop_pipeline(self):
+        handled = []
+
+        async def stage(item, pipeline):
+            if item == 2:
+                raise ValueError("boom")
+            handled.append(item)
+
+        await CrawlPipeline([Stage("only", stage)]).run("only", [1, 2, 3])
+        self.assertEqual([1, 3], handled)
+
+    async def test_ordered_page_checkpoint(self):
+        frontier = MemoryFrontier()
+        checkpoint = OrderedPageCheckpoint(frontier, "search:python", first_page=1)
+        await checkpoint.page_done(2)
+        self.assertIsNone(await frontier.get("search:python"), msg="第1页未完成时不能推进断点")
+        await checkpoint.page_done(1)
+        self.assertEqual({"page": 3}, await frontier.get_cursor("search:python"))
+        await checkpoint.finish()
+        self.assertTrue(await frontier.is_done("search:python"))
+
+    async def test_countdown(self):
+        calls = []
+
+        async def callback():
+            calls.append(1)
+
+        countdown = Countdown(2, callback)
+        await countdown.done()
+        await countdown.done()
+        await countdown.start()
+        self.assertEqual(1, len(calls))
+
+        empty = Countdown(0, callback)
+        await empty.start()
+        self.assertEqual(2, len(calls))
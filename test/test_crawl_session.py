@@ -0,0 +1,183 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from media_platform.weibo.core import WeiboCrawler
+from proxy.proxy_ip_pool import ProxyIpPool
+from proxy.types import IpInfoModel
+from test.test_proxy_ip_pool import FakeProvider
+from tools.crawl_session import CrawlSession, CrawlSessionPool, load_cookie_jars
+from var import crawl_session_var
+
+
+class TestCrawlSession(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        self.sessions = [
+            CrawlSession("account_0", "SUB=a", "ua-0", primary=True),
+            CrawlSession("account_1", "SUB=b", "ua-1",
+                         IpInfoModel(ip="10.0.0.1", port=8080, user="", password="", expired_time_ts=0)),
+        ]
+        self.pool = CrawlSessionPool(self.sessions)
+
+    def test_apply_headers_keeps_key_case(self):
+        headers = self.sessions[1].apply_headers({"cookie": "old", "user-agent": "old", "accept": "*/*"})
+        self.assertEqual({"cookie": "SUB=b", "user-agent": "ua-1", "accept": "*/*"}, headers)
+        self.assertEqual("http://10.0.0.1:8080", self.sessions[1].httpx_proxy)
+        self.assertEqual({"SUB": "b"}, self.sessions[1].cookie_dict)
+
+    async def test_requests_rotate_across_sessions(self):
+        used = []
+
+        async def request():
+            async with self.pool.use() as session:
+                used.append(session.account)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*[request() for _ in range(4)])
+        self.assertEqual(2, used.count("account_0"))
+        self.assertEqual(2, used.count("account_1"))
+        self.assertEqual([0, 0], [session.in_flight for session in self.sessions])
+
+    async def test_nested_use_reuses_bound_session(self):
+        async with self.pool.use() as outer:
+            async with self.pool.use() as inner:
+                self.assertIs(outer, inner, msg="签名和请求使用同一个会话")
+            self.assertEqual(1, outer.in_flight)
+        self.assertIsNone(crawl_session_var.get())
+
+    async def test_parked_session_not_used(self):
+        self.pool.park(self.sessions[0], "pong failed")
+        for _ in range(3):
+            async with self.pool.use() as session:
+                self.assertEqual("account_1", session.account)
+        self.pool.park(self.sessions[1], "pong failed")
+        with self.assertRaises(RuntimeError):
+            self.pool.acquire()
+
+    async def test_bind_session(self):
+        async with self.pool.bind(self.sessions[1]):
+            async with self.pool.use() as session:
+                self.assertIs(self.sessions[1], session)
+        self.assertEqual(0, self.sessions[1].in_flight)
+
+    async def test_session_rotates_after_proxy_evicted(self):
+        ip_pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=False, ip_provider=FakeProvider())
+        await ip_pool.load_proxies()
+        primary = CrawlSession("account_0", "SUB=a", "ua-0", await ip_pool.get_proxy(), primary=True)
+        session = CrawlSession("account_1", "SUB=b", "ua-1", await ip_pool.get_proxy(exclude={primary.proxy_key}))
+        pool = CrawlSessionPool([primary, session], ip_pool=ip_pool)
+        old_proxy_key = session.proxy_key
+
+        for _ in range(5):
+            await pool.report(session, success=False)
+        self.assertNotEqual(old_proxy_key, session.proxy_key, msg="代理被淘汰后会话换成新的代理")
+        self.assertNotEqual(primary.proxy_key, session.proxy_key, msg="不和其他会话共用代理")
+        self.assertTrue(ip_pool.is_proxy_usable(session.proxy_info))
+        self.assertEqual(f"http://{session.proxy_key}", session.httpx_proxy)
+        self.assertEqual(1, ip_pool.health[session.proxy_key].in_use)
+
+        primary_proxy_key = primary.proxy_key
+        for _ in range(5):
+            await pool.report(primary, success=False)
+        self.assertEqual(primary_proxy_key, primary.proxy_key, msg="主会话和浏览器共用代理，不换")
+        await ip_pool.close()
+
+    def test_load_cookie_jars(self):
+        with tempfile.TemporaryDirectory() as cookie_dir:
+            with open(os.path.join(cookie_dir, "a.json"), "w") as f:
+                json.dump([{"name": "SUB", "value": "a"}, {"name": "SUBP", "value": "b"}], f)
+            with open(os.path.join(cookie_dir, "b.txt"), "w") as f:
+                f.write("SUB=c\n")
+            self.assertEqual(["SUB=a;SUBP=b", "SUB=c"], load_cookie_jars(cookie_dir))
+        self.assertEqual([], load_cookie_jars(os.path.join(cookie_dir, "not_exists")))
+
+
+class FakeWeiboClient:
+
+    def __init__(self, session_pool: CrawlSessionPool, dead_accounts):
+        self.session_pool = session_pool
+        self.dead_accounts = dead_accounts
+
+    async def pong(self) -> bool:
+        return crawl_session_var.get().account not in self.dead_accounts
+
+
+class TestWeiboCreatorSessionWorkers(IsolatedAsyncioTestCase):
+
+    @staticmethod
+    def _crawler(sessions, dead_accounts) -> WeiboCrawler:
+        crawler = WeiboCrawler.__new__(WeiboCrawler)
+        crawler.wb_client = FakeWeiboClient(CrawlSessionPool(sessions), dead_accounts=dead_accounts)
+        return crawler
+
+    async def test_creators_sharded_across_sessions(self):
+        sessions = [CrawlSession(f"account_{i}", f"SUB={i}", "ua") for i in range(3)]
+        crawler = self._crawler(sessions, dead_accounts={"account_2"})
+        crawled = {}
+
+        async def get_creator_and_notes(user_id):
+            crawled[user_id] = crawl_session_var.get().account
+            await asyncio.sleep(0.01)
+
+        crawler.get_creator_and_notes = get_creator_and_notes
+        creator_ids = [str(i) for i in range(6)]
+        origin_creator_ids = config.WEIBO_CREATOR_ID_LIST
+        config.WEIBO_CREATOR_ID_LIST = creator_ids
+        try:
+            await crawler.get_creators_and_notes()
+        finally:
+            config.WEIBO_CREATOR_ID_LIST = origin_creator_ids
+
+        self.assertEqual(set(creator_ids), set(crawled.keys()))
+        self.assertEqual({"account_0", "account_1"}, set(crawled.values()), msg="登录态失效的会话被暂停")
+        self.assertTrue(sessions[2].parked)
+
+    @patch("config.WEIBO_CREATOR_MAX_ATTEMPTS", 3)
+    async def test_failed_creator_retried_with_bounded_attempts(self):
+        sessions = [CrawlSession(f"account_{i}", f"SUB={i}", "ua") for i in range(2)]
+        crawler = self._crawler(sessions, dead_accounts=set())
+        attempts = {}
+
+        async def get_creator_and_notes(user_id):
+            attempts[user_id] = attempts.get(user_id, 0) + 1
+            await asyncio.sleep(0.01)
+            if user_id == "flaky" and attempts[user_id] == 1 or user_id == "broken":
+                raise Exception("DataFetchError")
+
+        crawler.get_creator_and_notes = get_creator_and_notes
+        with patch("config.WEIBO_CREATOR_ID_LIST", ["ok", "flaky", "broken"]):
+            await crawler.get_creators_and_notes()
+        self.assertEqual({"ok": 1, "flaky": 2, "broken": 3}, attempts, msg="临时失败的创作者重试，持续失败的最多尝试 3 次")
+        self.assertFalse(any(session.parked for session in sessions))
+
+    async def test_all_sessions_parked_reports_remaining_creators(self):
+        sessions = [CrawlSession(f"account_{i}", f"SUB={i}", "ua") for i in range(2)]
+        crawler = self._crawler(sessions, dead_accounts={"account_0", "account_1"})
+
+        async def get_creator_and_notes(user_id):
+            raise AssertionError("会话全部失效时不应爬取")
+
+        crawler.get_creator_and_notes = get_creator_and_notes
+        with patch("config.WEIBO_CREATOR_ID_LIST", ["c1", "c2"]), \
+                patch("media_platform.weibo.core.utils.logger.error") as error:
+            await crawler.get_creators_and_notes()
+        self.assertTrue(all(session.parked for session in sessions))
+        message = error.call_args[0][0]
+        self.assertIn("2 creators not crawled", message)
+        self.assertIn("'c1'", message)
+        self.assertIn("'c2'", message)
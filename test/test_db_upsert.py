@@ -0,0 +1,155 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from sqlalchemy import create_engine, select, text
+from sqlalchemy.dialects import mysql
+
+import config
+from config.db_config import sqlite_db_config
+from database import db_session
+from database.db_migrations import has_unique_index, migrate_unique_indexes
+from database.db_upsert import _normalize_rows, build_upsert_stmt, upsert_rows
+from database.models import Base, WeiboNoteComment, ZhihuComment
+
+# 批量 upsert 之前版本建的 zhihu_comment 表：comment_id 上只有普通索引
+OLD_ZHIHU_COMMENT_DDL = [
+    "CREATE TABLE zhihu_comment (id INTEGER PRIMARY KEY, comment_id VARCHAR(64), parent_comment_id VARCHAR(64), "
+    "content TEXT, publish_time VARCHAR(32), ip_location TEXT, sub_comment_count INTEGER, like_count INTEGER, "
+    "dislike_count INTEGER, content_id VARCHAR(64), content_type TEXT, user_id VARCHAR(64), user_link TEXT, "
+    "user_nickname TEXT, user_avatar TEXT, add_ts BIGINT, last_modify_ts BIGINT)",
+    "CREATE INDEX ix_zhihu_comment_comment_id ON zhihu_comment (comment_id)",
+]
+
+
+def create_old_zhihu_comment_table(conn):
+    for ddl in OLD_ZHIHU_COMMENT_DDL:
+        conn.execute(text(ddl))
+    conn.execute(text(
+        "INSERT INTO zhihu_comment (id, comment_id, content) VALUES "
+        "(1, 'c1', 'old'), (2, 'c2', 'b'), (3, 'c1', 'new'), (4, NULL, 'x'), (5, NULL, 'y')"
+    ))
+
+
+class TestDbUpsert(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        Base.metadata.create_all(self.engine)
+
+    def _upsert(self, rows):
+        rows = _normalize_rows(WeiboNoteComment, rows, "comment_id")
+        with self.engine.begin() as conn:
+            conn.execute(build_upsert_stmt("sqlite", WeiboNoteComment, rows, "comment_id"))
+
+    def test_insert_then_update(self):
+        self._upsert([
+            {"comment_id": 1, "note_id": 10, "content": "a", "unknown_field": "x"},
+            {"comment_id": 2, "note_id": 10, "content": "b"},
+        ])
+        self._upsert([{"comment_id": 1, "note_id": 10, "content": "a2"}])
+        with self.engine.connect() as conn:
+            rows = conn.execute(select(WeiboNoteComment.comment_id, WeiboNoteComment.content)
+                                .order_by(WeiboNoteComment.comment_id)).all()
+        self.assertEqual([(1, "a2"), (2, "b")], [tuple(row) for row in rows])
+
+    def test_add_ts_kept_on_update(self):
+        self._upsert([{"comment_id": 1, "content": "a", "add_ts": 100}])
+        self._upsert([{"comment_id": 1, "content": "b", "add_ts": 200}])
+        with self.engine.connect() as conn:
+            add_ts = conn.execute(select(WeiboNoteComment.add_ts)).scalar_one()
+        self.assertEqual(100, add_ts)
+
+    def test_normalize_dedup_and_datetime(self):
+        rows = _normalize_rows(WeiboNoteComment, [
+            {"comment_id": 1, "content": "a", "create_date_time": "2023-12-23 17:12:54+08:00"},
+            {"comment_id": 1, "content": "b", "create_date_time": "2023-12-23 17:12:54+08:00"},
+            {"comment_id": None, "content": "c"},
+        ], "comment_id")
+        self.assertEqual(1, len(rows))
+        self.assertEqual("b", rows[0]["content"])
+        self.assertEqual(2023, rows[0]["create_date_time"].year)
+
+    def test_mysql_statement(self):
+        rows = _normalize_rows(WeiboNoteComment, [{"comment_id": 1, "content": "a"}], "comment_id")
+        sql = str(build_upsert_stmt("mysql", WeiboNoteComment, rows, "comment_id").compile(dialect=mysql.dialect()))
+        self.assertIn("ON DUPLICATE KEY UPDATE", sql)
+        self.assertNotIn("add_ts = VALUES", sql)
+
+
+class TestUniqueIndexMigration(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = create_engine("sqlite://")
+        with self.engine.begin() as conn:
+            create_old_zhihu_comment_table(conn)
+
+    def test_dedup_then_create_unique_index(self):
+        with self.engine.begin() as conn:
+            self.assertFalse(has_unique_index(conn, "zhihu_comment", "comment_id"))
+            self.assertEqual(1, migrate_unique_indexes(conn))
+        with self.engine.begin() as conn:
+            self.assertTrue(has_unique_index(conn, "zhihu_comment", "comment_id"))
+            rows = conn.execute(text("SELECT comment_id, content FROM zhihu_comment ORDER BY id")).all()
+            self.assertEqual([("c2", "b"), ("c1", "new"), (None, "x"), (None, "y")], [tuple(row) for row in rows],
+                             msg="重复记录只保留最后写入的一条，空值不去重")
+            self.assertEqual(0, migrate_unique_indexes(conn), msg="重复执行迁移什么都不做")
+
+            rows = _normalize_rows(ZhihuComment, [{"comment_id": "c1", "content": "upserted"}], "comment_id")
+            conn.execute(build_upsert_stmt("sqlite", ZhihuComment, rows, "comment_id"))
+            content = conn.execute(text("SELECT content FROM zhihu_comment WHERE comment_id = 'c1'")).scalar_one()
+        self.assertEqual("upserted", content)
+
+
+class TestUpsertWithoutUniqueIndex(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        db_path = os.path.join(self.tmp_dir.name, "old.db")
+        with create_engine(f"sqlite:///{db_path}").begin() as conn:
+            create_old_zhihu_comment_table(conn)
+        self.patches = [
+            patch.object(config, "SAVE_DATA_OPTION", "sqlite"),
+            patch.dict(sqlite_db_config, {"db_path": db_path}),
+        ]
+        for p in self.patches:
+            p.start()
+
+    async def asyncTearDown(self):
+        await db_session.dispose_engines()
+        for p in self.patches:
+            p.stop()
+        self.tmp_dir.cleanup()
+
+    async def _comments(self):
+        async with db_session.get_session() as session:
+            res = await session.execute(select(ZhihuComment.comment_id, ZhihuComment.content).order_by(ZhihuComment.id))
+            return [tuple(row) for row in res.all()]
+
+    async def test_fall_back_to_per_row_until_migrated(self):
+        await upsert_rows(ZhihuComment, [{"comment_id": "c2", "content": "b2"}, {"comment_id": "c9", "content": "n"}],
+                          conflict_column="comment_id")
+        self.assertIn(("c2", "b2"), await self._comments())
+        self.assertIn(("c9", "n"), await self._comments())
+
+        await db_session.migrate_tables("sqlite")
+        await upsert_rows(ZhihuComment, [{"comment_id": "c1", "content": "batched"}], conflict_column="comment_id")
+        comments = await self._comments()
+        self.assertEqual(1, sum(1 for comment_id, _ in comments if comment_id == "c1"))
+        self.assertIn(("c1", "batched"), comments)
+
+
+if __name__ == '__main__':
+    unittest.main()
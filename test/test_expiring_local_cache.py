@@ -17,6 +17,7 @@
 
 import time
 import unittest
+from unittest import mock
 
 from cache.local_cache import ExpiringLocalCache
 
@@ -42,6 +43,48 @@ class TestExpiringLocalCache(unittest.TestCase):
         time.sleep(12)
         self.assertIsNone(self.cache.get('key'))
 
+    def test_clear_multiple_expired_keys(self):
+        now = time.time()
+        with mock.patch("cache.local_cache.time.time", return_value=now):
+            for i in range(5):
+                self.cache.set(f'key{i}', i, i + 1)
+        with mock.patch("cache.local_cache.time.time", return_value=now + 3.5):
+            self.cache._clear()
+            self.assertEqual(['key3', 'key4'], self.cache.keys('*'))
+
+    def test_overwrite_extends_expire_time(self):
+        now = time.time()
+        with mock.patch("cache.local_cache.time.time", return_value=now):
+            self.cache.set('key', 'old', 1)
+            self.cache.set('key', 'new', 10)
+        with mock.patch("cache.local_cache.time.time", return_value=now + 5):
+            self.cache._clear()
+            self.assertEqual('new', self.cache.get('key'))
+
+    def test_lru_eviction(self):
+        cache = ExpiringLocalCache(max_size=2)
+        cache.set('a', 1, 10)
+        cache.set('b', 2, 10)
+        cache.get('a')
+        cache.set('c', 3, 10)
+        self.assertIsNone(cache.get('b'), msg="最久未访问的键被淘汰")
+        self.assertEqual(1, cache.get('a'))
+        self.assertEqual(1, cache.stats()["evictions"])
+
+    def test_keys_by_prefix(self):
+        self.cache.set('kuaidaili_1', 1, 10)
+        self.cache.set('kuaidaili_2', 2, 10)
+        self.cache.set('wandouhttp_1', 3, 10)
+        self.assertEqual(['kuaidaili_1', 'kuaidaili_2'], self.cache.keys('kuaidaili_*'))
+        self.assertEqual(['kuaidaili_1', 'wandouhttp_1'], self.cache.keys('*_1'))
+
+    def test_hit_and_miss_counters(self):
+        self.cache.set('key', 'value', 10)
+        self.cache.get('key')
+        self.cache.get('not_exists')
+        self.assertEqual(1, self.cache.hits)
+        self.assertEqual(1, self.cache.misses)
+
     def tearDown(self):
         del self.cache
 
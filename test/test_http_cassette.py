@@ -0,0 +1,78 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import gzip
+import json
+import os
+import tempfile
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from tools.http_cassette import (
+    CASSETTE_RECORD,
+    CASSETTE_REPLAY,
+    CassetteMissError,
+    CassetteStore,
+    CassetteTransport,
+    request_fingerprint,
+)
+
+
+class TestHttpCassette(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.tmp_dir.name, "cassettes", "wb.db")
+        self.requests: List[httpx.Request] = []
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        body = json.dumps({"ok": 1, "page": request.url.params.get("page")}).encode()
+        return httpx.Response(200, headers={"content-encoding": "gzip"}, content=gzip.compress(body))
+
+    def _client(self, mode: str) -> httpx.AsyncClient:
+        transport = httpx.MockTransport(self.handler) if mode == CASSETTE_RECORD else None
+        return httpx.AsyncClient(transport=CassetteTransport(CassetteStore(self.db_path), mode, transport))
+
+    def test_fingerprint_ignores_query_order(self):
+        self.assertEqual(
+            request_fingerprint("GET", "https://m.weibo.cn/api?page=1&q=python"),
+            request_fingerprint("get", "https://m.weibo.cn/api?q=python&page=1"),
+        )
+        self.assertNotEqual(
+            request_fingerprint("GET", "https://m.weibo.cn/api?page=1"),
+            request_fingerprint("GET", "https://m.weibo.cn/api?page=2"),
+        )
+        self.assertNotEqual(
+            request_fingerprint("POST", "https://m.weibo.cn/api", b"a=1"),
+            request_fingerprint("POST", "https://m.weibo.cn/api", b"a=2"),
+        )
+
+    async def test_record_then_replay_without_network(self):
+        async with self._client(CASSETTE_RECORD) as client:
+            recorded = await client.get("https://m.weibo.cn/api", params={"page": 1, "q": "python"})
+            self.assertEqual({"ok": 1, "page": "1"}, recorded.json())
+        self.assertEqual(1, len(self.requests))
+
+        async with self._client(CASSETTE_REPLAY) as client:
+            # 请求头不同、参数顺序不同也能命中录制的响应
+            replayed = await client.get("https://m.weibo.cn/api?q=python&page=1", headers={"Cookie": "a=b"})
+            self.assertEqual(200, replayed.status_code)
+            self.assertEqual(recorded.json(), replayed.json())
+            self.assertNotIn("content-encoding", replayed.headers)
+
+            with self.assertRaises(CassetteMissError):
+                await client.get("https://m.weibo.cn/api", params={"page": 2, "q": "python"})
+        self.assertEqual(1, len(self.requests), msg="回放模式下不发出请求")
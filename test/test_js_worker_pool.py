@@ -0,0 +1,63 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from tools.js_worker_pool import JsWorker, JsWorkerError, JsWorkerPool, node_available
+
+SCRIPT = """
+function add(a, b) { return a + b; }
+function fail() { throw new Error("boom"); }
+"""
+
+
+@unittest.skipUnless(node_available(), "node runtime not found")
+class TestJsWorkerPool(IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        fd, self.script_path = tempfile.mkstemp(suffix=".js")
+        with os.fdopen(fd, "w") as f:
+            f.write(SCRIPT)
+
+    def tearDown(self):
+        os.remove(self.script_path)
+
+    async def test_concurrent_calls(self):
+        pool = JsWorkerPool(self.script_path, size=2)
+        try:
+            results = await asyncio.gather(*[pool.call("add", i, 1) for i in range(20)])
+            self.assertEqual([i + 1 for i in range(20)], results)
+        finally:
+            await pool.close()
+
+    async def test_js_error(self):
+        worker = JsWorker(self.script_path)
+        try:
+            with self.assertRaises(JsWorkerError):
+                await worker.call("fail")
+            with self.assertRaises(JsWorkerError):
+                await worker.call("not_exists")
+            self.assertEqual(3, await worker.call("add", 1, 2), msg="出错后进程仍然可用")
+        finally:
+            await worker.close()
+
+    async def test_restart_after_exit(self):
+        worker = JsWorker(self.script_path)
+        try:
+            await worker.call("add", 1, 2)
+            worker._proc.kill()
+            await worker._proc.wait()
+            self.assertEqual(5, await worker.call("add", 2, 3), msg="进程退出后自动重启")
+        finally:
+            await worker.close()
@@ -0,0 +1,128 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import hashlib
+import os
+import tempfile
+from typing import List, Optional
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import httpx
+
+import config
+from media.downloader import MediaDownloader, MediaTask
+from media.media_store import ContentAddressedMediaStore
+from media_platform.weibo.client import WeiboClient
+from tools.http_pool import HttpClientPool
+
+CONTENTS = {
+    "/a.jpg": b"a" * 1000 + b"b" * 1000,
+    "/same_as_a.jpg": b"a" * 1000 + b"b" * 1000,
+    "/c.jpg": b"c" * 300,
+}
+
+
+class MockHttpClientPool(HttpClientPool):
+
+    def __init__(self):
+        super().__init__()
+        self.requests: List[httpx.Request] = []
+
+    def _new_client(self, proxy: Optional[str]) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(self.handler))
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        content = CONTENTS[request.url.path]
+        range_header = request.headers.get("Range")
+        if range_header:
+            start = int(range_header[len("bytes="):-1])
+            return httpx.Response(206, content=content[start:])
+        return httpx.Response(200, content=content)
+
+
+class TestMediaDownloader(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ContentAddressedMediaStore(self.tmp_dir.name)
+        self.http_pool = MockHttpClientPool()
+        self.downloader = MediaDownloader(self.store, self.http_pool, concurrency=2, chunk_size=128)
+
+    async def asyncTearDown(self):
+        await self.downloader.close()
+        self.tmp_dir.cleanup()
+
+    async def test_sharded_path_and_content_dedup(self):
+        path = await self.downloader.download(MediaTask(media_key="a", url="https://img.test/a.jpg", extension="jpg"))
+        digest = hashlib.sha256(CONTENTS["/a.jpg"]).hexdigest()
+        self.assertEqual(os.path.join(self.tmp_dir.name, digest[:2], digest[2:4], f"{digest}.jpg"), path)
+        with open(path, "rb") as f:
+            self.assertEqual(CONTENTS["/a.jpg"], f.read())
+
+        with open(self.store.key_path("a", "jpg"), "rb") as f:
+            self.assertEqual(CONTENTS["/a.jpg"], f.read(), msg="按媒体标识命名的硬链接指向同一内容")
+
+        same_path = await self.downloader.download(
+            MediaTask(media_key="same", url="https://img.test/same_as_a.jpg", extension="jpg"))
+        self.assertEqual(path, same_path, msg="内容相同的文件只保存一份")
+        self.assertFalse(os.listdir(os.path.join(self.tmp_dir.name, ".partial")))
+
+    async def test_downloaded_key_is_not_requested_again(self):
+        task = MediaTask(media_key="c", url="https://img.test/c.jpg", extension="jpg")
+        futures = [await self.downloader.submit(task) for _ in range(3)]
+        paths = {await future for future in futures}
+        self.assertEqual(1, len(paths))
+        self.assertEqual(1, len(self.http_pool.requests))
+
+        # 新的存储实例从索引文件中恢复已下载的记录
+        downloader = MediaDownloader(ContentAddressedMediaStore(self.tmp_dir.name), self.http_pool)
+        self.assertEqual(paths.pop(), await downloader.download(task))
+        self.assertEqual(1, len(self.http_pool.requests))
+
+    async def test_resume_partial_file(self):
+        partial_path = self.store.partial_path("a")
+        os.makedirs(os.path.dirname(partial_path))
+        with open(partial_path, "wb") as f:
+            f.write(CONTENTS["/a.jpg"][:700])
+
+        path = await self.downloader.download(MediaTask(media_key="a", url="https://img.test/a.jpg", extension="jpg"))
+        self.assertEqual("bytes=700-", self.http_pool.requests[0].headers["Range"])
+        with open(path, "rb") as f:
+            self.assertEqual(CONTENTS["/a.jpg"], f.read())
+
+
+class TestWeiboNotePics(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = ContentAddressedMediaStore(self.tmp_dir.name)
+        self.http_pool = MockHttpClientPool()
+        self.client = WeiboClient(headers={}, playwright_page=None, cookie_dict={})
+        self.client._media_downloader = MediaDownloader(self.store, self.http_pool)
+
+    async def asyncTearDown(self):
+        await self.client._media_downloader.close()
+        self.tmp_dir.cleanup()
+
+    async def test_note_pics_do_not_wait_for_downloads(self):
+        with patch.object(self.client, "get_note_image_url", lambda url: url):
+            await self.client.download_note_pics([{"pid": "a", "url": "https://img.test/a.jpg"}])
+            mblog = {"pics": [{"pid": "a", "url": "https://img.test/a.jpg"}, {"pid": "c", "url": "https://img.test/c.jpg"}]}
+            with patch.object(config, "ENABLE_GET_MEIDAS", True):
+                pics = await self.client._note_pics(mblog)
+        expected_paths = [os.path.join(self.tmp_dir.name, "a.jpg"), os.path.join(self.tmp_dir.name, "c.jpg")]
+        self.assertEqual(expected_paths, [pic["pic_path"] for pic in pics], msg="文件路径按 pid 确定，不等待下载完成")
+        self.assertFalse(os.path.exists(expected_paths[1]), msg="新图片只提交下载，还没有下载完成")
+
+        await self.client._media_downloader.join()
+        with open(expected_paths[1], "rb") as f:
+            self.assertEqual(CONTENTS["/c.jpg"], f.read())
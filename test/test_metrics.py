@@ -0,0 +1,106 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import unittest
+from typing import Optional
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+import config
+from metrics.crawler_metrics import REQUEST_ERRORS_TOTAL, REQUESTS_TOTAL, endpoint_label
+from metrics.registry import MetricsRegistry
+from metrics.server import PROMETHEUS_CONTENT_TYPE, create_metrics_app
+from tools.http_pool import HttpClientPool
+
+
+class TestMetricsRegistry(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_render_prometheus_text(self):
+        counter = self.registry.counter("test_requests_total", "requests", ("status",))
+        counter.inc(status="200")
+        counter.inc(2, status="200")
+        gauge = self.registry.gauge("test_queue_depth", "queue", ("queue",))
+        gauge.set_function(lambda: 7, queue="store")
+        histogram = self.registry.histogram("test_latency_seconds", "latency", buckets=(0.1, 1))
+        histogram.observe(0.05)
+        histogram.observe(0.5)
+        histogram.observe(3)
+
+        text = self.registry.render()
+        self.assertIn("# TYPE test_requests_total counter", text)
+        self.assertIn('test_requests_total{status="200"} 3', text)
+        self.assertIn('test_queue_depth{queue="store"} 7', text)
+        self.assertIn('test_latency_seconds_bucket{le="0.1"} 1', text)
+        self.assertIn('test_latency_seconds_bucket{le="1"} 2', text)
+        self.assertIn('test_latency_seconds_bucket{le="+Inf"} 3', text)
+        self.assertIn("test_latency_seconds_count 3", text)
+        self.assertEqual(1, histogram.quantile(0.5))
+
+    def test_labels_must_match(self):
+        counter = self.registry.counter("test_errors_total", "errors", ("kind",))
+        with self.assertRaises(ValueError):
+            counter.inc(status="500")
+        self.assertIs(counter, self.registry.counter("test_errors_total", "errors", ("kind",)))
+        with self.assertRaises(ValueError):
+            self.registry.gauge("test_errors_total", "errors", ("kind",))
+
+    def test_endpoint_label_replaces_ids(self):
+        self.assertEqual(
+            "www.zhihu.com/api/v4/comment_v5/answers/{id}/root_comment",
+            endpoint_label("https://www.zhihu.com/api/v4/comment_v5/answers/123456/root_comment?offset=1"),
+        )
+        self.assertEqual("m.weibo.cn/detail/{id}", endpoint_label("https://m.weibo.cn/detail/4987654321"))
+        self.assertEqual(
+            "www.zhihu.com/api/v4/members/{url_token}/answers",
+            endpoint_label("https://www.zhihu.com/api/v4/members/some-creator/answers?offset=20",
+                           route="/api/v4/members/{url_token}/answers"),
+            msg="路径中的非数字参数按路由模板归一化",
+        )
+
+
+class MockHttpClientPool(HttpClientPool):
+
+    def _new_client(self, proxy: Optional[str]) -> httpx.AsyncClient:
+        return httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(432, text="banned")))
+
+
+class TestMetricsInstrumentation(IsolatedAsyncioTestCase):
+
+    async def test_http_pool_records_requests_and_errors(self):
+        endpoint = endpoint_label("https://m.weibo.cn/comments/hotflow")
+        requests_before = REQUESTS_TOTAL.get(platform="wb", endpoint=endpoint, status="432")
+        errors_before = REQUEST_ERRORS_TOTAL.get(platform="wb", kind="http_432")
+
+        platform, config.PLATFORM = config.PLATFORM, "wb"
+        try:
+            pool = MockHttpClientPool()
+            await pool.request("GET", "https://m.weibo.cn/comments/hotflow?id=1")
+            await pool.request("GET", "https://www.zhihu.com/people/creator-a", route="/people/{url_token}")
+            await pool.request("GET", "https://www.zhihu.com/people/creator-b", route="/people/{url_token}")
+            await pool.aclose()
+        finally:
+            config.PLATFORM = platform
+
+        self.assertEqual(requests_before + 1, REQUESTS_TOTAL.get(platform="wb", endpoint=endpoint, status="432"))
+        self.assertEqual(errors_before + 3, REQUEST_ERRORS_TOTAL.get(platform="wb", kind="http_432"))
+        self.assertEqual(2, REQUESTS_TOTAL.get(platform="wb", endpoint="www.zhihu.com/people/{url_token}", status="432"))
+
+    async def test_metrics_endpoint(self):
+        registry = MetricsRegistry()
+        registry.counter("test_items_total", "items").inc(5)
+        transport = httpx.ASGITransport(app=create_metrics_app(registry))
+        async with httpx.AsyncClient(transport=transport, base_url="http://metrics") as client:
+            response = await client.get("/metrics")
+        self.assertEqual(PROMETHEUS_CONTENT_TYPE, response.headers["content-type"])
+        self.assertIn("test_items_total 5", response.text)
@@ -0,0 +1,81 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+import time
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from metrics.profiler import IDLE, ProfilerFactory, profiling
+
+
+async def busy_coroutine(seconds: float):
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        sum(range(1000))
+        await asyncio.sleep(0)
+
+
+class TestProfiler(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_patch = patch.multiple(
+            config, PROFILE_OUTPUT_DIR=self.tmp_dir.name, PROFILE_SAMPLE_INTERVAL=0.001, PROFILE_TOP_N=10)
+        self.config_patch.start()
+
+    async def asyncTearDown(self):
+        self.config_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _read(self, suffix: str) -> str:
+        file_name = next(name for name in os.listdir(self.tmp_dir.name) if name.endswith(suffix))
+        with open(os.path.join(self.tmp_dir.name, file_name), encoding="utf-8") as f:
+            return f.read()
+
+    async def test_cpu_profile(self):
+        async with profiling("cpu"):
+            await busy_coroutine(0.05)
+        self.assertIn("busy_coroutine", self._read("cpu.txt"))
+        self.assertTrue(any(name.endswith("cpu.prof") for name in os.listdir(self.tmp_dir.name)))
+
+    async def test_async_sampler_attributes_time_to_coroutines(self):
+        async with profiling("async") as profiler:
+            await asyncio.gather(asyncio.create_task(busy_coroutine(0.2)), asyncio.sleep(0.2))
+        self.assertGreater(profiler.samples, 0)
+        self.assertIn("busy_coroutine", profiler.coroutines)
+        self.assertIn("busy_coroutine", self._read("async.txt"))
+        folded = self._read("async.folded")
+        self.assertTrue(all(line.rsplit(" ", 1)[1].isdigit() for line in folded.splitlines()))
+        stacks = [line.split(";", 1)[0] for line in folded.splitlines()]
+        self.assertIn("busy_coroutine", stacks)
+        self.assertTrue(set(stacks) <= set(profiler.coroutines) | {IDLE})
+
+    async def test_memory_profile_reports_allocations(self):
+        async with profiling("memory"):
+            data = [bytearray(1024) for _ in range(2000)]
+        self.assertEqual(2000, len(data))
+        report = self._read("memory.txt")
+        self.assertIn("test_profiler.py", report)
+        self.assertIn("growth since start", report)
+
+    async def test_report_written_on_error_and_disabled_mode(self):
+        with self.assertRaises(ValueError):
+            async with profiling("cpu"):
+                raise ValueError("crawler failed")
+        self.assertTrue(self._read("cpu.txt"))
+
+        async with profiling("") as profiler:
+            self.assertIsNone(profiler)
+        with self.assertRaises(ValueError):
+            ProfilerFactory.create_profiler("gpu")
@@ -13,10 +13,14 @@
 # @Author  : relakkes@gmail.com
 # @Time    : 2023/12/2 14:42
 # @Desc    :
+import asyncio
+from typing import List
 from unittest import IsolatedAsyncioTestCase
 
-from proxy.proxy_ip_pool import create_ip_pool
+from proxy.base_proxy import ProxyProvider
+from proxy.proxy_ip_pool import ProxyIpPool, create_ip_pool
 from proxy.types import IpInfoModel
+from tools import utils
 
 
 class TestIpPool(IsolatedAsyncioTestCase):
@@ -28,3 +32,65 @@ class TestIpPool(IsolatedAsyncioTestCase):
             print(ip_proxy_info)
             self.assertIsNotNone(ip_proxy_info.ip, msg="验证 ip 是否获取成功")
 
+
+
+class FakeProvider(ProxyProvider):
+
+    def __init__(self, expired_time_ts: int = 0):
+        self.expired_time_ts = expired_time_ts
+        self.calls = 0
+
+    async def get_proxy(self, num: int) -> List[IpInfoModel]:
+        self.calls += 1
+        start = (self.calls - 1) * 10
+        return [
+            IpInfoModel(ip=f"10.0.0.{start + i}", port=8080, user="", password="", expired_time_ts=self.expired_time_ts)
+            for i in range(num)
+        ]
+
+
+class TestProxyHealthScore(IsolatedAsyncioTestCase):
+
+    async def test_concurrent_validation_and_best_proxy(self):
+        pool = ProxyIpPool(ip_pool_count=3, enable_validate_ip=True, ip_provider=FakeProvider())
+        latencies = {"10.0.0.0": 0.3, "10.0.0.1": 0.05, "10.0.0.2": None}
+
+        async def fake_validate(proxy: IpInfoModel):
+            if latencies[proxy.ip] is None:
+                return None
+            await asyncio.sleep(latencies[proxy.ip])
+            return latencies[proxy.ip]
+
+        pool._validate_latency = fake_validate
+        await pool.load_proxies()
+        self.assertEqual(2, len(pool.proxy_list), msg="验证失败的代理不会进入代理池")
+        self.assertEqual("10.0.0.1", (await pool.get_proxy()).ip, msg="优先使用延迟最低的代理")
+
+    async def test_failures_evict_and_refill(self):
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=False, ip_provider=FakeProvider())
+        await pool.load_proxies()
+        proxy = await pool.get_proxy()
+        for _ in range(5):
+            pool.report_proxy_result(proxy, success=False)
+        self.assertNotIn(proxy, pool.proxy_list)
+        await pool._refill_task
+        self.assertEqual(1, len(pool.proxy_list), msg="低于水位线后在后台补充代理")
+        self.assertNotEqual(proxy.ip, pool.proxy_list[0].ip)
+        await pool.close()
+
+    async def test_expiring_proxy_evicted(self):
+        provider = FakeProvider(expired_time_ts=utils.get_unix_timestamp() + 3600)
+        pool = ProxyIpPool(ip_pool_count=1, enable_validate_ip=False, ip_provider=provider)
+        await pool.load_proxies()
+        pool.proxy_list[0].expired_time_ts = utils.get_unix_timestamp() + 5
+        proxy = await pool.get_proxy()
+        self.assertEqual("10.0.0.10", proxy.ip, msg="即将过期的代理被淘汰并重新加载")
+        await pool.close()
+
+    async def test_release_proxy_restores_score(self):
+        pool = ProxyIpPool(ip_pool_count=2, enable_validate_ip=False, ip_provider=FakeProvider())
+        await pool.load_proxies()
+        for _ in range(20):
+            pool.release_proxy(await pool.get_proxy())
+        self.assertEqual([0, 0], [health.in_use for health in pool.health.values()],
+                         msg="归还后正在使用的计数回落，不会无限降权")
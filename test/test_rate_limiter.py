@@ -0,0 +1,46 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import time
+from unittest import IsolatedAsyncioTestCase
+
+from tools.rate_limiter import RateLimiter, TokenBucket
+
+
+class TestRateLimiter(IsolatedAsyncioTestCase):
+
+    async def test_burst_then_rate(self):
+        bucket = TokenBucket(rate=20, burst=3)
+        start = time.monotonic()
+        for _ in range(3):
+            self.assertEqual(0, await bucket.acquire(), msg="突发额度内不需要等待")
+        self.assertLess(time.monotonic() - start, 0.02)
+
+        await bucket.acquire()
+        await bucket.acquire()
+        # 额度用完后按 20 个/秒 的速度发放，两个令牌至少等待 0.1 秒
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    async def test_concurrent_acquire_respects_rate(self):
+        bucket = TokenBucket(rate=50, burst=1)
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        self.assertGreaterEqual(time.monotonic() - start, 0.09)
+
+    async def test_buckets_per_host_account_proxy(self):
+        limiter = RateLimiter(rate=1, burst=1, host_rates={"www.zhihu.com": 5})
+        await limiter.acquire("https://m.weibo.cn/api/config", account="a")
+        # 不同账号、不同代理、不同域名各自独立计数，不需要等待
+        self.assertEqual(0, await limiter.acquire("https://m.weibo.cn/api/config", account="b"))
+        self.assertEqual(0, await limiter.acquire("https://m.weibo.cn/api/config", account="a", proxy="http://127.0.0.1:1"))
+        self.assertEqual(0, await limiter.acquire("https://www.zhihu.com/api/v4/search_v3"))
+        self.assertEqual(5, limiter.get_bucket("www.zhihu.com").rate)
+        self.assertIs(limiter.get_bucket("m.weibo.cn", "a"), limiter.get_bucket("m.weibo.cn", "a"))
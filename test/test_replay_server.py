@@ -0,0 +1,72 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+from unittest import IsolatedAsyncioTestCase
+
+import httpx
+
+from media_platform.weibo.help import filter_search_result_card
+from media_platform.zhihu.help import ZhihuExtractor
+from model.m_zhihu import ZhihuContent
+from test.benchmark_crawl import percentile
+from test.replay_server import WEIBO_BAN_STATUS, ReplayConfig, create_replay_app
+from tools import utils
+
+
+class TestReplayServer(IsolatedAsyncioTestCase):
+
+    def _client(self, replay_config: ReplayConfig) -> httpx.AsyncClient:
+        self.app = create_replay_app(replay_config)
+        return httpx.AsyncClient(transport=httpx.ASGITransport(app=self.app), base_url="http://replay")
+
+    async def test_weibo_search_and_comments_paging(self):
+        async with self._client(ReplayConfig(search_pages=2, comment_pages=3)) as client:
+            params = {"containerid": "100103type=1&q=python", "page_type": "searchall"}
+            page_1 = (await client.get("/api/container/getIndex", params={**params, "page": 1})).json()
+            page_2 = (await client.get("/api/container/getIndex", params={**params, "page": 2})).json()
+            page_3 = (await client.get("/api/container/getIndex", params={**params, "page": 3})).json()
+            notes = filter_search_result_card(page_1["data"]["cards"] + page_2["data"]["cards"])
+            self.assertEqual(20, len({note["mblog"]["id"] for note in notes}))
+            self.assertEqual([], page_3["data"]["cards"])
+            utils.rfc2822_to_timestamp(notes[0]["mblog"]["created_at"])
+
+            note_id, max_id, comment_ids = notes[0]["mblog"]["id"], 0, []
+            while True:
+                res = (await client.get("/comments/hotflow", params={"id": note_id, "max_id": max_id})).json()["data"]
+                comment_ids.extend(comment["id"] for comment in res["data"])
+                max_id = res["max_id"]
+                if max_id == 0:
+                    break
+            self.assertEqual(notes[0]["mblog"]["comments_count"], len(set(comment_ids)))
+
+    async def test_zhihu_search_extractable(self):
+        async with self._client(ReplayConfig(search_pages=1)) as client:
+            res = (await client.get("/api/v4/search_v3", params={"q": "python", "offset": 0, "limit": 20})).json()
+            contents = ZhihuExtractor().extract_contents_from_search(res)
+            self.assertEqual(20, len(contents))
+            self.assertTrue(res["paging"]["is_end"])
+
+            content: ZhihuContent = contents[0]
+            res = (await client.get(f"/api/v4/comment_v5/{content.content_type}s/{content.content_id}/root_comment")).json()
+            self.assertEqual("2", ZhihuExtractor.extract_offset(res["paging"]))
+            self.assertTrue(ZhihuExtractor().extract_comments(content, res["data"]))
+
+    async def test_fault_injection(self):
+        async with self._client(ReplayConfig(ban_rate=1)) as client:
+            response = await client.get("/comments/hotflow", params={"id": "1"})
+            self.assertEqual(WEIBO_BAN_STATUS, response.status_code)
+            self.assertEqual(403, (await client.get("/api/v4/me")).status_code)
+            self.assertEqual({"requests": 2, "banned": 2}, (await client.get("/stats")).json())
+
+    def test_percentile(self):
+        values = [i / 1000 for i in range(1, 101)]
+        self.assertEqual(0.05, percentile(values, 50))
+        self.assertEqual(0.099, percentile(values, 99))
+        self.assertEqual(0.0, percentile([], 99))
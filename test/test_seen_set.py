@@ -0,0 +1,82 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import os
+import tempfile
+import unittest
+from unittest import IsolatedAsyncioTestCase
+
+from dedup.abs_seen_set import NoopSeenSet
+from dedup.bloom_filter import BloomFilter, FileBloomSeenSet, ScalableBloomFilter
+from dedup.redis_seen_set import RedisBloomSeenSet
+
+try:
+    from fakeredis import aioredis as fake_aioredis
+except ImportError:  # fakeredis 不是项目依赖，未安装时跳过
+    fake_aioredis = None
+
+
+class TestBloomFilter(unittest.TestCase):
+
+    def test_no_false_negative_and_low_false_positive(self):
+        bloom = BloomFilter(capacity=5000, error_rate=0.01)
+        for i in range(5000):
+            bloom.add(f"note:{i}")
+        self.assertTrue(all(f"note:{i}" in bloom for i in range(5000)))
+        false_positives = sum(f"other:{i}" in bloom for i in range(10000))
+        self.assertLess(false_positives / 10000, 0.03)
+
+    def test_scalable_filter_grows(self):
+        bloom = ScalableBloomFilter(initial_capacity=100, error_rate=0.01)
+        self.assertTrue(bloom.add("a"))
+        self.assertFalse(bloom.add("a"))
+        for i in range(1000):
+            bloom.add(str(i))
+        self.assertGreater(len(bloom.filters), 1)
+        self.assertTrue(all(str(i) in bloom for i in range(1000)))
+
+    def test_serialize_round_trip(self):
+        bloom = ScalableBloomFilter(initial_capacity=10, error_rate=0.01)
+        for i in range(50):
+            bloom.add(str(i))
+        restored = ScalableBloomFilter.from_bytes(bloom.to_bytes())
+        self.assertEqual(len(bloom), len(restored))
+        self.assertTrue(all(str(i) in restored for i in range(50)))
+
+
+class TestFileBloomSeenSet(IsolatedAsyncioTestCase):
+
+    async def test_persist_across_runs(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            file_path = os.path.join(tmp_dir, "wb_note.bloom")
+            seen_set = FileBloomSeenSet("wb:note", file_path, capacity=1000, error_rate=0.001)
+            self.assertEqual([True, True, False], await seen_set.add(["1:10", "2:0", "1:10"]))
+            await seen_set.close()
+
+            seen_set = FileBloomSeenSet("wb:note", file_path, capacity=1000, error_rate=0.001)
+            self.assertEqual([True, False], await seen_set.contains(["1:10", "1:11"]))
+            items = [{"id": 1, "count": 10}, {"id": 1, "count": 11}]
+            new_items = await seen_set.filter_new(items, lambda item: f"{item['id']}:{item['count']}")
+            self.assertEqual([{"id": 1, "count": 11}], new_items, msg="计数变化后视为新内容")
+
+    async def test_noop_seen_set(self):
+        seen_set = NoopSeenSet("wb:note")
+        self.assertEqual([1, 1], await seen_set.filter_new([1, 1], str))
+
+
+@unittest.skipIf(fake_aioredis is None, "fakeredis is not installed")
+class TestRedisBloomSeenSet(IsolatedAsyncioTestCase):
+
+    async def test_add_and_contains(self):
+        seen_set = RedisBloomSeenSet("wb:comment", capacity=1000, error_rate=0.001,
+                                     redis_client=fake_aioredis.FakeRedis())
+        self.assertEqual([True, True, False], await seen_set.add(["c1", "c2", "c1"]))
+        self.assertEqual([True, True, False], await seen_set.contains(["c1", "c2", "c3"]))
+        await seen_set.close()
@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+from typing import Dict, List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+from base.base_crawler import AbstractStore
+from dedup.bloom_filter import FileBloomSeenSet
+from store.store_pipeline import ITEM_TYPE_COMMENTS, ITEM_TYPE_CONTENTS, StorePipeline
+
+
+class FakeStore(AbstractStore):
+    def __init__(self):
+        self.batches: List[tuple] = []
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def store_content(self, content_item: Dict):
+        pass
+
+    async def store_comment(self, comment_item: Dict):
+        pass
+
+    async def store_creator(self, creator: Dict):
+        pass
+
+    async def store_contents_batch(self, content_items: List[Dict]):
+        self.batches.append((ITEM_TYPE_CONTENTS, list(content_items)))
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        await self.gate.wait()
+        self.batches.append((ITEM_TYPE_COMMENTS, list(comment_items)))
+
+
+class FailingStore(FakeStore):
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        raise IOError("disk full")
+
+
+class FlakyStore(FakeStore):
+    """前 failures 次批量写入失败，id 为 bad 的数据每次都写入失败"""
+
+    def __init__(self, failures: int = 0):
+        super().__init__()
+        self.failures = failures
+
+    async def store_comments_batch(self, comment_items: List[Dict]):
+        if self.failures:
+            self.failures -= 1
+            raise IOError("database is locked")
+        if any(item["id"] == "bad" for item in comment_items):
+            raise ValueError("bad row")
+        await super().store_comments_batch(comment_items)
+
+
+@patch("config.ENABLE_STORE_PIPELINE", True)
+class TestStorePipeline(IsolatedAsyncioTestCase):
+
+    async def test_flush_by_batch_size(self):
+        store = FakeStore()
+        pipeline = StorePipeline(max_size=100, batch_size=3, flush_interval=60)
+        await pipeline.submit(store, ITEM_TYPE_CONTENTS, [{"id": i} for i in range(3)])
+        await asyncio.sleep(0.05)
+        self.assertEqual([(ITEM_TYPE_CONTENTS, [{"id": 0}, {"id": 1}, {"id": 2}])], store.batches)
+        await pipeline.drain()
+
+    async def test_flush_by_interval(self):
+        store = FakeStore()
+        pipeline = StorePipeline(max_size=100, batch_size=100, flush_interval=0.05)
+        await pipeline.submit(store, ITEM_TYPE_CONTENTS, [{"id": 1}])
+        await asyncio.sleep(0.2)
+        self.assertEqual(1, len(store.batches))
+        await pipeline.drain()
+
+    async def test_backpressure_and_drain(self):
+        store = FakeStore()
+        store.gate.clear()
+        pipeline = StorePipeline(max_size=2, batch_size=1, flush_interval=60)
+        # 第一条被后台任务取出后卡在写入上，随后两条填满队列
+        await pipeline.submit(store, ITEM_TYPE_COMMENTS, [{"id": 1}, {"id": 2}, {"id": 3}])
+        blocked = asyncio.create_task(pipeline.submit(store, ITEM_TYPE_COMMENTS, [{"id": i} for i in range(4, 10)]))
+        await asyncio.sleep(0.05)
+        self.assertFalse(blocked.done(), msg="队列已满时 submit 应该等待")
+        self.assertEqual(2, pipeline.pending)
+
+        store.gate.set()
+        await blocked
+        await pipeline.drain()
+        stored_ids = [item["id"] for _, items in store.batches for item in items]
+        self.assertEqual(list(range(1, 10)), stored_ids)
+        self.assertEqual(0, pipeline.pending)
+
+    async def test_disabled_writes_inline(self):
+        store = FakeStore()
+        pipeline = StorePipeline()
+        with patch("config.ENABLE_STORE_PIPELINE", False):
+            await pipeline.submit(store, ITEM_TYPE_CONTENTS, [{"id": 1}])
+        self.assertEqual([(ITEM_TYPE_CONTENTS, [{"id": 1}])], store.batches)
+
+    async def test_seen_keys_added_only_after_successful_write(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            seen_sets = {entity: FileBloomSeenSet(entity, os.path.join(tmp_dir, entity), 1000, 0.001)
+                         for entity in ("note", "comment", "note_comments")}
+            with patch("store.store_pipeline.get_seen_set", seen_sets.get):
+                pipeline = StorePipeline(max_size=100, batch_size=100, flush_interval=60, retry_interval=0)
+                await pipeline.submit(FakeStore(), ITEM_TYPE_CONTENTS, [{"id": 1}], "note", ["1:10"])
+                await pipeline.submit(FailingStore(), ITEM_TYPE_COMMENTS, [{"id": 2}], "comment", ["2:0:0"])
+                await pipeline.mark_seen("note_comments", ["1:10"])
+                self.assertEqual([False], await seen_sets["note"].contains(["1:10"]), msg="入队时不应加入已见集合")
+                await pipeline.drain()
+
+            self.assertEqual([True], await seen_sets["note"].contains(["1:10"]))
+            self.assertEqual([False], await seen_sets["comment"].contains(["2:0:0"]), msg="写入失败的评论下次运行要重新保存")
+            self.assertEqual([False], await seen_sets["note_comments"].contains(["1:10"]))
+            self.assertEqual(1, pipeline.dropped_items)
+
+    async def test_failed_batch_is_retried_then_written_per_item(self):
+        store = FlakyStore(failures=1)
+        pipeline = StorePipeline(max_size=100, batch_size=100, flush_interval=60, max_retries=1, retry_interval=0)
+        await pipeline.submit(store, ITEM_TYPE_COMMENTS, [{"id": 1}, {"id": 2}])
+        await pipeline.drain()
+        self.assertEqual([(ITEM_TYPE_COMMENTS, [{"id": 1}, {"id": 2}])], store.batches, msg="临时失败重试后写入")
+
+        store = FlakyStore()
+        await pipeline.submit(store, ITEM_TYPE_COMMENTS, [{"id": 1}, {"id": "bad"}, {"id": 3}])
+        await pipeline.drain()
+        self.assertEqual([1, 3], [item["id"] for _, items in store.batches for item in items], msg="只丢弃写入失败的那一条")
+        self.assertEqual(1, pipeline.dropped_items)
+
+    async def test_seen_marks_skipped_only_for_flush_with_failures(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            seen_set = FileBloomSeenSet("note_comments", os.path.join(tmp_dir, "note_comments"), 1000, 0.001)
+            with patch("store.store_pipeline.get_seen_set", lambda entity: seen_set):
+                pipeline = StorePipeline(max_size=100, batch_size=100, flush_interval=60, max_retries=0)
+                await pipeline.submit(FailingStore(), ITEM_TYPE_COMMENTS, [{"id": 1}])
+                await pipeline.mark_seen("note_comments", ["1:1"])
+                await pipeline.drain()
+                await pipeline.submit(FakeStore(), ITEM_TYPE_COMMENTS, [{"id": 2}])
+                await pipeline.mark_seen("note_comments", ["2:1"])
+                await pipeline.drain()
+            self.assertEqual([False, True], await seen_set.contains(["1:1", "2:1"]),
+                             msg="之前的写入失败不影响之后的标记")
@@ -0,0 +1,154 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+import os
+import tempfile
+import unittest
+from typing import List
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+
+from distributed.task_queue import TASK_NOTE_COMMENTS, TASK_SEARCH_PAGE, CrawlTask, RedisTaskQueue, new_task
+from distributed.worker import CrawlWorker, enqueue_seed_tasks
+from frontier.sqlite_frontier import SqliteFrontier
+
+try:
+    import lupa  # noqa: F401  fakeredis 执行入队的 Lua 脚本需要 lupa
+    from fakeredis import aioredis as fake_aioredis
+except ImportError:  # fakeredis 不是项目依赖，未安装时跳过
+    fake_aioredis = None
+
+
+def search_task(page: int) -> CrawlTask:
+    return new_task("wb", TASK_SEARCH_PAGE, f"search:python:{page}", {"keyword": "python", "page": page})
+
+
+@unittest.skipIf(fake_aioredis is None, "fakeredis is not installed")
+class TestRedisTaskQueue(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+        self.queue = RedisTaskQueue("test:tasks", redis_client=self.redis_client, visibility_timeout=60, max_retries=1)
+
+    async def asyncTearDown(self):
+        await self.queue.close()
+
+    async def test_enqueue_dedup_and_fifo(self):
+        self.assertEqual(2, await self.queue.enqueue([search_task(1), search_task(2)]))
+        self.assertEqual(0, await self.queue.enqueue([search_task(1)]), msg="未完成的任务重复入队会被忽略")
+        self.assertEqual("wb:search:python:1", (await self.queue.lease()).task_id)
+        self.assertEqual({"pending": 1, "processing": 1, "dead": 0}, await self.queue.stats())
+
+    async def test_ack_allows_enqueue_again(self):
+        await self.queue.enqueue([search_task(1)])
+        await self.queue.ack(await self.queue.lease())
+        self.assertEqual({"pending": 0, "processing": 0, "dead": 0}, await self.queue.stats())
+        self.assertEqual(1, await self.queue.enqueue([search_task(1)]))
+
+    async def test_nack_retries_then_dead_letter(self):
+        await self.queue.enqueue([search_task(1)])
+        await self.queue.nack(await self.queue.lease(), "blocked")
+        task = await self.queue.lease()
+        self.assertEqual(1, task.attempts)
+        await self.queue.nack(task, "blocked again")
+        self.assertIsNone(await self.queue.lease())
+        dead = await self.queue.list_dead()
+        self.assertEqual(["wb:search:python:1"], [t.task_id for t in dead])
+        self.assertEqual("blocked again", dead[0].last_error)
+
+    async def test_expired_lease_is_requeued(self):
+        self.queue.visibility_timeout = 0
+        await self.queue.enqueue([search_task(1)])
+        task = await self.queue.lease()
+        await asyncio.sleep(0.01)
+        self.assertEqual(1, await self.queue.requeue_expired())
+        self.assertFalse(await self.queue.extend_lease(task), msg="租约已被回收")
+        self.assertEqual(task.task_id, (await self.queue.lease()).task_id)
+
+    async def test_processing_without_lease_gets_grace_period(self):
+        await self.queue.enqueue([search_task(1)])
+        # 模拟 worker 在 RPOPLPUSH 之后、设置租约之前退出
+        await self.redis_client.rpoplpush("test:tasks:pending", "test:tasks:processing")
+        self.assertEqual(0, await self.queue.requeue_expired(), msg="先补一个租约，不立即回收")
+        await self.redis_client.zadd("test:tasks:leases", {"wb:search:python:1": 0})
+        self.assertEqual(1, await self.queue.requeue_expired())
+
+
+class FakeCrawler:
+
+    def __init__(self):
+        self.handled: List[str] = []
+        self.failures = {"wb:comments:2": 1}
+
+    async def handle_task(self, task: CrawlTask) -> List[CrawlTask]:
+        self.handled.append(task.task_id)
+        if self.failures.get(task.task_id):
+            self.failures[task.task_id] -= 1
+            raise RuntimeError("blocked")
+        if task.task_type == TASK_SEARCH_PAGE and task.payload["page"] < 2:
+            page = task.payload["page"]
+            return [search_task(page + 1)] + [
+                new_task("wb", TASK_NOTE_COMMENTS, f"comments:{note_id}", {"note_id": note_id}) for note_id in (1, 2)
+            ]
+        return []
+
+
+@unittest.skipIf(fake_aioredis is None, "fakeredis is not installed")
+class TestCrawlWorker(IsolatedAsyncioTestCase):
+
+    async def test_workers_drain_queue_with_follow_ups_and_retry(self):
+        redis_client = fake_aioredis.FakeRedis(decode_responses=True)
+        queue = RedisTaskQueue("test:worker", redis_client=redis_client, max_retries=2)
+        await queue.enqueue([search_task(1)])
+        crawler = FakeCrawler()
+        workers = [CrawlWorker(crawler, queue, idle_timeout=0.05, poll_interval=0.01) for _ in range(2)]
+        await asyncio.gather(*[worker.run() for worker in workers])
+
+        self.assertEqual(
+            ["wb:comments:1", "wb:comments:2", "wb:search:python:1", "wb:search:python:2"],
+            sorted(set(crawler.handled)),
+        )
+        self.assertEqual(2, crawler.handled.count("wb:comments:2"), msg="失败的任务会被重试")
+        self.assertEqual(4, sum(worker.processed for worker in workers))
+        self.assertEqual({"pending": 0, "processing": 0, "dead": 0}, await queue.stats())
+        await queue.close()
+
+
+@unittest.skipIf(fake_aioredis is None, "fakeredis is not installed")
+class TestEnqueueSeedTasks(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.frontier = SqliteFrontier("wb:creator", db_path=os.path.join(self.tmp_dir.name, "frontier.db"))
+        self.queue = RedisTaskQueue("test:seed", redis_client=fake_aioredis.FakeRedis(decode_responses=True))
+        self.config_patch = patch.multiple(config, PLATFORM="wb", CRAWLER_TYPE="creator", WEIBO_CREATOR_ID_LIST=["1"])
+        self.config_patch.start()
+
+    async def asyncTearDown(self):
+        self.config_patch.stop()
+        await self.queue.close()
+        await self.frontier.close()
+        self.tmp_dir.cleanup()
+
+    async def test_seeding_resets_progress_of_finished_run(self):
+        await self.frontier.mark_done("creator:1")
+        await self.frontier.mark_done("comments:100")
+        self.assertEqual(1, await enqueue_seed_tasks(self.queue, self.frontier))
+        self.assertFalse(await self.frontier.is_done("creator:1"), msg="上一轮已结束，新一轮的创作者需要重新爬取")
+        self.assertFalse(await self.frontier.is_done("comments:100"))
+
+    async def test_seeding_keeps_progress_of_running_crawl(self):
+        await self.queue.enqueue([search_task(1)])
+        await self.frontier.checkpoint("comments:100", {"max_id": 5})
+        await enqueue_seed_tasks(self.queue, self.frontier)
+        self.assertEqual({"max_id": 5}, await self.frontier.get_cursor("comments:100"), msg="上一轮还在运行，保留断点")
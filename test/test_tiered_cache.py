@@ -0,0 +1,77 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import asyncio
+from unittest import IsolatedAsyncioTestCase
+
+from cache.abs_cache import AsyncCacheAdapter
+from cache.local_cache import ExpiringLocalCache
+from cache.tiered_cache import TieredCache
+
+
+class TestTieredCache(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        # 用另一个本地缓存模拟远端缓存
+        self.remote = ExpiringLocalCache()
+        self.cache = TieredCache(remote=AsyncCacheAdapter(self.remote), local_ttl=60, negative_ttl=5)
+
+    async def test_read_through_from_remote(self):
+        self.remote.set("key", "value", 10)
+        self.assertEqual("value", await self.cache.get("key"))
+        self.remote.delete("key")
+        self.assertEqual("value", await self.cache.get("key"), msg="第二次读取命中进程内缓存")
+
+    async def test_set_writes_both_tiers(self):
+        await self.cache.set("key", 1, 10)
+        self.assertEqual(1, self.remote.get("key"))
+        await self.cache.delete("key")
+        self.assertIsNone(await self.cache.get("key"))
+
+    async def test_get_or_load_single_flight(self):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"fid_container_id": "1"}
+
+        results = await asyncio.gather(*[self.cache.get_or_load("container", loader, 10) for _ in range(5)])
+        self.assertEqual([{"fid_container_id": "1"}] * 5, results)
+        self.assertEqual(1, len(calls))
+
+    async def test_negative_cache(self):
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            return None
+
+        self.assertIsNone(await self.cache.get_or_load("creator", loader, 10))
+        self.assertIsNone(await self.cache.get_or_load("creator", loader, 10))
+        self.assertEqual(1, len(calls), msg="空结果也会被缓存")
+        self.assertIsNone(await self.cache.get("creator"))
+
+    async def test_loader_error_not_cached(self):
+        async def loader():
+            raise ValueError("boom")
+
+        with self.assertRaises(ValueError):
+            await self.cache.get_or_load("key", loader, 10)
+
+        async def ok_loader():
+            return 1
+
+        self.assertEqual(1, await self.cache.get_or_load("key", ok_loader, 10))
+
+    async def test_mget_fills_local(self):
+        self.remote.set("a", 1, 10)
+        await self.cache.set("b", 2, 10)
+        self.assertEqual([1, 2, None], await self.cache.mget(["a", "b", "c"]))
@@ -0,0 +1,90 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+import json
+import os
+import tempfile
+from unittest import IsolatedAsyncioTestCase
+from unittest.mock import patch
+
+import config
+from metrics import tracing
+from metrics.tracing import close_tracing, log_slow_request, trace_span, traced
+from model.m_zhihu import ZhihuContent
+
+
+class TestTracing(IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.config_patch = patch.multiple(
+            config, ENABLE_TRACING=True, TRACE_EXPORTER="jsonl", TRACE_FILE_DIR=self.tmp_dir.name,
+            SLOW_REQUEST_THRESHOLD_SEC=1)
+        self.config_patch.start()
+
+    async def asyncTearDown(self):
+        close_tracing()
+        self.config_patch.stop()
+        self.tmp_dir.cleanup()
+
+    def _read_spans(self):
+        close_tracing()
+        lines = []
+        for file_name in os.listdir(self.tmp_dir.name):
+            with open(os.path.join(self.tmp_dir.name, file_name), encoding="utf-8") as f:
+                lines.extend(json.loads(line) for line in f)
+        return lines
+
+    async def test_nested_spans_and_decorator(self):
+
+        @traced("comment_page", "content.content_id", "offset")
+        async def get_comment_page(content: ZhihuContent, offset: str = ""):
+            return offset
+
+        with trace_span("note_comments", note_id="n1"):
+            await get_comment_page(ZhihuContent(content_id="123"), offset="10")
+            with self.assertRaises(ValueError):
+                with trace_span("store_write", store="jsonl"):
+                    raise ValueError("disk full")
+
+        spans = {span["name"]: span for span in self._read_spans()}
+        parent = spans["note_comments"]
+        self.assertEqual({"content_id": "123", "offset": "10"}, spans["comment_page"]["attributes"])
+        self.assertEqual(parent["span_id"], spans["comment_page"]["parent_span_id"])
+        self.assertEqual(parent["trace_id"], spans["store_write"]["trace_id"])
+        self.assertEqual("ValueError: disk full", spans["store_write"]["error"])
+        self.assertEqual("", parent["parent_span_id"])
+
+    async def test_otlp_exporter(self):
+        config.TRACE_EXPORTER = "otlp"
+        with trace_span("search_page", keyword="python", page=2):
+            pass
+        request = self._read_spans()[0]
+        span = request["resourceSpans"][0]["scopeSpans"][0]["spans"][0]
+        self.assertEqual("search_page", span["name"])
+        self.assertEqual(32, len(span["traceId"]))
+        self.assertIn({"key": "page", "value": {"intValue": "2"}}, span["attributes"])
+
+    async def test_disabled_tracing_writes_nothing(self):
+        config.ENABLE_TRACING = False
+        with trace_span("search_page") as span:
+            self.assertIsNone(span)
+        self.assertEqual([], self._read_spans())
+
+    async def test_slow_request_log_carries_span_context(self):
+        with patch.object(tracing.utils.logger, "warning") as warning:
+            with trace_span("creator", creator_id="c1"), trace_span("comment_page", mid_id="m1"):
+                log_slow_request("GET", "https://m.weibo.cn/comments/hotflow?id=m1", "200", 0.5)
+                log_slow_request("GET", "https://m.weibo.cn/comments/hotflow?id=m1", "200", 3)
+        warning.assert_called_once()
+        message = warning.call_args[0][0]
+        self.assertIn("'creator_id': 'c1'", message)
+        self.assertIn("'mid_id': 'm1'", message)
+        self.assertIn("hotflow?id=m1", message)
@@ -0,0 +1,168 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : AIMD 自适应并发控制：响应正常时线性增加并发，遇到封禁/风控信号时成倍减少并发
+
+import asyncio
+import time
+from typing import Dict, Optional, Union
+
+import config
+from metrics.crawler_metrics import CONCURRENCY_IN_FLIGHT, CONCURRENCY_LIMIT, SEMAPHORE_WAIT_SECONDS
+from tools import utils
+
+
+class AdaptiveConcurrencyController:
+    """
+    可以替代 asyncio.Semaphore 使用（async with controller: ...），区别是并发上限会根据请求结果动态调整：
+    - 连续 limit 次请求成功后，上限 +1（加性增）
+    - 出现封禁/风控信号时，上限乘以 decrease_factor（乘性减），cooldown 秒内的多次失败只减一次
+    """
+
+    def __init__(
+        self,
+        initial_limit: int,
+        min_limit: int = 1,
+        max_limit: int = 16,
+        decrease_factor: float = 0.5,
+        cooldown: float = 5.0,
+    ):
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.decrease_factor = decrease_factor
+        self.cooldown = cooldown
+        self._limit = min(self.max_limit, max(self.min_limit, initial_limit))
+        self._in_flight = 0
+        self._successes = 0
+        self._failures = 0
+        self._last_decrease = float("-inf")
+        self._cond: Optional[asyncio.Condition] = None
+
+    @property
+    def limit(self) -> int:
+        """当前并发上限"""
+        return self._limit
+
+    @property
+    def in_flight(self) -> int:
+        """当前正在执行的任务数"""
+        return self._in_flight
+
+    def snapshot(self) -> Dict:
+        """
+        当前状态，用于监控
+        :return:
+        """
+        return {
+            "limit": self._limit,
+            "in_flight": self._in_flight,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "failures": self._failures,
+        }
+
+    def _get_cond(self) -> asyncio.Condition:
+        if self._cond is None:
+            self._cond = asyncio.Condition()
+        return self._cond
+
+    async def acquire(self):
+        cond = self._get_cond()
+        start = time.monotonic()
+        async with cond:
+            await cond.wait_for(lambda: self._in_flight < self._limit)
+            self._in_flight += 1
+        SEMAPHORE_WAIT_SECONDS.observe(time.monotonic() - start)
+
+    async def release(self):
+        cond = self._get_cond()
+        async with cond:
+            self._in_flight -= 1
+            cond.notify_all()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.release()
+
+    async def record_success(self):
+        """请求成功"""
+        self._successes += 1
+        if self._successes < self._limit or self._limit >= self.max_limit:
+            return
+        self._successes = 0
+        self._limit += 1
+        utils.logger.info(f"[AdaptiveConcurrencyController] concurrency limit increased to {self._limit}")
+        cond = self._get_cond()
+        async with cond:
+            cond.notify_all()
+
+    async def record_failure(self, reason: str = ""):
+        """
+        出现封禁/风控信号
+        :param reason: 失败原因，用于日志
+        :return:
+        """
+        self._failures += 1
+        self._successes = 0
+        now = time.monotonic()
+        if now - self._last_decrease < self.cooldown:
+            return
+        self._last_decrease = now
+        new_limit = max(self.min_limit, int(self._limit * self.decrease_factor))
+        if new_limit != self._limit:
+            utils.logger.warning(
+                f"[AdaptiveConcurrencyController] concurrency limit decreased {self._limit} -> {new_limit}, reason: {reason}")
+            self._limit = new_limit
+
+
+class TimedSemaphore(asyncio.Semaphore):
+    """记录等待时间的信号量"""
+
+    async def acquire(self):
+        start = time.monotonic()
+        result = await super().acquire()
+        SEMAPHORE_WAIT_SECONDS.observe(time.monotonic() - start)
+        return result
+
+
+_controller: Optional[AdaptiveConcurrencyController] = None
+
+
+def get_concurrency_controller() -> Optional[AdaptiveConcurrencyController]:
+    """
+    获取全局共享的自适应并发控制器，未开启时返回 None
+    :return:
+    """
+    global _controller
+    if not config.ENABLE_ADAPTIVE_CONCURRENCY:
+        return None
+    if _controller is None:
+        _controller = AdaptiveConcurrencyController(
+            initial_limit=config.MAX_CONCURRENCY_NUM,
+            min_limit=config.ADAPTIVE_CONCURRENCY_MIN,
+            max_limit=config.ADAPTIVE_CONCURRENCY_MAX,
+            decrease_factor=config.ADAPTIVE_CONCURRENCY_DECREASE_FACTOR,
+            cooldown=config.ADAPTIVE_CONCURRENCY_COOLDOWN,
+        )
+        CONCURRENCY_LIMIT.set_function(lambda controller=_controller: controller.limit)
+        CONCURRENCY_IN_FLIGHT.set_function(lambda controller=_controller: controller.in_flight)
+    return _controller
+
+
+def create_concurrency_limiter() -> Union[AdaptiveConcurrencyController, asyncio.Semaphore]:
+    """
+    爬虫并发控制：开启自适应并发时返回全局控制器，否则返回固定大小的信号量
+    :return:
+    """
+    return get_concurrency_controller() or TimedSemaphore(config.MAX_CONCURRENCY_NUM)
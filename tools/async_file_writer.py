@@ -1,14 +1,66 @@
 import asyncio
 import csv
+import glob
 import json
 import os
 import pathlib
-from typing import Dict, List
+from typing import AsyncIterator, Dict, List
 import aiofiles
 import config
 from tools.utils import utils
 from tools.words import AsyncWordCloudGenerator
 
+
+async def _iter_jsonl_items(file_path: str) -> AsyncIterator[Dict]:
+    """
+    逐行读取 JSON Lines 文件，跳过空行和损坏的行（例如进程被强杀时写了一半的最后一行）
+    """
+    if not os.path.exists(file_path):
+        return
+    async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+        async for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                utils.logger.warning(f"[AsyncFileWriter] skip broken json line in {file_path}: {line[:64]}")
+
+
+async def _load_json_array(file_path: str) -> List:
+    """读取 JSON 数组文件，文件不存在或内容损坏时返回空列表"""
+    if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
+        return []
+    async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+        try:
+            content = await f.read()
+            data = json.loads(content) if content else []
+        except json.JSONDecodeError:
+            return []
+    return data if isinstance(data, list) else [data]
+
+
+async def finalize_json_files(data_root: str = "data"):
+    """
+    json 模式运行时以 JSON Lines 方式追加写入暂存文件 (xxx.jsonl)，
+    收尾时把暂存文件合并进同名的 JSON 数组文件 (xxx.json) 并删除暂存文件。
+    同时会处理上次运行被强杀后残留的暂存文件，可重复调用。
+    """
+    for staging_path in glob.glob(os.path.join(data_root, "*", "json", "*.jsonl")):
+        json_path = staging_path[:-1]
+        data = await _load_json_array(json_path)
+        async for item in _iter_jsonl_items(staging_path):
+            data.append(item)
+
+        tmp_path = f"{json_path}.tmp"
+        async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+            await f.write(json.dumps(data, ensure_ascii=False, indent=4))
+        os.replace(tmp_path, json_path)
+        os.remove(staging_path)
+        utils.logger.info(f"[finalize_json_files] merged {staging_path} into {json_path}, total items: {len(data)}")
+
+
 class AsyncFileWriter:
     def __init__(self, platform: str, crawler_type: str):
         self.lock = asyncio.Lock()
@@ -32,25 +84,43 @@ class AsyncFileWriter:
                     await writer.writeheader()
                 await writer.writerow(item)
 
-    async def write_single_item_to_json(self, item: Dict, item_type: str):
-        file_path = self._get_file_path('json', item_type)
+    def _get_json_staging_path(self, item_type: str) -> str:
+        """json 模式的 JSON Lines 暂存文件，与最终的 JSON 数组文件同目录同名"""
+        return f"{self._get_file_path('json', item_type)}l"
+
+    async def _append_json_line(self, file_path: str, item: Dict):
+        line = json.dumps(item, ensure_ascii=False) + "\n"
         async with self.lock:
-            existing_data = []
-            if os.path.exists(file_path) and os.path.getsize(file_path) > 0:
-                async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                    try:
-                        content = await f.read()
-                        if content:
-                            existing_data = json.loads(content)
-                        if not isinstance(existing_data, list):
-                            existing_data = [existing_data]
-                    except json.JSONDecodeError:
-                        existing_data = []
-            
-            existing_data.append(item)
-
-            async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-                await f.write(json.dumps(existing_data, ensure_ascii=False, indent=4))
+            async with aiofiles.open(file_path, 'a', encoding='utf-8') as f:
+                await f.write(line)
+
+    async def write_single_item_to_jsonl(self, item: Dict, item_type: str):
+        """
+        以 JSON Lines 格式追加写入一条数据，每次写入的开销与文件大小无关
+        """
+        await self._append_json_line(self._get_file_path('jsonl', item_type), item)
+
+    async def write_single_item_to_json(self, item: Dict, item_type: str):
+        """
+        json 模式写入一条数据：运行时追加到 JSON Lines 暂存文件，
+        由 finalize_json_files 在程序退出时合并为 JSON 数组
+        """
+        await self._append_json_line(self._get_json_staging_path(item_type), item)
+
+    async def _iter_saved_items(self, item_type: str) -> AsyncIterator[Dict]:
+        """
+        按当前的存储模式流式读取当天已保存的数据
+        """
+        if config.SAVE_DATA_OPTION == "jsonl":
+            async for item in _iter_jsonl_items(self._get_file_path('jsonl', item_type)):
+                yield item
+            return
+
+        # json 模式：已合并的 JSON 数组 + 尚未合并的暂存文件
+        for item in await _load_json_array(self._get_file_path('json', item_type)):
+            yield item
+        async for item in _iter_jsonl_items(self._get_json_staging_path(item_type)):
+            yield item
 
     async def generate_wordcloud_from_comments(self):
         """
@@ -64,26 +134,11 @@ class AsyncFileWriter:
             return
 
         try:
-            # Read comments from JSON file
-            comments_file_path = self._get_file_path('json', 'comments')
-            if not os.path.exists(comments_file_path) or os.path.getsize(comments_file_path) == 0:
-                utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] No comments file found at {comments_file_path}")
-                return
-
-            async with aiofiles.open(comments_file_path, 'r', encoding='utf-8') as f:
-                content = await f.read()
-                if not content:
-                    utils.logger.info(f"[AsyncFileWriter.generate_wordcloud_from_comments] Comments file is empty")
-                    return
-
-                comments_data = json.loads(content)
-                if not isinstance(comments_data, list):
-                    comments_data = [comments_data]
-
+            # Stream comments from the saved JSON / JSON Lines file
             # Filter comments data to only include 'content' field
             # Handle different comment data structures across platforms
             filtered_data = []
-            for comment in comments_data:
+            async for comment in self._iter_saved_items('comments'):
                 if isinstance(comment, dict):
                     # Try different possible content field names
                     content_text = comment.get('content') or comment.get('comment_text') or comment.get('text') or ''
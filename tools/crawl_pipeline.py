@@ -0,0 +1,148 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 基于 asyncio.Queue 的多阶段爬取流水线，例如 搜索翻页 -> 评论 -> 媒体，
+#            每个阶段有独立的 worker 数，第 N+1 页的搜索可以和第 N 页的评论抓取同时进行
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Iterable, List
+
+from frontier.abs_frontier import AbstractFrontier
+from tools import utils
+
+# 阶段处理函数：handler(item, pipeline)，可以通过 pipeline.emit 把新的任务投递给当前或后续阶段
+StageHandler = Callable[[Any, "CrawlPipeline"], Awaitable[None]]
+
+
+class Stage:
+
+    def __init__(self, name: str, handler: StageHandler, workers: int = 1):
+        """
+        :param name: 阶段名称
+        :param handler: 阶段处理函数
+        :param workers: 该阶段并发执行的 worker 数
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+
+
+class CrawlPipeline:
+    """
+    每个阶段一个有界队列 + 若干 worker。任务只能投递给当前阶段或排在后面的阶段，
+    因此按阶段顺序依次等待队列清空即可确认所有任务都已处理完。
+    """
+
+    def __init__(self, stages: List[Stage], max_queue_size: int = 100):
+        if not stages:
+            raise ValueError("[CrawlPipeline] at least one stage is required")
+        self.stages = stages
+        self.max_queue_size = max_queue_size
+        self._stage_index: Dict[str, int] = {stage.name: index for index, stage in enumerate(stages)}
+        self._queues: Dict[str, asyncio.Queue] = {}
+
+    async def emit(self, stage_name: str, item: Any):
+        """
+        投递任务，下游队列满时等待（背压）
+        :param stage_name: 目标阶段
+        :param item: 任务
+        :return:
+        """
+        if stage_name not in self._stage_index:
+            raise ValueError(f"[CrawlPipeline.emit] Unknown stage: {stage_name}")
+        await self._queues[stage_name].put(item)
+
+    async def _worker(self, stage: Stage):
+        queue = self._queues[stage.name]
+        while True:
+            item = await queue.get()
+            try:
+                await stage.handler(item, self)
+            except Exception as e:
+                utils.logger.error(f"[CrawlPipeline._worker] stage {stage.name} handle item error: {e}")
+            finally:
+                queue.task_done()
+
+    async def run(self, stage_name: str, items: Iterable[Any]):
+        """
+        投递初始任务并运行到所有阶段的任务都处理完成
+        :param stage_name: 初始任务所在的阶段
+        :param items: 初始任务
+        :return:
+        """
+        # 上游阶段的 worker 可能阻塞在下游队列上，队列上限只约束下游阶段，第一个阶段不设上限以便一次性投递初始任务
+        self._queues = {
+            stage.name: asyncio.Queue(maxsize=0 if index == 0 else self.max_queue_size)
+            for index, stage in enumerate(self.stages)
+        }
+        workers = [
+            asyncio.create_task(self._worker(stage), name=f"{stage.name}-{i}")
+            for stage in self.stages
+            for i in range(stage.workers)
+        ]
+        try:
+            for item in items:
+                await self.emit(stage_name, item)
+            for stage in self.stages:
+                await self._queues[stage.name].join()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+
+class Countdown:
+    """计数归零时执行一次回调，用于等待一个页面派生出的所有下游任务完成"""
+
+    def __init__(self, count: int, callback: Callable[[], Awaitable[None]]):
+        self._total = count
+        self._count = count
+        self._callback = callback
+
+    async def start(self):
+        """下游任务全部投递后调用，没有下游任务时直接完成"""
+        if self._total <= 0:
+            await self._callback()
+
+    async def done(self):
+        self._count -= 1
+        if self._count == 0:
+            await self._callback()
+
+
+class OrderedPageCheckpoint:
+    """
+    流水线中页面的完成顺序不固定，只有当前面所有页面都完成时才把断点推进到下一页，
+    保证断点续爬时不会跳过未完成的页面
+    """
+
+    def __init__(self, frontier: AbstractFrontier, unit_key: str, first_page: int):
+        self.frontier = frontier
+        self.unit_key = unit_key
+        self.next_page = first_page
+        self._completed_pages = set()
+        self.failed = False
+
+    async def page_done(self, page: int):
+        self._completed_pages.add(page)
+        advanced = False
+        while self.next_page in self._completed_pages:
+            self._completed_pages.discard(self.next_page)
+            self.next_page += 1
+            advanced = True
+        if advanced:
+            await self.frontier.checkpoint(self.unit_key, {"page": self.next_page})
+
+    async def finish(self):
+        """关键词的所有页面都处理完成且没有失败时标记为完成"""
+        if not self.failed and not self._completed_pages:
+            await self.frontier.mark_done(self.unit_key)
+
@@ -0,0 +1,289 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 爬取会话：把 (账号 Cookie, 代理IP, User-Agent) 绑定在一起，
+#            API client 每次请求从会话池中选一个会话，多个账号和代理并行分摊请求
+
+import itertools
+import json
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, AsyncIterator, Callable, Dict, List, Optional
+
+import config
+from tools import utils
+from var import crawl_session_var
+
+if TYPE_CHECKING:
+    from proxy.proxy_ip_pool import ProxyIpPool
+    from proxy.types import IpInfoModel
+
+
+class CrawlSession:
+
+    def __init__(
+        self,
+        account: str,
+        cookie_str: str,
+        user_agent: str,
+        proxy_info: Optional["IpInfoModel"] = None,
+        primary: bool = False,
+    ):
+        """
+        :param account: 账号标识，用于按账号限流和日志
+        :param cookie_str: 该账号的登录 Cookie
+        :param user_agent: 该会话固定使用的 User-Agent
+        :param proxy_info: 该会话使用的代理IP，为空表示直连；被代理池淘汰后会换成新的代理（主会话除外）
+        :param primary: 是否是浏览器登录得到的会话，浏览器中刷新 Cookie 后需要同步到该会话
+        """
+        self.account = account
+        self.user_agent = user_agent
+        self.primary = primary
+        self.cookie_str = ""
+        self.cookie_dict: Dict[str, str] = {}
+        self.update_cookies(cookie_str)
+        self.proxy_info: Optional["IpInfoModel"] = None
+        self.httpx_proxy: Optional[str] = None
+        self.playwright_proxy: Optional[Dict] = None
+        self.set_proxy(proxy_info)
+        self.in_flight = 0
+        self.parked = False
+
+    def __repr__(self) -> str:
+        return f"CrawlSession(account={self.account!r}, proxy={self.proxy_key!r})"
+
+    @property
+    def proxy_key(self) -> str:
+        return f"{self.proxy_info.ip}:{self.proxy_info.port}" if self.proxy_info else ""
+
+    def set_proxy(self, proxy_info: Optional["IpInfoModel"]):
+        self.proxy_info = proxy_info
+        if proxy_info is None:
+            self.playwright_proxy, self.httpx_proxy = None, None
+        else:
+            self.playwright_proxy, self.httpx_proxy = utils.format_proxy_info(proxy_info)
+
+    def update_cookies(self, cookie_str: str, cookie_dict: Optional[Dict[str, str]] = None):
+        self.cookie_str = cookie_str
+        self.cookie_dict = cookie_dict if cookie_dict is not None else utils.convert_str_cookie_to_dict(cookie_str)
+
+    def apply_headers(self, headers: Dict[str, str]) -> Dict[str, str]:
+        """
+        返回替换了 Cookie 和 User-Agent 的请求头副本，保留原请求头中键名的大小写
+        :param headers: 原请求头
+        :return:
+        """
+        headers = dict(headers)
+        overrides = {"cookie": self.cookie_str, "user-agent": self.user_agent}
+        for key in list(headers.keys()):
+            if key.lower() in overrides:
+                headers[key] = overrides.pop(key.lower())
+        if "cookie" in overrides:
+            headers["Cookie"] = overrides["cookie"]
+        if "user-agent" in overrides:
+            headers["User-Agent"] = overrides["user-agent"]
+        return headers
+
+
+class CrawlSessionPool:
+    """
+    会话池：每次请求选择正在处理请求最少的会话；
+    在 use() 范围内发起的请求（包括嵌套调用）都使用同一个会话，例如知乎签名和请求必须使用同一个 Cookie
+    """
+
+    def __init__(self, sessions: List[CrawlSession], ip_pool: Optional["ProxyIpPool"] = None):
+        if not sessions:
+            raise ValueError("[CrawlSessionPool] at least one session is required")
+        self.sessions = sessions
+        self.ip_pool = ip_pool
+        self._round_robin = itertools.count()
+
+    @property
+    def primary(self) -> Optional[CrawlSession]:
+        return next((session for session in self.sessions if session.primary), None)
+
+    @property
+    def active_sessions(self) -> List[CrawlSession]:
+        return [session for session in self.sessions if not session.parked]
+
+    def acquire(self) -> CrawlSession:
+        """
+        选择正在处理请求最少的会话，数量相同时轮流选择
+        :return:
+        """
+        sessions = self.active_sessions
+        if not sessions:
+            raise RuntimeError("[CrawlSessionPool.acquire] no active session, all sessions are parked")
+        offset = next(self._round_robin)
+        ordered = sessions[offset % len(sessions):] + sessions[:offset % len(sessions)]
+        session = min(ordered, key=lambda s: s.in_flight)
+        session.in_flight += 1
+        return session
+
+    def release(self, session: CrawlSession):
+        session.in_flight = max(0, session.in_flight - 1)
+
+    @asynccontextmanager
+    async def use(self) -> AsyncIterator[CrawlSession]:
+        """
+        获取当前上下文绑定的会话，没有绑定时从池中选择一个并绑定到当前上下文
+        :return:
+        """
+        session = crawl_session_var.get()
+        if session is not None and session in self.sessions:
+            yield session
+            return
+        session = self.acquire()
+        token = crawl_session_var.set(session)
+        try:
+            yield session
+        finally:
+            crawl_session_var.reset(token)
+            self.release(session)
+
+    @asynccontextmanager
+    async def bind(self, session: CrawlSession) -> AsyncIterator[CrawlSession]:
+        """
+        把指定会话绑定到当前上下文，范围内的所有请求都使用该会话，例如每个账号一个 worker
+        :param session:
+        :return:
+        """
+        session.in_flight += 1
+        token = crawl_session_var.set(session)
+        try:
+            yield session
+        finally:
+            crawl_session_var.reset(token)
+            self.release(session)
+
+    async def report(self, session: CrawlSession, success: bool, latency: Optional[float] = None):
+        """
+        上报会话的请求结果，代理的健康分由代理池维护；
+        会话的代理被代理池淘汰或即将过期时，为会话换一个其他会话没有使用的代理
+        :param session:
+        :param success: 请求是否成功（网络层成功且未被封禁）
+        :param latency: 请求耗时（秒）
+        :return:
+        """
+        if self.ip_pool is None or session.proxy_info is None:
+            return
+        self.ip_pool.report_proxy_result(session.proxy_info, success, latency)
+        if not self.ip_pool.is_proxy_usable(session.proxy_info):
+            await self.rotate_proxy(session)
+
+    async def rotate_proxy(self, session: CrawlSession):
+        """
+        为会话换一个代理，并把旧代理归还给代理池。
+        主会话不换：浏览器启动时已经固定了代理，主会话的 Cookie 由浏览器在该代理IP下登录和刷新，
+        API 请求换成其他IP会和浏览器的登录环境不一致，增加登录态失效的风险
+        :param session:
+        :return:
+        """
+        if self.ip_pool is None or session.primary:
+            return
+        old_proxy, old_proxy_key = session.proxy_info, session.proxy_key
+        exclude = {s.proxy_key for s in self.sessions if s is not session and s.proxy_key}
+        try:
+            new_proxy = await self.ip_pool.get_proxy(exclude=exclude)
+        except Exception as e:
+            utils.logger.error(f"[CrawlSessionPool.rotate_proxy] get proxy for session {session} error: {e}")
+            return
+        if session.proxy_info is not old_proxy:
+            # 并发的请求已经为该会话换过代理
+            self.ip_pool.release_proxy(new_proxy)
+            return
+        if old_proxy is not None:
+            self.ip_pool.release_proxy(old_proxy)
+        session.set_proxy(new_proxy)
+        utils.logger.info(f"[CrawlSessionPool.rotate_proxy] session {session.account} proxy {old_proxy_key} -> {session.proxy_key}")
+
+    def park(self, session: CrawlSession, reason: str):
+        """
+        暂停使用某个会话（例如登录态失效），之后的请求不会再选择该会话
+        :param session:
+        :param reason:
+        :return:
+        """
+        if session.parked:
+            return
+        session.parked = True
+        utils.logger.warning(f"[CrawlSessionPool.park] park session {session}, reason: {reason}")
+
+    def unpark(self, session: CrawlSession):
+        session.parked = False
+
+
+def load_cookie_jars(directory: str) -> List[str]:
+    """
+    从目录中加载保存的账号 Cookie，.json 文件为浏览器导出的 cookies 列表，.txt 文件为 Cookie 字符串
+    :param directory: 目录
+    :return: Cookie 字符串列表
+    """
+    if not directory or not os.path.isdir(directory):
+        return []
+    cookie_strs = []
+    for file_name in sorted(os.listdir(directory)):
+        file_path = os.path.join(directory, file_name)
+        try:
+            with open(file_path, encoding="utf-8") as f:
+                if file_name.endswith(".json"):
+                    cookie_str, _ = utils.convert_cookies(json.load(f))
+                elif file_name.endswith(".txt"):
+                    cookie_str = f.read().strip()
+                else:
+                    continue
+        except (OSError, ValueError) as e:
+            utils.logger.error(f"[load_cookie_jars] load cookie file {file_path} error: {e}")
+            continue
+        if cookie_str:
+            cookie_strs.append(cookie_str)
+    utils.logger.info(f"[load_cookie_jars] {len(cookie_strs)} cookie jars loaded from {directory}")
+    return cookie_strs
+
+
+def get_extra_session_cookies(platform: str) -> List[str]:
+    """
+    浏览器登录账号之外的其他账号 Cookie：CRAWL_SESSION_COOKIES + CRAWL_SESSION_COOKIE_DIR 目录中保存的 Cookie
+    :param platform: 平台名称
+    :return:
+    """
+    cookie_dir = os.path.join(os.getcwd(), "browser_data", config.CRAWL_SESSION_COOKIE_DIR % platform)
+    return list(config.CRAWL_SESSION_COOKIES) + load_cookie_jars(cookie_dir)
+
+
+async def create_session_pool(
+    primary_cookie_str: str,
+    user_agent_factory: Callable[[], str],
+    primary_user_agent: str,
+    extra_cookies: List[str],
+    ip_pool: Optional["ProxyIpPool"] = None,
+    primary_proxy: Optional["IpInfoModel"] = None,
+) -> CrawlSessionPool:
+    """
+    创建会话池：浏览器登录得到的主会话 + 配置中的其他账号，每个账号绑定一个不同的代理IP和 User-Agent
+    :param primary_cookie_str: 浏览器登录得到的 Cookie
+    :param user_agent_factory: 为其他账号生成 User-Agent
+    :param primary_user_agent: 主会话的 User-Agent，需要和浏览器一致
+    :param extra_cookies: 其他账号的 Cookie
+    :param ip_pool: 代理池，为空表示直连
+    :param primary_proxy: 主会话（浏览器）使用的代理IP
+    :return:
+    """
+    sessions = [CrawlSession("account_0", primary_cookie_str, primary_user_agent, primary_proxy, primary=True)]
+    used_proxies = {sessions[0].proxy_key} if primary_proxy else set()
+    for index, cookie_str in enumerate(extra_cookies, start=1):
+        proxy_info = None
+        if ip_pool is not None:
+            proxy_info = await ip_pool.get_proxy(exclude=used_proxies)
+            used_proxies.add(f"{proxy_info.ip}:{proxy_info.port}")
+        sessions.append(CrawlSession(f"account_{index}", cookie_str, user_agent_factory(), proxy_info))
+    utils.logger.info(f"[create_session_pool] {len(sessions)} sessions created: {sessions}")
+    return CrawlSessionPool(sessions, ip_pool=ip_pool)
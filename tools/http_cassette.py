@@ -0,0 +1,185 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 请求录制回放：录制模式下把请求指纹和压缩后的响应写入本地 sqlite 文件，
+#            回放模式下直接从文件返回响应，不访问网络。以 httpx transport 的形式接入连接池，
+#            各平台 client 的请求、重试、解析逻辑不需要感知当前是否在回放
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+import zlib
+from typing import Dict, Optional, Tuple
+
+import aiosqlite
+import httpx
+
+import config
+from config import db_config
+from tools import utils
+
+CASSETTE_RECORD = "record"
+CASSETTE_REPLAY = "replay"
+
+# 录制的是解码后的响应体，回放时这两个头需要由 httpx 重新计算
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding"}
+
+
+class CassetteMissError(httpx.TransportError):
+    """回放模式下录制文件中没有对应的请求"""
+
+
+def is_cassette_replay() -> bool:
+    return config.HTTP_CASSETTE_MODE == CASSETTE_REPLAY
+
+
+def request_fingerprint(method: str, url: str, content: bytes = b"") -> str:
+    """
+    请求指纹：请求方法 + 按参数名排序后的URL + 请求体。
+    请求头（Cookie、签名、UA）每次运行都会变化，不参与指纹计算
+    :param method: 请求方法
+    :param url: 完整的请求URL
+    :param content: 请求体
+    :return:
+    """
+    parsed = httpx.URL(url)
+    normalized = parsed.copy_with(params=sorted(parsed.params.multi_items()))
+    hasher = hashlib.sha256()
+    hasher.update(method.upper().encode())
+    hasher.update(b"\n")
+    hasher.update(str(normalized).encode())
+    hasher.update(b"\n")
+    hasher.update(content or b"")
+    return hasher.hexdigest()
+
+
+class CassetteStore:
+    """录制文件，一个 sqlite 文件保存一个平台的所有响应，响应体使用 zlib 压缩"""
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._db: Optional[aiosqlite.Connection] = None
+        self._lock = asyncio.Lock()
+
+    async def _get_db(self) -> aiosqlite.Connection:
+        async with self._lock:
+            if self._db is None:
+                os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+                db = await aiosqlite.connect(self.db_path)
+                await db.execute("PRAGMA journal_mode=WAL")
+                await db.execute(
+                    "CREATE TABLE IF NOT EXISTS cassette ("
+                    "fingerprint TEXT PRIMARY KEY, method TEXT NOT NULL, url TEXT NOT NULL, "
+                    "status_code INTEGER NOT NULL, headers TEXT NOT NULL, body BLOB NOT NULL, "
+                    "recorded_ts INTEGER NOT NULL)"
+                )
+                await db.commit()
+                self._db = db
+            return self._db
+
+    async def get(self, fingerprint: str) -> Optional[Tuple[int, Dict[str, str], bytes]]:
+        """
+        读取录制的响应
+        :param fingerprint: 请求指纹
+        :return: (状态码, 响应头, 响应体)，没有录制时返回 None
+        """
+        db = await self._get_db()
+        async with db.execute(
+            "SELECT status_code, headers, body FROM cassette WHERE fingerprint = ?", (fingerprint,)
+        ) as cursor:
+            row = await cursor.fetchone()
+        if row is None:
+            return None
+        return row[0], json.loads(row[1]), zlib.decompress(row[2])
+
+    async def put(self, fingerprint: str, method: str, url: str, status_code: int, headers: Dict[str, str], body: bytes):
+        """
+        写入响应，同一个请求重复录制时保留最新的响应
+        :return:
+        """
+        db = await self._get_db()
+        await db.execute(
+            "INSERT OR REPLACE INTO cassette "
+            "(fingerprint, method, url, status_code, headers, body, recorded_ts) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (fingerprint, method, url, status_code, json.dumps(headers, ensure_ascii=False),
+             zlib.compress(body), int(time.time())),
+        )
+        await db.commit()
+
+    async def close(self):
+        if self._db is not None:
+            await self._db.close()
+            self._db = None
+
+
+class CassetteTransport(httpx.AsyncBaseTransport):
+
+    def __init__(self, store: CassetteStore, mode: str, transport: Optional[httpx.AsyncBaseTransport] = None):
+        """
+        :param store: 录制文件
+        :param mode: record | replay
+        :param transport: 录制模式下真正发出请求的 transport
+        """
+        if mode not in (CASSETTE_RECORD, CASSETTE_REPLAY):
+            raise ValueError(f"unknown cassette mode: {mode}")
+        if mode == CASSETTE_RECORD and transport is None:
+            raise ValueError("record mode requires a transport")
+        self.store = store
+        self.mode = mode
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        fingerprint = request_fingerprint(request.method, str(request.url), await request.aread())
+        if self.mode == CASSETTE_REPLAY:
+            recorded = await self.store.get(fingerprint)
+            if recorded is None:
+                raise CassetteMissError(f"no recorded response for {request.method} {request.url}", request=request)
+            status_code, headers, body = recorded
+            return httpx.Response(status_code, headers=headers, content=body, request=request)
+
+        response = await self._transport.handle_async_request(request)
+        # 这里读取的是解码后的响应体，保证回放时不依赖原始的压缩格式
+        body = await httpx.Response(
+            response.status_code, headers=response.headers, stream=response.stream, request=request
+        ).aread()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in _DROPPED_HEADERS}
+        await self.store.put(fingerprint, request.method, str(request.url), response.status_code, headers, body)
+        return httpx.Response(
+            response.status_code, headers=headers, content=body, request=request, extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        if self._transport is not None:
+            await self._transport.aclose()
+        await self.store.close()
+
+
+def create_cassette_transport(
+    proxy: Optional[str],
+    limits: httpx.Limits,
+    http2: bool = False,
+) -> CassetteTransport:
+    """
+    按配置创建录制/回放 transport，录制文件按平台区分
+    :param proxy: httpx 代理URL，只在录制模式下使用
+    :param limits: 录制模式下的连接池限制
+    :param http2: 是否启用 HTTP/2
+    :return:
+    """
+    mode = config.HTTP_CASSETTE_MODE
+    db_path = os.path.join(db_config.HTTP_CASSETTE_DIR, f"{config.PLATFORM}.db")
+    transport = None
+    if mode == CASSETTE_RECORD:
+        transport = httpx.AsyncHTTPTransport(proxy=proxy, limits=limits, http2=http2)
+    utils.logger.info(f"[create_cassette_transport] http cassette mode: {mode}, file: {db_path}")
+    return CassetteTransport(CassetteStore(db_path), mode, transport)
@@ -0,0 +1,119 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 长连接复用的 httpx 连接池，供各平台 API client 共享
+
+import importlib.util
+import time
+from http.cookiejar import CookieJar, DefaultCookiePolicy
+from typing import Dict, Optional
+
+import httpx
+
+import config
+from metrics.crawler_metrics import record_error, record_request
+from metrics.tracing import log_slow_request
+from tools import utils
+
+
+def _http2_available() -> bool:
+    """HTTP/2 依赖 h2 包，未安装时自动回退到 HTTP/1.1"""
+    return importlib.util.find_spec("h2") is not None
+
+
+class HttpClientPool:
+    """
+    按代理地址缓存 httpx.AsyncClient，保证同一个爬虫实例内的请求复用 TCP/TLS 连接。
+    每个代理对应一个独立的 AsyncClient（httpx 的代理是在 client 级别设置的）。
+    """
+
+    def __init__(self, timeout: Optional[float] = None):
+        self.timeout = timeout
+        self._clients: Dict[Optional[str], httpx.AsyncClient] = {}
+        self._http2 = config.ENABLE_HTTP2 and _http2_available()
+        if config.ENABLE_HTTP2 and not self._http2:
+            utils.logger.warning("[HttpClientPool] ENABLE_HTTP2 is True but h2 is not installed, fallback to HTTP/1.1")
+
+    def get_client(self, proxy: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        获取代理对应的长连接 client，不存在时创建
+        :param proxy: httpx 代理URL，None 表示直连
+        :return:
+        """
+        client = self._clients.get(proxy)
+        if client is None or client.is_closed:
+            client = self._new_client(proxy)
+            self._clients[proxy] = client
+        return client
+
+    def _new_client(self, proxy: Optional[str]) -> httpx.AsyncClient:
+        limits = httpx.Limits(
+            max_connections=config.HTTPX_MAX_CONNECTIONS,
+            max_keepalive_connections=config.HTTPX_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=config.HTTPX_KEEPALIVE_EXPIRY,
+        )
+        # 请求的 Cookie 统一由调用方通过 headers 传入，这里拒绝持久化服务端下发的 Set-Cookie，
+        # 保持和之前每次新建 client 时一致的行为
+        cookie_jar = CookieJar(policy=DefaultCookiePolicy(allowed_domains=[]))
+        if config.HTTP_CASSETTE_MODE:
+            # 录制/回放模式下由 cassette transport 负责发出请求或返回录制的响应，代理在 transport 上设置
+            from tools.http_cassette import create_cassette_transport
+
+            return httpx.AsyncClient(
+                transport=create_cassette_transport(proxy, limits, self._http2),
+                timeout=self.timeout,
+                cookies=cookie_jar,
+            )
+        return httpx.AsyncClient(
+            proxy=proxy,
+            limits=limits,
+            http2=self._http2,
+            timeout=self.timeout,
+            cookies=cookie_jar,
+        )
+
+    async def request(self, method: str, url: str, proxy: Optional[str] = None, route: Optional[str] = None,
+                      **kwargs) -> httpx.Response:
+        """
+        使用连接池发起请求
+        :param method: 请求方法
+        :param url: 请求地址
+        :param proxy: httpx 代理URL
+        :param route: 路由模板，用作指标的接口名，见 metrics.crawler_metrics.endpoint_label
+        :param kwargs: 透传给 httpx 的参数
+        :return:
+        """
+        start = time.perf_counter()
+        try:
+            response = await self.get_client(proxy).request(method, url, **kwargs)
+        except httpx.HTTPError as e:
+            latency = time.perf_counter() - start
+            record_request(url, e.__class__.__name__, latency, route)
+            record_error(e.__class__.__name__)
+            log_slow_request(method, url, e.__class__.__name__, latency, kwargs.get("params"))
+            raise
+        latency = time.perf_counter() - start
+        record_request(url, str(response.status_code), latency, route)
+        log_slow_request(method, url, str(response.status_code), latency, kwargs.get("params"))
+        if response.status_code >= 400:
+            record_error(f"http_{response.status_code}")
+        return response
+
+    async def aclose(self) -> None:
+        """
+        关闭所有 client 并释放连接
+        :return:
+        """
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for client in clients:
+            if not client.is_closed:
+                await client.aclose()
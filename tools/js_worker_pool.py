@@ -0,0 +1,157 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 常驻 Node 子进程池，通过按行的 JSON 协议调用 JS 函数（见 libs/js_worker.js），
+#            替代 execjs 每次调用都启动一个新 Node 进程的方式
+
+import asyncio
+import itertools
+import json
+import os
+import shutil
+from typing import Any, Dict, List, Optional
+
+from tools import utils
+
+JS_WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "libs", "js_worker.js")
+
+
+class JsWorkerError(Exception):
+    """JS 子进程不可用或调用出错"""
+    pass
+
+
+def node_available() -> bool:
+    return shutil.which("node") is not None
+
+
+class JsWorker:
+    """
+    单个常驻 Node 子进程，请求按 id 匹配响应，同一个进程内可以有多个请求在排队
+    """
+
+    def __init__(self, script_path: str):
+        self.script_path = script_path
+        self._proc: Optional[asyncio.subprocess.Process] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._ids = itertools.count(1)
+        self._start_lock = asyncio.Lock()
+
+    @property
+    def alive(self) -> bool:
+        return self._proc is not None and self._proc.returncode is None
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def start(self):
+        async with self._start_lock:
+            if self.alive:
+                return
+            node_path = shutil.which("node")
+            if not node_path:
+                raise JsWorkerError("node runtime not found")
+            self._proc = await asyncio.create_subprocess_exec(
+                node_path, JS_WORKER_SCRIPT, self.script_path,
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+            )
+            self._reader_task = asyncio.create_task(self._read_loop(self._proc))
+            utils.logger.info(f"[JsWorker.start] node worker started, pid: {self._proc.pid}, script: {self.script_path}")
+
+    async def _read_loop(self, proc: asyncio.subprocess.Process):
+        try:
+            while True:
+                line = await proc.stdout.readline()
+                if not line:
+                    break
+                try:
+                    response = json.loads(line)
+                except json.JSONDecodeError:
+                    utils.logger.error(f"[JsWorker._read_loop] invalid response: {line[:200]}")
+                    continue
+                future = self._pending.pop(response.get("id"), None)
+                if future is None or future.done():
+                    continue
+                if "error" in response:
+                    future.set_exception(JsWorkerError(response["error"]))
+                else:
+                    future.set_result(response.get("result"))
+        finally:
+            # 进程退出，所有未完成的请求都失败，下次调用时重新拉起进程
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(JsWorkerError("node worker exited"))
+            self._pending.clear()
+
+    async def call(self, fn: str, *args: Any, timeout: float = 10) -> Any:
+        """
+        调用 JS 脚本中的函数
+        :param fn: 函数名
+        :param args: 参数，需要可以被 JSON 序列化
+        :param timeout: 超时时间（秒）
+        :return:
+        """
+        if not self.alive:
+            await self.start()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            self._proc.stdin.write((json.dumps({"id": request_id, "fn": fn, "args": list(args)}) + "\n").encode())
+            await self._proc.stdin.drain()
+            return await asyncio.wait_for(future, timeout=timeout)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            raise JsWorkerError(f"node worker pipe closed: {e}")
+        except asyncio.TimeoutError:
+            raise JsWorkerError(f"call {fn} timeout after {timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def close(self):
+        if self._proc is None:
+            return
+        if self.alive:
+            self._proc.stdin.close()
+            try:
+                await asyncio.wait_for(self._proc.wait(), timeout=3)
+            except asyncio.TimeoutError:
+                self._proc.kill()
+                await self._proc.wait()
+        if self._reader_task:
+            await self._reader_task
+        self._proc = None
+        self._reader_task = None
+
+
+class JsWorkerPool:
+    """
+    多个常驻 Node 子进程，每次调用选择排队请求最少的进程
+    """
+
+    def __init__(self, script_path: str, size: int = 2):
+        self.script_path = script_path
+        self._workers: List[JsWorker] = [JsWorker(script_path) for _ in range(max(1, size))]
+
+    async def start(self):
+        """预先拉起所有子进程，不调用时会在第一次被选中时启动"""
+        await asyncio.gather(*[worker.start() for worker in self._workers])
+
+    async def call(self, fn: str, *args: Any, timeout: float = 10) -> Any:
+        worker = min(self._workers, key=lambda w: w.pending)
+        return await worker.call(fn, *args, timeout=timeout)
+
+    async def close(self):
+        for worker in self._workers:
+            await worker.close()
@@ -0,0 +1,137 @@
+# 声明：本代码仅供学习和研究目的使用。使用者应遵守以下原则：
+# 1. 不得用于任何商业用途。
+# 2. 使用时应遵守目标平台的使用条款和robots.txt规则。
+# 3. 不得进行大规模爬取或对平台造成运营干扰。
+# 4. 应合理控制请求频率，避免给目标平台带来不必要的负担。
+# 5. 不得用于任何非法或不当的用途。
+#
+# 详细许可条款请参阅项目根目录下的LICENSE文件。
+# 使用本代码即表示您同意遵守上述原则和LICENSE中的所有条款。
+
+# -*- coding: utf-8 -*-
+# @Desc    : 令牌桶限流，按 (host, 账号, 代理) 维度统一控制请求速率，替代散落在各处的固定 sleep
+
+import asyncio
+import random
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import config
+from metrics.crawler_metrics import SLEEP_SECONDS_TOTAL
+from tools.http_cassette import is_cassette_replay
+
+
+class TokenBucket:
+    """
+    令牌桶：以 rate 个/秒的速度生成令牌，最多积攒 burst 个，每次请求消耗一个令牌
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if rate <= 0:
+            raise ValueError(f"[TokenBucket] rate must be positive, got {rate}")
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self._tokens = float(self.capacity)
+        self._last_refill = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+
+    async def acquire(self) -> float:
+        """
+        获取一个令牌，令牌不足时等待
+        :return: 本次等待的秒数
+        """
+        async with self._lock:
+            self._refill()
+            wait_seconds = 0.0
+            if self._tokens < 1:
+                wait_seconds = (1 - self._tokens) / self.rate
+                await asyncio.sleep(wait_seconds)
+                self._refill()
+            self._tokens -= 1
+            return wait_seconds
+
+
+class RateLimiter:
+    """
+    限流服务，每个 (host, 账号, 代理) 对应一个独立的令牌桶
+    """
+
+    def __init__(self, rate: float, burst: int = 1, jitter: float = 0.0, host_rates: Optional[Dict[str, float]] = None):
+        """
+        :param rate: 默认每秒请求数
+        :param burst: 允许的突发请求数
+        :param jitter: 每次请求额外增加 0~jitter 秒的随机延迟，避免请求间隔过于规律
+        :param host_rates: 按 host 单独配置的每秒请求数
+        """
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        self.host_rates = host_rates or {}
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    def get_bucket(self, host: str, account: str = "", proxy: Optional[str] = None) -> TokenBucket:
+        key = (host, account or "", proxy or "")
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = TokenBucket(rate=self.host_rates.get(host, self.rate), burst=self.burst)
+            self._buckets[key] = bucket
+        return bucket
+
+    async def acquire(self, url: str, account: str = "", proxy: Optional[str] = None) -> float:
+        """
+        请求发出前调用，按 url 的 host 限流
+        :param url: 请求地址
+        :param account: 账号标识
+        :param proxy: 代理地址
+        :return: 本次等待的秒数
+        """
+        host = urlparse(url).netloc
+        wait_seconds = await self.get_bucket(host, account, proxy).acquire()
+        if self.jitter > 0:
+            jitter_seconds = random.uniform(0, self.jitter)
+            await asyncio.sleep(jitter_seconds)
+            wait_seconds += jitter_seconds
+        if wait_seconds > 0:
+            SLEEP_SECONDS_TOTAL.inc(wait_seconds, kind="rate_limiter")
+        return wait_seconds
+
+
+_rate_limiter: Optional[RateLimiter] = None
+
+
+def get_rate_limiter() -> Optional[RateLimiter]:
+    """
+    获取全局共享的限流服务，未开启限流时返回 None
+    :return:
+    """
+    global _rate_limiter
+    if not config.ENABLE_RATE_LIMITER or is_cassette_replay():
+        # 回放模式下请求不会发到平台，不需要限流
+        return None
+    if _rate_limiter is None:
+        _rate_limiter = RateLimiter(
+            rate=config.RATE_LIMITER_RATE,
+            burst=config.RATE_LIMITER_BURST,
+            jitter=config.RATE_LIMITER_JITTER,
+            host_rates=config.RATE_LIMITER_HOST_RATES,
+        )
+    return _rate_limiter
+
+
+async def throttle_sleep(seconds: float):
+    """
+    翻页/请求之间的等待。开启限流后请求速率已经由令牌桶控制，这里不再额外等待；
+    未开启限流时保持原来的固定间隔 sleep；回放模式下不等待
+    :param seconds: 未开启限流时的等待秒数
+    :return:
+    """
+    if config.ENABLE_RATE_LIMITER or is_cassette_replay():
+        return
+    SLEEP_SECONDS_TOTAL.inc(seconds, kind="throttle")
+    await asyncio.sleep(seconds)